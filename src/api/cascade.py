@@ -0,0 +1,75 @@
+# src/api/cascade.py
+import threading
+from collections import Counter, deque
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+
+class CascadeStats:
+    """
+    Estadísticas por nivel de la cascada de modelos: intentos, respuestas aceptadas,
+    escaladas al siguiente nivel, latencias y motivos de escalado. Sirven para
+    ajustar los umbrales de utils/response_validation.py.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self.analyses = 0
+        self.tiers = {}
+        self._lock = threading.Lock()
+
+    def _tier(self, model):
+        if model not in self.tiers:
+            self.tiers[model] = {"attempts": 0, "accepted": 0, "escalated": 0, "errors": 0,
+                                 "latencies": deque(maxlen=self.window), "issues": Counter()}
+        return self.tiers[model]
+
+    def record_attempt(self, model: str, latency: float, accepted: bool, issues=(), error: str = None):
+        with self._lock:
+            tier = self._tier(model)
+            tier["attempts"] += 1
+            tier["latencies"].append(latency)
+            if error:
+                tier["errors"] += 1
+                tier["issues"][f"error:{error}"] += 1
+            if accepted:
+                tier["accepted"] += 1
+            else:
+                tier["escalated"] += 1
+                tier["issues"].update(issues)
+
+    def record_analysis(self):
+        with self._lock:
+            self.analyses += 1
+
+    def summary(self) -> dict:
+        """{modelo: {'attempts', 'accepted', 'hit_rate', 'escalated', 'errors', 'latency_p50', 'latency_p95', 'top_issues'}}"""
+        result = {}
+        with self._lock:
+            for model, tier in self.tiers.items():
+                ordered = sorted(tier["latencies"])
+                result[model] = {
+                    "attempts": tier["attempts"],
+                    "accepted": tier["accepted"],
+                    "hit_rate": tier["accepted"] / tier["attempts"] if tier["attempts"] else None,
+                    "escalated": tier["escalated"],
+                    "errors": tier["errors"],
+                    "latency_p50": _quantile(ordered, 0.5),
+                    "latency_p95": _quantile(ordered, 0.95),
+                    "top_issues": tier["issues"].most_common(5),
+                }
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.analyses = 0
+            self.tiers.clear()
+
+
+_cascade_stats = CascadeStats()
+
+
+def get_cascade_stats() -> CascadeStats:
+    return _cascade_stats
@@ -0,0 +1,163 @@
+# src/api/fake_server.py
+"""
+Servidor HTTP local que imita el endpoint chat.completions de OpenAI.
+
+Permite ejecutar todo el bucle de navegación sin red ni clave real:
+
+    python -m api.fake_server --port 8765          (desde src/)
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake streamlit run interfaces/streamlit_app.py
+
+Las respuestas de visión siguen la estructura de navigation_prompt y son
+deterministas: la misma imagen produce siempre el mismo nodo.
+"""
+import json
+import time
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PLACES = ["Pasillo", "Cocina", "Salon", "Dormitorio", "Entrada", "Oficina", "Bano", "Escalera"]
+
+
+def _request_images(messages):
+    urls = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    urls.append(part.get("image_url", {}).get("url", ""))
+    return urls
+
+
+def fake_navigation_response(messages) -> str:
+    """Respuesta JSON determinista con la estructura de navigation_prompt."""
+    images = _request_images(messages)
+    digest = hashlib.sha256("".join(images).encode("utf-8")).hexdigest()
+    place = _PLACES[int(digest[:8], 16) % len(_PLACES)]
+    node_name = f"{place}_{digest[:4]}"
+    return json.dumps({
+        "overall_scene_description": f"Vista simulada de {place.lower()} ({len(images)} imagen(es)).",
+        "landmarks_and_suggested_node_name": {
+            "suggested_node_name": node_name,
+            "suggested_node_name_detailed": f"{place} con marca {digest[4:10]}",
+        },
+        "identified_objects": [
+            {"name": "puerta", "characteristics": "marco blanco"},
+            {"name": place.lower(), "characteristics": "zona principal"},
+        ],
+        "potential_navigation_paths": [
+            {"description": "Paso libre hacia delante", "direction": "forward", "features": "clear"},
+        ],
+        "obstacles": [
+            {"type": "wall", "size": "large", "location": "left"},
+        ],
+        "robot_perspective_and_potential_actions": ["avanzar 1 metro", "girar a la derecha"],
+        "navigation_graph_elements": [],
+        "reasoning": "Respuesta generada por el servidor local de pruebas.",
+        "obstacle_avoidance_strategy": "",
+        "process_step": "initial_scan",
+    }, ensure_ascii=False)
+
+
+def fake_text_response(messages) -> str:
+    return "## Plan de Navegación (simulado)\n1. **Avanzar** siguiendo la ruta calculada.\n"
+
+
+class FakeChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Atiende POST /v1/chat/completions (normal y stream=True con SSE)."""
+
+    latency = 0.0
+    chunk_size = 24
+
+    def log_message(self, format, *args):
+        pass  # Silencioso: se usa en benchmarks
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404, "Only /v1/chat/completions is implemented")
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.get("messages", [])
+        if _request_images(messages):
+            text = fake_navigation_response(messages)
+        else:
+            text = fake_text_response(messages)
+        if self.latency:
+            time.sleep(self.latency)
+
+        completion_id = "chatcmpl-fake-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        created = int(time.time())
+        model = request.get("model", "gpt-4o")
+        usage = {"prompt_tokens": 100 * len(messages), "completion_tokens": len(text) // 4,
+                 "total_tokens": 100 * len(messages) + len(text) // 4}
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i in range(0, len(text), self.chunk_size):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": text[i:i + self.chunk_size]}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                usage_chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                               "model": model, "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(usage_chunk)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+
+        body = json.dumps({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+    """Crea el servidor (port=0 elige un puerto libre). Devuelve el ThreadingHTTPServer."""
+    handler = type("Handler", (FakeChatCompletionsHandler,), {"latency": latency})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+@contextmanager
+def run_fake_server(latency: float = 0.0):
+    """
+    Arranca el servidor en un hilo y devuelve su base_url (para OpenAI(base_url=...)
+    o la variable OPENAI_BASE_URL). Se detiene al salir del bloque with.
+    """
+    server = make_server(latency=latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Servidor local compatible con chat.completions")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por petición (s)")
+    args = arg_parser.parse_args()
+    fake_server = make_server(args.host, args.port, args.latency)
+    print(f"Servidor falso escuchando en http://{args.host}:{args.port}/v1")
+    fake_server.serve_forever()
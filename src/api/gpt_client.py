@@ -1,19 +1,294 @@
 # src/api/gpt_client.py
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import time
+import threading
 import base64 # Asegúrate de importar base64 si no estaba ya
+from contextlib import contextmanager
+from api.response_cache import get_response_cache, make_request_key, image_digest
+from api.transport import get_transport, LiveTransport
+from api.resilience import (
+    ResiliencePolicy, CircuitBreaker, LatencyTracker, LLMError, LLMBadRequestError,
+    call_with_resilience, acall_with_resilience, classify_exception
+)
+from api.single_flight import SingleFlight
+from api.telemetry import get_telemetry, new_call_record
+from utils.streaming_json import IncrementalJSONParser
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Arranque perezoso: .env, Pillow (preprocesado), asyncio (lotes) y el cliente de OpenAI
+# (api/transport.py) se cargan en la primera llamada que los necesita, no al importar.
+# Así la app y las herramientas sin cabeza arrancan rápido y sin exigir OPENAI_API_KEY.
+_env_loaded = False
 
-if OPENAI_API_KEY is None:
-    raise EnvironmentError("La clave de API de OpenAI no se encontró en el archivo .env")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+def _ensure_environment():
+    """Carga .env una sola vez, antes de leer la configuración de caché y transporte."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def _preprocess_image_inputs(image_inputs):
+    from utils.image_processing import preprocess_image_inputs
+    return preprocess_image_inputs(image_inputs)
+
+# Parámetros de muestreo; forman parte de la clave de caché de cada respuesta
+VISION_MODEL = "gpt-4o"
+VISION_PARAMS = {"max_tokens": 2000, "temperature": 0.5, "response_format": "json_object"}
+TEXT_PARAMS = {"max_tokens": 1000, "temperature": 0.5}
+# Cascada de modelos: se prueba cada nivel en orden y se escala al siguiente si la respuesta
+# no pasa el esquema de navigation_prompt o la heurística de confianza (utils/response_validation.py)
+CASCADE_TIERS = (
+    {"model": "gpt-4o-mini", "params": dict(VISION_PARAMS, max_tokens=1500)},
+    {"model": VISION_MODEL, "params": VISION_PARAMS},
+)
+# Campos que el operador necesita primero; se mide el tiempo hasta que llega el primero
+USEFUL_FIELDS = ("overall_scene_description", "landmarks_and_suggested_node_name")
+
+# Política de resiliencia compartida; un cortocircuito y una ventana de latencias por tipo de llamada
+_policy = ResiliencePolicy()
+_breakers = {}
+_latencies = {}
+# Llamadas idénticas simultáneas (reruns, doble clic) comparten una sola petición; clave = clave de caché
+_flights = SingleFlight()
+
+
+def set_resilience_policy(policy: ResiliencePolicy):
+    """Sustituye la política de reintentos/plazos/hedging y reinicia los cortocircuitos."""
+    global _policy
+    _policy = policy
+    _breakers.clear()
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    return _policy
+
+
+def get_circuit_breaker(kind: str) -> CircuitBreaker:
+    """Cortocircuito de un tipo de llamada ('vision' o 'text')."""
+    if kind not in _breakers:
+        _breakers[kind] = CircuitBreaker(_policy.breaker_failure_threshold, _policy.breaker_reset_timeout)
+    return _breakers[kind]
+
+
+def get_single_flight() -> SingleFlight:
+    """Agrupador de llamadas idénticas en curso (ver stats() para las llamadas agrupadas)."""
+    return _flights
+
+
+def _latency_tracker(kind: str) -> LatencyTracker:
+    if kind not in _latencies:
+        _latencies[kind] = LatencyTracker()
+    return _latencies[kind]
+
+
+def _call_llm(kind: str, request: dict, track_latency: bool = True):
+    """Llama al transporte aplicando la política de resiliencia. Lanza LLMError."""
+    transport = get_transport()
+    return call_with_resilience(
+        lambda timeout: transport.chat_completion(timeout=timeout, **request),
+        _policy, get_circuit_breaker(kind), _latency_tracker(kind) if track_latency else None
+    )
+
+
+def _payload_bytes(messages: list) -> int:
+    """Tamaño codificado aproximado de los mensajes: texto en UTF-8 más la URL/base64 de cada imagen."""
+    total = 0
+    for message in messages:
+        content = message["content"]
+        parts = [{"type": "text", "text": content}] if isinstance(content, str) else content
+        for part in parts:
+            if part["type"] == "text":
+                total += len(part["text"].encode("utf-8"))
+            else:
+                total += len(part["image_url"]["url"])
+    return total
+
+
+def _cache_status(cache, use_cache: bool, hit: bool) -> str:
+    if not cache.enabled:
+        return "disabled"
+    if not use_cache:
+        return "bypass"
+    return "hit" if hit else "miss"
+
+
+def _record_usage(call_record: dict, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        call_record["prompt_tokens"] = getattr(usage, "prompt_tokens", None)
+        call_record["completion_tokens"] = getattr(usage, "completion_tokens", None)
+
+
+@contextmanager
+def _telemetry_call(kind: str, model: str, messages: list = (), images: int = 0, streamed: bool = False):
+    """
+    Mide una llamada y la entrega a get_telemetry() al salir, falle o no. El bloque
+    rellena 'cache', 'coalesced', tokens y 'ttft'; una respuesta de caché o compartida
+    con otra llamada en curso no cuenta bytes enviados.
+    """
+    call_record = new_call_record(kind, model, images, _payload_bytes(messages), streamed)
+    started = time.perf_counter()
+    try:
+        yield call_record
+    except Exception as e:
+        call_record["error"] = classify_exception(e).kind
+        raise
+    finally:
+        call_record["latency"] = time.perf_counter() - started
+        if call_record["cache"] == "hit" or call_record["coalesced"]:
+            call_record["payload_bytes"] = 0
+        get_telemetry().record(call_record)
+
+
+# Informe de preprocesado de la última llamada de visión (por hilo: una sesión de Streamlit por hilo)
+_call_state = threading.local()
+
+
+def get_last_preprocess_report() -> dict:
+    """Devuelve el informe (bytes y tokens ahorrados) de la última llamada de visión de este hilo."""
+    return getattr(_call_state, "preprocess_report", None)
+
+
+def get_last_cascade_report() -> dict:
+    """
+    Informe de la última llamada de visión en modo cascada de este hilo:
+    {'model': modelo que respondió, 'tiers': [{'model', 'latency', 'accepted', 'issues', 'error'}]}.
+    """
+    return getattr(_call_state, "cascade_report", None)
+
+def build_vision_content(image_inputs: list, prompt: str):
+    """
+    Construye el contenido multimodal (texto + imágenes) de una petición de visión.
+
+    Args:
+        image_inputs: Lista de diccionarios {'position': str, 'source': str} y,
+                      opcionalmente, 'detail' ('low', 'high' o 'auto').
+        prompt: La pregunta o instrucción principal para el modelo.
+
+    Returns:
+        Tupla (content, image_keys): la lista de partes del mensaje y, para la caché,
+        las tuplas (position, detail, digest) de cada imagen válida en el orden enviado.
+    """
+    # Start with the main text prompt
+    content = [{"type": "text", "text": prompt}]
+    image_keys = [] # (position, detail, digest) of each image actually sent, for the cache key
+
+    # Add image inputs to the content list
+    for img_input in image_inputs:
+        position = img_input.get('position', 'image') # Default position label
+        image_source = img_input.get('source')
+
+        if not image_source:
+            continue # Skip if source is missing
+
+        # Add the image data itself
+        if image_source.startswith("blob:"):
+            # Reference into mapping/blob_store.py: the pixels are read only now
+            from mapping.blob_store import resolve_image_source
+            image_url = resolve_image_source(image_source)
+            if image_url is None:
+                print(f"Warning: Skipping missing image blob for position {position}.")
+                continue
+        elif image_source.startswith("http") or image_source.startswith("data:"):
+            image_url = image_source
+        else:
+            # If it's a raw base64 string without the prefix, add it (less robust)
+            # Consider enforcing the "data:" prefix in the calling code
+            try:
+                # Basic check if it looks like base64
+                base64.b64decode(image_source)
+                image_url = f"data:image/jpeg;base64,{image_source}" # Assume JPEG, adjust if needed
+            except Exception:
+                print(f"Warning: Skipping invalid image source format for position {position}.")
+                continue # Skip this invalid source
+
+        # Add descriptive text before each image (optional but helpful)
+        content.append({"type": "text", "text": f"Image from the {position} view:"})
+        content.append({
+            "type": "image_url",
+            "image_url": {"url": image_url, "detail": img_input.get('detail', 'auto')}
+        })
+        image_keys.append((position, img_input.get('detail', 'auto'), image_digest(image_source)))
+
+    return content, image_keys
+
+
+def _vision_completion(content: list, image_keys: list, prompt: str, model: str = VISION_MODEL,
+                       params: dict = VISION_PARAMS, use_cache: bool = True) -> str:
+    """Una petición de visión a ``model`` con caché, telemetría y agrupación de llamadas idénticas."""
+    cache = get_response_cache()
+    cache_key = make_request_key("vision", model, prompt, params, image_keys)
+    # Cada modelo de la cascada tiene su propio cortocircuito: un modelo barato degradado no bloquea al fuerte
+    breaker_kind = "vision" if model == VISION_MODEL else f"vision:{model}"
+    messages = [
+        {
+            "role": "user",
+            "content": content,
+        }
+    ]
+    with _telemetry_call("vision", model, messages, len(image_keys)) as call_record:
+        cached = cache.get(cache_key) if use_cache else None
+        call_record["cache"] = _cache_status(cache, use_cache, cached is not None)
+        if cached is not None:
+            return cached
+
+        def call_upstream():
+            response = _call_llm(breaker_kind, dict(
+                model=model,  # Make sure model supports vision and multiple images
+                messages=messages,
+                max_tokens=params["max_tokens"],  # Increased slightly for potentially more complex analysis
+                # Ensure response_format is compatible if expecting JSON structure
+                # If the prompt guides towards JSON, keep it. Otherwise, remove/adjust.
+                response_format={"type": params["response_format"]},
+                temperature=params["temperature"],
+            ))
+            _record_usage(call_record, response)
+            response_text = response.choices[0].message.content
+            if response_text:
+                cache.put(cache_key, response_text, {"model": model, "images": len(image_keys)})
+            return response_text
+
+        response_text, call_record["coalesced"] = _flights.do(cache_key, call_upstream, _policy.deadline)
+    return response_text
+
+
+def _cascade_completion(content: list, image_keys: list, prompt: str, use_cache: bool = True,
+                        tiers=None, thresholds: dict = None) -> str:
+    """Recorre CASCADE_TIERS hasta obtener una respuesta válida y fiable (el último nivel siempre se acepta)."""
+    from api.cascade import get_cascade_stats
+    from utils.response_validation import validate_navigation_response
+
+    tiers = tiers or CASCADE_TIERS
+    stats = get_cascade_stats()
+    stats.record_analysis()
+    report = {"model": None, "tiers": []}
+    _call_state.cascade_report = report
+    for position, tier in enumerate(tiers):
+        is_last = position == len(tiers) - 1
+        started = time.perf_counter()
+        attempt = {"model": tier["model"], "latency": None, "accepted": False, "issues": [], "error": None}
+        report["tiers"].append(attempt)
+        try:
+            response_text = _vision_completion(content, image_keys, prompt, tier["model"], tier["params"], use_cache)
+        except LLMError as e:
+            attempt.update(latency=time.perf_counter() - started, error=e.kind)
+            stats.record_attempt(tier["model"], attempt["latency"], False, error=e.kind)
+            if is_last:
+                raise
+            continue
+        validation = validate_navigation_response(response_text, thresholds)
+        attempt.update(latency=time.perf_counter() - started, issues=validation["issues"],
+                       accepted=validation["confident"] or is_last)
+        stats.record_attempt(tier["model"], attempt["latency"], attempt["accepted"], validation["issues"])
+        if attempt["accepted"]:
+            report["model"] = tier["model"]
+            return response_text
+
 
 # MODIFIED FUNCTION DEFINITION
-def analyze_image_with_gpt(image_inputs: list, prompt: str = "Analyze the provided image(s).") -> str:
+def analyze_image_with_gpt(image_inputs: list, prompt: str = "Analyze the provided image(s).", use_cache: bool = True,
+                           preprocess: bool = True, cascade: bool = False) -> str:
     """
     Analiza una o varias imágenes utilizando el modelo de visión de OpenAI.
 
@@ -21,101 +296,321 @@ def analyze_image_with_gpt(image_inputs: list, prompt: str = "Analyze the provid
         image_inputs: Una lista de diccionarios. Cada diccionario debe tener:
                       {'position': str, 'source': str}
                       donde 'position' es una descripción (ej: 'center', 'left', 'right')
-                      y 'source' es la URL o cadena base64 de la imagen (con prefijo data:).
+                      y 'source' es la URL o cadena base64 de la imagen (con prefijo data:)
+                      o una referencia 'blob:' de mapping/blob_store.py.
         prompt: La pregunta o instrucción principal para el modelo.
+        use_cache: Si es False se ignora la caché al leer (la respuesta nueva sí se guarda).
+        preprocess: Si es True las imágenes se reducen y recodifican antes de enviarse y se
+                    elige el detalle 'low'/'high' por imagen (ver get_last_preprocess_report).
+        cascade: Si es True se prueba primero un modelo más barato (CASCADE_TIERS) y solo se
+                 escala a VISION_MODEL si la respuesta no cumple el esquema de navigation_prompt
+                 o la heurística de confianza (ver get_last_cascade_report y api/cascade.py).
 
     Returns:
         El texto de la respuesta del modelo.
+
+    Raises:
+        LLMError: Error estructurado (ver api/resilience.py) si no hay imágenes válidas o
+                  la llamada falla tras aplicar reintentos, plazos y cortocircuito.
     """
+    _ensure_environment()
+    _call_state.preprocess_report = None
+    _call_state.cascade_report = None
+    if preprocess:
+        image_inputs, _call_state.preprocess_report = _preprocess_image_inputs(image_inputs)
+    content, image_keys = build_vision_content(image_inputs, prompt)
+
+    if not image_keys: # Only the initial prompt, no valid images added
+        raise LLMBadRequestError("No valid images provided for analysis.")
+
+    if cascade:
+        return _cascade_completion(content, image_keys, prompt, use_cache)
+    return _vision_completion(content, image_keys, prompt, use_cache=use_cache)
+
+
+def stream_image_analysis(image_inputs: list, prompt: str = "Analyze the provided image(s).", use_cache: bool = True,
+                          preprocess: bool = True):
+    """
+    Variante en streaming de analyze_image_with_gpt.
+
+    Es un generador de eventos (diccionarios) pensado para que la interfaz pinte los
+    primeros campos del JSON de navigation_prompt antes de que termine la respuesta:
+
+        {'type': 'partial', 'key': str, 'text': str}   string de primer nivel a medio llegar
+        {'type': 'field', 'key': str, 'value': ...}    campo de primer nivel completo
+        {'type': 'done', 'text': str, 'cached': bool, 'coalesced': bool,
+         'time_to_first_field': float|None, 'field_times': {clave: segundos}}
+        {'type': 'error', 'text': str, 'error': LLMError}
+
+    'time_to_first_field' es el tiempo hasta el primer campo de USEFUL_FIELDS. Los
+    reintentos solo se aplican antes de recibir el primer fragmento.
+    """
+    _ensure_environment()
+    started = time.perf_counter()
+    _call_state.preprocess_report = None
     try:
-        # Start with the main text prompt
-        content = [{"type": "text", "text": prompt}]
-
-        # Add image inputs to the content list
-        for img_input in image_inputs:
-            position = img_input.get('position', 'image') # Default position label
-            image_source = img_input.get('source')
-
-            if not image_source:
-                continue # Skip if source is missing
-
-            # Add descriptive text before each image (optional but helpful)
-            content.append({"type": "text", "text": f"Image from the {position} view:"})
-
-            # Add the image data itself
-            if image_source.startswith("http") or image_source.startswith("data:"):
-                 content.append({
-                     "type": "image_url",
-                     "image_url": {"url": image_source, "detail": "auto"} # Use "auto" or "high" based on need
-                 })
-            else:
-                # If it's a raw base64 string without the prefix, add it (less robust)
-                # Consider enforcing the "data:" prefix in the calling code
-                try:
-                    # Basic check if it looks like base64
-                    base64.b64decode(image_source)
-                    data_url = f"data:image/jpeg;base64,{image_source}" # Assume JPEG, adjust if needed
-                    content.append({
-                        "type": "image_url",
-                        "image_url": {"url": data_url, "detail": "auto"}
-                    })
-                except Exception:
-                     print(f"Warning: Skipping invalid image source format for position {position}.")
-                     continue # Skip this invalid source
-
-
-        if len(content) == 1: # Only the initial prompt, no valid images added
-             return "Error: No valid images provided for analysis."
-
-        response = client.chat.completions.create(
-            model="gpt-4o",  # Make sure model supports vision and multiple images
-            messages=[
-                {
-                    "role": "user",
-                    "content": content,
-                }
-            ],
-            max_tokens=2000,  # Increased slightly for potentially more complex analysis
-            # Ensure response_format is compatible if expecting JSON structure
-            # If the prompt guides towards JSON, keep it. Otherwise, remove/adjust.
-            response_format={"type": "json_object"},
-            temperature=0.5,
-        )
-        return response.choices[0].message.content
+        if preprocess:
+            image_inputs, _call_state.preprocess_report = _preprocess_image_inputs(image_inputs)
+        content, image_keys = build_vision_content(image_inputs, prompt)
+        if not image_keys:
+            raise LLMBadRequestError("No valid images provided for analysis.")
+
+        cache = get_response_cache()
+        cache_key = make_request_key("vision", VISION_MODEL, prompt, VISION_PARAMS, image_keys)
+        messages = [{"role": "user", "content": content}]
+        parser = IncrementalJSONParser()
+        parts = []
+        field_times = {}
+        with _telemetry_call("vision", VISION_MODEL, messages, len(image_keys), streamed=True) as call_record:
+            cached = cache.get(cache_key) if use_cache else None
+            call_record["cache"] = _cache_status(cache, use_cache, cached is not None)
+            flight = None
+            if cached is None:
+                # Una llamada idéntica ya en curso: se espera a su texto completo y se reproduce
+                while True:
+                    flight, leader = _flights.acquire(cache_key)
+                    if leader:
+                        break
+                    shared = _flights.wait(flight, _policy.deadline)
+                    if not flight.abandoned:
+                        call_record["coalesced"] = True
+                        break
+            is_cached = cached is not None
+            replayed = [cached] if is_cached else [shared] if call_record["coalesced"] else None
+
+            try:
+                if replayed is None:
+                    chunks = _call_llm("vision", dict(
+                        model=VISION_MODEL,
+                        messages=messages,
+                        max_tokens=VISION_PARAMS["max_tokens"],
+                        response_format={"type": VISION_PARAMS["response_format"]},
+                        temperature=VISION_PARAMS["temperature"],
+                        stream=True,
+                        stream_options={"include_usage": True},  # El último fragmento trae el uso de tokens
+                    ), track_latency=False)
+                else:
+                    chunks = replayed
+                for chunk in chunks:
+                    if replayed is not None:
+                        delta = chunk
+                    else:
+                        _record_usage(call_record, chunk)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if call_record["ttft"] is None and replayed is None:
+                        call_record["ttft"] = time.perf_counter() - started
+                    parts.append(delta)
+                    for key, value in parser.feed(delta):
+                        field_times[key] = time.perf_counter() - started
+                        yield {"type": "field", "key": key, "value": value}
+                    partial = parser.partial_string()
+                    if partial:
+                        yield {"type": "partial", "key": partial[0], "text": partial[1]}
+            except Exception as e:
+                if replayed is None:
+                    _flights.resolve(cache_key, flight, error=classify_exception(e))
+                raise
+            except BaseException:
+                if replayed is None:
+                    _flights.resolve(cache_key, flight, abandoned=True)
+                raise
+
+        response_text = "".join(parts)
+        if replayed is None:
+            if response_text:
+                cache.put(cache_key, response_text, {"model": VISION_MODEL, "images": len(image_keys)})
+            _flights.resolve(cache_key, flight, result=response_text)
+        useful_times = [field_times[key] for key in USEFUL_FIELDS if key in field_times]
+        yield {
+            "type": "done",
+            "text": response_text,
+            "cached": is_cached,
+            "coalesced": call_record["coalesced"],
+            "time_to_first_field": min(useful_times) if useful_times else None,
+            "field_times": field_times,
+        }
     except Exception as e:
-        # Provide more context in the error if possible
-        return f"Error during API call: {e}. Check image formats and API key."
+        error = classify_exception(e)
+        yield {"type": "error", "text": f"Error during API call ({error.kind}): {error}", "error": error}
 
 
-def generate_text_with_gpt(prompt: str, model: str = "gpt-4o") -> str:
+def generate_text_with_gpt(prompt: str, model: str = "gpt-4o", use_cache: bool = True) -> str:
     """
     Genera texto usando un modelo de OpenAI (sin análisis de imagen).
 
     Args:
         prompt: El prompt para el modelo.
         model: El modelo de OpenAI a utilizar (ej: "gpt-4o", "gpt-3.5-turbo").
+        use_cache: Si es False se ignora la caché al leer (la respuesta nueva sí se guarda).
 
     Returns:
         El texto de la respuesta del modelo.
+
+    Raises:
+        LLMError: Error estructurado si la llamada falla tras reintentos y plazos.
+    """
+    _ensure_environment()
+    cache = get_response_cache()
+    cache_key = make_request_key("text", model, prompt, TEXT_PARAMS)
+    messages = [
+        # Puedes añadir un mensaje de sistema si quieres definir mejor el rol del AI
+        # {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+    with _telemetry_call("text", model, messages) as call_record:
+        cached = cache.get(cache_key) if use_cache else None
+        call_record["cache"] = _cache_status(cache, use_cache, cached is not None)
+        if cached is not None:
+            return cached
+
+        def call_upstream():
+            response = _call_llm("text", dict(
+                model=model,
+                messages=messages,
+                max_tokens=TEXT_PARAMS["max_tokens"], # Ajusta según necesites para el plan
+                temperature=TEXT_PARAMS["temperature"], # Temperatura moderada para planes creativos pero consistentes
+                # response_format={"type": "text"}, # Opcional, si no necesitas JSON
+            ))
+            _record_usage(call_record, response)
+            response_text = response.choices[0].message.content
+            if response_text:
+                cache.put(cache_key, response_text, {"model": model})
+            return response_text
+
+        response_text, call_record["coalesced"] = _flights.do(cache_key, call_upstream, _policy.deadline)
+    return response_text
+
+
+async def analyze_images_batch(jobs: list, prompt: str = "Analyze the provided image(s).",
+                               max_concurrency: int = 4, requests_per_minute: float = None,
+                               tokens_per_minute: float = None, use_cache: bool = True,
+                               preprocess: bool = True, base_url: str = None, async_client=None):
+    """
+    Analiza muchas vistas en paralelo con concurrencia acotada y presupuesto por minuto.
+
+    Es un generador asíncrono: produce cada resultado en cuanto termina (orden de
+    finalización, no de entrada). Las respuestas cacheadas se devuelven sin consumir
+    presupuesto ni huecos de concurrencia.
+
+    Args:
+        jobs: Lista de trabajos. Cada trabajo es una lista ``image_inputs`` (igual que en
+              analyze_image_with_gpt) o un dict {'image_inputs': [...], 'prompt': str}.
+        prompt: Prompt por defecto para los trabajos que no traen el suyo.
+        max_concurrency: Número máximo de peticiones simultáneas.
+        requests_per_minute: Límite de peticiones por minuto (None = sin límite).
+        tokens_per_minute: Límite de tokens por minuto (None = sin límite).
+        use_cache: Si es False se ignora la caché al leer.
+        preprocess: Reduce y recodifica las imágenes antes de enviarlas (en un hilo aparte).
+        base_url: Endpoint alternativo compatible con OpenAI (p.ej. api/fake_server.py); por
+                  defecto se usa el transporte del proceso (live, record o replay).
+        async_client: Cliente AsyncOpenAI ya construido (tiene prioridad sobre base_url).
+
+    Yields:
+        Diccionarios {'index', 'response', 'error', 'cached', 'coalesced', 'latency', 'preprocess'}
+        donde 'index' es la posición del trabajo en ``jobs``, 'error' un LLMError (o None),
+        'coalesced' indica que reutilizó la llamada de un trabajo idéntico y 'preprocess'
+        el informe de bytes/tokens ahorrados. Cada trabajo aplica la
+        política de resiliencia (reintentos, plazos, hedging y cortocircuito).
     """
+    import asyncio
+    from api.rate_limiter import RateBudget, estimate_request_tokens
+
+    _ensure_environment()
+    if async_client is not None:
+        create_completion = async_client.chat.completions.create
+    elif base_url is not None:
+        create_completion = LiveTransport(base_url=base_url).achat_completion
+    else:
+        create_completion = get_transport().achat_completion
+    cache = get_response_cache()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    budget = RateBudget(requests_per_minute, tokens_per_minute)
+
+    async def run_job(index, job):
+        if isinstance(job, dict):
+            job_inputs, job_prompt = job.get('image_inputs', []), job.get('prompt', prompt)
+        else:
+            job_inputs, job_prompt = job, prompt
+        result = {"index": index, "response": None, "error": None, "cached": False, "coalesced": False,
+                  "latency": 0.0, "preprocess": None}
+        started = time.perf_counter()
+        try:
+            if preprocess:
+                job_inputs, result["preprocess"] = await asyncio.to_thread(_preprocess_image_inputs, job_inputs)
+            content, image_keys = build_vision_content(job_inputs, job_prompt)
+            if not image_keys:
+                result["error"] = LLMBadRequestError("No valid images provided for analysis.")
+                return result
+            cache_key = make_request_key("vision", VISION_MODEL, job_prompt, VISION_PARAMS, image_keys)
+            messages = [{"role": "user", "content": content}]
+            cached = cache.get(cache_key) if use_cache else None
+            if cached is not None:
+                with _telemetry_call("vision", VISION_MODEL, messages, len(image_keys)) as call_record:
+                    call_record["cache"] = "hit"
+                result.update(response=cached, cached=True)
+                return result
+
+            async def call_upstream():
+                nonlocal started
+                estimated = estimate_request_tokens(job_prompt, len(image_keys), VISION_PARAMS["max_tokens"])
+                async with semaphore:
+                    await budget.acquire(estimated)
+                    started = time.perf_counter()
+                    request = dict(
+                        model=VISION_MODEL,
+                        messages=messages,
+                        max_tokens=VISION_PARAMS["max_tokens"],
+                        response_format={"type": VISION_PARAMS["response_format"]},
+                        temperature=VISION_PARAMS["temperature"],
+                    )
+                    response = await acall_with_resilience(
+                        lambda timeout: create_completion(timeout=timeout, **request),
+                        _policy, get_circuit_breaker("vision"), _latency_tracker("vision")
+                    )
+                _record_usage(call_record, response)
+                usage = getattr(response, "usage", None)
+                if usage is not None and getattr(usage, "total_tokens", None):
+                    budget.refund(estimated - usage.total_tokens)
+                response_text = response.choices[0].message.content
+                if response_text:
+                    cache.put(cache_key, response_text, {"model": VISION_MODEL, "images": len(image_keys)})
+                return response_text
+
+            # Trabajos idénticos del lote esperan a la misma llamada sin gastar hueco ni presupuesto.
+            # En lotes la latencia de telemetría incluye la espera por hueco y presupuesto.
+            with _telemetry_call("vision", VISION_MODEL, messages, len(image_keys)) as call_record:
+                call_record["cache"] = _cache_status(cache, use_cache, False)
+                result["response"], result["coalesced"] = await _flights.ado(cache_key, call_upstream)
+                call_record["coalesced"] = result["coalesced"]
+        except Exception as e:
+            result["error"] = classify_exception(e)
+        finally:
+            result["latency"] = time.perf_counter() - started
+        return result
+
+    tasks = [asyncio.ensure_future(run_job(i, job)) for i, job in enumerate(jobs)]
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                # Puedes añadir un mensaje de sistema si quieres definir mejor el rol del AI
-                # {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000, # Ajusta según necesites para el plan
-            temperature=0.5, # Temperatura moderada para planes creativos pero consistentes
-            # response_format={"type": "text"}, # Opcional, si no necesitas JSON
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error en la llamada a la API de texto de OpenAI: {e}")
-        # Considera lanzar la excepción o devolver un mensaje de error específico
-        # raise e # Opcional: relanzar para que el llamador lo maneje
-        return f"Error al generar texto: {e}"
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def analyze_images_batch_sync(jobs: list, **kwargs) -> list:
+    """
+    Variante bloqueante de analyze_images_batch para scripts y herramientas sin bucle
+    asyncio. Devuelve los resultados ordenados por índice de trabajo.
+    """
+    import asyncio
+
+    async def collect():
+        return [result async for result in analyze_images_batch(jobs, **kwargs)]
+    return sorted(asyncio.run(collect()), key=lambda r: r["index"])
 
 
 # Example usage (for testing within this file)
@@ -0,0 +1,78 @@
+# src/api/rate_limiter.py
+import time
+import asyncio
+
+# Estimación aproximada de tokens de OpenAI: ~4 caracteres por token de texto y
+# 765 tokens por imagen en detalle alto de 1024x1024 (85 base + 4 teselas x 170).
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE = 765
+
+
+def estimate_request_tokens(prompt: str, n_images: int = 0, max_tokens: int = 0) -> int:
+    """
+    Estima los tokens que consumirá una petición (entrada + salida máxima),
+    que es lo que cuentan los límites de tokens por minuto de la API.
+    """
+    return len(prompt) // CHARS_PER_TOKEN + n_images * TOKENS_PER_IMAGE + max_tokens
+
+
+class RateBudget:
+    """
+    Presupuesto de peticiones y tokens por minuto (doble cubo de tokens).
+
+    Cada cubo se rellena de forma continua hasta su capacidad por minuto. ``acquire``
+    espera hasta que hay saldo suficiente en ambos cubos. Un límite a None significa
+    "sin límite" para ese recurso.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute,
+                                 self._requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute,
+                               self._tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def _wait_time(self, tokens):
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.requests_per_minute)
+        if self.tokens_per_minute:
+            # Una petición mayor que el cubo entero solo puede pasar con el cubo lleno
+            needed = min(tokens, self.tokens_per_minute)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens: int = 0):
+        """Espera hasta poder gastar una petición y ``tokens`` tokens."""
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= min(tokens, self.tokens_per_minute)
+
+    def refund(self, tokens: int):
+        """
+        Devuelve al cubo la diferencia entre los tokens estimados y los realmente
+        usados (``response.usage``). Un valor negativo cobra el exceso.
+        """
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + tokens)
@@ -0,0 +1,335 @@
+# src/api/resilience.py
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# --- Errores estructurados ---
+class LLMError(Exception):
+    """
+    Error de una llamada al LLM. Sustituye a los strings "Error ..." que devolvían
+    antes las funciones de gpt_client.
+
+    Attributes:
+        kind: Categoría estable ('timeout', 'rate_limit', 'connection', 'server',
+              'auth', 'bad_request', 'circuit_open', 'unknown').
+        retryable: Si tiene sentido reintentar la llamada.
+        attempts: Intentos realizados antes de rendirse.
+        cause: Excepción original, si la hay.
+    """
+
+    kind = "unknown"
+    retryable = False
+
+    def __init__(self, message: str, cause: Exception = None, attempts: int = 0):
+        super().__init__(message)
+        self.cause = cause
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "message": str(self), "retryable": self.retryable, "attempts": self.attempts}
+
+
+class LLMTimeoutError(LLMError):
+    kind = "timeout"
+    retryable = True
+
+
+class LLMRateLimitError(LLMError):
+    kind = "rate_limit"
+    retryable = True
+
+
+class LLMConnectionError(LLMError):
+    kind = "connection"
+    retryable = True
+
+
+class LLMServerError(LLMError):
+    kind = "server"
+    retryable = True
+
+
+class LLMAuthError(LLMError):
+    kind = "auth"
+
+
+class LLMBadRequestError(LLMError):
+    kind = "bad_request"
+
+
+class LLMCircuitOpenError(LLMError):
+    kind = "circuit_open"
+
+
+def classify_exception(exc: Exception) -> LLMError:
+    """Traduce excepciones del SDK de OpenAI (y de la red) a la jerarquía LLMError."""
+    if isinstance(exc, LLMError):
+        return exc
+    if isinstance(exc, TimeoutError):
+        return LLMTimeoutError(f"Tiempo de espera agotado: {exc}", exc)
+    if isinstance(exc, ConnectionError):
+        return LLMConnectionError(f"Error de conexión: {exc}", exc)
+    try:
+        import openai
+    except ImportError:
+        return LLMError(str(exc), exc)
+    if isinstance(exc, openai.APITimeoutError):
+        return LLMTimeoutError(f"Tiempo de espera agotado: {exc}", exc)
+    if isinstance(exc, openai.APIConnectionError):
+        return LLMConnectionError(f"Error de conexión: {exc}", exc)
+    if isinstance(exc, openai.RateLimitError):
+        return LLMRateLimitError(f"Límite de peticiones alcanzado: {exc}", exc)
+    if isinstance(exc, (openai.AuthenticationError, openai.PermissionDeniedError)):
+        return LLMAuthError(f"Error de autenticación: {exc}", exc)
+    if isinstance(exc, openai.APIStatusError):
+        if exc.status_code >= 500 or exc.status_code in (408, 409):
+            return LLMServerError(f"Error del servidor ({exc.status_code}): {exc}", exc)
+        return LLMBadRequestError(f"Petición rechazada ({exc.status_code}): {exc}", exc)
+    return LLMError(f"Error inesperado: {exc}", exc)
+
+
+# --- Política ---
+class ResiliencePolicy:
+    """
+    Configuración de reintentos, plazos, peticiones duplicadas (hedging) y cortocircuito.
+
+    Args:
+        deadline: Plazo total de la llamada en segundos, incluidos reintentos.
+        attempt_timeout: Plazo máximo de cada intento (se recorta al plazo restante).
+        max_retries: Reintentos tras el primer intento para errores reintentables.
+        backoff_base: Espera base del backoff exponencial (s).
+        backoff_max: Espera máxima entre intentos (s).
+        hedge: Si es True, lanza un duplicado cuando el intento supera el p95 observado.
+        hedge_quantile: Cuantil de latencia que dispara el duplicado.
+        hedge_min_samples: Muestras necesarias antes de activar el hedging.
+        hedge_min_delay: Espera mínima antes de duplicar (s).
+        breaker_failure_threshold: Fallos consecutivos que abren el circuito.
+        breaker_reset_timeout: Segundos con el circuito abierto antes de probar de nuevo.
+    """
+
+    def __init__(self, deadline: float = 90.0, attempt_timeout: float = 45.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, hedge: bool = False,
+                 hedge_quantile: float = 0.95, hedge_min_samples: int = 20, hedge_min_delay: float = 1.0,
+                 breaker_failure_threshold: int = 5, breaker_reset_timeout: float = 30.0):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo: uniforme en [0, min(max, base * 2^n)]."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Cortocircuito clásico (cerrado → abierto → semiabierto). Con el circuito abierto
+    las llamadas fallan al instante con LLMCircuitOpenError en lugar de esperar al
+    plazo completo de un backend degradado.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise LLMCircuitOpenError("Circuito abierto: el backend del LLM está degradado, se omite la llamada.")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    raise LLMCircuitOpenError("Circuito semiabierto: ya hay una llamada de prueba en curso.")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias de llamadas correctas para calcular cuantiles."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def quantile(self, q: float):
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _hedge_delay(policy, tracker):
+    if not policy.hedge or tracker is None or len(tracker) < policy.hedge_min_samples:
+        return None
+    return max(policy.hedge_min_delay, tracker.quantile(policy.hedge_quantile) or 0.0)
+
+
+# Hilos para los intentos con hedging; los perdedores terminan solos al vencer su timeout
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+def _run_hedged(fn, timeout, hedge_delay):
+    first = _hedge_executor.submit(fn, timeout)
+    done, _ = wait([first], timeout=hedge_delay)
+    if done:
+        return first.result()
+    second = _hedge_executor.submit(fn, max(0.1, timeout - hedge_delay))
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = error or future.exception()
+    raise error or LLMTimeoutError("Ningún intento (ni el duplicado) respondió a tiempo.")
+
+
+def call_with_resilience(fn, policy: ResiliencePolicy, breaker: CircuitBreaker = None,
+                         tracker: LatencyTracker = None):
+    """
+    Ejecuta ``fn(timeout)`` aplicando la política: plazo total, reintentos con backoff
+    y jitter para errores reintentables, hedging opcional y cortocircuito.
+
+    Returns:
+        El resultado de ``fn``.
+
+    Raises:
+        LLMError: Error estructurado del último intento (con ``attempts`` rellenado).
+    """
+    deadline_at = time.monotonic() + policy.deadline
+    attempt = 0
+    while True:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"Plazo total de {policy.deadline:.0f}s agotado.", attempts=attempt)
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except LLMCircuitOpenError as circuit_error:
+                circuit_error.attempts = attempt
+                raise
+        timeout = min(policy.attempt_timeout, remaining)
+        started = time.monotonic()
+        try:
+            hedge_delay = _hedge_delay(policy, tracker)
+            if hedge_delay is not None and hedge_delay < timeout:
+                result = _run_hedged(fn, timeout, hedge_delay)
+            else:
+                result = fn(timeout)
+        except Exception as exc:
+            error = classify_exception(exc)
+            attempt += 1
+            error.attempts = attempt
+            if breaker is not None and error.retryable:
+                breaker.record_failure()
+            elif breaker is not None:
+                breaker.record_success()  # Errores del cliente no indican un backend degradado
+            pause = policy.backoff(attempt - 1)
+            if not error.retryable or attempt > policy.max_retries or time.monotonic() + pause >= deadline_at:
+                raise error from exc
+            time.sleep(pause)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        if tracker is not None:
+            tracker.add(time.monotonic() - started)
+        return result
+
+
+async def acall_with_resilience(afn, policy: ResiliencePolicy, breaker: CircuitBreaker = None,
+                                tracker: LatencyTracker = None):
+    """Versión asyncio de call_with_resilience: ``afn(timeout)`` es una corrutina."""
+    import asyncio
+
+    deadline_at = time.monotonic() + policy.deadline
+    attempt = 0
+    while True:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"Plazo total de {policy.deadline:.0f}s agotado.", attempts=attempt)
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except LLMCircuitOpenError as circuit_error:
+                circuit_error.attempts = attempt
+                raise
+        timeout = min(policy.attempt_timeout, remaining)
+        started = time.monotonic()
+        try:
+            hedge_delay = _hedge_delay(policy, tracker)
+            first = asyncio.ensure_future(afn(timeout))
+            tasks = {first}
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay if hedge_delay is not None else timeout)
+            if not done and hedge_delay is not None and hedge_delay < timeout:
+                tasks.add(asyncio.ensure_future(afn(max(0.1, timeout - hedge_delay))))
+                done, _ = await asyncio.wait(tasks, timeout=timeout - hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+            successful = [task for task in done if task.exception() is None]
+            for task in tasks - set(successful[:1]):
+                task.cancel()
+            if successful:
+                result = successful[0].result()
+            elif done:
+                raise next(iter(done)).exception()
+            else:
+                raise LLMTimeoutError(f"El intento superó {timeout:.1f}s.")
+        except Exception as exc:
+            error = classify_exception(exc)
+            attempt += 1
+            error.attempts = attempt
+            if breaker is not None and error.retryable:
+                breaker.record_failure()
+            elif breaker is not None:
+                breaker.record_success()
+            pause = policy.backoff(attempt - 1)
+            if not error.retryable or attempt > policy.max_retries or time.monotonic() + pause >= deadline_at:
+                raise error from exc
+            await asyncio.sleep(pause)
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        if tracker is not None:
+            tracker.add(time.monotonic() - started)
+        return result
@@ -0,0 +1,248 @@
+# src/api/response_cache.py
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import threading
+
+# Directorio por defecto: <raíz del proyecto>/data/cache/llm
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_CACHE_DIR = os.path.join(_PROJECT_ROOT, "data", "cache", "llm")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 3600  # 30 días
+# put() escribe "created" como primera clave: basta la cabecera para conocer la edad
+_CREATED_RE = re.compile(rb'^\{"created":\s*([0-9.eE+-]+)')
+
+
+def image_digest(image_source: str) -> str:
+    """
+    Calcula un hash estable del contenido de una imagen.
+
+    Para data URIs y cadenas base64 se hashean los bytes decodificados, de modo que
+    la misma imagen produce la misma clave aunque cambie el prefijo MIME. Las
+    referencias ``blob:<sha256>`` ya llevan ese hash y no se leen. Para URLs http(s)
+    se hashea la propia URL.
+    """
+    if image_source.startswith("http"):
+        return "url:" + hashlib.sha256(image_source.encode("utf-8")).hexdigest()
+    if image_source.startswith("blob:"):
+        return "img:" + image_source[len("blob:"):]
+    payload = image_source.split(",", 1)[1] if image_source.startswith("data:") else image_source
+    try:
+        raw = base64.b64decode(payload)
+    except Exception:
+        raw = image_source.encode("utf-8")
+    return "img:" + hashlib.sha256(raw).hexdigest()
+
+
+def make_request_key(kind: str, model: str, prompt: str, params: dict, images: list = None) -> str:
+    """
+    Construye la clave de caché de una petición.
+
+    Args:
+        kind: Tipo de llamada ('vision' o 'text').
+        model: Modelo de OpenAI.
+        prompt: Prompt ya rellenado (con objetivo, historial, etc.).
+        params: Parámetros de muestreo (max_tokens, temperature, response_format...).
+        images: Lista de tuplas (position, detail, digest) en el orden enviado al modelo.
+
+    Returns:
+        Un hash sha256 hexadecimal.
+    """
+    canonical = json.dumps(
+        {
+            "kind": kind,
+            "model": model,
+            "prompt": prompt,
+            "params": params,
+            "images": [list(img) for img in (images or [])],
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Caché persistente en disco de respuestas del LLM, direccionada por contenido.
+
+    Cada entrada es un fichero JSON ``<dir>/<key[:2]>/<key>.json``. La fecha de
+    modificación del fichero hace de marca de último acceso, así que la expulsión
+    LRU sobrevive entre procesos. Se expulsan entradas cuando el tamaño total supera
+    ``max_bytes`` o cuando una entrada es más antigua que ``max_age_seconds``. La
+    edad se cuenta siempre desde la creación (campo "created"), tanto en get() como
+    en la expulsión: leer una entrada no la rejuvenece.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = None  # key -> (size, last_access, created); se carga al primer uso
+        self._total_bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                self._index[name[:-5]] = (st.st_size, st.st_mtime, self._read_created(path, st.st_mtime))
+                self._total_bytes += st.st_size
+
+    @staticmethod
+    def _read_created(path, default):
+        """Fecha de creación de la entrada leída de la cabecera del fichero."""
+        try:
+            with open(path, "rb") as f:
+                match = _CREATED_RE.match(f.read(64))
+        except OSError:
+            return default
+        return float(match.group(1)) if match else default
+
+    def _expired(self, key, now):
+        return now - self._index[key][2] > self.max_age_seconds
+
+    def _remove(self, key):
+        size = self._index.pop(key, (0,))[0]
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str):
+        """Devuelve la respuesta cacheada o None (y contabiliza acierto/fallo)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load_index()
+            if key not in self._index:
+                self.misses += 1
+                return None
+            now = time.time()
+            if self._expired(key, now):
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            # Marca de último acceso para la política LRU
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            size, _, created = self._index[key]
+            self._index[key] = (size, now, created)
+            self.hits += 1
+            return entry.get("response")
+
+    def put(self, key: str, response: str, meta: dict = None):
+        """Guarda una respuesta de forma atómica y aplica la expulsión por tamaño."""
+        if not self.enabled:
+            return
+        entry = {"created": time.time(), "response": response, "meta": meta or {}}
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            old_size = self._index.get(key, (0,))[0]
+            self._index[key] = (len(data), time.time(), entry["created"])
+            self._total_bytes += len(data) - old_size
+            self._evict()
+
+    def _evict(self):
+        now = time.time()
+        expired = [key for key in self._index if self._expired(key, now)]
+        for key in expired:
+            self._remove(key)
+            self.evictions += 1
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Expulsa las entradas menos usadas recientemente hasta bajar al 90% del límite
+        target = int(self.max_bytes * 0.9)
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= target:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def clear(self):
+        """Elimina todas las entradas y reinicia los contadores."""
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                self._remove(key)
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+            }
+
+
+_default_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Devuelve la caché compartida del proceso, configurable por variables de entorno:
+    LLM_CACHE_DIR, LLM_CACHE_MAX_MB, LLM_CACHE_MAX_AGE_DAYS y LLM_CACHE_DISABLED.
+    """
+    global _default_cache
+    if _default_cache is None:
+        disabled = os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+        _default_cache = ResponseCache(
+            cache_dir=os.getenv("LLM_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+            max_age_seconds=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_SECONDS / 86400)) * 86400,
+            enabled=not disabled,
+        )
+    return _default_cache
@@ -0,0 +1,150 @@
+# src/api/single_flight.py
+import threading
+from api.resilience import LLMTimeoutError
+
+
+class Flight:
+    """Una llamada en curso y su resultado, compartido con todas las llamadas idénticas que esperan."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas idénticas simultáneas en una sola llamada al LLM.
+
+    La primera llamada con una clave (la líder) hace la petición; las que llegan
+    mientras sigue en curso esperan y reciben el mismo resultado o el mismo error.
+    Si la líder se abandona sin terminar (p.ej. un rerun de Streamlit cierra el
+    generador de streaming), la siguiente llamada en espera pasa a ser la líder.
+
+    Uso normal con do(); acquire()/resolve() permiten gestionar a mano llamadas
+    que no caben en una función (streaming).
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._async_flights = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str):
+        """Devuelve (flight, leader). Si leader es False hay que esperar con wait()."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight()
+                self.leaders += 1
+                return flight, True
+            self.coalesced += 1
+            return flight, False
+
+    def resolve(self, key: str, flight: Flight, result=None, error: Exception = None, abandoned: bool = False):
+        """Publica el resultado (o error) de la líder y libera a las llamadas en espera."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result, flight.error, flight.abandoned = result, error, abandoned
+        flight.event.set()
+
+    def wait(self, flight: Flight, timeout: float = None):
+        """
+        Espera a la líder. Devuelve su resultado, relanza su error o devuelve None con
+        flight.abandoned a True si hay que volver a intentarlo como líder.
+        """
+        if not flight.event.wait(timeout):
+            raise LLMTimeoutError(f"La llamada compartida no terminó en {timeout:.0f}s.")
+        if flight.error is not None:
+            raise flight.error
+        if flight.abandoned:
+            with self._lock:
+                self.coalesced -= 1  # No llegó a compartir nada: se reintenta como líder
+        return flight.result
+
+    def do(self, key: str, fn, timeout: float = None):
+        """
+        Ejecuta fn() una sola vez para todas las llamadas simultáneas con la misma clave.
+
+        Returns:
+            Tupla (resultado, shared) donde shared indica si se reutilizó la llamada de otra.
+        """
+        while True:
+            flight, leader = self.acquire(key)
+            if not leader:
+                result = self.wait(flight, timeout)
+                if flight.abandoned:
+                    continue
+                return result, True
+            try:
+                result = fn()
+            except Exception as e:
+                self.resolve(key, flight, error=e)
+                raise
+            except BaseException:
+                self.resolve(key, flight, abandoned=True)
+                raise
+            self.resolve(key, flight, result=result)
+            return result, False
+
+    async def ado(self, key: str, fn):
+        """
+        Variante asíncrona de do() para corrutinas del mismo bucle de eventos.
+        fn es una función sin argumentos que devuelve la corrutina a esperar.
+
+        Si la tarea líder se cancela, las que esperaban no reciben su CancelledError:
+        la primera en despertar pasa a ser la líder y repite la llamada.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        while True:
+            with self._lock:
+                future = self._async_flights.get(flight_key)
+                if future is None:
+                    future = self._async_flights[flight_key] = loop.create_future()
+                    self.leaders += 1
+                    leader = True
+                else:
+                    self.coalesced += 1
+                    leader = False
+            if leader:
+                break
+            # wait() no cancela el futuro compartido si se cancela esta tarea, y no
+            # relanza la cancelación de la líder
+            await asyncio.wait((future,))
+            if not future.cancelled():
+                return future.result(), True
+            with self._lock:
+                self.coalesced -= 1  # No llegó a compartir nada: se reintenta como líder
+        try:
+            result = await fn()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Marcada como leída: sin esperas no debe avisar el bucle
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                if self._async_flights.get(flight_key) is future:
+                    del self._async_flights[flight_key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._flights) + len(self._async_flights)
+        total = self.leaders + self.coalesced
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+            "coalesced_rate": (self.coalesced / total) if total else 0.0,
+        }
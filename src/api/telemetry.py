@@ -0,0 +1,125 @@
+# src/api/telemetry.py
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# Métricas numéricas de cada llamada sobre las que se calculan percentiles
+NUMERIC_FIELDS = ("latency", "ttft", "prompt_tokens", "completion_tokens", "images", "payload_bytes")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def new_call_record(kind: str, model: str, images: int = 0, payload_bytes: int = 0, streamed: bool = False) -> dict:
+    """
+    Registro de una llamada al LLM. Se rellena durante la llamada y se entrega a
+    TelemetryRecorder.record al terminar.
+
+    Campos: timestamp, kind ('vision'/'text'), model, streamed, latency (s de reloj),
+    ttft (s hasta el primer token, solo en streaming), prompt_tokens, completion_tokens,
+    images, payload_bytes (tamaño codificado de la petición), cache ('hit', 'miss',
+    'bypass' o 'disabled'), coalesced (reutilizó una llamada idéntica en curso),
+    error (kind del LLMError o None).
+    """
+    return {
+        "timestamp": time.time(),
+        "kind": kind,
+        "model": model,
+        "streamed": streamed,
+        "latency": None,
+        "ttft": None,
+        "prompt_tokens": None,
+        "completion_tokens": None,
+        "images": images,
+        "payload_bytes": payload_bytes,
+        "cache": None,
+        "coalesced": False,
+        "error": None,
+    }
+
+
+def _percentile(ordered, p):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+class TelemetryRecorder:
+    """
+    Guarda los últimos ``window`` registros en memoria para calcular percentiles
+    móviles y, opcionalmente, añade cada registro a un archivo JSON Lines.
+    """
+
+    def __init__(self, window: int = 1000, jsonl_path: str = None):
+        self.records = deque(maxlen=window)
+        self.jsonl_path = jsonl_path
+        self.total_calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, call_record: dict):
+        with self._lock:
+            self.records.append(call_record)
+            self.total_calls += 1
+            if self.jsonl_path:
+                os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(call_record, ensure_ascii=False) + "\n")
+
+    def summary(self, group_by: str = "kind") -> dict:
+        """
+        Agrega la ventana por ``group_by`` (p.ej. 'kind' o 'model').
+
+        Returns:
+            {grupo: {'calls', 'errors', 'coalesced', 'cache_hit_rate', 'tokens', 'payload_bytes',
+                     '<métrica>_p50', '<métrica>_p95', ...}}
+        """
+        with self._lock:
+            records = list(self.records)
+        groups = {}
+        for call_record in records:
+            groups.setdefault(call_record.get(group_by) or "?", []).append(call_record)
+        result = {}
+        for group, items in groups.items():
+            lookups = [r for r in items if r.get("cache") in ("hit", "miss")]
+            stats = {
+                "calls": len(items),
+                "errors": sum(1 for r in items if r.get("error")),
+                "coalesced": sum(1 for r in items if r.get("coalesced")),
+                "cache_hit_rate": (sum(1 for r in lookups if r["cache"] == "hit") / len(lookups)) if lookups else None,
+                "tokens": sum((r.get("prompt_tokens") or 0) + (r.get("completion_tokens") or 0) for r in items),
+                "payload_bytes": sum(r.get("payload_bytes") or 0 for r in items),
+            }
+            for field in NUMERIC_FIELDS:
+                ordered = sorted(r[field] for r in items if r.get(field) is not None)
+                for p in PERCENTILES:
+                    stats[f"{field}_p{p}"] = _percentile(ordered, p)
+            result[group] = stats
+        return result
+
+    def to_jsonl(self) -> str:
+        """Serializa la ventana actual como JSON Lines (para descargar o analizar offline)."""
+        with self._lock:
+            return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.records)
+
+    def export_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_jsonl())
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.total_calls = 0
+
+
+_telemetry = None
+
+
+def get_telemetry() -> TelemetryRecorder:
+    """Registro compartido del proceso. LLM_TELEMETRY_PATH activa el volcado continuo a JSON Lines."""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = TelemetryRecorder(
+            window=int(os.getenv("LLM_TELEMETRY_WINDOW", "1000")),
+            jsonl_path=os.getenv("LLM_TELEMETRY_PATH") or None,
+        )
+    return _telemetry
@@ -0,0 +1,249 @@
+# src/api/transport.py
+import os
+import json
+import time
+import hashlib
+import threading
+from api.response_cache import image_digest
+from api.resilience import LLMError, LLMAuthError
+
+# Modos de transporte (variable de entorno LLM_TRANSPORT)
+LIVE, RECORD, REPLAY = "live", "record", "replay"
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_ARCHIVE = os.path.join(_PROJECT_ROOT, "data", "llm_archive.jsonl")
+
+
+class TransportError(LLMError):
+    """Error del transporte (p.ej. petición sin grabación en modo replay)."""
+
+    kind = "transport"
+
+
+def request_fingerprint(request: dict) -> str:
+    """
+    Hash canónico de una petición chat.completions. Las imágenes se sustituyen por
+    el hash de su contenido para que el archivo no dependa del base64 exacto.
+    """
+    def strip_images(value):
+        if isinstance(value, dict):
+            if value.get("type") == "image_url":
+                image_url = value.get("image_url", {})
+                return {"type": "image_url", "digest": image_digest(image_url.get("url", "")),
+                        "detail": image_url.get("detail")}
+            return {k: strip_images(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [strip_images(v) for v in value]
+        return value
+
+    # El timeout depende de la política de reintentos, no identifica la petición
+    request = {k: v for k, v in request.items() if k != "timeout"}
+    canonical = json.dumps(strip_images(request), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _to_dict(obj):
+    return obj.model_dump() if hasattr(obj, "model_dump") else obj
+
+
+class LiveTransport:
+    """Llama a la API real (o a cualquier endpoint compatible vía base_url)."""
+
+    mode = LIVE
+
+    def __init__(self, api_key: str = None, base_url: str = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def _credentials(self):
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key = self.api_key or os.getenv("OPENAI_API_KEY")
+        base_url = self.base_url or os.getenv("OPENAI_BASE_URL") or None
+        if api_key is None:
+            if base_url is None:
+                raise LLMAuthError("La clave de API de OpenAI no se encontró en el archivo .env")
+            api_key = "sk-local"  # Endpoints locales (api/fake_server.py) no validan la clave
+        return api_key, base_url
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                api_key, base_url = self._credentials()
+                self._client = OpenAI(api_key=api_key, base_url=base_url)
+            return self._client
+
+    @property
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                from openai import AsyncOpenAI
+                api_key, base_url = self._credentials()
+                self._async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+            return self._async_client
+
+    def chat_completion(self, **request):
+        return self.client.chat.completions.create(**request)
+
+    async def achat_completion(self, **request):
+        return await self.async_client.chat.completions.create(**request)
+
+
+class RecordingTransport:
+    """
+    Delegado sobre otro transporte que guarda cada par petición/respuesta en un
+    archivo JSON Lines (una línea por llamada, con la latencia observada).
+    """
+
+    mode = RECORD
+
+    def __init__(self, inner, archive_path: str = DEFAULT_ARCHIVE):
+        self.inner = inner
+        self.archive_path = archive_path
+        self._lock = threading.Lock()
+
+    def _save(self, request, response, latency, chunks=None):
+        entry = {
+            "key": request_fingerprint(request),
+            "model": request.get("model"),
+            "stream": bool(request.get("stream")),
+            "latency": latency,
+            "response": response,
+            "chunks": chunks,
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            os.makedirs(os.path.dirname(self.archive_path) or ".", exist_ok=True)
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def chat_completion(self, **request):
+        started = time.perf_counter()
+        response = self.inner.chat_completion(**request)
+        if request.get("stream"):
+            return self._record_stream(request, response, started)
+        self._save(request, _to_dict(response), time.perf_counter() - started)
+        return response
+
+    def _record_stream(self, request, stream, started):
+        chunks = []
+        for chunk in stream:
+            chunks.append({"delay": time.perf_counter() - started, "chunk": _to_dict(chunk)})
+            yield chunk
+        self._save(request, None, time.perf_counter() - started, chunks)
+
+    async def achat_completion(self, **request):
+        started = time.perf_counter()
+        response = await self.inner.achat_completion(**request)
+        self._save(request, _to_dict(response), time.perf_counter() - started)
+        return response
+
+
+class ReplayTransport:
+    """
+    Sirve respuestas grabadas sin red.
+
+    Args:
+        archive_path: Archivo JSON Lines generado por RecordingTransport.
+        latency: None para responder al instante, un número de segundos fijo o
+                 'recorded' para reproducir la latencia grabada (escalada por speed).
+        speed: Factor de aceleración cuando latency='recorded' (2.0 = el doble de rápido).
+    """
+
+    mode = REPLAY
+
+    def __init__(self, archive_path: str = DEFAULT_ARCHIVE, latency=None, speed: float = 1.0):
+        self.archive_path = archive_path
+        self.latency = latency
+        self.speed = speed
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.archive_path):
+                with open(self.archive_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry["key"]] = entry  # La última grabación gana
+        return self._entries
+
+    def _lookup(self, request):
+        entry = self._load().get(request_fingerprint(request))
+        if entry is None:
+            raise TransportError(f"Petición sin grabación en {self.archive_path} (modo replay).")
+        return entry
+
+    def _delay(self, entry):
+        if self.latency == "recorded":
+            return entry.get("latency", 0.0) / (self.speed or 1.0)
+        return float(self.latency or 0.0)
+
+    def chat_completion(self, **request):
+        from openai.types.chat import ChatCompletion
+        entry = self._lookup(request)
+        if request.get("stream"):
+            return self._replay_stream(entry)
+        delay = self._delay(entry)
+        if delay:
+            time.sleep(delay)
+        return ChatCompletion.model_validate(entry["response"])
+
+    def _replay_stream(self, entry):
+        from openai.types.chat import ChatCompletionChunk
+        recorded = self.latency == "recorded"
+        fixed_delay = self._delay(entry) if not recorded else 0.0
+        if fixed_delay:
+            time.sleep(fixed_delay)
+        previous = 0.0
+        for item in entry.get("chunks") or []:
+            if recorded:
+                time.sleep(max(0.0, item["delay"] - previous) / (self.speed or 1.0))
+                previous = item["delay"]
+            yield ChatCompletionChunk.model_validate(item["chunk"])
+
+    async def achat_completion(self, **request):
+        import asyncio
+        from openai.types.chat import ChatCompletion
+        entry = self._lookup(request)
+        delay = self._delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatCompletion.model_validate(entry["response"])
+
+
+_transport = None
+
+
+def get_transport():
+    """
+    Devuelve el transporte del proceso según LLM_TRANSPORT (live, record, replay),
+    LLM_TRANSPORT_ARCHIVE, LLM_REPLAY_LATENCY (segundos o 'recorded') y LLM_REPLAY_SPEED.
+    """
+    global _transport
+    if _transport is None:
+        mode = os.getenv("LLM_TRANSPORT", LIVE).lower()
+        archive_path = os.getenv("LLM_TRANSPORT_ARCHIVE", DEFAULT_ARCHIVE)
+        if mode == LIVE:
+            _transport = LiveTransport()
+        elif mode == RECORD:
+            _transport = RecordingTransport(LiveTransport(), archive_path)
+        elif mode == REPLAY:
+            latency = os.getenv("LLM_REPLAY_LATENCY") or None
+            if latency and latency != "recorded":
+                latency = float(latency)
+            _transport = ReplayTransport(archive_path, latency, float(os.getenv("LLM_REPLAY_SPEED", "1.0")))
+        else:
+            raise ValueError(f"Modo de transporte desconocido: {mode} (usa live, record o replay)")
+    return _transport
+
+
+def set_transport(transport):
+    """Sustituye el transporte del proceso (None vuelve a leer la configuración del entorno)."""
+    global _transport
+    _transport = transport
@@ -0,0 +1,107 @@
+# src/benchmarks/graph_backend.py
+"""
+Compara los backends de grafo de mapping.graph_manager ('networkx' y 'csr') en
+memoria, BFS completo y camino más corto con mapas grandes.
+
+El mapa sintético es una exploración: una cadena de puntos de vista (cada análisis
+conecta con el anterior) más aristas de vuelta a nodos ya visitados. Cada nodo lleva
+los atributos escalares habituales (descripción, modo, marca de tiempo, hashes).
+
+    cd src && python -m benchmarks.graph_backend --nodes 10000 50000
+"""
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+
+import networkx as nx
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph
+import mapping.csr_graph  # noqa: F401  (NumPy se importa aquí y no dentro de la medida de memoria)
+
+ACTIONS = ["move_to_analyzed", "move_forward", "turn_left", "turn_right", "go_through_door"]
+
+
+def build(backend: str, n_nodes: int, extra_edges: float = 1.0, seed: int = 0):
+    rng = random.Random(seed)
+    graph = initialize_graph(backend)
+    for i in range(n_nodes):
+        add_node_to_graph(graph, f"Nodo_{i}", {
+            "description": f"Vista {i}",
+            "input_mode": "Vista Única (Centro)",
+            "timestamp": 1.7e9 + i,
+            "view_hashes": {"center": format(rng.getrandbits(64), "016x")},
+        })
+        if i:
+            add_edge_to_graph(graph, f"Nodo_{i - 1}", f"Nodo_{i}", "move_to_analyzed")
+    for _ in range(int(n_nodes * extra_edges)):
+        u, v = rng.randrange(n_nodes), rng.randrange(n_nodes)
+        add_edge_to_graph(graph, f"Nodo_{u}", f"Nodo_{v}", rng.choice(ACTIONS))
+    return graph
+
+
+def _memory(backend, n_nodes):
+    gc.collect()
+    tracemalloc.start()
+    graph = build(backend, n_nodes)
+    if backend == "csr":
+        graph.compact()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return graph, size
+
+
+def _best(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(n_nodes: int, n_pairs: int = 200, seed: int = 0) -> dict:
+    nx_graph, nx_bytes = _memory("networkx", n_nodes)
+    csr_graph, csr_bytes = _memory("csr", n_nodes)
+    rng = random.Random(seed)
+    pairs = [(f"Nodo_{rng.randrange(n_nodes)}", f"Nodo_{rng.randrange(n_nodes)}") for _ in range(n_pairs)]
+
+    def paths(fn):
+        def run():
+            for source, target in pairs:
+                try:
+                    fn(source, target)
+                except nx.NetworkXNoPath:
+                    pass
+        return run
+
+    return {
+        "nx_bytes": nx_bytes / n_nodes,
+        "csr_bytes": csr_bytes / n_nodes,
+        "nx_bfs_ms": _best(lambda: nx.single_source_shortest_path_length(nx_graph, "Nodo_0")) * 1000,
+        "csr_bfs_ms": _best(lambda: csr_graph.bfs_distances("Nodo_0")) * 1000,
+        "nx_path_ms": _best(paths(lambda s, t: nx.shortest_path(nx_graph, s, t))) * 1000 / n_pairs,
+        "csr_path_ms": _best(paths(csr_graph.shortest_path)) * 1000 / n_pairs,
+        "adapter_path_ms": _best(paths(lambda s, t: nx.shortest_path(csr_graph, s, t))) * 1000 / n_pairs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--pairs", type=int, default=200)
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.pairs)
+        print(f"--- {n_nodes} nodos, ~{2 * n_nodes} aristas ---")
+        print(f"memoria           networkx {r['nx_bytes']:7.0f} B/nodo   csr {r['csr_bytes']:7.0f} B/nodo "
+              f"({r['csr_bytes'] / r['nx_bytes']:.0%})")
+        print(f"BFS completo      networkx {r['nx_bfs_ms']:7.2f} ms       csr {r['csr_bfs_ms']:7.2f} ms")
+        print(f"camino más corto  networkx {r['nx_path_ms']:7.3f} ms       csr {r['csr_path_ms']:7.3f} ms   "
+              f"(nx.shortest_path sobre el adaptador csr: {r['adapter_path_ms']:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
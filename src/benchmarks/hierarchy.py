@@ -0,0 +1,134 @@
+# src/benchmarks/hierarchy.py
+"""
+Compara la búsqueda de rutas jerárquica (mapping/hierarchy.py: zonas -> habitaciones
+-> nodos) con nx.shortest_path sobre el grafo plano de puntos de vista.
+
+El mapa sintético es un edificio: una cuadrícula de habitaciones, cada una con un
+anillo de puntos de vista que ven los objetos propios de la habitación, y puertas
+entre habitaciones vecinas. Las rutas se piden entre habitaciones a una distancia
+fija, así que su longitud no cambia al crecer el mapa; también se mide la ruta
+hasta la habitación opuesta del edificio, un destino sin ruta (una habitación
+aislada), la calidad de las rutas (saltos frente a la más corta) y el coste de
+mantener la jerarquía al añadir nodos.
+
+    cd src && python -m benchmarks.hierarchy --nodes 1000 10000 50000
+"""
+import math
+import time
+import random
+import argparse
+
+import networkx as nx
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph
+from mapping.hierarchy import get_hierarchy
+from mapping.observation import Observation
+from benchmarks.object_index import COMMON, COLORS, MATERIALS, OBJECTS
+
+VIEWS_PER_ROOM = 10
+
+
+def build_building(n_nodes: int, rng):
+    """Grafo de ~n_nodes vistas en una cuadrícula de habitaciones; devuelve (grafo, lado)."""
+    side = max(2, round(math.sqrt(n_nodes / VIEWS_PER_ROOM)))
+    graph = initialize_graph()
+    get_hierarchy(graph)  # mantenida desde el primer nodo, como en la app
+    for row in range(side):
+        for col in range(side):
+            objects = [f"{rng.choice(COLORS)} {rng.choice(MATERIALS)} {rng.choice(OBJECTS)}" for _ in range(5)]
+            for view in range(VIEWS_PER_ROOM):
+                names = rng.sample(COMMON, 2) + rng.sample(objects, 3)
+                add_node_to_graph(graph, _node(row, col, view), {
+                    "description": f"Vista {view} de la habitación {row}-{col}",
+                    "observation": Observation.from_json({
+                        "identified_objects": [{"name": name} for name in names],
+                    }),
+                })
+                if view:
+                    add_edge_to_graph(graph, _node(row, col, view - 1), _node(row, col, view), "turn_right")
+                    add_edge_to_graph(graph, _node(row, col, view), _node(row, col, view - 1), "turn_left")
+            add_edge_to_graph(graph, _node(row, col, VIEWS_PER_ROOM - 1), _node(row, col, 0), "turn_right")
+            add_edge_to_graph(graph, _node(row, col, 0), _node(row, col, VIEWS_PER_ROOM - 1), "turn_left")
+            # Puertas con las habitaciones de arriba y de la izquierda
+            for other in ((row - 1, col), (row, col - 1)):
+                if min(other) < 0:
+                    continue
+                u, v = _node(row, col, rng.randrange(VIEWS_PER_ROOM)), _node(*other, rng.randrange(VIEWS_PER_ROOM))
+                add_edge_to_graph(graph, u, v, "go_through_door")
+                add_edge_to_graph(graph, v, u, "go_through_door")
+    return graph, side
+
+
+def _node(row, col, view):
+    return f"R{row}_{col}_V{view}"
+
+
+def _no_path(fn):
+    def search(u, v):
+        try:
+            return fn(u, v)
+        except nx.NetworkXNoPath:
+            return None
+    return search
+
+
+def _per_query_ms(fn, pairs):
+    start = time.perf_counter()
+    paths = [fn(u, v) for u, v in pairs]
+    return (time.perf_counter() - start) * 1000 / len(pairs), paths
+
+
+def bench(n_nodes: int, n_queries: int = 100, distance: int = 3, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    graph, side = build_building(n_nodes, rng)
+    # Habitación a la que no se puede llegar
+    for view in range(VIEWS_PER_ROOM):
+        add_node_to_graph(graph, _node(side, 0, view), {"description": f"Vista {view} del trastero"})
+        if view:
+            add_edge_to_graph(graph, _node(side, 0, view - 1), _node(side, 0, view), "turn_right")
+    hierarchy = get_hierarchy(graph)
+    hierarchy.refresh()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    near, far = [], []
+    for _ in range(n_queries):
+        row, col = rng.randrange(side - distance), rng.randrange(side)
+        near.append((_node(row, col, rng.randrange(VIEWS_PER_ROOM)),
+                     _node(row + distance, col, rng.randrange(VIEWS_PER_ROOM))))
+        far.append((_node(0, 0, rng.randrange(VIEWS_PER_ROOM)),
+                    _node(side - 1, side - 1, rng.randrange(VIEWS_PER_ROOM))))
+
+    result = {"nodes": graph.number_of_nodes(), "build_ms": build_ms, **hierarchy.stats()}
+    for name, pairs in (("near", near), ("far", far)):
+        flat_ms, flat_paths = _per_query_ms(lambda u, v: nx.shortest_path(graph, u, v), pairs)
+        hier_ms, hier_paths = _per_query_ms(hierarchy.shortest_path, pairs)
+        result[f"{name}_flat_ms"], result[f"{name}_hier_ms"] = flat_ms, hier_ms
+        result[f"{name}_stretch"] = (sum(len(p) for p in hier_paths) / sum(len(p) for p in flat_paths))
+    unreachable = [(u, _node(side, 0, 0)) for u, _ in near[:10]]
+    result["none_flat_ms"], _ = _per_query_ms(_no_path(lambda u, v: nx.shortest_path(graph, u, v)), unreachable)
+    result["none_hier_ms"], _ = _per_query_ms(_no_path(hierarchy.shortest_path), unreachable)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--distance", type=int, default=3, help="habitaciones entre origen y destino")
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.queries, args.distance)
+        print(f"--- {r['nodes']} nodos: {r['rooms']} habitaciones, {r['zones']} zonas, {r['portals']} portales ---")
+        print(f"construcción         {r['build_ms'] / r['nodes'] * 1000:.0f} µs por nodo (grafo + jerarquía)")
+        print(f"ruta a {args.distance} habitaciones nx {r['near_flat_ms']:.2f} ms   jerárquica {r['near_hier_ms']:.2f} ms   "
+              f"longitud x{r['near_stretch']:.2f}")
+        print(f"ruta de lado a lado  nx {r['far_flat_ms']:.2f} ms   jerárquica {r['far_hier_ms']:.2f} ms   "
+              f"longitud x{r['far_stretch']:.2f}")
+        print(f"sin ruta             nx {r['none_flat_ms']:.2f} ms   jerárquica {r['none_hier_ms']:.2f} ms")
+        print(f"búsquedas ampliadas al grafo completo: {r['fallbacks']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# src/benchmarks/import_time.py
+"""
+Mide el coste de importación en frío de los módulos del proyecto.
+
+Cada módulo se importa en un intérprete nuevo con ``python -X importtime`` (sin
+cachés de sys.modules) y se informa el mejor tiempo acumulado de N repeticiones.
+
+    cd src && python -m benchmarks.import_time --repeat 5
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_MODULES = [
+    "api.gpt_client",
+    "navigation.planer",
+    "mapping.graph_manager",
+    "utils.parsing_llm_response",
+    "utils.image_processing",
+]
+
+
+def measure_import(module: str, repeat: int = 5) -> float:
+    """Devuelve el mejor tiempo acumulado (ms) de importar ``module`` en un proceso nuevo."""
+    best = None
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE="")
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=SRC_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {module}:\n{proc.stderr[-2000:]}")
+        cumulative_us = None
+        for line in proc.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                cumulative_us = int(parts[1])
+        if cumulative_us is not None:
+            best = cumulative_us if best is None else min(best, cumulative_us)
+    return (best or 0) / 1000.0
+
+
+def top_imports(module: str, limit: int = 8) -> list:
+    """Lista las dependencias que más tiempo propio consumen al importar ``module``."""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[0].startswith("import time:") and parts[1].strip().isdigit():
+            rows.append((int(parts[1]) / 1000.0, parts[2].strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark de tiempo de importación")
+    arg_parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--detail", action="store_true", help="Muestra las dependencias más lentas")
+    args = arg_parser.parse_args()
+
+    print(f"{'módulo':32s} {'ms (mejor de ' + str(args.repeat) + ')':>18s}")
+    for module_name in args.modules:
+        print(f"{module_name:32s} {measure_import(module_name, args.repeat):18.1f}")
+        if args.detail:
+            for ms, name in top_imports(module_name):
+                print(f"    {name:40s} {ms:8.1f} ms (acumulado)")
@@ -0,0 +1,75 @@
+# src/benchmarks/layout.py
+"""
+Mide la disposición incremental del grafo (mapping/layout.py) frente a recalcular
+toda la disposición en cada interacción, que es lo que hacía la física de vis.js
+en el navegador.
+
+Para cada tamaño se mide la disposición completa de un grafo sin posiciones (lo que
+costaría recalcularla en cada rerun con el mismo motor), el coste de un paso de
+exploración (un nodo y su arista), cuántos nodos se mueven en ese paso y la calidad
+del resultado (longitud de las aristas respecto a la ideal).
+
+    cd src && python -m benchmarks.layout --nodes 1000 10000 50000
+"""
+import random
+import argparse
+
+import numpy as np
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph
+from mapping.layout import get_layout, DEFAULT_SPRING_LENGTH
+
+
+def _explore(graph, rng, start, count):
+    """Recorrido sintético: casi siempre desde uno de los últimos nodos, a veces vuelve atrás."""
+    for i in range(start, start + count):
+        add_node_to_graph(graph, f"Vista_{i}", {"description": f"Vista {i}"})
+        if i:
+            source = rng.randrange(max(0, i - 3), i) if rng.random() < 0.9 else rng.randrange(i)
+            add_edge_to_graph(graph, f"Vista_{source}", f"Vista_{i}", "move_forward")
+
+
+def _edge_lengths(graph):
+    nodes = graph.nodes
+    return np.array([np.hypot(nodes[u]["x"] - nodes[v]["x"], nodes[u]["y"] - nodes[v]["y"])
+                     for u, v in graph.edges()]) / DEFAULT_SPRING_LENGTH
+
+
+def bench(n_nodes: int, steps: int = 50, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    graph = initialize_graph()
+    _explore(graph, rng, 0, n_nodes)
+    layout = get_layout(graph)
+    initial = layout.update()
+
+    step_ms, moved = [], []
+    for i in range(n_nodes, n_nodes + steps):
+        _explore(graph, rng, i, 1)
+        result = layout.update()
+        step_ms.append(result["ms"])
+        moved.append(result["moved"])
+
+    lengths = _edge_lengths(graph)
+    return {
+        "initial_ms": initial["ms"], "step_ms": float(np.median(step_ms)), "step_p95_ms": float(np.percentile(step_ms, 95)),
+        "moved": float(np.median(moved)),
+        "edge_median": float(np.median(lengths)), "edge_p90": float(np.percentile(lengths, 90)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--steps", type=int, default=50)
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.steps)
+        print(f"--- {n_nodes} nodos ---")
+        print(f"disposición completa {r['initial_ms']:.0f} ms (solo la primera vez; los estados guardados traen las posiciones)")
+        print(f"paso (+1 nodo)       {r['step_ms']:.2f} ms (p95 {r['step_p95_ms']:.2f} ms), {r['moved']:.0f} nodos movidos")
+        print(f"aristas / ideal      mediana {r['edge_median']:.2f}   p90 {r['edge_p90']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
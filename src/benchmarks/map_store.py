@@ -0,0 +1,105 @@
+# src/benchmarks/map_store.py
+"""
+Mide el mapa persistente en SQLite (mapping/map_store.py): coste del write-through
+por mutación, tiempo de abrir un mapa grande y de las consultas indexadas frente a
+cargar el estado JSON completo para responder lo mismo.
+
+    cd src && python -m benchmarks.map_store --nodes 1000 10000 50000
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from mapping.graph_manager import (
+    initialize_graph, add_node_to_graph, add_edge_to_graph, graph_to_node_link, graph_from_node_link
+)
+from mapping.map_store import MapStore
+from mapping.observation import Observation
+from benchmarks.observation import synthetic_response
+
+
+def _per_call_ms(fn, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / len(args_list)
+
+
+def bench(n_nodes: int, n_queries: int = 200, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    path = os.path.join(tempfile.mkdtemp(prefix="map_bench_"), "map.sqlite3")
+    store = MapStore(path)
+    graph = initialize_graph()
+
+    # Primera mitad en memoria, segunda con write-through: la diferencia es el coste de SQLite
+    half = n_nodes // 2
+    elapsed = [0.0, 0.0]
+    for i in range(n_nodes):
+        data = {
+            "description": f"Vista {i}",
+            "observation": Observation.from_json(json.loads(synthetic_response(rng, i))),
+            "timestamp": 1.7e9 + i,
+            "images": {"center": "blob:" + format(rng.getrandbits(256), "064x")},
+        }
+        if i == half:
+            store.replace_graph(graph)
+            store.attach(graph)
+        start = time.perf_counter()
+        add_node_to_graph(graph, f"Room_{i}", data)
+        if i:
+            add_edge_to_graph(graph, f"Room_{i - 1}", f"Room_{i}", "move_forward")
+        elapsed[i >= half] += time.perf_counter() - start
+    write_ms = (elapsed[1] / (n_nodes - half) - elapsed[0] / half) * 1000
+    store.detach(graph)
+    store.replace_graph(graph)
+    store.close()
+
+    state_json = json.dumps({"graph": graph_to_node_link(graph)})
+    start = time.perf_counter()
+    graph_from_node_link(json.loads(state_json)["graph"])
+    json_open_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    store = MapStore(path)
+    store.number_of_nodes()
+    open_ms = (time.perf_counter() - start) * 1000
+
+    nodes = [(f"Room_{rng.randrange(n_nodes)}",) for _ in range(n_queries)]
+    windows = [(1.7e9 + t, 1.7e9 + t + 50) for t in (rng.randrange(n_nodes) for _ in range(n_queries))]
+    result = {
+        "write_ms": write_ms,
+        "json_open_ms": json_open_ms,
+        "open_ms": open_ms,
+        "get_node_ms": _per_call_ms(store.get_node, nodes),
+        "neighbors_ms": _per_call_ms(lambda n: (store.successors(n), store.predecessors(n)), nodes),
+        "time_range_ms": _per_call_ms(store.nodes_between, windows),
+        "object_ms": _per_call_ms(store.nodes_with_object, [("sofa",)] * 20),
+    }
+    start = time.perf_counter()
+    store.load_graph()
+    result["load_graph_ms"] = (time.perf_counter() - start) * 1000
+    result["db_mb"] = store.stats()["bytes"] / 2 ** 20
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.queries)
+        print(f"--- {n_nodes} nodos ({r['db_mb']:.1f} MB) ---")
+        print(f"write-through        {r['write_ms']:.3f} ms por nodo + arista")
+        print(f"abrir                SQLite {r['open_ms']:.1f} ms   JSON completo {r['json_open_ms']:.0f} ms   "
+              f"load_graph {r['load_graph_ms']:.0f} ms")
+        print(f"consultas (ms)       nodo {r['get_node_ms']:.3f}   vecinos {r['neighbors_ms']:.3f}   "
+              f"intervalo {r['time_range_ms']:.3f}   objeto 'sofa' {r['object_ms']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
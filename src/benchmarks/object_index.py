@@ -0,0 +1,109 @@
+# src/benchmarks/object_index.py
+"""
+Compara la búsqueda de nodos con objetos en común con el índice invertido
+(mapping/object_index.py) frente a la comparación par a par de conjuntos de objetos
+con todos los nodos del mapa, que es lo que haría una implementación directa de
+connect_nodes_by_common_objects.
+
+Se mide el coste de añadir un nodo nuevo y buscar sus candidatos en mapas de
+distinto tamaño. El mapa sintético agrupa las vistas en habitaciones: cada vista ve
+objetos comunes a todo el mapa (pared, puerta, suelo...) y algunos de los objetos
+distintivos de su habitación ('red wooden cabinet'), que son los que la conectan
+con las otras vistas de la misma habitación.
+
+    cd src && python -m benchmarks.object_index --nodes 100 1000 10000
+"""
+import time
+import random
+import argparse
+
+from mapping.observation import Observation
+from mapping.object_index import ObjectIndex, normalize_words
+
+COMMON = ["wall", "door", "floor", "ceiling light", "window"]
+COLORS = ["red", "blue", "green", "white", "black", "grey", "yellow", "brown", "silver", "orange"]
+MATERIALS = ["wooden", "metal", "glass", "plastic", "leather", "fabric"]
+OBJECTS = ["cabinet", "chair", "table", "sofa", "fridge", "plant", "lamp", "shelf", "bed", "desk",
+           "painting", "rug", "mirror", "clock", "television", "bench", "stool", "printer", "sink", "oven"]
+VIEWS_PER_ROOM = 5
+
+
+def synthetic_observation(rng, index: int, room_objects: dict) -> Observation:
+    """Vista ``index`` de la habitación index // VIEWS_PER_ROOM."""
+    room = index // VIEWS_PER_ROOM
+    if room not in room_objects:
+        room_objects[room] = [f"{rng.choice(COLORS)} {rng.choice(MATERIALS)} {rng.choice(OBJECTS)}"
+                              for _ in range(5)]
+    names = rng.sample(COMMON, 2) + rng.sample(room_objects[room], 3)
+    return Observation.from_json({
+        "landmarks_and_suggested_node_name": {"suggested_node_name": f"Nodo_{index}"},
+        "identified_objects": [{"name": name} for name in names],
+        "obstacles": [{"type": rng.choice(["wall", "furniture", "box"])}],
+    })
+
+
+def _object_set(observation):
+    names = [item.name for item in observation.objects] + [item.type for item in observation.obstacles]
+    return {" ".join(normalize_words(name)) for name in names}
+
+
+def pairwise_candidates(object_sets, node_id, top_k=5):
+    """Jaccard del nodo contra todos los demás: O(nodos) por consulta."""
+    query = object_sets[node_id]
+    scored = []
+    for other, objects in object_sets.items():
+        if other == node_id:
+            continue
+        common = query & objects
+        if common:
+            scored.append((other, len(common) / len(query | objects)))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored[:top_k]
+
+
+def bench(n_nodes: int, n_queries: int = 200, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    room_objects = {}
+    observations = [synthetic_observation(rng, i, room_objects) for i in range(n_nodes + n_queries)]
+    index = ObjectIndex()
+    object_sets = {}
+    for i in range(n_nodes):
+        index.add(f"Nodo_{i}", observations[i])
+        object_sets[f"Nodo_{i}"] = _object_set(observations[i])
+
+    start = time.perf_counter()
+    for i in range(n_nodes, n_nodes + n_queries):
+        object_sets[f"Nodo_{i}"] = _object_set(observations[i])
+        pairwise_candidates(object_sets, f"Nodo_{i}")
+    pairwise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = 0
+    for i in range(n_nodes, n_nodes + n_queries):
+        index.add(f"Nodo_{i}", observations[i])
+        found += len(index.candidates(f"Nodo_{i}"))
+    indexed = time.perf_counter() - start
+
+    return {
+        "pairwise_ms": pairwise * 1000 / n_queries,
+        "index_ms": indexed * 1000 / n_queries,
+        "candidates": found / n_queries,
+        **index.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'nodos':>7} {'par a par ms':>13} {'índice ms':>10} {'candidatos':>11} {'términos':>9}")
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.queries)
+        print(f"{n_nodes:>7} {r['pairwise_ms']:>13.3f} {r['index_ms']:>10.3f} "
+              f"{r['candidates']:>11.1f} {r['terms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# src/benchmarks/observation.py
+"""
+Compara la memoria por nodo del dict parseado ('llm_json') con la de
+mapping.observation.Observation, y mide la conversión en ambos sentidos.
+
+Cada respuesta sintética se decodifica con json.loads, como las reales: los nombres
+repetidos (objetos, obstáculos, direcciones) llegan como strings distintos y solo
+Observation los comparte al internarlos.
+
+    cd src && python -m benchmarks.observation --nodes 2000
+"""
+import gc
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+from mapping.observation import Observation
+
+OBJECTS = ["door", "chair", "table", "window", "sofa", "fridge", "plant", "lamp", "shelf", "bed"]
+OBSTACLES = ["wall", "furniture", "step", "box", "cable"]
+DIRECTIONS = ["forward", "forward-left", "forward-right", "left", "right", "back"]
+SIZES = ["small", "medium", "large"]
+LOCATIONS = ["center-low", "left", "right", "spanning left-center"]
+
+
+def synthetic_response(rng, index: int) -> str:
+    """Texto JSON con la estructura de navigation_prompt."""
+    return json.dumps({
+        "overall_scene_description": f"Scene {index}: a room with " + ", ".join(rng.sample(OBJECTS, 3)) + ".",
+        "landmarks_and_suggested_node_name": {
+            "suggested_node_name": f"Room_{index}",
+            "suggested_node_name_detailed": f"Landmarks of room {index} near the {rng.choice(OBJECTS)}",
+        },
+        "identified_objects": [{"name": name, "characteristics": f"{rng.choice(SIZES)} {name}"}
+                               for name in rng.sample(OBJECTS, rng.randint(3, 7))],
+        "potential_navigation_paths": [{"description": f"Path towards the {rng.choice(OBJECTS)}",
+                                        "direction": rng.choice(DIRECTIONS), "features": "clear"}
+                                       for _ in range(rng.randint(1, 3))],
+        "obstacles": [{"type": rng.choice(OBSTACLES), "size": rng.choice(SIZES), "location": rng.choice(LOCATIONS)}
+                      for _ in range(rng.randint(0, 3))],
+        "robot_perspective_and_potential_actions": [f"move {rng.choice(DIRECTIONS)}" for _ in range(3)],
+        "navigation_graph_elements": [{"target_node": f"Room_{rng.randint(0, index + 1)}", "action": "move forward"}],
+        "reasoning": "The path ahead is clear and leads towards the goal.",
+        "obstacle_avoidance_strategy": "",
+        "process_step": "path_evaluation",
+    })
+
+
+def _measure(build) -> tuple:
+    """(bytes retenidos, segundos) de construir la lista que devuelve ``build``."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [synthetic_response(rng, i) for i in range(args.nodes)]
+
+    dict_bytes, _ = _measure(lambda: [json.loads(text) for text in texts])
+    model_bytes, _ = _measure(lambda: [Observation.from_json(json.loads(text)) for text in texts])
+
+    parsed = [json.loads(text) for text in texts]
+    start = time.perf_counter()
+    observations = [Observation.from_json(data) for data in parsed]
+    from_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for observation in observations:
+        observation.to_json()
+    to_seconds = time.perf_counter() - start
+
+    print(f"Nodos: {args.nodes}")
+    print(f"dict (llm_json)   {dict_bytes / args.nodes:8.0f} bytes/nodo")
+    print(f"Observation       {model_bytes / args.nodes:8.0f} bytes/nodo   ({model_bytes / dict_bytes:.0%} del dict)")
+    print(f"from_json         {from_seconds / args.nodes * 1e6:8.1f} µs/nodo")
+    print(f"to_json           {to_seconds / args.nodes * 1e6:8.1f} µs/nodo")
+
+
+if __name__ == "__main__":
+    main()
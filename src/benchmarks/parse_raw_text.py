@@ -0,0 +1,216 @@
+# src/benchmarks/parse_raw_text.py
+"""
+Compara el rendimiento de utils.parsing_llm_response.parse_raw_text_to_json con la
+implementación anterior (regex DOTALL por secciones y re.match por línea).
+
+El corpus puede ser un archivo JSON Lines con respuestas crudas grabadas (campo
+'text', 'response' o 'raw'), un directorio de archivos .txt o, por defecto, un
+corpus sintético con el formato de secciones numeradas.
+
+    cd src && python -m benchmarks.parse_raw_text --repeat 5
+    cd src && python -m benchmarks.parse_raw_text --corpus ../data/raw_responses.jsonl
+"""
+import os
+import re
+import json
+import time
+import random
+import argparse
+
+from utils.parsing_llm_response import parse_raw_text_to_json
+
+SCHEMA_FIELDS = (
+    "overall_scene_description", "identified_objects", "potential_navigation_paths", "obstacles",
+    "landmarks_and_suggested_node_name", "robot_perspective_and_potential_actions",
+    "navigation_graph_elements", "reasoning", "obstacle_avoidance_strategy",
+)
+
+
+def legacy_parse_raw_text_to_json(raw_text):
+    """
+    Parsea el raw text estructurado en secciones y bullets a un objeto JSON
+    con la estructura esperada.
+    """
+    result = {
+        "overall_scene_description": "",
+        "identified_objects": [],
+        "potential_navigation_paths": [],
+        "obstacles": [],
+        "landmarks_and_suggested_node_name": {
+            "suggested_node_name": ""
+        },
+        "robot_perspective_and_potential_actions": [],
+        "navigation_graph_elements": [],
+        "reasoning": "",
+        "obstacle_avoidance_strategy": ""
+    }
+
+    # Patrón para extraer secciones del raw text
+    pattern = re.compile(r"\*\*(\d+\.\s+[^:]+):\*\*\s*\n(.+?)(?=\n\*\*\d+\.|$)", re.DOTALL)
+    matches = pattern.findall(raw_text)
+    for header, content in matches:
+        header = header.strip()
+        content = content.strip()
+        if "Overall Scene Description" in header:
+            result["overall_scene_description"] = content
+        elif "Identified Objects" in header:
+            # Divide por líneas que comienzan con guiones
+            lines = re.split(r"\n- ", content)
+            for line in lines:
+                line = line.strip("- ").strip()
+                if not line:
+                    continue
+                # Espera el formato: **Nombre:** descripción
+                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
+                if m:
+                    name = m.group(1).strip()
+                    characteristics = m.group(2).strip()
+                    result["identified_objects"].append({"name": name, "characteristics": characteristics})
+                else:
+                    # Si no hay coincidencia, se guarda la línea completa
+                    result["identified_objects"].append({"name": line, "characteristics": ""})
+        elif "Potential Navigation Paths" in header:
+            lines = re.split(r"\n- ", content)
+            for line in lines:
+                line = line.strip("- ").strip()
+                if not line:
+                    continue
+                # Intenta separar usando el formato: **Descripción:** detalles
+                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
+                if m:
+                    description = m.group(1).strip()
+                    details = m.group(2).strip()
+                    # Si no se especifica dirección, la dejamos vacía
+                    result["potential_navigation_paths"].append({
+                        "description": description, 
+                        "direction": "", 
+                        "features": details
+                    })
+                else:
+                    result["potential_navigation_paths"].append({
+                        "description": line, 
+                        "direction": "", 
+                        "features": ""
+                    })
+        elif "Obstacles" in header:
+            lines = re.split(r"\n- ", content)
+            for line in lines:
+                line = line.strip("- ").strip()
+                if not line:
+                    continue
+                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
+                if m:
+                    typ = m.group(1).strip()
+                    details = m.group(2).strip()
+                    result["obstacles"].append({
+                        "type": typ, 
+                        "size": "",  # Si se requiere, se podría intentar extraer el tamaño
+                        "location": details
+                    })
+                else:
+                    result["obstacles"].append({
+                        "type": line, 
+                        "size": "", 
+                        "location": ""
+                    })
+        elif "Landmarks and Suggested Node Name" in header:
+            # Busca la línea que contenga "Suggested Node Name:"
+            m = re.search(r"Suggested Node Name:\s*\"?([^\n\"]+)\"?", content)
+            if m:
+                result["landmarks_and_suggested_node_name"]["suggested_node_name"] = m.group(1).strip()
+        elif "Robot's Perspective and Potential Actions" in header:
+            lines = re.split(r"\n- ", content)
+            for line in lines:
+                line = line.strip("- ").strip()
+                if line:
+                    result["robot_perspective_and_potential_actions"].append(line)
+        # Otras secciones (como navigation_graph_elements, reasoning, obstacle_avoidance_strategy)
+        # se pueden agregar aquí según se requiera.
+    return result
+
+
+_OBJECTS = ["Door", "Chair", "Table", "Window", "Sofa", "Plant", "Lamp", "Shelf", "Stairs", "Fridge"]
+_DIRECTIONS = ["forward", "left", "right", "forward-left", "forward-right", "behind"]
+
+
+def synthetic_corpus(size: int = 500, seed: int = 0) -> list:
+    """Respuestas crudas con las nueve secciones numeradas y un número variable de viñetas."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        objects = rng.sample(_OBJECTS, rng.randint(2, 6))
+        sections = [
+            ("Overall Scene Description", "A hallway with " + ", ".join(o.lower() for o in objects) + ". " * rng.randint(1, 3)),
+            ("Identified Objects", "\n".join(f"- **{o}**: {rng.choice(['white', 'wooden', 'large'])} {o.lower()} "
+                                            f"on the {rng.choice(_DIRECTIONS)}" for o in objects)),
+            ("Potential Navigation Paths", "\n".join(f"- **Path {k + 1}**: clear way {rng.choice(_DIRECTIONS)}"
+                                                    for k in range(rng.randint(1, 3)))),
+            ("Obstacles", "\n".join(f"- **{rng.choice(['Wall', 'Box', 'Step'])}**: {rng.choice(_DIRECTIONS)}"
+                                    for _ in range(rng.randint(0, 3))) or "- None"),
+            ("Landmarks and Suggested Node Name", f"- Landmarks: {objects[0]} next to {objects[-1]}\n"
+                                                  f"- Suggested Node Name: \"{objects[0]}_Hall_{i}\""),
+            ("Robot's Perspective and Potential Actions", "\n".join(f"- Move {rng.choice(_DIRECTIONS)} {rng.randint(1, 3)} m"
+                                                                   for _ in range(rng.randint(1, 4)))),
+            ("Navigation Graph Elements", f"- **{objects[-1]}_Area**: move {rng.choice(_DIRECTIONS)}"),
+            ("Reasoning", "The goal is ahead; the clearest path avoids the obstacles."),
+            ("Obstacle Avoidance Strategy", "Keep to the right side and slow down near the door."),
+        ]
+        corpus.append("\n\n".join(f"**{n + 1}. {title}:**\n{body}" for n, (title, body) in enumerate(sections)))
+    return corpus
+
+
+def load_corpus(path: str) -> list:
+    if os.path.isdir(path):
+        corpus = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".txt"):
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    corpus.append(f.read())
+        return corpus
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                text = entry.get("text") or entry.get("response") or entry.get("raw") if isinstance(entry, dict) else entry
+                if isinstance(text, str):
+                    corpus.append(text)
+    return corpus
+
+
+def filled_fields(parsed: dict) -> int:
+    """Campos del esquema con contenido (el nombre de nodo cuenta para landmarks)."""
+    count = 0
+    for field in SCHEMA_FIELDS:
+        value = parsed.get(field)
+        if field == "landmarks_and_suggested_node_name":
+            value = (value or {}).get("suggested_node_name")
+        count += bool(value)
+    return count
+
+
+def bench(parse, corpus: list, repeat: int = 5) -> float:
+    """Mejor throughput (parseos por segundo) de ``repeat`` pasadas sobre el corpus."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in corpus:
+            parse(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(corpus) / best if best else float("inf")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark de parse_raw_text_to_json")
+    arg_parser.add_argument("--corpus", help="JSON Lines o directorio de .txt con respuestas crudas")
+    arg_parser.add_argument("--size", type=int, default=500, help="Tamaño del corpus sintético")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    texts = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.size)
+    print(f"Corpus: {len(texts)} respuestas")
+    for label, parse in (("anterior", legacy_parse_raw_text_to_json), ("actual", parse_raw_text_to_json)):
+        rate = bench(parse, texts, args.repeat)
+        coverage = sum(filled_fields(parse(t)) for t in texts) / max(1, len(texts))
+        print(f"{label:10s} {rate:12.0f} parseos/s   campos rellenos: {coverage:.1f}/{len(SCHEMA_FIELDS)}")
@@ -0,0 +1,100 @@
+# src/benchmarks/path_service.py
+"""
+Mide el servicio de caminos (navigation/path_service.py) frente a llamar a networkx
+en cada comprobación, como hacía el panel de navegación (cuatro nx.has_path por
+rerun más la búsqueda del plan).
+
+Sobre el edificio sintético de benchmarks/hierarchy.py se mide, para un nodo
+actual y un objetivo fijos, el coste de un rerun con networkx y con el servicio ya
+caliente, el coste de construir el árbol la primera vez, y el coste de reparar los
+árboles en caché tras añadir aristas frente a reconstruirlos con el mismo BFS.
+
+    cd src && python -m benchmarks.path_service --nodes 1000 10000 50000
+"""
+import time
+import random
+import argparse
+
+import networkx as nx
+
+from mapping.graph_manager import add_node_to_graph, add_edge_to_graph
+from navigation.path_service import get_path_service, clear_path_cache, _bfs_tree
+from benchmarks.hierarchy import build_building, VIEWS_PER_ROOM, _node
+
+CHECKS_PER_RERUN = 4  # comprobaciones de alcanzabilidad del panel en cada rerun
+
+
+def _ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench(n_nodes: int, repeat: int = 20, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    graph, side = build_building(n_nodes, rng)
+    start, goal = _node(0, 0, 0), _node(side - 1, side - 1, VIEWS_PER_ROOM // 2)
+
+    def flat_rerun():
+        for _ in range(CHECKS_PER_RERUN):
+            nx.has_path(graph, start, goal)
+        nx.shortest_path(graph, start, goal)
+
+    paths = get_path_service(graph)
+
+    def cached_rerun():
+        for _ in range(CHECKS_PER_RERUN):
+            paths.has_path(start, goal)
+        paths.shortest_path(start, goal)
+
+    result = {"nodes": graph.number_of_nodes(), "flat_ms": _ms(flat_rerun, repeat)}
+    result["first_ms"] = _ms(lambda: (clear_path_cache(graph), get_path_service(graph).has_path(start, goal)), 3)
+    paths = get_path_service(graph)
+    paths.has_path(start, goal)
+    result["cached_ms"] = _ms(cached_rerun, repeat)
+
+    # Exploración: un nodo nuevo enlazado al mapa y, a veces, un atajo entre habitaciones
+    sources = [_node(rng.randrange(side), rng.randrange(side), 0) for _ in range(7)]
+    for source in sources:
+        paths.has_path(source, goal)
+    repair, rebuild, repaired = [], [], paths.repaired
+    for i in range(repeat):
+        node = f"Nueva_{i}"
+        anchor = _node(rng.randrange(side), rng.randrange(side), rng.randrange(VIEWS_PER_ROOM))
+        add_node_to_graph(graph, node, {"description": f"Vista nueva {i}"})
+        add_edge_to_graph(graph, anchor, node, "move_forward")
+        if i % 4 == 0:
+            add_edge_to_graph(graph, node, _node(rng.randrange(side), rng.randrange(side), 0), "go_through_door")
+        t0 = time.perf_counter()
+        paths.has_path(start, goal)
+        repair.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        for source in [start, *sources]:
+            _bfs_tree(graph, source)
+        rebuild.append((time.perf_counter() - t0) * 1000)
+    result["repair_ms"] = sum(repair) / len(repair)
+    result["rebuild_ms"] = sum(rebuild) / len(rebuild)
+    result["repaired"] = (paths.repaired - repaired) / repeat
+    result["trees"] = paths.stats()["trees"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.repeat)
+        print(f"--- {r['nodes']} nodos ---")
+        print(f"rerun del panel      nx {r['flat_ms']:.2f} ms   servicio {r['cached_ms']:.3f} ms "
+              f"({CHECKS_PER_RERUN} has_path + shortest_path)")
+        print(f"primer árbol         {r['first_ms']:.2f} ms")
+        print(f"tras añadir aristas  reparar {r['repair_ms']:.3f} ms   reconstruir {r['rebuild_ms']:.2f} ms "
+              f"({r['trees']} árboles, {r['repaired']:.0f} nodos actualizados por paso)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# src/benchmarks/place_index.py
+"""
+Mide el índice de reconocimiento de lugares (mapping/place_index.py): latencia de una
+consulta y de un lote de consultas frente a comparar los términos con todos los nodos
+en Python, y calidad de la fusión "mismo lugar".
+
+El mapa sintético tiene habitaciones de un tipo (cocina, dormitorio...) con objetos
+propios. Cada nodo indexado es una visita a una habitación; las consultas son otra
+visita a una habitación ya indexada (mismo lugar, otra descripción y otros objetos de
+la habitación) o a una habitación nueva del mismo tipo (no debe fusionarse).
+
+    cd src && python -m benchmarks.place_index --nodes 1000 10000 50000
+"""
+import math
+import time
+import random
+import argparse
+
+import numpy as np
+
+from mapping.place_index import PlaceIndex, observation_features, DEFAULT_MIN_SCORE
+
+ROOM_TYPES = ["kitchen", "bedroom", "bathroom", "living room", "office", "corridor", "garage", "dining room"]
+COLORS = ["red", "blue", "green", "white", "black", "grey", "yellow", "brown", "silver", "orange"]
+MATERIALS = ["wooden", "metal", "glass", "plastic", "leather", "fabric"]
+OBJECTS = ["cabinet", "chair", "table", "sofa", "fridge", "plant", "lamp", "shelf", "bed", "desk",
+           "painting", "rug", "mirror", "clock", "television", "bench", "stool", "printer", "sink", "oven"]
+OPENINGS = ["A view of the", "Looking into the", "Standing at the entrance of the", "Inside the"]
+
+
+def synthetic_room(rng):
+    objects = [f"{rng.choice(COLORS)} {rng.choice(MATERIALS)} {rng.choice(OBJECTS)}" for _ in range(6)]
+    return rng.choice(ROOM_TYPES), objects
+
+
+def synthetic_visit(rng, room, name):
+    """Observación (dict parseado) de una visita a ``room`` con el nombre que daría el LLM."""
+    room_type, objects = room
+    seen = rng.sample(objects, 4)
+    return {
+        "overall_scene_description": f"{rng.choice(OPENINGS)} {room_type} with a {seen[0]} and a {seen[1]}.",
+        "landmarks_and_suggested_node_name": {
+            "suggested_node_name": name,
+            "suggested_node_name_detailed": f"{room_type} near the {seen[2]}",
+        },
+        "identified_objects": [{"name": obj} for obj in seen] + [{"name": "wall"}, {"name": "door"}],
+    }
+
+
+def _cosine(a, b):
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    return dot / math.sqrt(sum(w * w for w in a.values()) * sum(w * w for w in b.values()))
+
+
+def bench(n_nodes: int, n_queries: int = 200, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    rooms = [synthetic_room(rng) for _ in range(n_nodes)]
+    index = PlaceIndex()
+    features = {}
+    for i, room in enumerate(rooms):
+        visit = synthetic_visit(rng, room, f"{room[0]} {i}")
+        index.add(i, visit)
+        features[i] = observation_features(visit)
+
+    revisits = [(rng.randrange(n_nodes), None) for _ in range(n_queries // 2)]
+    new_rooms = [(None, synthetic_room(rng)) for _ in range(n_queries - len(revisits))]
+    queries = [synthetic_visit(rng, rooms[i] if room is None else room, f"place {q}")
+               for q, (i, room) in enumerate(revisits + new_rooms)]
+
+    start = time.perf_counter()
+    for visit in queries[:20]:
+        query = observation_features(visit)
+        max(features, key=lambda node: _cosine(query, features[node]))
+    scan = (time.perf_counter() - start) / 20
+
+    start = time.perf_counter()
+    matches = [index.match(visit) for visit in queries]
+    single = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    vectors = np.stack([index.embed(visit) for visit in queries])
+    index.search_batch(vectors, top_k=5)
+    batch = (time.perf_counter() - start) / len(queries)
+
+    found = sum(1 for (i, _), m in zip(revisits, matches) if m is not None and m[0] == i)
+    false_merges = sum(1 for m in matches[len(revisits):] if m is not None)
+    return {
+        "scan_ms": scan * 1000, "single_ms": single * 1000, "batch_ms": batch * 1000,
+        "recall": found / len(revisits), "false_merges": false_merges / len(new_rooms),
+        "matrix_mb": index.memory_bytes() / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"umbral de fusión: {DEFAULT_MIN_SCORE}")
+    print(f"{'nodos':>7} {'python ms':>10} {'consulta ms':>12} {'lote ms/c':>10} "
+          f"{'aciertos':>9} {'fusiones falsas':>16} {'matriz MB':>10}")
+    for n_nodes in args.nodes:
+        r = bench(n_nodes, args.queries)
+        print(f"{n_nodes:>7} {r['scan_ms']:>10.2f} {r['single_ms']:>12.3f} {r['batch_ms']:>10.3f} "
+              f"{r['recall']:>9.0%} {r['false_merges']:>16.0%} {r['matrix_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# src/benchmarks/render_graph.py
+"""
+Mide la preparación del render (convert_nx_to_agraph) a medida que crece el mapa.
+
+Para cada tamaño se compara la conversión completa (caché vacío, equivalente a la
+implementación anterior), un rerun sin cambios y un rerun tras añadir un nodo y su
+arista, que es lo habitual entre interacciones.
+
+También se compara el payload que recibe el navegador en cada rerun (el JSON que
+serializa agraph) y el tiempo de conversión + serialización del grafo completo
+frente a la vista por niveles de detalle (convert_nx_to_agraph_lod) alrededor del
+último nodo.
+
+    cd src && python -m benchmarks.render_graph --nodes 100 1000 5000
+"""
+import json
+import time
+import random
+import argparse
+
+from mapping.graph_manager import (
+    initialize_graph, add_node_to_graph, add_edge_to_graph, convert_nx_to_agraph, get_render_stats,
+    clear_render_cache, convert_nx_to_agraph_lod
+)
+from mapping.hierarchy import get_hierarchy
+from mapping.observation import Observation
+from benchmarks.observation import synthetic_response
+
+
+def _node_data(rng, index):
+    observation = Observation.from_json(json.loads(synthetic_response(rng, index)))
+    return {"description": observation.description, "observation": observation}
+
+
+def _timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(n_nodes: int, repeat: int = 5, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    graph = initialize_graph()
+    for i in range(n_nodes):
+        add_node_to_graph(graph, f"Room_{i}", _node_data(rng, i))
+        if i:
+            add_edge_to_graph(graph, f"Room_{i - 1}", f"Room_{i}", "move_forward")
+    highlights = {"Room_0": "#FF0000"}
+
+    def cold():
+        clear_render_cache(graph)  # Caché vacío: se reconstruye todo
+        convert_nx_to_agraph(graph, highlights=highlights)
+
+    convert_nx_to_agraph(graph, highlights=highlights)
+    counter = [n_nodes]
+
+    def incremental():
+        i = counter[0]
+        counter[0] += 1
+        add_node_to_graph(graph, f"Room_{i}", _node_data(rng, i))
+        add_edge_to_graph(graph, f"Room_{i - 1}", f"Room_{i}", "move_forward")
+        convert_nx_to_agraph(graph, highlights={f"Room_{i}": "#FF0000"})
+
+    payload = {}
+
+    def render(convert):
+        agraph_nodes, agraph_edges = convert()
+        # Lo mismo que hace streamlit_agraph.agraph antes de enviar el grafo
+        payload["bytes"] = len(json.dumps({"nodes": [node.to_dict() for node in agraph_nodes],
+                                           "edges": [edge.to_dict() for edge in agraph_edges]}))
+        payload["items"] = len(agraph_nodes) + len(agraph_edges)
+
+    get_hierarchy(graph).refresh()
+    focus = (f"Room_{counter[0] - 1}",)
+    full_render_ms = _timed(lambda: render(lambda: convert_nx_to_agraph(graph, highlights=highlights)), repeat) * 1000
+    full_payload = dict(payload)
+    lod_render_ms = _timed(lambda: render(lambda: convert_nx_to_agraph_lod(graph, focus=focus)), repeat) * 1000
+
+    return {
+        "full_render_ms": full_render_ms, "full_kb": full_payload["bytes"] / 1024, "full_items": full_payload["items"],
+        "lod_render_ms": lod_render_ms, "lod_kb": payload["bytes"] / 1024, "lod_items": payload["items"],
+        "cold_ms": _timed(cold, repeat) * 1000,
+        "warm_ms": _timed(lambda: convert_nx_to_agraph(graph, highlights=highlights), repeat) * 1000,
+        "incremental_ms": _timed(incremental, repeat) * 1000,
+        "rebuilt": get_render_stats(graph)["rebuilt"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [(n_nodes, bench(n_nodes, args.repeat)) for n_nodes in args.nodes]
+    print(f"{'nodos':>7} {'completa ms':>12} {'sin cambios ms':>15} {'+1 nodo ms':>11} {'reconstruidos':>14}")
+    for n_nodes, result in results:
+        print(f"{n_nodes:>7} {result['cold_ms']:>12.2f} {result['warm_ms']:>15.2f} "
+              f"{result['incremental_ms']:>11.2f} {result['rebuilt']:>14}")
+    print()
+    print(f"{'nodos':>7} {'payload KB':>11} {'elementos':>10} {'render ms':>10}   "
+          f"{'LOD KB':>7} {'elementos':>10} {'render ms':>10}")
+    for n_nodes, result in results:
+        print(f"{n_nodes:>7} {result['full_kb']:>11.0f} {result['full_items']:>10} {result['full_render_ms']:>10.1f}   "
+              f"{result['lod_kb']:>7.0f} {result['lod_items']:>10} {result['lod_render_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# src/benchmarks/session_store.py
+"""
+Compara el guardado JSON anterior (json.dumps(indent=2) de todo el estado) con el
+formato binario de mapping/session_store.py: tamaño, tiempo de un guardado tras
+añadir un nodo (completo en JSON, incremental con el diario) y tiempo de carga.
+
+    cd src && python -m benchmarks.session_store --nodes 500 2000 10000
+"""
+import json
+import time
+import random
+import argparse
+import tempfile
+
+from mapping.graph_manager import (
+    initialize_graph, add_node_to_graph, add_edge_to_graph, graph_to_node_link, graph_from_node_link
+)
+from mapping.observation import Observation
+from mapping.session_store import SessionStore, dumps_snapshot
+from benchmarks.observation import synthetic_response
+
+
+def _add_step(graph, fields, rng, i):
+    """Un paso de exploración: nodo analizado, arista desde el anterior y acción."""
+    node_id = f"Room_{i}"
+    images = {"center": "blob:" + format(rng.getrandbits(256), "064x")}
+    add_node_to_graph(graph, node_id, {
+        "description": f"Vista {i}",
+        "images": images,
+        "observation": Observation.from_json(json.loads(synthetic_response(rng, i))),
+        "input_mode": "Vista Única (Centro)",
+        "view_hashes": {"center": format(rng.getrandbits(64), "016x")},
+        "timestamp": 1.7e9 + i,
+    })
+    if i:
+        add_edge_to_graph(graph, f"Room_{i - 1}", node_id, "move_forward")
+    fields["action_history"].append("move_forward")
+    fields["analyzed_images"].append((node_id, images))
+    fields["current_node"] = node_id
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench(n_nodes: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    graph = initialize_graph()
+    fields = {"action_history": [], "analyzed_images": [], "current_node": None, "navigation_goal": "cocina"}
+    for i in range(n_nodes):
+        _add_step(graph, fields, rng, i)
+
+    store = SessionStore(tempfile.mkdtemp(prefix="session_bench_"))
+    store.save(fields, graph)  # instantánea inicial
+    _add_step(graph, fields, rng, n_nodes)
+
+    json_text, json_save = _timed(lambda: json.dumps({"graph": graph_to_node_link(graph), **fields}, indent=2))
+    append, append_save = _timed(lambda: store.save(fields, graph))
+    snapshot, snapshot_save = _timed(lambda: dumps_snapshot({"graph": graph_to_node_link(graph), **fields}))
+    _, json_load = _timed(lambda: graph_from_node_link(json.loads(json_text)["graph"]))
+    _, store_load = _timed(lambda: SessionStore(store.session_dir).load())
+
+    return {
+        "json_kb": len(json_text.encode("utf-8")) / 1024, "snapshot_kb": len(snapshot) / 1024,
+        "append_kb": append["bytes"] / 1024,
+        "json_save_ms": json_save * 1000, "snapshot_save_ms": snapshot_save * 1000,
+        "append_save_ms": append_save * 1000,
+        "json_load_ms": json_load * 1000, "store_load_ms": store_load * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[500, 2000, 10000])
+    args = parser.parse_args()
+
+    for n_nodes in args.nodes:
+        r = bench(n_nodes)
+        print(f"--- {n_nodes} nodos ---")
+        print(f"tamaño            JSON {r['json_kb']:9.0f} KB   instantánea {r['snapshot_kb']:7.0f} KB   "
+              f"diario (+1 nodo) {r['append_kb']:.1f} KB")
+        print(f"guardar (+1 nodo) JSON {r['json_save_ms']:9.1f} ms   instantánea {r['snapshot_save_ms']:7.1f} ms   "
+              f"incremental {r['append_save_ms']:.2f} ms")
+        print(f"cargar            JSON {r['json_load_ms']:9.1f} ms   instantánea + diario {r['store_load_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
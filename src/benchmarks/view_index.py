@@ -0,0 +1,71 @@
+# src/benchmarks/view_index.py
+"""
+Mide la búsqueda de vistas casi duplicadas en mapping.view_index con mapas grandes.
+
+Se indexan N nodos con hashes aleatorios y se consulta con vistas a pocos bits de
+un nodo existente (acierto) y con vistas aleatorias (fallo).
+
+    cd src && python -m benchmarks.view_index --nodes 1000 10000 --queries 2000
+"""
+import time
+import random
+import argparse
+
+from mapping.view_index import ViewIndex
+
+POSITION_SETS = [("center",), ("center", "left", "right")]
+
+
+def _random_view(rng, positions):
+    return {p: format(rng.getrandbits(64), "016x") for p in positions}
+
+
+def _flip_bits(view, rng, bits):
+    flipped = {}
+    for position, value in view.items():
+        number = int(value, 16)
+        for bit in rng.sample(range(64), bits):
+            number ^= 1 << bit
+        flipped[position] = format(number, "016x")
+    return flipped
+
+
+def bench_lookup(n_nodes: int, n_queries: int = 2000, seed: int = 0) -> dict:
+    """Devuelve tiempos medio y p99 (µs) de lookup con ``n_nodes`` nodos indexados."""
+    rng = random.Random(seed)
+    index = ViewIndex()
+    views = []
+    for i in range(n_nodes):
+        view = _random_view(rng, POSITION_SETS[i % len(POSITION_SETS)])
+        index.add(f"Nodo_{i}", view)
+        views.append(view)
+
+    timings, hits = [], 0
+    for q in range(n_queries):
+        if q % 2 == 0:
+            query = _flip_bits(views[rng.randrange(n_nodes)], rng, 3)
+        else:
+            query = _random_view(rng, POSITION_SETS[q % len(POSITION_SETS)])
+        started = time.perf_counter()
+        match = index.lookup(query)
+        timings.append((time.perf_counter() - started) * 1e6)
+        hits += match is not None
+    timings.sort()
+    return {
+        "nodes": n_nodes,
+        "mean_us": sum(timings) / len(timings),
+        "p99_us": timings[int(0.99 * (len(timings) - 1))],
+        "hit_rate": hits / n_queries,
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark del índice de vistas casi duplicadas")
+    arg_parser.add_argument("--nodes", type=int, nargs="*", default=[100, 1000, 10000])
+    arg_parser.add_argument("--queries", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    print(f"{'nodos':>8s} {'media µs':>10s} {'p99 µs':>10s} {'aciertos':>9s}")
+    for n in args.nodes:
+        result = bench_lookup(n, args.queries)
+        print(f"{result['nodes']:8d} {result['mean_us']:10.1f} {result['p99_us']:10.1f} {result['hit_rate']:9.0%}")
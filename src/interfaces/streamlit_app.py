@@ -3,14 +3,13 @@
 import streamlit as st
 import time
 import base64
-from PIL import Image
-import io # Needed for handling image bytes if PIL is used for validation/preview
 import os
 import sys
 import json
 import re
 import networkx as nx
-from networkx.readwrite import json_graph
+# Heavy or rarely used modules (Pillow, networkx.readwrite, the OpenAI SDK) are imported
+# on first use so cold start and each script rerun stay cheap.
 
 # --- Path Setup ---
 # Adjust path if necessary to find custom modules
@@ -20,14 +19,29 @@ try:
         sys.path.insert(0, src_path)
 
     # --- Import Custom Modules ---
-    from api.gpt_client import analyze_image_with_gpt # Expects the modified version
+    from api.gpt_client import analyze_image_with_gpt, stream_image_analysis, get_last_preprocess_report # Expects the modified version
+    from api.gpt_client import get_last_cascade_report
+    from api.cascade import get_cascade_stats
+    from api.gpt_client import LLMError, get_circuit_breaker, get_single_flight
+    from api.response_cache import get_response_cache
+    from api.telemetry import get_telemetry
     from utils.prompts import navigation_prompt, formatting_prompt # Expects the modified navigation_prompt
     from utils.parsing_llm_response import parse_raw_text_to_json # Assumed function exists
+    from utils.json_repair import repair_json
+    from utils.response_validation import NAVIGATION_SCHEMA, fill_navigation_defaults
     from navigation.planer import generate_navigation_plan # Assumed function exists
+    from navigation.path_service import get_path_service
     from mapping.graph_manager import (
         initialize_graph, add_node_to_graph, add_edge_to_graph,
-        convert_nx_to_agraph, get_node_data, update_node_data
+        convert_nx_to_agraph, get_node_data, update_node_data,
+        get_node_observation, graph_to_node_link, graph_from_node_link,
+        convert_nx_to_agraph_lod, parse_cluster_id, LOD_MIN_NODES, LOD_DEFAULT_HOPS
     )
+    from mapping.observation import Observation
+    from mapping.blob_store import get_blob_store, externalize_images, image_for_display
+    from mapping.session_store import SessionStore, DEFAULT_SESSION_DIR, dumps_snapshot, loads_state
+    from mapping.map_store import open_map_store, new_map_id, list_maps
+    from mapping.hierarchy import get_hierarchy
     from streamlit_agraph import agraph, Node, Edge, Config # Ensure streamlit_agraph is installed
 except ImportError as e:
     st.error(f"Error importing required modules: {e}")
@@ -45,9 +59,102 @@ def safe_rerun():
     except Exception as e:
         st.warning(f"No se pudo reiniciar la app automáticamente: {e}")
 
+def get_view_index():
+    """Perceptual-hash index of the graph's node views (numpy/Pillow load on first use)."""
+    if st.session_state.view_index is None:
+        from mapping.view_index import ViewIndex
+        st.session_state.view_index = ViewIndex.from_graph(st.session_state.graph)
+    return st.session_state.view_index
+
+def get_object_index():
+    """Inverted index object/obstacle/landmark term -> nodes; built lazily from the graph."""
+    if st.session_state.object_index is None:
+        from mapping.object_index import ObjectIndex
+        st.session_state.object_index = ObjectIndex.from_graph(st.session_state.graph)
+    return st.session_state.object_index
+
+def get_place_index():
+    """Place-recognition index (hashed text vectors of each node's analysis); built lazily from the graph."""
+    if st.session_state.place_index is None:
+        from mapping.place_index import PlaceIndex
+        st.session_state.place_index = PlaceIndex.from_graph(st.session_state.graph)
+    return st.session_state.place_index
+
+def show_image(source, caption=None, **kwargs):
+    """st.image for any stored image source; blob references are read from disk only here."""
+    image = image_for_display(source)
+    if image is None:
+        st.caption(f"{caption or 'Imagen'}: no disponible")
+        return
+    st.image(image, caption=caption, **kwargs)
+
+def store_image_source(image_data):
+    """Keeps the image bytes once in the blob store and returns the reference held in session state."""
+    try:
+        return get_blob_store().put_source(image_data)
+    except OSError as e:
+        st.warning(f"No se pudo guardar la imagen en el almacén local, se mantiene en memoria: {e}", icon="⚠️")
+        return image_data
+
+def graph_highlights():
+    """Highlight colors for convert_nx_to_agraph: current node in red, clicked node in green."""
+    highlights = {}
+    if st.session_state.current_node:
+        highlights[st.session_state.current_node] = "#FF0000"
+    if st.session_state.clicked_node_id:
+        highlights[st.session_state.clicked_node_id] = "#00FF00" # Clicked wins over current
+    return highlights
+
+def graph_render_items():
+    """Node/Edge lists for agraph, built once per rerun: the whole graph, or a level-of-detail view for large maps."""
+    graph = st.session_state.graph
+    start = time.perf_counter()
+    # Only new nodes and their surroundings are laid out; positions are stored as node attributes
+    layout_ms = 0.0
+    if st.session_state.use_server_layout:
+        from mapping.layout import get_layout # numpy loads on first use, not at startup
+        layout_ms = get_layout(graph).update()["ms"]
+    lod = st.session_state.graph_lod and graph.number_of_nodes() > LOD_MIN_NODES
+    if lod:
+        agraph_nodes, agraph_edges = convert_nx_to_agraph_lod(
+            graph, focus=(st.session_state.current_node, st.session_state.clicked_node_id),
+            hops=st.session_state.graph_lod_hops, expanded=st.session_state.graph_expanded_clusters,
+            highlights=graph_highlights())
+    else:
+        agraph_nodes, agraph_edges = convert_nx_to_agraph(graph, highlights=graph_highlights())
+    # Same serialization agraph does; measured here since every agraph call sends it again
+    payload_bytes = len(json.dumps({"nodes": [node.to_dict() for node in agraph_nodes],
+                                    "edges": [edge.to_dict() for edge in agraph_edges]}))
+    st.session_state.render_metrics = {
+        "lod": lod, "nodes": len(agraph_nodes), "edges": len(agraph_edges), "payload_bytes": payload_bytes,
+        "convert_ms": (time.perf_counter() - start) * 1000, "layout_ms": layout_ms, "agraph_ms": 0.0, "agraph_calls": 0,
+    }
+    return agraph_nodes, agraph_edges
+
+def show_agraph(agraph_nodes, agraph_edges, config):
+    """Draws the graph and times it. A click on a room/zone super-node expands it; returns the clicked graph node, if any."""
+    start = time.perf_counter()
+    clicked = agraph(nodes=agraph_nodes, edges=agraph_edges, config=config)
+    metrics = st.session_state.render_metrics
+    metrics["agraph_ms"] += (time.perf_counter() - start) * 1000
+    metrics["agraph_calls"] += 1
+    if clicked and parse_cluster_id(clicked):
+        if clicked not in st.session_state.graph_expanded_clusters:
+            st.session_state.graph_expanded_clusters.add(clicked)
+            safe_rerun()
+        return None
+    return clicked
+
 # --- Session State Initialization ---
 if 'graph' not in st.session_state:
+    # Each session writes through to its own SQLite map (mapping/map_store.py); stored maps
+    # are only reopened when chosen in the sidebar. map_store is None when MAP_DIR is empty
     st.session_state.graph = initialize_graph()
+    st.session_state.map_id = new_map_id()
+    st.session_state.map_store = open_map_store(st.session_state.map_id)
+    st.session_state.map_reopened = False # True while the session writes to a map chosen in the sidebar
+    if st.session_state.map_store is not None:
+        st.session_state.map_store.attach(st.session_state.graph)
 if 'current_description' not in st.session_state:
     st.session_state.current_description = ""
 if 'navigation_goal' not in st.session_state:
@@ -66,6 +173,56 @@ if 'suggested_action' not in st.session_state: # May be deprecated if actions ar
     st.session_state.suggested_action = ""
 if 'use_formatter' not in st.session_state:
     st.session_state.use_formatter = False
+if 'use_llm_cache' not in st.session_state: # Read LLM responses from the on-disk cache
+    st.session_state.use_llm_cache = True
+if 'use_streaming' not in st.session_state: # Render first JSON fields while the LLM is still answering
+    st.session_state.use_streaming = True
+if 'last_json_repairs' not in st.session_state: # Fixes applied by the local JSON repair to the last response
+    st.session_state.last_json_repairs = None
+if 'use_cascade' not in st.session_state: # Try a cheaper vision model first, escalate to gpt-4o if needed
+    st.session_state.use_cascade = False
+if 'last_cascade_report' not in st.session_state:
+    st.session_state.last_cascade_report = None
+if 'last_time_to_first_field' not in st.session_state:
+    st.session_state.last_time_to_first_field = None
+if 'show_graph_debug' not in st.session_state: # Dump agraph nodes/edges as JSON (slow on big graphs)
+    st.session_state.show_graph_debug = False
+if 'graph_lod' not in st.session_state: # Level-of-detail rendering once the map exceeds LOD_MIN_NODES nodes
+    st.session_state.graph_lod = True
+if 'graph_lod_hops' not in st.session_state: # Neighborhood drawn in full around the current/clicked node
+    st.session_state.graph_lod_hops = LOD_DEFAULT_HOPS
+if 'graph_expanded_clusters' not in st.session_state: # Room/zone super-nodes opened by clicking them
+    st.session_state.graph_expanded_clusters = set()
+if 'use_server_layout' not in st.session_state: # Fixed node positions from mapping/layout.py, physics off in the browser
+    st.session_state.use_server_layout = True
+if 'render_metrics' not in st.session_state: # Payload size and time of the graph render in the last rerun
+    st.session_state.render_metrics = {}
+if 'last_preprocess_report' not in st.session_state: # Bytes/tokens saved by image preprocessing in the last analysis
+    st.session_state.last_preprocess_report = None
+if 'use_view_dedup' not in st.session_state: # Reuse a node's analysis when the new view is a near-duplicate
+    st.session_state.use_view_dedup = True
+if 'view_dedup_distance' not in st.session_state: # Max Hamming distance (of 64 bits) between view hashes
+    st.session_state.view_dedup_distance = 6
+if 'view_index' not in st.session_state: # Perceptual-hash index of node views; built lazily from the graph
+    st.session_state.view_index = None
+if 'last_view_dedup' not in st.session_state: # (node_id, distance) reused by the last analysis, if any
+    st.session_state.last_view_dedup = None
+if 'use_object_links' not in st.session_state: # Auto-link new nodes to nodes sharing distinctive objects
+    st.session_state.use_object_links = False
+if 'object_link_min_score' not in st.session_state: # Min TF-IDF cosine similarity to propose a link
+    st.session_state.object_link_min_score = 0.35
+if 'object_index' not in st.session_state: # Inverted object index of the graph; built lazily from the nodes
+    st.session_state.object_index = None
+if 'last_object_links' not in st.session_state: # [(node_id, score, shared_terms)] found by the last analysis
+    st.session_state.last_object_links = []
+if 'use_place_merge' not in st.session_state: # Merge a new analysis into the known node recognized as the same place
+    st.session_state.use_place_merge = False
+if 'place_merge_min_score' not in st.session_state: # Min cosine similarity to consider two analyses the same place
+    st.session_state.place_merge_min_score = 0.65
+if 'place_index' not in st.session_state: # Place-recognition index of the graph; built lazily from the nodes
+    st.session_state.place_index = None
+if 'last_place_match' not in st.session_state: # (suggested_name, node_id, score, merged) found by the last analysis
+    st.session_state.last_place_match = None
 if 'timer_start' not in st.session_state: # Used for auto-action selection timeout
     st.session_state.timer_start = None
 if 'selected_action' not in st.session_state: # Action chosen by user or timer
@@ -76,25 +233,66 @@ if 'clicked_node_id' not in st.session_state: # Node ID selected from graph prev
 if 'input_mode' not in st.session_state:
     st.session_state.input_mode = "Vista Única (Centro)" # Default mode: "Vista Única (Centro)" or "Vista Panorámica (Izq, Centro, Der)"
 if 'current_images' not in st.session_state:
-    # Stores the image data (URL/base64) currently loaded in the UI input widgets
+    # Stores the images currently loaded in the UI input widgets (http URL or 'blob:' reference)
     st.session_state.current_images = {'left': None, 'center': None, 'right': None}
+if 'session_store' not in st.session_state: # Binary snapshot + append-only journal on disk (mapping/session_store.py)
+    st.session_state.session_store = SessionStore(os.getenv("SESSION_DIR", DEFAULT_SESSION_DIR))
 if 'analyzed_images' not in st.session_state:
     # Stores history of analyses performed.
-    # Structure: list of tuples: (node_id, {'left': img_data, 'center': img_data, 'right': img_data})
+    # Structure: list of tuples: (node_id, {'left': img_ref, 'center': img_ref, 'right': img_ref})
     st.session_state.analyzed_images = []
 
 # --- State Save/Load Functions ---
+def store_session_map(new_map=True):
+    """
+    Writes the session graph to its SQLite map (if enabled) and every later change through to it.
+    With ``new_map`` a new map is started and the previous one is left untouched on disk (it can
+    be reopened from the sidebar); otherwise the session's current map is overwritten.
+    """
+    if new_map:
+        st.session_state.map_id = new_map_id()
+        st.session_state.map_store = open_map_store(st.session_state.map_id)
+        st.session_state.map_reopened = False
+    map_store = st.session_state.map_store
+    if map_store is None:
+        return
+    map_store.replace_graph(st.session_state.graph, st.session_state.action_history)
+    map_store.attach(st.session_state.graph)
+
+def open_map(map_id):
+    """Switches the session to the stored map ``map_id``; later changes are written through to it."""
+    map_store = open_map_store(map_id)
+    st.session_state.map_id, st.session_state.map_store = map_id, map_store
+    st.session_state.map_reopened = True
+    st.session_state.graph = map_store.load_graph()
+    map_store.attach(st.session_state.graph)
+    st.session_state.action_history = map_store.actions()
+    # Continue from the last node added to the map
+    st.session_state.current_node = next(reversed(list(st.session_state.graph.nodes())), None)
+    st.session_state.clicked_node_id = None
+    st.session_state.navigation_plan = ""
+    st.session_state.selected_action = None
+    st.session_state.analyzed_images = []
+    # Indexes are rebuilt from the nodes on the next analysis
+    st.session_state.view_index = None
+    st.session_state.object_index = None
+    st.session_state.last_object_links = []
+    st.session_state.place_index = None
+    st.session_state.graph_expanded_clusters = set()
+    st.session_state.last_place_match = None
+
 def save_state():
     """Serializes the current session state for saving."""
-    # Convert graph to serializable format
-    graph_data = json_graph.node_link_data(st.session_state.graph)
-    # Prepare images: optionally replace large base64 with placeholders if needed
-    # For simplicity, we save them as is for now.
+    # Convert graph to serializable format (node observations become 'llm_json' dicts)
+    return {"graph": graph_to_node_link(st.session_state.graph), **session_fields()}
+
+def session_fields():
+    """Session state to save, except the graph (the session store journals graph mutations itself)."""
+    # Images are 'blob:<sha256>' references into mapping/blob_store.py (data/blobs), not base64
     serializable_analyzed_images = st.session_state.analyzed_images
     serializable_current_images = st.session_state.current_images
 
     state = {
-         "graph": graph_data,
          "current_description": st.session_state.current_description,
          "current_images": serializable_current_images, # Save dict of current UI images
          "input_mode": st.session_state.input_mode, # Save input mode
@@ -116,9 +314,16 @@ def save_state():
 def load_state(state):
     """Loads the application state from a dictionary."""
     try:
-        st.session_state.graph = json_graph.node_link_graph(state["graph"])
+        # SessionStore.load() returns the graph already rebuilt; files carry node_link_data
+        graph = state["graph"]
+        st.session_state.graph = graph_from_node_link(graph) if isinstance(graph, dict) else graph
+        # States saved before the blob store carry base64 images: move them to the store
+        for _, node_data in st.session_state.graph.nodes(data=True):
+            if node_data.get("images"):
+                node_data["images"] = externalize_images(node_data["images"])
         st.session_state.current_description = state.get("current_description", "")
-        st.session_state.current_images = state.get("current_images", {'left': None, 'center': None, 'right': None})
+        st.session_state.current_images = externalize_images(
+            state.get("current_images", {'left': None, 'center': None, 'right': None}))
         st.session_state.input_mode = state.get("input_mode", "Vista Única (Centro)")
         st.session_state.navigation_goal = state.get("navigation_goal", "")
         st.session_state.current_node = state.get("current_node", None)
@@ -127,12 +332,22 @@ def load_state(state):
         st.session_state.action_history = state.get("action_history", [])
         st.session_state.llm_components = state.get("llm_components", {})
         st.session_state.suggested_action = state.get("suggested_action", "")
-        st.session_state.analyzed_images = state.get("analyzed_images", [])
+        st.session_state.analyzed_images = [(node_id, externalize_images(images))
+                                            for node_id, images in state.get("analyzed_images", [])]
         st.session_state.use_formatter = state.get("use_formatter", False)
         st.session_state.selected_action = state.get("selected_action", None)
         st.session_state.clicked_node_id = state.get("clicked_node_id", None)
+        # The loaded graph replaces the session's own map, so repeated loads don't leave
+        # orphan map files; a map reopened from the sidebar is kept and a new one is started
+        store_session_map(new_map=st.session_state.get("map_reopened", False))
         # Reset transient states
         st.session_state.timer_start = None
+        st.session_state.view_index = None # Rebuilt from the nodes' view_hashes on next analysis
+        st.session_state.object_index = None # Rebuilt from the nodes' observations on next analysis
+        st.session_state.last_object_links = []
+        st.session_state.place_index = None
+        st.session_state.graph_expanded_clusters = set()
+        st.session_state.last_place_match = None
         st.sidebar.success("Estado cargado exitosamente.")
     except Exception as e:
         st.sidebar.error(f"Error al cargar el estado: {e}")
@@ -141,24 +356,59 @@ def load_state(state):
 
 # --- Sidebar: Save/Load State ---
 st.sidebar.header("Guardar / Cargar Estado")
+session_store = st.session_state.session_store
+if st.session_state.map_store is not None:
+    # A failed write-through leaves the map out of sync; it is rewritten from the graph once SQLite recovers
+    if not st.session_state.map_store.resync():
+        st.sidebar.warning(f"El mapa persistente no está al día ({st.session_state.map_store.last_error}); "
+                           "se reescribirá desde el grafo en cuanto se pueda escribir.", icon="⚠️")
+    map_stats = st.session_state.map_store.stats()
+    st.sidebar.caption(f"Mapa persistente (SQLite) `{st.session_state.map_id}`: {map_stats['nodes']} nodos, "
+                       f"{map_stats['edges']} aristas, {map_stats['bytes'] / 1024:.0f} KB")
+    saved_maps = [saved for saved in list_maps() if saved[0] != st.session_state.map_id]
+    if saved_maps:
+        chosen_map = st.sidebar.selectbox(
+            "Mapas guardados", saved_maps, index=None, placeholder="Elige un mapa para abrirlo",
+            format_func=lambda saved: f"{saved[0]} ({saved[1]} nodos, {time.strftime('%d/%m %H:%M', time.localtime(saved[2]))})")
+        if chosen_map and st.sidebar.button("Abrir Mapa", help="Sustituye el grafo de esta sesión por el mapa elegido."):
+            try:
+                open_map(chosen_map[0])
+                safe_rerun()
+            except Exception as e:
+                st.sidebar.error(f"Error al abrir el mapa: {e}")
 if st.sidebar.button("Guardar Estado"):
     try:
-        state_to_save = save_state()
-        state_json = json.dumps(state_to_save, indent=2)
+        # Only the changes since the last save are appended, unless a new snapshot is due
+        save_result = session_store.save(session_fields(), st.session_state.graph)
+        if save_result["mode"] == "snapshot":
+            st.sidebar.success(f"Instantánea guardada ({save_result['bytes'] / 1024:.1f} KB).")
+        else:
+            st.sidebar.success(f"Cambios guardados: {save_result['records']} registros "
+                               f"({save_result['bytes'] / 1024:.1f} KB).")
+    except Exception as e:
+        st.sidebar.error(f"Error al guardar el estado: {e}")
+if session_store.exists() and st.sidebar.button("Cargar Última Sesión Guardada"):
+    try:
+        load_state(session_store.load())
+        safe_rerun()
+    except Exception as e:
+        st.sidebar.error(f"Error al cargar la sesión guardada: {e}")
+if st.sidebar.button("Exportar Estado"):
+    try:
         st.sidebar.download_button(
-            label="Descargar Estado (JSON)",
-            data=state_json,
-            file_name="estado_navegacion_robotica.json",
-            mime="application/json"
+            label="Descargar Estado (.navsnap)",
+            data=dumps_snapshot(save_state()),
+            file_name="estado_navegacion_robotica.navsnap",
+            mime="application/octet-stream"
         )
-        st.sidebar.success("Estado listo para descargar.")
     except Exception as e:
         st.sidebar.error(f"Error al preparar el estado para guardar: {e}")
 
-uploaded_state_file = st.sidebar.file_uploader("Cargar Estado Guardado (JSON)", type="json")
+# Binary snapshots and the JSON files of earlier versions
+uploaded_state_file = st.sidebar.file_uploader("Cargar Estado Guardado", type=["navsnap", "json"])
 if uploaded_state_file is not None:
     try:
-        state_data = json.load(uploaded_state_file)
+        state_data = loads_state(uploaded_state_file.getvalue())
         load_state(state_data)
         # Rerun after loading to reflect the new state in the UI
         safe_rerun()
@@ -167,6 +417,76 @@ if uploaded_state_file is not None:
     except Exception as e:
         st.sidebar.error(f"Error al procesar el archivo de estado: {e}")
 
+# --- Sidebar: LLM Response Cache ---
+with st.sidebar.expander("Caché de Respuestas LLM"):
+    cache_stats = get_response_cache().stats()
+    st.caption(
+        f"Aciertos: {cache_stats['hits']} | Fallos: {cache_stats['misses']} | "
+        f"Tasa: {cache_stats['hit_rate']:.0%}"
+    )
+    st.caption(f"Entradas: {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KB)")
+    if st.button("Vaciar Caché"):
+        get_response_cache().clear()
+        st.success("Caché vaciada.")
+    vision_breaker = get_circuit_breaker("vision")
+    if vision_breaker.state != vision_breaker.CLOSED:
+        st.warning(f"Circuito LLM de visión: {vision_breaker.state} ({vision_breaker.consecutive_failures} fallos seguidos)")
+
+# --- Sidebar: LLM Telemetry ---
+with st.sidebar.expander("Diagnóstico LLM"):
+    telemetry = get_telemetry()
+    telemetry_summary = telemetry.summary()
+    if not telemetry_summary:
+        st.caption("Sin llamadas registradas todavía.")
+    for call_kind, kind_stats in telemetry_summary.items():
+        hit_rate = kind_stats["cache_hit_rate"]
+        st.markdown(f"**{call_kind}**: {kind_stats['calls']} llamadas, {kind_stats['errors']} errores, "
+                    f"{kind_stats['coalesced']} agrupadas"
+                    + (f", caché {hit_rate:.0%}" if hit_rate is not None else ""))
+        st.caption(
+            "Latencia p50/p95: "
+            + " / ".join(f"{v:.2f}s" if v is not None else "-" for v in (kind_stats["latency_p50"], kind_stats["latency_p95"]))
+            + (f" | TTFT p50: {kind_stats['ttft_p50']:.2f}s" if kind_stats["ttft_p50"] is not None else "")
+        )
+        st.caption(
+            f"Tokens: {kind_stats['tokens']} | Enviado: {kind_stats['payload_bytes'] / 1024:.0f} KB "
+            f"(p95 {(kind_stats['payload_bytes_p95'] or 0) / 1024:.0f} KB/llamada)"
+        )
+    cascade_summary = get_cascade_stats().summary()
+    if cascade_summary:
+        st.markdown("**Cascada de modelos**")
+        for tier_model, tier_stats in cascade_summary.items():
+            st.caption(
+                f"{tier_model}: {tier_stats['accepted']}/{tier_stats['attempts']} aceptadas "
+                f"({tier_stats['hit_rate']:.0%}), p50 {tier_stats['latency_p50']:.2f}s, p95 {tier_stats['latency_p95']:.2f}s"
+                + (" | escalado por: " + ", ".join(f"{issue} ({count})" for issue, count in tier_stats["top_issues"])
+                   if tier_stats["top_issues"] else "")
+            )
+    flight_stats = get_single_flight().stats()
+    if flight_stats["coalesced"]:
+        st.caption(f"Llamadas duplicadas agrupadas: {flight_stats['coalesced']} "
+                   f"({flight_stats['coalesced_rate']:.0%}) | En curso: {flight_stats['in_flight']}")
+    if telemetry.records:
+        st.download_button("Descargar Telemetría (JSONL)", telemetry.to_jsonl(),
+                           file_name="llm_telemetry.jsonl", mime="application/x-ndjson")
+
+st.session_state.show_graph_debug = st.sidebar.checkbox("Mostrar depuración del grafo (lento)", st.session_state.show_graph_debug)
+
+# --- Sidebar: Graph Rendering ---
+with st.sidebar.expander("Visualización del Grafo"):
+    st.session_state.use_server_layout = st.checkbox(
+        "Posiciones calculadas en el servidor", st.session_state.use_server_layout,
+        help="Los nodos nuevos se colocan junto a su predecesor y solo se reajusta su entorno; el navegador "
+             "dibuja posiciones fijas sin simular la física.")
+    st.session_state.graph_lod = st.checkbox(
+        f"Nivel de detalle en mapas grandes (más de {LOD_MIN_NODES} nodos)", st.session_state.graph_lod,
+        help="Solo se dibuja entero el entorno del nodo actual y del seleccionado; el resto se agrupa en "
+             "habitaciones y zonas que se abren al hacer clic.")
+    st.session_state.graph_lod_hops = st.slider("Saltos alrededor del nodo actual/seleccionado", 1, 5,
+                                                st.session_state.graph_lod_hops)
+    if st.session_state.graph_expanded_clusters and st.button("Contraer grupos abiertos"):
+        st.session_state.graph_expanded_clusters = set()
+
 # --- LLM Response Handling Functions ---
 # Assume these functions are correctly implemented or imported
 def format_llm_response(raw_response):
@@ -180,6 +500,7 @@ def format_llm_response(raw_response):
 
 def extract_llm_components(llm_response):
     """ Attempts to parse the LLM response string into a JSON object. """
+    st.session_state.last_json_repairs = None
     try:
         # Try direct JSON parsing first (assuming LLM follows instructions)
         parsed = json.loads(llm_response)
@@ -202,6 +523,15 @@ def extract_llm_components(llm_response):
             except json.JSONDecodeError as nested_err:
                  st.warning(f"Fallo el parseo JSON del bloque extraído: {nested_err}")
 
+        # Local repair (unclosed brackets/quotes, trailing commas, comments, truncation) before raw text
+        repaired, repair_fixes = repair_json(llm_response)
+        if isinstance(repaired, dict) and any(key in repaired for key in NAVIGATION_SCHEMA):
+            added_keys = fill_navigation_defaults(repaired)
+            st.session_state.last_json_repairs = {"fixes": repair_fixes, "added_keys": added_keys}
+            st.info(f"JSON reparado localmente ({', '.join(repair_fixes) or 'sin cambios'})"
+                    + (f"; claves ausentes completadas: {', '.join(added_keys)}" if added_keys else ""))
+            return repaired
+
         # Fallback to raw text parsing if direct/regex fails (using provided function)
         st.info("Intentando parseo de texto crudo como último recurso.")
         try:
@@ -221,13 +551,31 @@ def extract_llm_components(llm_response):
          return None
 
 # --- Graph Interaction Functions ---
-def connect_nodes_by_common_objects(graph, new_node_name, new_llm_components):
-    """Adds edges between nodes if they share common identified objects."""
-    # Placeholder: Implement robust object comparison logic if needed.
-    # Current implementation relies on LLM suggesting connections or user actions.
-    # This function could be enhanced to automatically suggest connections based on object overlap.
-    st.info("`connect_nodes_by_common_objects` - Lógica de conexión automática no implementada activamente.")
-    pass # Add logic here if desired
+def connect_nodes_by_common_objects(graph, new_node_name, new_llm_components, exclude=()):
+    """
+    Indexes the node's objects/obstacles/landmarks and finds the nodes sharing the most
+    distinctive ones (TF-IDF cosine over the inverted index, see mapping/object_index.py).
+    Edges in both directions are only added when auto-linking is enabled; the candidates
+    are always returned and kept in session state as suggestions.
+    """
+    index = get_object_index()
+    index.add(new_node_name, new_llm_components)
+    candidates = index.candidates(
+        new_node_name, top_k=3, min_score=st.session_state.object_link_min_score, exclude=exclude
+    )
+    st.session_state.last_object_links = candidates
+    if not st.session_state.use_object_links:
+        return candidates
+    for other_node, score, shared_terms in candidates:
+        added = False
+        for source, target in ((new_node_name, other_node), (other_node, new_node_name)):
+            if not graph.has_edge(source, target):
+                add_edge_to_graph(graph, source, target, "common_objects")
+                added = True
+        if added:
+            st.info(f"Conexión por objetos comunes: '{new_node_name}' <-> '{other_node}' "
+                    f"({score:.2f}: {', '.join(shared_terms[:3])})")
+    return candidates
 
 def check_goal_reached(llm_response_text, current_node_id, navigation_goal):
     """Checks if the LLM response or current node indicates goal achievement."""
@@ -286,14 +634,25 @@ def get_image_input(label, key_suffix):
                     return None
 
                 image_bytes = uploaded_file.getvalue()
-                # Determine mime type
-                mime_type = uploaded_file.type
-                base64_image = base64.b64encode(image_bytes).decode('utf-8')
-                image_data = f"data:{mime_type};base64,{base64_image}"
+                try:
+                    from utils.image_processing import preprocess_image_bytes # Pillow loads on first upload
+                    # Downscale, strip metadata and re-encode before storing/sending
+                    image_data, detail, prep_report = preprocess_image_bytes(image_bytes)
+                    st.caption(
+                        f"{prep_report['original_bytes'] / 1024:.0f} KB → {prep_report['processed_bytes'] / 1024:.0f} KB, "
+                        f"detalle '{detail}' (~{prep_report['tokens_saved']} tokens menos)"
+                    )
+                except Exception as prep_err:
+                    st.warning(f"No se pudo optimizar la imagen, se envía sin cambios: {prep_err}", icon="⚠️")
+                    # Determine mime type
+                    mime_type = uploaded_file.type
+                    base64_image = base64.b64encode(image_bytes).decode('utf-8')
+                    image_data = f"data:{mime_type};base64,{base64_image}"
             except Exception as e:
                 st.error(f"Error procesando archivo subido: {e}")
                 image_data = None
-    return image_data
+    # Session state, graph nodes and history keep only a 'blob:<sha256>' reference
+    return store_image_source(image_data) if image_data else None
 
 # --- ==================== Main Application Layout ==================== ---
 st.title("🤖 Interfaz de Navegación Robótica con LLM")
@@ -308,12 +667,20 @@ if st.sidebar.button("⚠️ Iniciar Nueva Navegación (Reset)", type="primary")
     st.session_state.all_descriptions = {}
     st.session_state.navigation_plan = ""
     st.session_state.action_history = []
+    store_session_map() # Starts a new persisted map; the previous one can still be reopened
     st.session_state.llm_components = {}
     st.session_state.input_mode = "Vista Única (Centro)"
     st.session_state.current_images = {'left': None, 'center': None, 'right': None}
     st.session_state.analyzed_images = []
     st.session_state.clicked_node_id = None
     st.session_state.selected_action = None
+    st.session_state.view_index = None
+    st.session_state.last_view_dedup = None
+    st.session_state.object_index = None
+    st.session_state.last_object_links = []
+    st.session_state.place_index = None
+    st.session_state.graph_expanded_clusters = set()
+    st.session_state.last_place_match = None
     st.success("Nueva navegación iniciada. Estado reseteado.")
     time.sleep(1) # Allow user to see message
     safe_rerun()
@@ -366,17 +733,17 @@ with st.container(border=True):
     images_to_preview = st.session_state.current_images
     with preview_cols[0]:
         if images_to_preview.get('left'):
-            st.image(images_to_preview['left'], caption='Izquierda', use_container_width=True)
+            show_image(images_to_preview['left'], caption='Izquierda', use_container_width=True)
             valid_images_count += 1
         else: st.caption("Izquierda: N/A")
     with preview_cols[1]:
         if images_to_preview.get('center'):
-            st.image(images_to_preview['center'], caption='Centro', use_container_width=True)
+            show_image(images_to_preview['center'], caption='Centro', use_container_width=True)
             valid_images_count += 1
         else: st.caption("Centro: N/A")
     with preview_cols[2]:
          if images_to_preview.get('right'):
-            st.image(images_to_preview['right'], caption='Derecha', use_container_width=True)
+            show_image(images_to_preview['right'], caption='Derecha', use_container_width=True)
             valid_images_count += 1
          else: st.caption("Derecha: N/A")
 
@@ -397,6 +764,55 @@ with st.container(border=True):
 
     # Option to use secondary formatting prompt
     st.session_state.use_formatter = st.checkbox("Usar formateo LLM secundario si falla el parseo JSON", st.session_state.use_formatter)
+    # Bypass: when unchecked the cached answer is ignored and a fresh one replaces it
+    st.session_state.use_llm_cache = st.checkbox("Reutilizar respuestas cacheadas (misma imagen y prompt)", st.session_state.use_llm_cache)
+    st.session_state.use_streaming = st.checkbox("Mostrar la respuesta mientras llega (streaming)", st.session_state.use_streaming)
+    st.session_state.use_cascade = st.checkbox("Modo cascada: modelo barato primero, gpt-4o solo si hace falta (sin streaming)", st.session_state.use_cascade)
+    st.session_state.use_view_dedup = st.checkbox("Reutilizar el análisis si la vista es casi idéntica a un nodo (sin llamar al LLM)", st.session_state.use_view_dedup)
+    if st.session_state.use_view_dedup:
+        st.session_state.view_dedup_distance = st.slider(
+            "Distancia Hamming máxima (bits de 64)", 0, 16, st.session_state.view_dedup_distance
+        )
+    st.session_state.use_object_links = st.checkbox("Conectar automáticamente nodos con objetos distintivos en común", st.session_state.use_object_links)
+    if st.session_state.use_object_links:
+        st.session_state.object_link_min_score = st.slider(
+            "Similitud mínima (coseno TF-IDF)", 0.1, 1.0, st.session_state.object_link_min_score, 0.05
+        )
+    st.session_state.use_place_merge = st.checkbox("Fusionar con el nodo reconocido como el mismo lugar aunque el LLM sugiera otro nombre", st.session_state.use_place_merge)
+    if st.session_state.use_place_merge:
+        st.session_state.place_merge_min_score = st.slider(
+            "Similitud mínima para fusionar (coseno)", 0.3, 1.0, st.session_state.place_merge_min_score, 0.05
+        )
+
+    if st.session_state.last_time_to_first_field is not None:
+        st.caption(f"Tiempo hasta el primer campo útil: {st.session_state.last_time_to_first_field:.2f} s")
+    if st.session_state.last_preprocess_report:
+        prep = st.session_state.last_preprocess_report
+        st.caption(
+            f"Último análisis: {prep['processed_bytes'] / 1024:.0f} KB enviados "
+            f"({prep['bytes_saved'] / 1024:.0f} KB y ~{prep['tokens_saved']} tokens de imagen ahorrados)"
+        )
+    if st.session_state.last_cascade_report:
+        cascade_report = st.session_state.last_cascade_report
+        tried = []
+        for tier in cascade_report["tiers"]:
+            reasons = "" if tier["accepted"] else ": " + ", ".join(tier["issues"] or [tier["error"] or "?"])
+            tried.append(f"{tier['model']} ({tier['latency']:.1f}s{reasons})")
+        st.caption(f"Cascada: respondió {cascade_report['model']} | " + " → ".join(tried))
+    if st.session_state.last_view_dedup:
+        st.caption(f"Último análisis reutilizado del nodo '{st.session_state.last_view_dedup[0]}' "
+                   f"(distancia {st.session_state.last_view_dedup[1]}), sin llamada al LLM")
+    if st.session_state.last_object_links:
+        st.caption("Nodos con objetos en común: " + " | ".join(
+            f"{node_id} ({score:.2f}: {', '.join(terms[:3])})"
+            for node_id, score, terms in st.session_state.last_object_links
+        ))
+    if st.session_state.last_place_match:
+        suggested_name, place_node, place_score, merged = st.session_state.last_place_match
+        if merged:
+            st.caption(f"'{suggested_name}' se fusionó con '{place_node}' (mismo lugar, similitud {place_score:.2f})")
+        else:
+            st.caption(f"'{suggested_name}' podría ser el mismo lugar que '{place_node}' (similitud {place_score:.2f})")
 
     # --- Analyze Button ---
     if st.button("Analizar Vista Actual", type="primary", disabled=(valid_images_count == 0)):
@@ -432,16 +848,84 @@ with st.container(border=True):
                 "{action_history}", action_history_str or "Ninguna"
             )
 
-            # 3. Call the API
-            with st.spinner(f"🧠 Analizando vista ({st.session_state.input_mode})..."):
-                try:
-                    llm_response_raw = analyze_image_with_gpt(image_inputs_for_api, analysis_prompt_filled)
-                    st.session_state.current_description = llm_response_raw # Store raw response
-                except Exception as api_err:
-                    st.error(f"Error durante la llamada a la API: {api_err}")
-                    llm_response_raw = None
-
-            # 4. Process the response
+            # 3. Near-duplicate check: a view almost identical to a known node reuses its analysis
+            from mapping.view_index import compute_view_hashes
+            view_hashes = compute_view_hashes(final_images_to_store)
+            near_duplicate = None
+            st.session_state.last_view_dedup = None
+            st.session_state.last_object_links = []
+            st.session_state.last_place_match = None
+            if st.session_state.use_view_dedup and view_hashes:
+                near_duplicate = get_view_index().lookup(view_hashes, st.session_state.view_dedup_distance)
+                if near_duplicate and near_duplicate[0] not in st.session_state.graph:
+                    near_duplicate = None
+
+            # 4. Call the API
+            if near_duplicate:
+                duplicate_node, duplicate_distance = near_duplicate
+                previous_node = st.session_state.current_node
+                duplicate_observation = get_node_observation(st.session_state.graph, duplicate_node)
+                st.session_state.llm_components = duplicate_observation.to_json() if duplicate_observation else {}
+                st.session_state.current_description = json.dumps(st.session_state.llm_components, ensure_ascii=False)
+                st.session_state.last_view_dedup = near_duplicate
+                st.session_state.last_time_to_first_field = None
+                if previous_node and previous_node != duplicate_node and not st.session_state.graph.has_edge(previous_node, duplicate_node):
+                    add_edge_to_graph(st.session_state.graph, previous_node, duplicate_node, "move_to_analyzed")
+                st.session_state.current_node = duplicate_node
+                st.session_state.clicked_node_id = None
+                st.success(f"Vista casi idéntica al nodo '{duplicate_node}' (distancia {duplicate_distance}): "
+                           "se reutiliza su análisis sin llamar al LLM.")
+                check_goal_reached(st.session_state.current_description, st.session_state.current_node, st.session_state.navigation_goal)
+                llm_response_raw = None # Nothing to parse: the node's JSON is reused as is
+                safe_rerun()
+            elif st.session_state.use_streaming and not st.session_state.use_cascade:
+                # Streaming: show scene description and node name as soon as they are complete
+                stream_status = st.empty()
+                stream_description = st.empty()
+                stream_node_name = st.empty()
+                stream_status.info(f"🧠 Analizando vista ({st.session_state.input_mode})...")
+                llm_response_raw = None
+                for event in stream_image_analysis(
+                    image_inputs_for_api, analysis_prompt_filled,
+                    use_cache=st.session_state.use_llm_cache
+                ):
+                    if event["type"] == "partial" and event["key"] == "overall_scene_description":
+                        stream_description.markdown(f"**Descripción:** {event['text']}▌")
+                    elif event["type"] == "field" and event["key"] == "overall_scene_description":
+                        stream_description.markdown(f"**Descripción:** {event['value']}")
+                    elif event["type"] == "field" and event["key"] == "landmarks_and_suggested_node_name":
+                        node_name_value = event["value"].get("suggested_node_name", "") if isinstance(event["value"], dict) else ""
+                        stream_node_name.markdown(f"**Nodo sugerido:** `{node_name_value}`")
+                    elif event["type"] == "field":
+                        stream_status.info(f"🧠 Recibido: {event['key']}...")
+                    elif event["type"] == "done":
+                        llm_response_raw = event["text"]
+                        st.session_state.last_time_to_first_field = event["time_to_first_field"]
+                    elif event["type"] == "error":
+                        st.error(event["text"])
+                stream_status.empty()
+                st.session_state.current_description = llm_response_raw # Store raw response
+                st.session_state.last_preprocess_report = get_last_preprocess_report()
+            else:
+                with st.spinner(f"🧠 Analizando vista ({st.session_state.input_mode})..."):
+                    try:
+                        llm_response_raw = analyze_image_with_gpt(
+                            image_inputs_for_api, analysis_prompt_filled,
+                            use_cache=st.session_state.use_llm_cache,
+                            cascade=st.session_state.use_cascade
+                        )
+                        st.session_state.current_description = llm_response_raw # Store raw response
+                        st.session_state.last_preprocess_report = get_last_preprocess_report()
+                        st.session_state.last_cascade_report = get_last_cascade_report()
+                        st.session_state.last_time_to_first_field = None
+                    except LLMError as api_err:
+                        st.error(f"Error durante la llamada a la API ({api_err.kind}, {api_err.attempts} intento(s)): {api_err}")
+                        llm_response_raw = None
+                    except Exception as api_err:
+                        st.error(f"Error durante la llamada a la API: {api_err}")
+                        llm_response_raw = None
+
+            # 5. Process the response
             if llm_response_raw:
                 st.session_state.llm_components = extract_llm_components(llm_response_raw)
 
@@ -458,29 +942,44 @@ with st.container(border=True):
                         else:
                              st.error("Formateo secundario falló o no está implementado.")
 
-                # 5. Update Graph and State if components were successfully extracted
+                # 6. Update Graph and State if components were successfully extracted
                 if st.session_state.llm_components:
                     st.success("Análisis completado y JSON parseado.")
 
+                    # Typed view of the parsed response (slotted, interned names): stored in the node
+                    observation = Observation.from_json(st.session_state.llm_components)
+
                     # Extract suggested node name (provide a default)
-                    suggested_node_name = st.session_state.llm_components.get(
-                        "landmarks_and_suggested_node_name", {}
-                    ).get("suggested_node_name", "").strip()
+                    suggested_node_name = observation.node_name
                     # Sanitize node name (replace spaces, ensure uniqueness maybe?)
                     suggested_node_name = re.sub(r'\s+', '_', suggested_node_name)
                     if not suggested_node_name: # Generate default if empty
                          suggested_node_name = f"Nodo_{st.session_state.graph.number_of_nodes() + 1}"
                          st.info(f"LLM no sugirió nombre, usando nombre por defecto: {suggested_node_name}")
 
+                    # Same place under another name? Loop closure: the analysis goes to the known node
+                    if suggested_node_name not in st.session_state.graph:
+                        place_match = get_place_index().match(
+                            observation, st.session_state.place_merge_min_score, exclude=(st.session_state.current_node,)
+                        )
+                        if place_match:
+                            merged = st.session_state.use_place_merge
+                            st.session_state.last_place_match = (suggested_node_name, *place_match, merged)
+                            if merged:
+                                st.info(f"'{suggested_node_name}' es el mismo lugar que '{place_match[0]}' "
+                                        f"(similitud {place_match[1]:.2f}): se actualiza ese nodo.")
+                                suggested_node_name = place_match[0]
+
                     # Extract scene description for node
-                    node_description = st.session_state.llm_components.get("overall_scene_description", "Descripción no proporcionada.")
+                    node_description = observation.description or "Descripción no proporcionada."
 
                     # Prepare node data
                     node_data = {
                         "description": node_description,
                         "images": final_images_to_store, # Dict of images used for this node's analysis
-                        "llm_json": st.session_state.llm_components, # Full parsed JSON
+                        "observation": observation, # Parsed analysis (mapping/observation.py)
                         "input_mode": st.session_state.input_mode, # Mode used for analysis
+                        "view_hashes": view_hashes, # dHash per position, for near-duplicate detection
                         "timestamp": time.time() # Record analysis time
                     }
 
@@ -505,8 +1004,12 @@ with st.container(border=True):
                             st.session_state.analyzed_images.append((suggested_node_name, final_images_to_store))
 
 
-                    # Connect nodes automatically? (Using placeholder function)
-                    # connect_nodes_by_common_objects(st.session_state.graph, suggested_node_name, st.session_state.llm_components)
+                    get_view_index().add(suggested_node_name, view_hashes)
+                    get_place_index().add(suggested_node_name, observation)
+
+                    # Link to other nodes that share distinctive objects (the previous node is linked below)
+                    connect_nodes_by_common_objects(st.session_state.graph, suggested_node_name, observation,
+                                                    exclude=(previous_node,))
 
                     # Logic to connect previous node to this new/updated node
                     # This requires an action. If LLM suggests a specific move to this node, use it.
@@ -547,15 +1050,9 @@ with st.container(border=True):
     with col_preview_graph:
         st.markdown("**Grafo (Vista Rápida)**")
         if st.session_state.graph.number_of_nodes() > 0:
-            # Highlight current node
-            agraph_nodes_preview, agraph_edges_preview = convert_nx_to_agraph(st.session_state.graph) # Pass door_states if used
-            for node in agraph_nodes_preview:
-                if node.id == st.session_state.current_node:
-                    node.color = "#FF0000" # Highlight current node in red (example)
-                    node.borderWidth = 3
-                if node.id == st.session_state.clicked_node_id:
-                     node.color = "#00FF00" # Highlight clicked node in green (example)
-                     node.borderWidth = 3
+            # Highlight current node; only nodes/edges changed since the last rerun are rebuilt.
+            # Built once per rerun and shared with the full graph below
+            agraph_nodes_preview, agraph_edges_preview = graph_render_items() # Pass door_states if used
 
 
             config_preview = Config(
@@ -567,35 +1064,36 @@ with st.container(border=True):
                 # highlight_active=True # Doesn't work as expected directly with clicks
             )
             if agraph_nodes_preview:
-                # Justo antes de la línea 571
-                st.write("--- DEBUG INFO ---")
-                st.write("Nodes para agraph:")
-                # Convertir a diccionarios para mejor visualización en Streamlit
-                try:
-                    nodes_list_dict = [vars(n) for n in agraph_nodes_preview]
-                    st.json(nodes_list_dict)
-                except Exception as e:
-                    st.error(f"Error convirtiendo nodos a dict: {e}")
-                    st.write(agraph_nodes_preview) # Mostrar como lista si falla
-
-                st.write("Edges para agraph:")
-                try:
-                    edges_list_dict = [vars(e) for e in agraph_edges_preview]
-                    st.json(edges_list_dict)
-                except Exception as e:
-                    st.error(f"Error convirtiendo edges a dict: {e}")
-                    st.write(agraph_edges_preview) # Mostrar como lista si falla
-
-                st.write("Config para agraph:")
-                st.json(vars(config_preview))
-                st.write("--- FIN DEBUG INFO ---")
+                # Debug dump of the agraph payload: serializing every node is costly, so only on demand
+                if st.session_state.show_graph_debug:
+                    st.write("--- DEBUG INFO ---")
+                    st.write("Nodes para agraph:")
+                    # Convertir a diccionarios para mejor visualización en Streamlit
+                    try:
+                        nodes_list_dict = [vars(n) for n in agraph_nodes_preview]
+                        st.json(nodes_list_dict)
+                    except Exception as e:
+                        st.error(f"Error convirtiendo nodos a dict: {e}")
+                        st.write(agraph_nodes_preview) # Mostrar como lista si falla
+
+                    st.write("Edges para agraph:")
+                    try:
+                        edges_list_dict = [vars(e) for e in agraph_edges_preview]
+                        st.json(edges_list_dict)
+                    except Exception as e:
+                        st.error(f"Error convirtiendo edges a dict: {e}")
+                        st.write(agraph_edges_preview) # Mostrar como lista si falla
+
+                    st.write("Config para agraph:")
+                    st.json(vars(config_preview))
+                    st.write("--- FIN DEBUG INFO ---")
 
 
                 # Capture clicks on this graph instance
-                clicked_node_data = agraph(
-                    nodes=agraph_nodes_preview,
-                    edges=agraph_edges_preview,
-                    config=config_preview
+                clicked_node_data = show_agraph(
+                    agraph_nodes_preview,
+                    agraph_edges_preview,
+                    config_preview
                  )
                 if clicked_node_data: # If a node was clicked
                     st.session_state.clicked_node_id = clicked_node_data
@@ -624,20 +1122,21 @@ with st.container(border=True):
                 st.markdown("**Vista(s) del Nodo:**")
                 img_cols = st.columns(3)
                 with img_cols[0]:
-                    if node_images.get('left'): st.image(node_images['left'], caption='Izquierda', use_container_width=True)
+                    if node_images.get('left'): show_image(node_images['left'], caption='Izquierda', use_container_width=True)
                     else: st.caption("Izq: N/A")
                 with img_cols[1]:
-                    if node_images.get('center'): st.image(node_images['center'], caption='Centro', use_container_width=True)
+                    if node_images.get('center'): show_image(node_images['center'], caption='Centro', use_container_width=True)
                     else: st.caption("Centro: N/A")
                 with img_cols[2]:
-                     if node_images.get('right'): st.image(node_images['right'], caption='Derecha', use_container_width=True)
+                     if node_images.get('right'): show_image(node_images['right'], caption='Derecha', use_container_width=True)
                      else: st.caption("Der: N/A")
 
                 # --- Display Node Info ---
                 st.markdown(f"**Modo Análisis:** {node_info.get('input_mode', 'N/A')}")
                 st.markdown(f"**Descripción:** {node_info.get('description', 'N/A')}")
                 with st.expander("Ver Detalles del Análisis (JSON)"):
-                    st.json(node_info.get("llm_json", {}))
+                    node_observation = get_node_observation(st.session_state.graph, node_id_to_display)
+                    st.json(node_observation.to_json() if node_observation else {})
             else:
                 st.warning(f"No se encontraron datos para el nodo {node_id_to_display}. Puede que el grafo esté corrupto.")
                 # Consider resetting clicked_node_id if data is missing
@@ -670,7 +1169,7 @@ with st.container(border=True):
                      thumb_img = img_dict.get('center') or img_dict.get('left') or img_dict.get('right')
                      with cols_hist[c]:
                          if thumb_img:
-                             st.image(thumb_img, caption=f"#{image_idx+1}: {node_id[:15]}..", width=100) # Shorten name if long
+                             show_image(thumb_img, caption=f"#{image_idx+1}: {node_id[:15]}..", width=100) # Shorten name if long
                          else:
                              st.caption(f"#{image_idx+1}: {node_id[:15]}..\n(Sin img)")
                          # Button to select this node in the preview
@@ -693,21 +1192,14 @@ with st.container(border=True):
     with col_graph_full:
         st.markdown("**Grafo de Navegación Completo**")
         if st.session_state.graph.number_of_nodes() > 0:
-            # Use similar highlighting as preview graph
-            agraph_nodes_full, agraph_edges_full = convert_nx_to_agraph(st.session_state.graph) # Pass door_states if used
-            for node in agraph_nodes_full:
-                 if node.id == st.session_state.current_node:
-                     node.color = "#FF0000"
-                     node.borderWidth = 3
-                 if node.id == st.session_state.clicked_node_id:
-                      node.color = "#00FF00"
-                      node.borderWidth = 3
+            # Same nodes/edges as the preview graph
+            agraph_nodes_full, agraph_edges_full = agraph_nodes_preview, agraph_edges_preview
 
             config_full = Config(
                 width='100%',
                 height=600, # Larger height for full graph
                 directed=True,
-                physics=True, # Enable physics for potentially better layout
+                physics=not st.session_state.use_server_layout, # Browser physics only without server positions
                 hierarchical=False, # Usually better for exploration graphs
                 nodes={'shape': 'dot', 'size': 16}, # Customize node appearance
                 edges={'smooth': True}, # Customize edge appearance
@@ -715,8 +1207,22 @@ with st.container(border=True):
                 # layout={'improvedLayout': True} # Experiment with layout options
                  )
             if agraph_nodes_full:
-                 # No need to capture clicks here unless desired for other interactions
-                 agraph(nodes=agraph_nodes_full, edges=agraph_edges_full, config=config_full)
+                 # Node clicks are handled by the preview graph; cluster clicks expand here too
+                 show_agraph(agraph_nodes_full, agraph_edges_full, config_full)
+                 render_metrics = st.session_state.render_metrics
+                 st.caption(f"Render{' (nivel de detalle)' if render_metrics['lod'] else ''}: "
+                            f"{render_metrics['nodes']} nodos, {render_metrics['edges']} aristas, "
+                            f"{render_metrics['payload_bytes'] / 1024:.0f} KB x {render_metrics['agraph_calls']} grafos, "
+                            f"{render_metrics['convert_ms'] + render_metrics['agraph_ms']:.0f} ms por rerun"
+                            + (f" (disposición {render_metrics['layout_ms']:.1f} ms)" if st.session_state.use_server_layout else ""))
+                 # Rooms/zones are maintained incrementally from the graph mutations
+                 hierarchy_stats = get_hierarchy(st.session_state.graph).stats()
+                 st.caption(f"Jerarquía: {hierarchy_stats['rooms']} habitaciones en {hierarchy_stats['zones']} zonas, "
+                            f"{hierarchy_stats['portals']} portales entre habitaciones.")
+                 path_stats = get_path_service(st.session_state.graph).stats()
+                 if path_stats['hit_rate'] is not None:
+                     st.caption(f"Caminos: {path_stats['trees']} árboles en caché, "
+                                f"{path_stats['hit_rate']:.0%} de las consultas resueltas sin búsqueda.")
             else:
                 st.info("El grafo está vacío o no se pudo renderizar.")
         else:
@@ -741,6 +1247,8 @@ with st.container(border=True):
             if chosen_action and st.button(f"Confirmar Acción: '{chosen_action}'"):
                 st.session_state.selected_action = chosen_action
                 st.session_state.action_history.append(chosen_action)
+                if st.session_state.map_store is not None:
+                    st.session_state.map_store.record_action(chosen_action, st.session_state.current_node)
                 st.success(f"Acción '{chosen_action}' añadida al historial. (Simulado - el robot debería ejecutarla ahora)")
                 # TODO: Trigger robot execution here if applicable
                 # Reset selection and potentially rerun
@@ -762,7 +1270,8 @@ with st.container(border=True):
             st.session_state.graph.number_of_edges() > 0 and
             st.session_state.current_node and
             st.session_state.navigation_goal and
-            nx.has_path(st.session_state.graph, st.session_state.current_node, st.session_state.navigation_goal) # Check path exists
+            # Reachability checks below and the plan itself are lookups in the cached path tree of current_node
+            get_path_service(st.session_state.graph).has_path(st.session_state.current_node, st.session_state.navigation_goal) # Check path exists
         )
 
         # Check if goal node exists in graph
@@ -774,22 +1283,22 @@ with st.container(border=True):
                  st.warning(f"El nodo objetivo '{st.session_state.navigation_goal}' no existe actualmente en el grafo.", icon="⚠️")
              # --->>> CORRECCIÓN <<<---
              # Solo verifica el camino si el nodo objetivo existe
-             elif goal_node_exists and not nx.has_path(st.session_state.graph, st.session_state.current_node, st.session_state.navigation_goal):
+             elif goal_node_exists and not get_path_service(st.session_state.graph).has_path(st.session_state.current_node, st.session_state.navigation_goal):
                  st.warning(f"No se encontró una ruta desde '{st.session_state.current_node}' hasta '{st.session_state.navigation_goal}' en el grafo actual.", icon="⚠️")
 
 
         if st.button("Generar/Actualizar Plan", disabled=not (st.session_state.current_node and st.session_state.navigation_goal and goal_node_exists)):
                     # --->>> CORRECCIÓN (Añadir esta comprobación interna) <<<---
-                    if goal_node_exists and nx.has_path(st.session_state.graph, st.session_state.current_node, st.session_state.navigation_goal):
+                    if goal_node_exists and get_path_service(st.session_state.graph).has_path(st.session_state.current_node, st.session_state.navigation_goal):
                         with st.spinner("Generando plan de navegación..."):
                             try:
                                 st.session_state.navigation_plan = generate_navigation_plan(
                                     graph=st.session_state.graph,
                                     start_node=st.session_state.current_node,
-                                    goal_node=st.session_state.navigation_goal,
-                                    # Pass other required info like descriptions or history if needed by the planner
-                                    # all_descriptions=st.session_state.all_descriptions,
-                                    # action_history=st.session_state.action_history
+                                    goal_node_id=st.session_state.navigation_goal,
+                                    action_history=st.session_state.action_history,
+                                    door_states={}, # Door states are not tracked in the session yet
+                                    notify=st.info # The planner itself no longer imports streamlit
                                 )
                                 st.success("Plan de navegación generado/actualizado.")
                                 safe_rerun() # Rerun to display the new plan
@@ -816,7 +1325,7 @@ with st.container(border=True):
              if not st.session_state.navigation_goal: required.append("objetivo de navegación")
              if st.session_state.graph.number_of_nodes() == 0: required.append("grafo no vacío")
              elif st.session_state.navigation_goal and st.session_state.current_node and not goal_node_exists: required.append(f"que el nodo '{st.session_state.navigation_goal}' exista en el grafo")
-             elif st.session_state.navigation_goal and st.session_state.current_node and goal_node_exists and not nx.has_path(st.session_state.graph, st.session_state.current_node, st.session_state.navigation_goal) : required.append("una ruta válida al objetivo")
+             elif st.session_state.navigation_goal and st.session_state.current_node and goal_node_exists and not get_path_service(st.session_state.graph).has_path(st.session_state.current_node, st.session_state.navigation_goal) : required.append("una ruta válida al objetivo")
 
              if required:
                  st.info(f"Se necesita {', '.join(required)} para generar un plan.")
@@ -0,0 +1,183 @@
+# src/mapping/blob_store.py
+"""
+Almacén de imágenes en disco direccionado por contenido.
+
+Las imágenes se guardan una sola vez, con el sha256 de sus bytes como nombre
+(``<dir>/<hash[:2]>/<hash>``). Los nodos del grafo, el historial y la vista actual
+guardan solo la referencia ``blob:<hash>``; los píxeles se leen (con mmap) cuando la
+interfaz o la API los necesitan. Así ni la sesión ni el estado guardado crecen con
+el tamaño de las imágenes.
+
+    ref = get_blob_store().put_source("data:image/jpeg;base64,...")   # 'blob:3f2a...'
+    data_uri = resolve_image_source(ref)                              # para la API
+"""
+import os
+import mmap
+import base64
+import hashlib
+import tempfile
+import threading
+
+# Directorio por defecto: <raíz del proyecto>/data/blobs
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_BLOB_DIR = os.path.join(_PROJECT_ROOT, "data", "blobs")
+
+BLOB_PREFIX = "blob:"
+
+# Firma de los primeros bytes -> tipo MIME (para reconstruir el data URI)
+_MAGIC = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def is_blob_ref(source) -> bool:
+    return isinstance(source, str) and source.startswith(BLOB_PREFIX)
+
+
+def blob_digest(ref: str) -> str:
+    """sha256 hex de una referencia ``blob:<hash>``."""
+    return ref[len(BLOB_PREFIX):]
+
+
+def sniff_mime(data) -> str:
+    head = bytes(data[:12])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, mime in _MAGIC:
+        if head.startswith(magic):
+            return mime
+    return "image/jpeg"
+
+
+class BlobStore:
+    """
+    Blobs inmutables en disco. Escribir es idempotente (mismo contenido, mismo
+    fichero) y atómico (fichero temporal + rename), así que varias sesiones pueden
+    compartir el directorio.
+    """
+
+    def __init__(self, blob_dir: str = DEFAULT_BLOB_DIR):
+        self.blob_dir = blob_dir
+        self.writes = 0
+        self.dedup_hits = 0
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        """Guarda ``data`` (si no estaba ya) y devuelve su referencia."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            with self._lock:
+                self.dedup_hits += 1
+            return BLOB_PREFIX + digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self.writes += 1
+        return BLOB_PREFIX + digest
+
+    def put_source(self, source):
+        """
+        Sustituye un data URI o cadena base64 por su referencia. Las URLs http(s),
+        las referencias y las fuentes que no se pueden decodificar se devuelven igual.
+        """
+        if not source or not isinstance(source, str) or is_blob_ref(source) or source.startswith("http"):
+            return source
+        payload = source.split(",", 1)[1] if source.startswith("data:") else source
+        try:
+            data = base64.b64decode(payload, validate=True)
+        except ValueError:
+            return source
+        return self.put(data) if data else source
+
+    def open(self, ref: str):
+        """
+        mmap de solo lectura del blob (usar con ``with``). Permite codificar o
+        decodificar la imagen sin copiarla antes a memoria.
+
+        Raises:
+            KeyError: si el blob no existe en este almacén.
+        """
+        path = self._path(blob_digest(ref))
+        try:
+            with open(path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError: fichero vacío
+            raise KeyError(ref) from None
+
+    def read(self, ref: str) -> bytes:
+        with self.open(ref) as view:
+            return view[:]
+
+    def data_uri(self, ref: str) -> str:
+        with self.open(ref) as view:
+            return f"data:{sniff_mime(view)};base64," + base64.b64encode(view).decode("ascii")
+
+    def contains(self, ref: str) -> bool:
+        return is_blob_ref(ref) and os.path.exists(self._path(blob_digest(ref)))
+
+    def stats(self) -> dict:
+        entries = 0
+        total = 0
+        if os.path.isdir(self.blob_dir):
+            for shard in os.scandir(self.blob_dir):
+                if shard.is_dir():
+                    for entry in os.scandir(shard.path):
+                        if not entry.name.endswith(".tmp"):
+                            entries += 1
+                            total += entry.stat().st_size
+        return {"entries": entries, "bytes": total, "writes": self.writes, "dedup_hits": self.dedup_hits}
+
+
+_default_store = None
+
+
+def get_blob_store() -> BlobStore:
+    """Almacén compartido del proceso; el directorio se configura con IMAGE_BLOB_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BlobStore(os.getenv("IMAGE_BLOB_DIR", DEFAULT_BLOB_DIR))
+    return _default_store
+
+
+def externalize_images(images: dict) -> dict:
+    """{posición: fuente} con los data URI/base64 sustituidos por referencias."""
+    store = get_blob_store()
+    return {position: store.put_source(source) for position, source in (images or {}).items()}
+
+
+def resolve_image_source(source):
+    """Fuente utilizable por la API: las referencias se convierten en data URI (None si falta el blob)."""
+    if not is_blob_ref(source):
+        return source
+    try:
+        return get_blob_store().data_uri(source)
+    except KeyError:
+        print(f"Warning: Image blob not found: {source}")
+        return None
+
+
+def image_for_display(source):
+    """Argumento para st.image: bytes del blob, o la fuente tal cual si no es una referencia."""
+    if not is_blob_ref(source):
+        return source
+    try:
+        return get_blob_store().read(source)
+    except KeyError:
+        return None
@@ -0,0 +1,481 @@
+# src/mapping/csr_graph.py
+"""
+Grafo de navegación compacto para mapas con decenas de miles de puntos de vista.
+
+CSRGraph guarda la topología como arrays NumPy en formato CSR (indptr/indices, más
+el inverso para predecesores) con ids enteros internos, y los atributos de nodo por
+columnas (una lista por atributo en lugar de un dict por nodo). Las aristas nuevas
+se acumulan en un búfer y se compactan en el CSR cada cierto número de inserciones
+o antes de un recorrido vectorizado.
+
+Expone la parte de la API de networkx.DiGraph que usa el proyecto (nodes, edges,
+succ/pred, get_edge_data, has_edge, add_node, add_edge...), de modo que
+graph_manager, nx.shortest_path / nx.has_path y json_graph.node_link_data funcionan
+sin cambios. Los recorridos nativos (bfs_distances, shortest_path, has_path) evitan
+el coste por nodo de Python.
+
+    graph = initialize_graph(backend="csr")      # mapping.graph_manager
+"""
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+import networkx as nx
+
+# Aristas pendientes mínimas antes de compactar (después, 1/8 de las ya compactadas)
+MIN_COMPACT_EVERY = 256
+
+_MISSING = object()
+
+
+class _NodeAttrs(MutableMapping):
+    """Vista dict de los atributos de un nodo sobre las columnas del grafo."""
+    __slots__ = ("_graph", "_columns", "_i")
+
+    def __init__(self, graph, i):
+        self._graph = graph
+        self._columns = graph._columns
+        self._i = i
+
+    def __getitem__(self, key):
+        column = self._columns.get(key)
+        if column is None or column[self._i] is _MISSING:
+            raise KeyError(key)
+        return column[self._i]
+
+    def __setitem__(self, key, value):
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = [_MISSING] * len(self._graph._labels)
+        column[self._i] = value
+
+    def __delitem__(self, key):
+        self[key]  # KeyError si no está
+        self._columns[key][self._i] = _MISSING
+
+    def __iter__(self):
+        i = self._i
+        return (key for key, column in list(self._columns.items()) if column[i] is not _MISSING)
+
+    def __len__(self):
+        i = self._i
+        return sum(1 for column in self._columns.values() if column[i] is not _MISSING)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _NodeView(Mapping):
+    """graph.nodes: ``nodes[n]``, ``nodes.get(n)``, ``nodes(data=True)``."""
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, node):
+        return _NodeAttrs(self._graph, self._graph._index[node])
+
+    def __iter__(self):
+        return iter(self._graph._labels)
+
+    def __len__(self):
+        return len(self._graph._labels)
+
+    def __contains__(self, node):
+        return node in self._graph._index
+
+    def __call__(self, data=False, default=None):
+        graph = self._graph
+        if data is False:
+            return iter(graph._labels)
+        if data is True:
+            return ((label, _NodeAttrs(graph, i)) for i, label in enumerate(graph._labels))
+        column = graph._columns.get(data, ())
+        return ((label, column[i] if column and column[i] is not _MISSING else default)
+                for i, label in enumerate(graph._labels))
+
+
+class _EdgeView:
+    """graph.edges: ``edges()``, ``edges(data=True)``, ``len(edges)``, ``(u, v) in edges``."""
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __call__(self, data=False, default=None):
+        graph = self._graph
+        labels = graph._labels
+        for u, v in graph._edge_pairs():
+            if data is False:
+                yield labels[u], labels[v]
+            elif data is True:
+                yield labels[u], labels[v], graph._edge_attrs(u, v)
+            else:
+                yield labels[u], labels[v], graph._edge_attrs(u, v).get(data, default)
+
+    def __iter__(self):
+        return self()
+
+    def __len__(self):
+        return self._graph.number_of_edges()
+
+    def __contains__(self, edge):
+        return self._graph.has_edge(*edge)
+
+
+class _AdjacencyView(Mapping):
+    """graph.succ / graph.pred: nodo -> lista de vecinos (etiquetas)."""
+    __slots__ = ("_graph", "_reverse")
+
+    def __init__(self, graph, reverse):
+        self._graph = graph
+        self._reverse = reverse
+
+    def __getitem__(self, node):
+        graph = self._graph
+        labels = graph._labels
+        return [labels[j] for j in graph._neighbor_ids(graph._index[node], self._reverse)]
+
+    def __iter__(self):
+        return iter(self._graph._labels)
+
+    def __len__(self):
+        return len(self._graph._labels)
+
+    def __contains__(self, node):
+        return node in self._graph._index
+
+
+class CSRGraph:
+    """
+    Grafo dirigido con adyacencia CSR en NumPy y atributos de nodo por columnas.
+
+    Las etiquetas de nodo (p.ej. 'Cocina_Principal') se traducen a ids enteros
+    consecutivos. La acción de cada arista se guarda como código en un vocabulario
+    ('move_to_analyzed' se repite en casi todas). No admite borrar nodos ni aristas:
+    el mapa solo crece durante una exploración.
+    """
+
+    def __init__(self, compact_every: int = MIN_COMPACT_EVERY):
+        self.graph = {}  # Atributos del grafo (compatibilidad networkx)
+        self.compact_every = compact_every
+        self._index = {}  # etiqueta -> id
+        self._labels = []  # id -> etiqueta
+        self._columns = {}  # atributo -> lista alineada con los ids
+        self._actions = []  # vocabulario de acciones
+        self._action_codes = {}
+        self._extra_edge_attrs = {}  # (u, v) -> dict de atributos distintos de 'action'
+        # CSR compactado (filas = origen) e inverso (filas = destino)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._codes = np.zeros(0, dtype=np.int32)
+        self._rindptr = np.zeros(1, dtype=np.int64)
+        self._rindices = np.zeros(0, dtype=np.int32)
+        # Aristas nuevas aún sin compactar: (u, v) -> código, y por nodo
+        self._pending = {}
+        self._pending_out = {}
+        self._pending_in = {}
+        self.compactions = 0
+
+    # --- Nodos ---
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    def _node_id(self, node):
+        i = self._index.get(node)
+        if i is None:
+            i = self._index[node] = len(self._labels)
+            self._labels.append(node)
+            for column in self._columns.values():
+                column.append(_MISSING)
+        return i
+
+    def add_node(self, node, **attr):
+        attrs = _NodeAttrs(self, self._node_id(node))
+        attrs.update(attr)
+
+    def number_of_nodes(self) -> int:
+        return len(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __contains__(self, node):
+        try:
+            return node in self._index
+        except TypeError:
+            return False
+
+    # --- Aristas ---
+    @property
+    def edges(self):
+        return _EdgeView(self)
+
+    @property
+    def succ(self):
+        return _AdjacencyView(self, reverse=False)
+
+    adj = succ
+
+    @property
+    def pred(self):
+        return _AdjacencyView(self, reverse=True)
+
+    def _action_code(self, action):
+        code = self._action_codes.get(action)
+        if code is None:
+            code = self._action_codes[action] = len(self._actions)
+            self._actions.append(action)
+        return code
+
+    def _csr_slot(self, u, v):
+        """Posición de (u, v) en el CSR compactado, o -1."""
+        if u + 1 >= len(self._indptr):
+            return -1
+        start, end = self._indptr[u], self._indptr[u + 1]
+        if start == end:
+            return -1
+        pos = start + int(np.searchsorted(self._indices[start:end], v))
+        return pos if pos < end and self._indices[pos] == v else -1
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        u, v = self._node_id(u_of_edge), self._node_id(v_of_edge)
+        action = attr.pop("action", _MISSING)
+        code = self._action_code(action) if action is not _MISSING else -1
+        slot = self._csr_slot(u, v)
+        if slot >= 0:
+            if code >= 0:
+                self._codes[slot] = code
+        elif (u, v) in self._pending:
+            if code >= 0:
+                self._pending[(u, v)] = code
+        else:
+            self._pending[(u, v)] = code
+            self._pending_out.setdefault(u, []).append(v)
+            self._pending_in.setdefault(v, []).append(u)
+            if len(self._pending) >= max(self.compact_every, len(self._indices) // 8):
+                self.compact()
+        if attr:
+            self._extra_edge_attrs.setdefault((u, v), {}).update(attr)
+
+    def _edge_code(self, u, v):
+        slot = self._csr_slot(u, v)
+        if slot >= 0:
+            return int(self._codes[slot])
+        return self._pending.get((u, v))
+
+    def has_edge(self, u, v) -> bool:
+        i, j = self._index.get(u), self._index.get(v)
+        return i is not None and j is not None and self._edge_code(i, j) is not None
+
+    def _edge_attrs(self, u, v):
+        code = self._edge_code(u, v)
+        attrs = {"action": self._actions[code]} if code is not None and code >= 0 else {}
+        extra = self._extra_edge_attrs.get((u, v))
+        if extra:
+            attrs.update(extra)
+        return attrs
+
+    def get_edge_data(self, u, v, default=None):
+        i, j = self._index.get(u), self._index.get(v)
+        if i is None or j is None or self._edge_code(i, j) is None:
+            return default
+        return self._edge_attrs(i, j)
+
+    def number_of_edges(self, u=None, v=None) -> int:
+        if u is not None:
+            return int(self.has_edge(u, v))
+        return len(self._indices) + len(self._pending)
+
+    def size(self, weight=None) -> int:
+        return self.number_of_edges()
+
+    def _edge_pairs(self):
+        n_rows = len(self._indptr) - 1
+        rows = np.repeat(np.arange(n_rows, dtype=np.int32), np.diff(self._indptr))
+        yield from zip(rows.tolist(), self._indices.tolist())
+        yield from self._pending
+
+    def _neighbor_ids(self, i, reverse=False):
+        indptr, indices, pending = ((self._rindptr, self._rindices, self._pending_in) if reverse
+                                    else (self._indptr, self._indices, self._pending_out))
+        neighbors = indices[indptr[i]:indptr[i + 1]].tolist() if i + 1 < len(indptr) else []
+        extra = pending.get(i)
+        return neighbors + extra if extra else neighbors
+
+    def successors(self, node):
+        return iter(self.succ[node])
+
+    neighbors = successors
+
+    def predecessors(self, node):
+        return iter(self.pred[node])
+
+    def out_degree(self, node) -> int:
+        return len(self._neighbor_ids(self._index[node]))
+
+    def in_degree(self, node) -> int:
+        return len(self._neighbor_ids(self._index[node], reverse=True))
+
+    def is_directed(self) -> bool:
+        return True
+
+    def is_multigraph(self) -> bool:
+        return False
+
+    # --- Compactación ---
+    def compact(self):
+        """Vuelca las aristas pendientes en el CSR (ordenado por origen y destino)."""
+        n = len(self._labels)
+        if not self._pending and len(self._indptr) == n + 1:
+            return
+        n_rows = len(self._indptr) - 1
+        src = np.repeat(np.arange(n_rows, dtype=np.int32), np.diff(self._indptr))
+        dst = self._indices
+        codes = self._codes
+        if self._pending:
+            pending = np.array([(u, v, code) for (u, v), code in self._pending.items()], dtype=np.int32)
+            src = np.concatenate([src, pending[:, 0]])
+            dst = np.concatenate([dst, pending[:, 1]])
+            codes = np.concatenate([codes, pending[:, 2]])
+        order = np.lexsort((dst, src))
+        self._indices = np.ascontiguousarray(dst[order])
+        self._codes = np.ascontiguousarray(codes[order])
+        self._indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self._indptr[1:])
+        reverse = np.lexsort((src, dst))
+        self._rindices = np.ascontiguousarray(src[reverse])
+        self._rindptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=n), out=self._rindptr[1:])
+        self._pending.clear()
+        self._pending_out.clear()
+        self._pending_in.clear()
+        self.compactions += 1
+
+    # --- Recorridos nativos ---
+    def _expand(self, frontier, reverse=False):
+        """(orígenes, destinos) de las aristas que salen de ``frontier`` (entran, si ``reverse``); CSR ya compacto."""
+        indptr, indices = (self._rindptr, self._rindices) if reverse else (self._indptr, self._indices)
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            return frontier[:0], frontier[:0]
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return np.repeat(frontier, counts), indices[offsets]
+
+    def _advance(self, frontier, parents, reverse=False):
+        """Expande un nivel: marca el padre de cada id nuevo y devuelve la nueva frontera."""
+        origins, reached = self._expand(frontier, reverse)
+        new = parents[reached] == -1
+        reached, first = np.unique(reached[new], return_index=True)
+        parents[reached] = origins[new][first]
+        return reached
+
+    def bfs_parents(self, source, target=None):
+        """
+        BFS vectorizado por niveles desde ``source``.
+
+        Returns:
+            Array int32 con el padre de cada id (-1 si no se alcanza; el origen es su
+            propio padre). Si se da ``target`` la búsqueda para al alcanzarlo.
+        """
+        self.compact()
+        start = self._index[source]
+        goal = self._index[target] if target is not None else -1
+        parents = np.full(len(self._labels), -1, dtype=np.int32)
+        parents[start] = start
+        frontier = np.array([start], dtype=np.int32)
+        while len(frontier) and (goal < 0 or parents[goal] == -1):
+            frontier = self._advance(frontier, parents)
+        return parents
+
+    def bfs_distances(self, source) -> np.ndarray:
+        """Saltos desde ``source`` a cada id (-1 si no se alcanza)."""
+        self.compact()
+        distances = np.full(len(self._labels), -1, dtype=np.int32)
+        frontier = np.array([self._index[source]], dtype=np.int32)
+        level = 0
+        while len(frontier):
+            distances[frontier] = level
+            _, reached = self._expand(frontier)
+            frontier = np.unique(reached[distances[reached] == -1])
+            level += 1
+        return distances
+
+    def shortest_path(self, source, target) -> list:
+        """
+        Camino más corto en saltos (mismo contrato que nx.shortest_path sin pesos).
+
+        Raises:
+            nx.NodeNotFound: si falta el origen o el destino.
+            nx.NetworkXNoPath: si no hay camino.
+        """
+        for node in (source, target):
+            if node not in self._index:
+                raise nx.NodeNotFound(f"Node {node} not in graph")
+        start, goal = self._index[source], self._index[target]
+        if start == goal:
+            return [source]
+        # BFS bidireccional por niveles, expandiendo siempre la frontera menor (como networkx).
+        # El primer encuentro da un camino mínimo: cualquier nodo de la frontera nueva que ya
+        # estuviera visitado desde el otro extremo lo está a la profundidad de esa frontera.
+        self.compact()
+        forward = np.full(len(self._labels), -1, dtype=np.int32)
+        backward = np.full(len(self._labels), -1, dtype=np.int32)
+        forward[start], backward[goal] = start, goal
+        forward_frontier = np.array([start], dtype=np.int32)
+        backward_frontier = np.array([goal], dtype=np.int32)
+        while len(forward_frontier) and len(backward_frontier):
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier = self._advance(forward_frontier, forward)
+                meet = forward_frontier[backward[forward_frontier] != -1]
+            else:
+                backward_frontier = self._advance(backward_frontier, backward, reverse=True)
+                meet = backward_frontier[forward[backward_frontier] != -1]
+            if len(meet):
+                return self._join_path(int(meet[0]), forward, backward)
+        raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+
+    def _join_path(self, middle, forward, backward):
+        path = [middle]
+        while forward[path[-1]] != path[-1]:
+            path.append(int(forward[path[-1]]))
+        path.reverse()
+        while backward[path[-1]] != path[-1]:
+            path.append(int(backward[path[-1]]))
+        return [self._labels[i] for i in path]
+
+    def has_path(self, source, target) -> bool:
+        try:
+            self.shortest_path(source, target)
+            return True
+        except nx.NetworkXNoPath:
+            return False
+
+    # --- Conversión ---
+    @classmethod
+    def from_networkx(cls, graph, **kwargs):
+        csr = cls(**kwargs)
+        csr.graph.update(graph.graph)
+        for node, data in graph.nodes(data=True):
+            csr.add_node(node, **data)
+        for u, v, data in graph.edges(data=True):
+            csr.add_edge(u, v, **data)
+        csr.compact()
+        return csr
+
+    def to_networkx(self) -> nx.DiGraph:
+        graph = nx.DiGraph(**self.graph)
+        for node, data in self.nodes(data=True):
+            graph.add_node(node, **data)
+        graph.add_edges_from(self.edges(data=True))
+        return graph
+
+    def memory_bytes(self) -> int:
+        """Bytes de los arrays de topología (sin contar los valores de los atributos)."""
+        arrays = (self._indptr, self._indices, self._codes, self._rindptr, self._rindices)
+        return sum(array.nbytes for array in arrays)
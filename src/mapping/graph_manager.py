@@ -1,80 +1,561 @@
 # src/mapping/graph_manager.py
+import os
+import copy
+import math
+import weakref
+from itertools import chain
 import networkx as nx
-from streamlit_agraph import Node, Edge
+from mapping.observation import Observation
+# streamlit_agraph pulls in all of streamlit: imported only where agraph objects are built
 
-def initialize_graph():
+# Backends de grafo: 'networkx' (DiGraph) o 'csr' (mapping/csr_graph.py, para mapas grandes)
+GRAPH_BACKENDS = ("networkx", "csr")
+
+def initialize_graph(backend=None):
+    """
+    Crea un grafo vacío.
+
+    Args:
+        backend: 'networkx' o 'csr'. Por defecto la variable de entorno GRAPH_BACKEND
+                 ('networkx' si no está definida). Los dos admiten las funciones de
+                 este módulo, nx.shortest_path/nx.has_path y node_link_data.
+    """
+    backend = backend or os.getenv("GRAPH_BACKEND", "networkx")
+    if backend not in GRAPH_BACKENDS:
+        raise ValueError(f"Backend de grafo desconocido: {backend!r} (opciones: {', '.join(GRAPH_BACKENDS)})")
+    if backend == "csr":
+        from mapping.csr_graph import CSRGraph  # NumPy solo se carga si se usa
+        return CSRGraph()
     return nx.DiGraph()
 
+# Diarios de mutaciones por grafo, por nombre: mapping/session_store.py ('session') guarda
+# solo los cambios desde el último guardado y mapping/map_store.py ('map_store') los
+# escribe en SQLite. Cada entrada es una tupla (operación, args...)
+_journals = weakref.WeakKeyDictionary()
+
+def attach_journal(graph, journal, name="session"):
+    """
+    Añade a ``journal`` (una lista o cualquier objeto con append) cada mutación hecha
+    con las funciones de este módulo. Un diario con el mismo nombre se sustituye.
+    """
+    _journals.setdefault(graph, {})[name] = journal
+
+def detach_journal(graph, name="session"):
+    _journals.get(graph, {}).pop(name, None)
+
+def _record(graph, *entry):
+    for journal in _journals.get(graph, {}).values():
+        journal.append(entry)
+
+# Contador de mutaciones por grafo: lo incrementan los mutadores de este módulo, así
+# que los cachés derivados (navigation/path_service.py) saben con una comparación si
+# el grafo ha cambiado desde su última consulta
+_versions = weakref.WeakKeyDictionary()
+
+def graph_version(graph):
+    """Número de mutaciones hechas en el grafo con las funciones de este módulo."""
+    return _versions.get(graph, 0)
+
+def _bump_version(graph):
+    _versions[graph] = _versions.get(graph, 0) + 1
+
 def add_node_to_graph(graph, node_id, data):
+    data = _with_observation(data)
     graph.add_node(node_id, **data)
+    _bump_version(graph)
+    _mark_dirty(graph, node_ids=(node_id,))
+    _record(graph, "add_node", node_id, dict(data))
 
 def add_edge_to_graph(graph, node_from, node_to, action):
+    new_nodes = [node for node in (node_from, node_to) if node not in graph]
     graph.add_edge(node_from, node_to, action=action)
+    _bump_version(graph)
+    _mark_dirty(graph, node_ids=new_nodes, edge=(node_from, node_to))
+    _record(graph, "add_edge", node_from, node_to, action)
+
+def _with_observation(data):
+    """
+    ``data`` con el 'llm_json' de los estados anteriores a Observation convertido en
+    'observation'. Devuelve una copia: la conversión se hace una vez, al cargar o en
+    los mutadores, para que pase por los diarios y la versión del grafo.
+    """
+    if "llm_json" not in data:
+        return data
+    data = dict(data)
+    llm_json = data.pop("llm_json")
+    if llm_json and data.get("observation") is None:
+        data["observation"] = Observation.from_json(llm_json)
+    return data
+
+def _observation_of(data):
+    """Observation del nodo, sin modificar sus atributos (solo lectura)."""
+    observation = data.get("observation")
+    if observation is None and data.get("llm_json"):
+        # Nodo con formato antiguo añadido sin los mutadores: se convierte al vuelo
+        observation = Observation.from_json(data["llm_json"])
+    return observation
+
+def get_node_observation(graph, node_id):
+    """Observation (mapping/observation.py) del nodo, o None si no existe o no tiene análisis."""
+    data = graph.nodes.get(node_id)
+    return _observation_of(data) if data is not None else None
+
+def observation_tooltip(observation):
+    """Texto del tooltip de un nodo a partir de su observación."""
+    lines = [f"Descripción: {observation.description}"]
+    if observation.node_name_detailed:
+        lines.append(f"Landmarks: {observation.node_name_detailed}")
+    if observation.objects:
+        lines.append("Objetos: " + ", ".join(observation.object_names))
+    if observation.paths:
+        lines.append("Caminos: " + "; ".join(
+            f"{path.description} ({path.direction})" if path.direction else path.description
+            for path in observation.paths))
+    if observation.obstacles:
+        lines.append("Obstáculos: " + "; ".join(
+            f"{obstacle.type} ({obstacle.location})" if obstacle.location else obstacle.type
+            for obstacle in observation.obstacles))
+    if observation.actions:
+        lines.append("Acciones: " + "; ".join(observation.actions))
+    return "\n".join(lines)
+
+def graph_to_node_link(graph):
+    """node_link_data serializable a JSON: cada Observation se guarda como 'llm_json'."""
+    from networkx.readwrite import json_graph
+    data = json_graph.node_link_data(graph)
+    for node in data["nodes"]:
+        observation = node.pop("observation", None)
+        if observation is not None:
+            node["llm_json"] = observation.to_json()
+    return data
+
+def graph_from_node_link(data, backend=None):
+    """Inverso de graph_to_node_link; acepta también estados guardados antes de Observation."""
+    from networkx.readwrite import json_graph
+    data = dict(data, nodes=[_with_observation(node) for node in data["nodes"]])
+    graph = json_graph.node_link_graph(data)
+    if (backend or os.getenv("GRAPH_BACKEND", "networkx")) == "csr":
+        from mapping.csr_graph import CSRGraph
+        graph = CSRGraph.from_networkx(graph)
+    return graph
+
+# Definir colores para nodos
+START_NODE_BORDER = "#FFD700"
+DEFAULT_NODE_BORDER = "#ADD8E6"
+HIGHLIGHT_BORDER_WIDTH = 3
+
+# Definir propiedades de los bordes
+EDGE_COLOR = "#808080"
+EDGE_THICKNESS = 2
+
+# Los tooltips viajan en el payload de cada rerun: se recortan a este número de caracteres
+TOOLTIP_MAX_CHARS = 400
+
+# Nivel de detalle (convert_nx_to_agraph_lod): a partir de LOD_MIN_NODES nodos solo se
+# dibujan enteros los vecindarios de los nodos de interés; el resto se agrupa en
+# super-nodos de habitación o zona (mapping/hierarchy.py)
+LOD_MIN_NODES = 200
+LOD_DEFAULT_HOPS = 2
+LOD_MAX_DETAIL_NODES = 150
+CLUSTER_PREFIX = "cluster:"  # ids de super-nodo: 'cluster:room:<id>' y 'cluster:zone:<id>'
+ROOM_CLUSTER_COLOR = {"background": "#E8F0FE", "border": "#4A7BD0"}
+ZONE_CLUSTER_COLOR = {"background": "#FDF1DC", "border": "#C98A1B"}
+CLUSTER_EDGE_COLOR = "#B0B0B0"
+
+
+class _RenderCache:
+    """
+    Node/Edge de streamlit-agraph ya construidos para un grafo, en el orden del grafo.
+    Los mutadores de este módulo marcan como sucios los nodos y aristas que cambian;
+    convert_nx_to_agraph solo reconstruye esos. Si el número de nodos no cuadra (el
+    grafo se modificó por otra vía) se reconcilia entero; contar aristas es O(n) en
+    networkx, así que los cambios de aristas por otra vía requieren clear_render_cache.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = []
+        self.node_slots = {}  # node_id -> posición en nodes
+        self.edge_slots = {}  # (u, v) -> posición en edges
+        self.door_edges = set()  # Posiciones de aristas cuya acción menciona una puerta
+        # Dicts como conjuntos ordenados: los nodos nuevos entran en el orden del grafo
+        self.dirty_nodes = {}
+        self.dirty_edges = {}
+        self.rebuilt = 0  # Nodos + aristas reconstruidos en la última conversión
+
+    def reset(self):
+        self.__init__()
+
+
+# Un caché por grafo; desaparece con el grafo (reset o carga de un estado)
+_render_caches = weakref.WeakKeyDictionary()
+
+
+def _render_cache(graph):
+    cache = _render_caches.get(graph)
+    if cache is None:
+        cache = _render_caches[graph] = _RenderCache()
+        cache.dirty_nodes.update(dict.fromkeys(graph.nodes()))
+        cache.dirty_edges.update(dict.fromkeys(graph.edges()))
+    return cache
+
+
+def _mark_dirty(graph, node_ids=(), edge=None):
+    cache = _render_caches.get(graph)
+    if cache is None:
+        return
+    cache.dirty_nodes.update(dict.fromkeys(node_ids))
+    if edge is not None:
+        cache.dirty_edges[edge] = None
+
+
+def clear_render_cache(graph):
+    """Descarta los Node/Edge cacheados del grafo (p.ej. tras modificarlo sin los mutadores)."""
+    _render_caches.pop(graph, None)
+
+
+def _cap_tooltip(text, limit=TOOLTIP_MAX_CHARS):
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _build_node(Node, node_id, data):
+    observation = _observation_of(data)
+    if observation is not None:
+        viewpoint_details = observation_tooltip(observation)
+    else:
+        viewpoint_details = data.get("description", "")
+    # Posición fija de mapping/layout.py, si se ha calculado
+    position = {"x": data["x"], "y": data["y"]} if "x" in data and "y" in data else {}
+    return Node(
+        id=node_id,
+        label=str(node_id).replace(" ", "_"),
+        title=_cap_tooltip(viewpoint_details),
+        color={"background": "#ffffff", "border": DEFAULT_NODE_BORDER},
+        size=25,
+        **position
+    )
+
+
+def _build_edge(Edge, u, v, data):
+    return Edge(
+        source=u,
+        target=v,
+        label=data.get('action', ''),
+        color=EDGE_COLOR,
+        width=EDGE_THICKNESS,
+        style="solid"
+    )
 
-# MODIFIED FUNCTION DEFINITION: Added 'door_states=None' parameter
-def convert_nx_to_agraph(graph, door_states=None):
+
+def _overlay(item, **changes):
+    """Copia de un Node/Edge cacheado con atributos cambiados (el cacheado no se toca)."""
+    item = copy.copy(item)
+    item.__dict__.update(changes)
+    return item
+
+
+def _refresh_render_cache(cache, graph, Node, Edge):
+    """Reconstruye los elementos sucios. Devuelve cuántos se han reconstruido."""
+    rebuilt = 0
+    for node_id in cache.dirty_nodes:
+        if node_id not in graph:
+            continue
+        node = _build_node(Node, node_id, graph.nodes[node_id])
+        slot = cache.node_slots.get(node_id)
+        if slot is None:
+            cache.node_slots[node_id] = len(cache.nodes)
+            cache.nodes.append(node)
+        else:
+            cache.nodes[slot] = node
+        rebuilt += 1
+    for u, v in cache.dirty_edges:
+        data = graph.get_edge_data(u, v)
+        if data is None:
+            continue
+        _store_edge(cache, Edge, u, v, data)
+        rebuilt += 1
+    cache.dirty_nodes.clear()
+    cache.dirty_edges.clear()
+    return rebuilt
+
+
+def _store_edge(cache, Edge, u, v, data):
+    """Construye la arista (u, v) y la guarda en su posición del caché (nueva si no la tiene)."""
+    edge = _build_edge(Edge, u, v, data)
+    slot = cache.edge_slots.get((u, v))
+    if slot is None:
+        slot = cache.edge_slots[(u, v)] = len(cache.edges)
+        cache.edges.append(edge)
+    else:
+        cache.edges[slot] = edge
+    if 'door' in edge.label.lower():
+        cache.door_edges.add(slot)
+    else:
+        cache.door_edges.discard(slot)
+    return edge
+
+
+def convert_nx_to_agraph(graph, door_states=None, highlights=None):
+    """
+    Convierte el grafo en listas de Node/Edge de streamlit-agraph.
+
+    Los objetos se cachean por grafo y solo se reconstruyen los nodos y aristas
+    modificados con add_node_to_graph, update_node_data o add_edge_to_graph desde la
+    última llamada, así que el coste por rerun no crece con el tamaño del mapa ni de
+    sus análisis. El nodo inicial, los resaltados y el estado de las puertas se
+    aplican como copias superpuestas: los Node/Edge devueltos son compartidos con el
+    caché y no deben modificarse.
+
+    Args:
+        graph: Grafo de navegación (NetworkX DiGraph).
+        door_states: {('nodo1', 'nodo2'): 'abierta'/'cerrada'} (clave ordenada).
+        highlights: {node_id: color} de los nodos a resaltar (p.ej. actual y seleccionado).
+
+    Returns:
+        Tupla (agraph_nodes, agraph_edges).
+    """
     if door_states is None:
         door_states = {} # Default to an empty dictionary if not provided
+    cache = _fresh_render_cache(graph)
+
+    agraph_nodes = list(cache.nodes)
+    if agraph_nodes:
+        agraph_nodes[0] = _overlay(agraph_nodes[0], color={"background": "#ffffff", "border": START_NODE_BORDER})
+    for node_id, color in (highlights or {}).items():
+        slot = cache.node_slots.get(node_id)
+        if slot is not None:
+            agraph_nodes[slot] = _overlay(agraph_nodes[slot], color=color, borderWidth=HIGHLIGHT_BORDER_WIDTH)
+
+    agraph_edges = list(cache.edges)
+    if door_states:
+        for slot in cache.door_edges:
+            agraph_edges[slot] = _with_door_state(agraph_edges[slot], door_states)
+
+    return agraph_nodes, agraph_edges
+
+def _fresh_render_cache(graph):
+    """Caché de render del grafo con los elementos sucios ya reconstruidos."""
+    from streamlit_agraph import Node, Edge
+
+    cache = _render_cache(graph)
+    rebuilt = _refresh_render_cache(cache, graph, Node, Edge)
+    if len(cache.nodes) != len(graph):
+        # Nodos añadidos/quitados sin los mutadores: se reconcilia todo
+        cache.reset()
+        cache.dirty_nodes.update(dict.fromkeys(graph.nodes()))
+        cache.dirty_edges.update(dict.fromkeys(graph.edges()))
+        rebuilt = _refresh_render_cache(cache, graph, Node, Edge)
+    cache.rebuilt = rebuilt
+    return cache
+
+def _with_door_state(edge, door_states):
+    door_state = door_states.get(tuple(sorted((edge.source, edge.to))))
+    if door_state == "cerrada":
+        return _overlay(edge, style="dashed", label=edge.label + " (Cerrada)")
+    if door_state == "abierta":
+        return _overlay(edge, label=edge.label + " (Abierta)")
+    return edge
+
+def _mean_position(graph, nodes, limit=32):
+    """{'x', 'y'} medio de hasta ``limit`` nodos con posición, o {} si ninguno la tiene."""
+    points = []
+    for node in nodes:
+        data = graph.nodes[node]
+        if "x" in data and "y" in data:
+            points.append((data["x"], data["y"]))
+            if len(points) == limit:
+                break
+    if not points:
+        return {}
+    return {"x": sum(x for x, _ in points) / len(points), "y": sum(y for _, y in points) / len(points)}
 
+def cluster_node_id(kind, cluster_id):
+    """Id del super-nodo de una habitación ('room') o zona ('zone')."""
+    return f"{CLUSTER_PREFIX}{kind}:{cluster_id}"
+
+def parse_cluster_id(node_id):
+    """(kind, id) si ``node_id`` es un super-nodo de convert_nx_to_agraph_lod; si no, None."""
+    if not isinstance(node_id, str) or not node_id.startswith(CLUSTER_PREFIX):
+        return None
+    kind, _, cluster_id = node_id[len(CLUSTER_PREFIX):].partition(":")
+    if kind not in ("room", "zone") or not cluster_id.isdigit():
+        return None
+    return kind, int(cluster_id)
+
+def convert_nx_to_agraph_lod(graph, focus=(), hops=LOD_DEFAULT_HOPS, expanded=(), door_states=None,
+                             highlights=None):
+    """
+    Vista por niveles de detalle del grafo para mapas grandes.
+
+    Los nodos a ``hops`` saltos (en cualquier sentido) de los nodos de ``focus`` se
+    dibujan enteros, como en convert_nx_to_agraph y desde el mismo caché. El resto se
+    agrupa con la jerarquía del mapa: las habitaciones de las zonas visibles pasan a
+    ser un super-nodo cada una y las demás zonas un único super-nodo; las aristas
+    entre grupos se fusionan en una con el número de aristas originales como
+    etiqueta. El coste depende del vecindario y del número de zonas, no del de nodos.
+
+    Args:
+        graph: Grafo de navegación.
+        focus: Nodos de interés (p.ej. actual y seleccionado).
+        hops: Radio del vecindario que se dibuja completo.
+        expanded: Ids de super-nodo (cluster_node_id) que el usuario ha abierto: una
+                  habitación abierta muestra sus nodos y una zona, sus habitaciones.
+        door_states, highlights: Como en convert_nx_to_agraph.
+
+    Returns:
+        Tupla (agraph_nodes, agraph_edges).
+    """
+    from streamlit_agraph import Node, Edge
+    from mapping.hierarchy import get_hierarchy  # hierarchy importa este módulo
+
+    cache = _fresh_render_cache(graph)
+    hierarchy = get_hierarchy(graph)
+    hierarchy.refresh()
+    opened = [parse_cluster_id(cluster) for cluster in expanded]
+
+    # --- Nodos en detalle: vecindario de los nodos de interés y habitaciones abiertas ---
+    frontier = [node for node in dict.fromkeys(focus) if node is not None and node in graph]
+    detail = dict.fromkeys(frontier)
+    for _ in range(hops):
+        next_frontier = []
+        for node in frontier:
+            for neighbor in chain(graph.successors(node), graph.predecessors(node)):
+                if neighbor not in detail and len(detail) < LOD_MAX_DETAIL_NODES:
+                    detail[neighbor] = None
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    for kind, cluster_id in filter(None, opened):
+        if kind == "room" and cluster_id in hierarchy.rooms:
+            detail.update(dict.fromkeys(hierarchy.rooms[cluster_id].members))
+
+    open_zones = {hierarchy.rooms[hierarchy.room_of[node]].zone for node in detail}
+    open_zones.update(cluster_id for kind, cluster_id in filter(None, opened)
+                      if kind == "zone" and cluster_id in hierarchy.zones)
+
+    def unit(node):
+        if node in detail:
+            return node
+        room_id = hierarchy.room_of[node]
+        zone = hierarchy.rooms[room_id].zone
+        return cluster_node_id("room", room_id) if zone in open_zones else cluster_node_id("zone", zone)
+
+    # --- Nodos ---
+    highlights = highlights or {}
+    start_node = cache.nodes[0].id if cache.nodes else None
     agraph_nodes = []
-    agraph_edges = []
+    for node in detail:
+        item = cache.nodes[cache.node_slots[node]]
+        if node == start_node:
+            item = _overlay(item, color={"background": "#ffffff", "border": START_NODE_BORDER})
+        if node in highlights:
+            item = _overlay(item, color=highlights[node], borderWidth=HIGHLIGHT_BORDER_WIDTH)
+        agraph_nodes.append(item)
 
-    # Definir colores para nodos
-    start_node_border = "#FFD700"
-    default_node_border = "#ADD8E6"
-
-    # Definir propiedades de los bordes
-    edge_color = "#808080"
-    edge_thickness = 2
-
-    for i, (node_id, data) in enumerate(graph.nodes(data=True)):
-        node_name = str(node_id).replace(" ", "_")
-        viewpoint_details = ""
-        llm_json = data.get("llm_json", {})
-        if llm_json:
-            details = []
-            for key, value in llm_json.items():
-                details.append(f"{key}: {value}")
-            viewpoint_details = "\n".join(details)
-        else:
-            viewpoint_details = data.get("description", "")
-        label = node_name
-        node_color = {"background": "#ffffff", "border": start_node_border} if i == 0 else {"background": "#ffffff", "border": default_node_border}
+    open_rooms = {}  # habitación visible -> miembros que no están en detalle
+    for zone in open_zones:
+        for room_id in hierarchy.zones[zone]:
+            hidden = [node for node in hierarchy.rooms[room_id].members if node not in detail]
+            if not hidden:
+                continue
+            open_rooms[room_id] = hidden
+            label = hierarchy.room_label(room_id)
+            agraph_nodes.append(Node(
+                id=cluster_node_id("room", room_id), label=f"{label} ({len(hidden)})", shape="box",
+                title=_cap_tooltip(f"Habitación '{label}': {len(hidden)} vistas ocultas (clic para expandir)\n"
+                                   + ", ".join(sorted(map(str, hidden)))),
+                color=ROOM_CLUSTER_COLOR, size=15 + 3 * math.sqrt(len(hidden)), **_mean_position(graph, hidden)))
+    for zone, rooms in hierarchy.zones.items():
+        if zone in open_zones:
+            continue
+        n_nodes = sum(len(hierarchy.rooms[room_id].members) for room_id in rooms)
+        labels = sorted(hierarchy.room_label(room_id) for room_id in rooms)
         agraph_nodes.append(Node(
-            id=node_id,
-            label=label,
-            title=viewpoint_details,
-            color=node_color,
-            size=25
-        ))
-
-    for u, v, data in graph.edges(data=True):
-        edge_label = data.get('action', '')
-        edge_style = "solid"
-        if 'door' in edge_label.lower():
-            door_key = tuple(sorted((u, v)))
-            # MODIFIED LINE: Use the 'door_states' argument instead of st.session_state
-            if door_key in door_states and door_states[door_key] == "cerrada":
-                edge_style = "dashed"
-                edge_label += " (Cerrada)"
-            # MODIFIED LINE: Use the 'door_states' argument instead of st.session_state
-            elif door_key in door_states and door_states[door_key] == "abierta":
-                edge_label += " (Abierta)"
-        agraph_edges.append(Edge(
-            source=u,
-            target=v,
-            label=edge_label,
-            color=edge_color,
-            width=edge_thickness,
-            style=edge_style
-        ))
+            id=cluster_node_id("zone", zone), label=f"Zona {zone} ({n_nodes})", shape="hexagon",
+            title=_cap_tooltip(f"Zona con {len(rooms)} habitaciones y {n_nodes} vistas (clic para expandir)\n"
+                               + ", ".join(labels)),
+            color=ZONE_CLUSTER_COLOR, size=15 + 3 * math.sqrt(n_nodes),
+            **_mean_position(graph, chain.from_iterable(hierarchy.rooms[room_id].members for room_id in rooms))))
+
+    # --- Aristas ---
+    agraph_edges = []
+    merged = {}  # (origen, destino) -> número de aristas originales
 
+    def merge(source, target, count=1):
+        if source != target:
+            merged[(source, target)] = merged.get((source, target), 0) + count
+
+    for node in detail:
+        for neighbor in graph.successors(node):
+            if neighbor in detail:
+                slot = cache.edge_slots.get((node, neighbor))
+                if slot is None:
+                    # Arista añadida sin los mutadores (no se cuentan aristas al reconciliar)
+                    edge = _store_edge(cache, Edge, node, neighbor, graph.get_edge_data(node, neighbor))
+                else:
+                    edge = cache.edges[slot]
+                agraph_edges.append(_with_door_state(edge, door_states) if door_states else edge)
+            else:
+                merge(node, unit(neighbor))
+        for neighbor in graph.predecessors(node):
+            if neighbor not in detail:
+                merge(unit(neighbor), node)
+    for room_id, hidden in open_rooms.items():
+        source = cluster_node_id("room", room_id)
+        for node in hidden:
+            for neighbor in graph.successors(node):
+                if neighbor not in detail:
+                    merge(source, unit(neighbor))
+    for zone, links in hierarchy.zone_links.items():
+        if zone in open_zones:
+            continue
+        source = cluster_node_id("zone", zone)
+        for target_zone, count in links.items():
+            if target_zone not in open_zones:
+                merge(source, cluster_node_id("zone", target_zone), count)
+                continue
+            # Zona destino abierta: se resuelve el portal hasta su habitación o nodo
+            for room_id in hierarchy.zones[zone]:
+                for target_room, portals in hierarchy.room_links.get(room_id, {}).items():
+                    if hierarchy.rooms[target_room].zone == target_zone:
+                        for _, v in portals:
+                            if v not in detail:
+                                merge(source, unit(v))
+
+    for (source, target), count in merged.items():
+        agraph_edges.append(Edge(source=source, target=target, label=str(count) if count > 1 else "",
+                                 color=CLUSTER_EDGE_COLOR, width=1 + math.log2(count), dashes=True))
     return agraph_nodes, agraph_edges
 
+def get_render_stats(graph):
+    """Tamaño del caché de render del grafo y elementos reconstruidos en la última conversión."""
+    cache = _render_caches.get(graph)
+    if cache is None:
+        return {"cached_nodes": 0, "cached_edges": 0, "rebuilt": 0}
+    return {"cached_nodes": len(cache.nodes), "cached_edges": len(cache.edges), "rebuilt": cache.rebuilt}
+
+def set_node_positions(graph, positions):
+    """
+    Guarda posiciones de dibujo {node_id: (x, y)} en los atributos 'x'/'y' de los nodos
+    (mapping/layout.py). Se anotan en los diarios como ('set_positions', {node_id: (x, y)})
+    para que el mapa SQLite y la sesión guardada las conserven, pero no cambian la
+    versión del grafo: la estructura sigue siendo la misma.
+    """
+    nodes = graph.nodes
+    for node_id, (x, y) in positions.items():
+        data = nodes[node_id]
+        data["x"], data["y"] = x, y
+    _mark_dirty(graph, node_ids=positions)
+    if positions:
+        _record(graph, "set_positions", dict(positions))
+
 def get_node_data(graph, node_id):
     # Use .get() for safer access in case node_id doesn't exist
     return graph.nodes.get(node_id)
 
 def update_node_data(graph, node_id, new_data):
     if node_id in graph:
-        graph.nodes[node_id].update(new_data)
\ No newline at end of file
+        new_data = _with_observation(new_data)
+        graph.nodes[node_id].update(new_data)
+        _bump_version(graph)
+        _mark_dirty(graph, node_ids=(node_id,))
+        _record(graph, "update_node", node_id, dict(new_data))
\ No newline at end of file
@@ -0,0 +1,350 @@
+# src/mapping/hierarchy.py
+"""
+Jerarquía del mapa: puntos de vista -> habitaciones -> zonas.
+
+Cada nodo nuevo se asigna a una habitación vecina (conectada por una arista) si sus
+objetos y landmarks se parecen a los de esa habitación (coseno TF-IDF sobre los
+términos de mapping/object_index.py) y la habitación no está llena; si no, abre una
+habitación nueva. Las habitaciones conectadas se agrupan en zonas de hasta
+DEFAULT_MAX_ZONE_SIZE puntos de vista. Las aristas entre habitaciones distintas son los portales
+del grafo abstracto.
+
+La jerarquía se mantiene sola: se adjunta como diario de mapping/graph_manager.py
+('hierarchy') y los nodos nuevos se asignan en el siguiente refresh(), cuando ya
+tienen sus aristas. Planificar es buscar primero la ruta en el grafo de zonas, luego
+la secuencia de habitaciones dentro de esas zonas y refinar solo entre los nodos de
+esas habitaciones y sus vecinas, así que el coste depende de la longitud de la ruta
+y no del tamaño del mapa.
+
+    hierarchy = get_hierarchy(graph)
+    hierarchy.shortest_path("Kitchen_Door", "Garage")
+"""
+import math
+import weakref
+from collections import Counter, deque
+
+import networkx as nx
+
+from mapping.object_index import observation_terms
+from mapping.graph_manager import attach_journal, get_node_observation
+
+DEFAULT_MAX_ROOM_SIZE = 24  # puntos de vista por habitación
+DEFAULT_MAX_ZONE_SIZE = 192  # puntos de vista por zona
+# Similitud mínima entre un nodo y una habitación vecina para unirse a ella
+DEFAULT_MIN_SIMILARITY = 0.2
+
+
+class _Room:
+    __slots__ = ("members", "terms", "zone")
+
+    def __init__(self, zone):
+        self.members = set()
+        self.terms = Counter()
+        self.zone = zone
+
+
+def _bfs_path(neighbors, source, target):
+    """Camino más corto (en saltos) de source a target con la función ``neighbors``, o None."""
+    if source == target:
+        return [source]
+    parents = {source: None}
+    queue = deque((source,))
+    while queue:
+        node = queue.popleft()
+        for neighbor in neighbors(node):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = node
+            if neighbor == target:
+                path = [neighbor]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            queue.append(neighbor)
+    return None
+
+
+class MapHierarchy:
+    """
+    Habitaciones y zonas de un grafo, con sus portales.
+
+    Atributos de consulta: ``room_of`` (nodo -> habitación), ``rooms`` (habitación ->
+    miembros, términos y zona), ``zones`` (zona -> habitaciones), ``room_links``
+    (habitación -> {habitación vecina: aristas portal}) y ``zone_links``. Solo están al
+    día tras refresh(); room_of_node() lo llama antes de consultar.
+    """
+
+    def __init__(self, graph, max_room_size: int = DEFAULT_MAX_ROOM_SIZE,
+                 max_zone_size: int = DEFAULT_MAX_ZONE_SIZE, min_similarity: float = DEFAULT_MIN_SIMILARITY):
+        self._graph_ref = weakref.ref(graph)
+        self.max_room_size = max_room_size
+        self.max_zone_size = max_zone_size
+        self.min_similarity = min_similarity
+        self.room_of = {}
+        self.rooms = {}
+        self.zones = {}
+        self.room_links = {}
+        self.zone_links = {}
+        self.zone_sizes = {}  # zona -> puntos de vista
+        self._zone_sources = {}  # zona -> zonas con portales hacia ella
+        self._df = Counter()  # nodos asignados que contienen cada término
+        self._node_terms = {}  # nodo asignado -> sus términos, para descontarlos si se reanaliza
+        self._labels = {}  # habitación -> etiqueta, hasta que cambian sus términos
+        self._pending = {}  # nodos por asignar, en orden de llegada
+        self._next_room = 0
+        self._next_zone = 0
+        self.fallbacks = 0  # búsquedas que tuvieron que salir de las habitaciones de la ruta
+
+    @property
+    def graph(self):
+        return self._graph_ref()
+
+    # --- Mantenimiento ---
+    def append(self, entry):
+        """Entrada del diario de graph_manager: (operación, args...)."""
+        op = entry[0]
+        if op == "add_node":
+            if entry[1] not in self.room_of:
+                self._pending[entry[1]] = None
+        elif op == "add_edge":
+            u, v = entry[1], entry[2]
+            for node in (u, v):
+                if node not in self.room_of:
+                    self._pending[node] = None
+            if u in self.room_of and v in self.room_of:
+                self._link(u, v)
+        elif op == "update_node":
+            node = entry[1]
+            room_id = self.room_of.get(node)
+            observation = entry[2].get("observation")
+            if room_id is not None and observation is not None:
+                # Los términos del análisis anterior se sustituyen, no se acumulan
+                room = self.rooms[room_id]
+                old_terms = self._node_terms[node]
+                terms = self._node_terms[node] = observation_terms(observation)
+                room.terms.subtract(old_terms)
+                room.terms.update(terms)
+                room.terms = +room.terms
+                self._df.subtract(old_terms.keys())
+                self._df.update(terms.keys())
+                self._df = +self._df
+                self._labels.pop(room_id, None)
+
+    def refresh(self):
+        """Asigna los nodos añadidos desde la última llamada."""
+        graph = self.graph
+        while self._pending:
+            node = next(iter(self._pending))
+            del self._pending[node]
+            if node in graph and node not in self.room_of:
+                self._assign(graph, node)
+
+    def _idf(self, term):
+        return math.log((1 + len(self.room_of)) / (1 + self._df[term])) + 1
+
+    def _similarity(self, terms, room_terms):
+        if not terms or not room_terms:
+            return 0.0
+        weights = {term: self._idf(term) for term in terms.keys() | room_terms.keys()}
+        dot = sum(tf * room_terms.get(term, 0) * weights[term] ** 2 for term, tf in terms.items())
+        if not dot:
+            return 0.0
+        norm = math.sqrt(sum((tf * weights[term]) ** 2 for term, tf in terms.items()))
+        room_norm = math.sqrt(sum((tf * weights[term]) ** 2 for term, tf in room_terms.items()))
+        return dot / (norm * room_norm)
+
+    def _assign(self, graph, node):
+        observation = get_node_observation(graph, node)
+        terms = observation_terms(observation) if observation is not None else Counter()
+        edges_to = Counter(self.room_of[n] for n in graph.successors(node) if n in self.room_of)
+        edges_to.update(self.room_of[n] for n in graph.predecessors(node) if n in self.room_of)
+
+        best, best_key = None, None
+        for room_id, edge_count in edges_to.items():
+            room = self.rooms[room_id]
+            if len(room.members) >= self.max_room_size:
+                continue
+            # Sin observaciones que comparar decide solo la conectividad
+            similarity = self._similarity(terms, room.terms) if terms and room.terms else self.min_similarity
+            if similarity < self.min_similarity:
+                continue
+            key = (similarity, edge_count)
+            if best_key is None or key > best_key:
+                best, best_key = room_id, key
+        if best is None:
+            best = self._new_room(edges_to)
+
+        room = self.rooms[best]
+        room.members.add(node)
+        room.terms.update(terms)
+        self._labels.pop(best, None)
+        self._df.update(terms.keys())
+        self._node_terms[node] = terms
+        self.room_of[node] = best
+        self.zone_sizes[room.zone] += 1
+        for neighbor in graph.successors(node):
+            if neighbor in self.room_of:
+                self._link(node, neighbor)
+        for neighbor in graph.predecessors(node):
+            if neighbor in self.room_of:
+                self._link(neighbor, node)
+
+    def _new_room(self, neighbor_rooms):
+        """Habitación nueva, en la zona de una habitación vecina si cabe (la más conectada)."""
+        zone = None
+        for room_id, _ in neighbor_rooms.most_common():
+            candidate = self.rooms[room_id].zone
+            if self.zone_sizes[candidate] < self.max_zone_size:
+                zone = candidate
+                break
+        if zone is None:
+            zone = self._next_zone
+            self._next_zone += 1
+            self.zones[zone] = set()
+            self.zone_sizes[zone] = 0
+        room_id = self._next_room
+        self._next_room += 1
+        self.rooms[room_id] = _Room(zone)
+        self.zones[zone].add(room_id)
+        return room_id
+
+    def _link(self, u, v):
+        ru, rv = self.room_of[u], self.room_of[v]
+        if ru == rv:
+            return
+        portals = self.room_links.setdefault(ru, {}).setdefault(rv, set())
+        if (u, v) in portals:
+            return
+        portals.add((u, v))
+        zu, zv = self.rooms[ru].zone, self.rooms[rv].zone
+        if zu == zv:
+            return
+        if self.zone_sizes[zu] + self.zone_sizes[zv] <= self.max_zone_size:
+            # Dos zonas pequeñas conectadas se funden (la primera habitación de una zona
+            # suele crearse antes de conocer sus puertas)
+            keep, drop = (zu, zv) if self.zone_sizes[zu] >= self.zone_sizes[zv] else (zv, zu)
+            self._merge_zones(keep, drop)
+            return
+        self._add_zone_link(zu, zv, 1)
+
+    def _add_zone_link(self, zu, zv, count):
+        links = self.zone_links.setdefault(zu, {})
+        links[zv] = links.get(zv, 0) + count
+        self._zone_sources.setdefault(zv, set()).add(zu)
+
+    def _merge_zones(self, keep, drop):
+        self.zone_sizes[keep] += self.zone_sizes.pop(drop)
+        for room_id in self.zones.pop(drop):
+            self.rooms[room_id].zone = keep
+            self.zones[keep].add(room_id)
+        for target, count in self.zone_links.pop(drop, {}).items():
+            self._zone_sources[target].discard(drop)
+            if target != keep:
+                self._add_zone_link(keep, target, count)
+        for source in self._zone_sources.pop(drop, ()):
+            count = self.zone_links[source].pop(drop)
+            if source != keep:
+                self._add_zone_link(source, keep, count)
+        self._zone_sources.get(keep, set()).discard(keep)
+
+    # --- Consultas ---
+    def room_of_node(self, node):
+        """Habitación de ``node``, asignando antes los nodos pendientes (room_of puede ir por detrás)."""
+        self.refresh()
+        return self.room_of[node]
+
+    def room_label(self, room_id) -> str:
+        """Término más distintivo de la habitación (o su primer nodo si no tiene observaciones)."""
+        label = self._labels.get(room_id)
+        if label is not None:
+            return label
+        room = self.rooms[room_id]
+        if room.terms:
+            label = max(room.terms, key=lambda term: (room.terms[term] * self._idf(term), len(term)))
+        else:
+            label = str(min(room.members, key=str)) if room.members else f"Habitación {room_id}"
+        self._labels[room_id] = label
+        return label
+
+    def portals(self, room_from, room_to):
+        """Aristas (u, v) que van de la habitación ``room_from`` a ``room_to``."""
+        return self.room_links.get(room_from, {}).get(room_to, set())
+
+    def shortest_path(self, source, target) -> list:
+        """
+        Camino de nodos de ``source`` a ``target`` buscando por niveles: zonas, habitaciones
+        y nodos de las habitaciones de la ruta (y sus vecinas). Si la búsqueda restringida
+        falla (p.ej. una habitación no es conexa en el sentido de las aristas), se
+        amplía al grafo completo; si no hay ruta abstracta no se busca más.
+
+        Raises:
+            nx.NodeNotFound: si source o target no están en el grafo.
+            nx.NetworkXNoPath: si no hay camino.
+        """
+        graph = self.graph
+        for node in (source, target):
+            if node not in graph:
+                raise nx.NodeNotFound(f"El nodo {node!r} no está en el grafo")
+        self.refresh()
+        # Los portales recogen todas las aristas entre habitaciones: si no hay ruta de
+        # zonas o de habitaciones, tampoco la hay de nodos
+        room_path = self.room_path(source, target)
+        if room_path is None:
+            raise nx.NetworkXNoPath(f"No hay camino de {source!r} a {target!r}")
+        # La ruta de habitaciones se cuenta en saltos: se deja margen con las habitaciones
+        # vecinas para que el refinado elija las puertas más cortas
+        involved = set(room_path)
+        for room_id in room_path:
+            involved.update(self.room_links.get(room_id, ()))
+        allowed = set().union(*(self.rooms[room_id].members for room_id in involved))
+        path = _bfs_path(lambda n: (m for m in graph.successors(n) if m in allowed), source, target)
+        if path is None:
+            self.fallbacks += 1
+            path = nx.shortest_path(graph, source, target)
+        return path
+
+    def room_path(self, source, target):
+        """
+        Secuencia de habitaciones de la ruta de source a target, o None si no hay. Solo
+        recorre las habitaciones de las zonas de la ruta de zonas; si dentro de ellas no
+        hay ruta (p.ej. portales de un solo sentido), se amplía a todas las habitaciones.
+        """
+        self.refresh()
+        room_source, room_target = self.room_of[source], self.room_of[target]
+        zone_path = _bfs_path(lambda z: self.zone_links.get(z, ()),
+                              self.rooms[room_source].zone, self.rooms[room_target].zone)
+        if zone_path is None:
+            return None
+        zones = set(zone_path)
+        rooms = self.rooms
+        path = _bfs_path(lambda r: (n for n in self.room_links.get(r, ()) if rooms[n].zone in zones),
+                         room_source, room_target)
+        if path is None:
+            self.fallbacks += 1
+            path = _bfs_path(lambda r: self.room_links.get(r, ()), room_source, room_target)
+        return path
+
+    def stats(self) -> dict:
+        self.refresh()
+        portals = sum(len(edges) for links in self.room_links.values() for edges in links.values())
+        return {"nodes": len(self.room_of), "rooms": len(self.rooms), "zones": len(self.zones),
+                "portals": portals, "fallbacks": self.fallbacks}
+
+    @classmethod
+    def from_graph(cls, graph, **kwargs):
+        hierarchy = cls(graph, **kwargs)
+        hierarchy._pending.update(dict.fromkeys(graph.nodes()))
+        return hierarchy
+
+
+# Una jerarquía por grafo; desaparece con el grafo
+_hierarchies = weakref.WeakKeyDictionary()
+
+
+def get_hierarchy(graph) -> MapHierarchy:
+    """Jerarquía del grafo, creada la primera vez y mantenida después con sus mutaciones."""
+    hierarchy = _hierarchies.get(graph)
+    if hierarchy is None:
+        hierarchy = _hierarchies[graph] = MapHierarchy.from_graph(graph)
+        attach_journal(graph, hierarchy, name="hierarchy")
+    return hierarchy
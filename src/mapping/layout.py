@@ -0,0 +1,246 @@
+# src/mapping/layout.py
+"""
+Disposición del grafo calculada en el servidor, de forma incremental.
+
+En lugar de que vis.js simule la física en el navegador en cada rerun, las
+posiciones se calculan aquí y se guardan en los atributos 'x'/'y' de cada nodo
+(graph_manager.set_node_positions), que convert_nx_to_agraph pasa a agraph para
+dibujar con la física desactivada. set_node_positions las anota en los diarios, así
+que el mapa SQLite y la sesión guardada las conservan y un mapa reabierto no se
+vuelve a disponer.
+
+El motor es un force-directed (Fruchterman-Reingold) vectorizado con NumPy, pero
+local: cada nodo nuevo se coloca junto a su predecesor siguiendo la dirección del
+recorrido y solo se relajan los nodos nuevos, los extremos de aristas nuevas y sus
+vecinos. La repulsión se calcula contra los nodos de las celdas cercanas de una
+rejilla espacial, así que el coste de update() depende de los cambios y no del
+tamaño del grafo. Se mantiene como diario de mapping/graph_manager.py ('layout').
+
+    layout = get_layout(graph)
+    layout.update()   # antes de convertir el grafo para agraph
+"""
+import math
+import time
+import weakref
+from itertools import chain
+
+import numpy as np
+
+from mapping.graph_manager import attach_journal, set_node_positions
+
+DEFAULT_SPRING_LENGTH = 120.0  # distancia ideal entre nodos conectados, en píxeles de vis.js
+RELAX_ITERATIONS = 30
+BULK_ITERATIONS = 10  # al disponer de golpe un grafo sin posiciones (p.ej. un mapa reabierto)
+MAX_ACTIVE_NODES = 256  # nodos relajados por paso; los lotes grandes se procesan por tramos
+MAX_TURN = math.radians(60)  # giro máximo al continuar un recorrido desde el predecesor
+
+
+class GraphLayout:
+    """Posiciones de los nodos de un grafo, actualizadas solo donde el grafo cambia."""
+
+    def __init__(self, graph, spring_length: float = DEFAULT_SPRING_LENGTH,
+                 iterations: int = RELAX_ITERATIONS, seed: int = 0):
+        self._graph_ref = weakref.ref(graph)
+        self.spring_length = spring_length
+        self.iterations = iterations
+        self._rng = np.random.default_rng(seed)
+        self._rows = {}  # nodo -> fila de _pos
+        self._nodes = []
+        self._pos = np.zeros((64, 2))
+        # Rejilla espacial para la repulsión: celdas del tamaño del radio de corte
+        self._cell_size = 2 * spring_length
+        self._cells = {}  # (cx, cy) -> filas
+        self._cell_of = []  # fila -> celda
+        self._pending = {}  # nodos nuevos por colocar, en orden de llegada
+        self._touched = {}  # nodos ya colocados con aristas nuevas
+        self.last_update = {"placed": 0, "moved": 0, "ms": 0.0}
+
+    @property
+    def graph(self):
+        return self._graph_ref()
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def position(self, node):
+        row = self._rows.get(node)
+        return None if row is None else tuple(self._pos[row])
+
+    # --- Diario de graph_manager ---
+    def append(self, entry):
+        op = entry[0]
+        if op == "add_node":
+            if entry[1] not in self._rows:
+                self._pending[entry[1]] = None
+        elif op == "add_edge":
+            for node in entry[1:3]:
+                if node in self._rows:
+                    self._touched[node] = None
+                else:
+                    self._pending[node] = None
+
+    # --- Actualización ---
+    def update(self) -> dict:
+        """Coloca los nodos nuevos y relaja su entorno. Devuelve {'placed', 'moved', 'ms'}."""
+        start = time.perf_counter()
+        graph = self.graph
+        placed = moved = 0
+        while self._pending or self._touched:
+            bulk = len(self._pending) > MAX_ACTIVE_NODES
+            seeds = []
+            # Tramos de MAX_ACTIVE_NODES para que la relajación siga siendo local
+            while self._pending and len(seeds) < MAX_ACTIVE_NODES:
+                node = next(iter(self._pending))
+                del self._pending[node]
+                if node in graph and node not in self._rows:
+                    if self._place(graph, node):
+                        seeds.append(node)
+                    placed += 1
+            while self._touched and len(seeds) < MAX_ACTIVE_NODES:
+                node = next(iter(self._touched))
+                del self._touched[node]
+                seeds.append(node)
+            moved += self._relax(graph, self._neighborhood(graph, seeds),
+                                 BULK_ITERATIONS if bulk else self.iterations)
+        self.last_update = {"placed": placed, "moved": moved, "ms": (time.perf_counter() - start) * 1000}
+        return self.last_update
+
+    def _add_row(self, node, point):
+        row = len(self._nodes)
+        if row == len(self._pos):
+            self._pos = np.concatenate([self._pos, np.zeros_like(self._pos)])
+        self._pos[row] = point
+        self._rows[node] = row
+        self._nodes.append(node)
+        cell = self._cell(point)
+        self._cell_of.append(cell)
+        self._cells.setdefault(cell, set()).add(row)
+        return row
+
+    def _cell(self, point):
+        return (math.floor(point[0] / self._cell_size), math.floor(point[1] / self._cell_size))
+
+    def _place(self, graph, node) -> bool:
+        """
+        Posición inicial del nodo. Devuelve False si ya tenía posición guardada (no se
+        relaja) y True si se ha estimado a partir de sus vecinos.
+        """
+        data = graph.nodes[node]
+        if "x" in data and "y" in data:
+            self._add_row(node, (data["x"], data["y"]))
+            return False
+        anchor = next((self._rows[n] for n in chain(graph.predecessors(node), graph.successors(node))
+                       if n in self._rows), None)
+        if anchor is None:
+            # Sin vecinos colocados: en un anillo alrededor de lo ya dibujado
+            angle = self._rng.uniform(0, 2 * math.pi)
+            radius = self.spring_length * math.sqrt(len(self._nodes))
+            self._add_row(node, (radius * math.cos(angle), radius * math.sin(angle)))
+            return True
+        anchor_node = self._nodes[anchor]
+        before = next((self._rows[n] for n in graph.predecessors(anchor_node) if n in self._rows), None)
+        if before is not None and np.any(self._pos[anchor] != self._pos[before]):
+            # Continúa la dirección en la que se llegó al ancla
+            direction = self._pos[anchor] - self._pos[before]
+            angle = math.atan2(direction[1], direction[0]) + self._rng.uniform(-MAX_TURN, MAX_TURN)
+        else:
+            angle = self._rng.uniform(0, 2 * math.pi)
+        self._add_row(node, self._pos[anchor] + self.spring_length * np.array([math.cos(angle), math.sin(angle)]))
+        return True
+
+    def _neighborhood(self, graph, seeds):
+        active = dict.fromkeys(seeds)
+        for node in seeds:
+            if len(active) >= MAX_ACTIVE_NODES:
+                break
+            for neighbor in chain(graph.successors(node), graph.predecessors(node)):
+                if neighbor in self._rows:
+                    active[neighbor] = None
+        return list(active)
+
+    def _repulsion_pairs(self, active_rows):
+        """(índice en active, fila) de cada nodo activo con los nodos de sus celdas vecinas."""
+        pair_i, pair_j = [], []
+        near_cells = {}
+        for i, row in enumerate(active_rows.tolist()):
+            cell = self._cell_of[row]
+            near = near_cells.get(cell)
+            if near is None:
+                cx, cy = cell
+                near = near_cells[cell] = list(chain.from_iterable(
+                    self._cells.get((cx + dx, cy + dy), ()) for dx in (-1, 0, 1) for dy in (-1, 0, 1)))
+            pair_i.extend([i] * len(near))
+            pair_j.extend(near)
+        return np.array(pair_i, dtype=np.int64), np.array(pair_j, dtype=np.int64)
+
+    def _relax(self, graph, active, iterations) -> int:
+        """Relaja los nodos ``active`` con el resto fijo; escribe sus posiciones en el grafo."""
+        if not active:
+            return 0
+        n_active = len(active)
+        active_rows = np.fromiter((self._rows[node] for node in active), dtype=np.int64, count=n_active)
+        spring = self.spring_length
+        # Aristas de los nodos activos: (índice en active, fila del vecino)
+        edge_i, edge_j = [], []
+        for i, node in enumerate(active):
+            for neighbor in chain(graph.successors(node), graph.predecessors(node)):
+                row = self._rows.get(neighbor)
+                if row is not None and row != active_rows[i]:
+                    edge_i.append(i)
+                    edge_j.append(row)
+        edge_i, edge_j = np.array(edge_i, dtype=np.int64), np.array(edge_j, dtype=np.int64)
+        # Los vecinos de rejilla se fijan con las posiciones iniciales
+        pair_i, pair_j = self._repulsion_pairs(active_rows)
+        cutoff2 = self._cell_size ** 2
+
+        temperature = spring / 2
+        cooling = 0.05 ** (1 / max(iterations, 1))  # termina en el 5 % del paso inicial
+        for _ in range(iterations):
+            points = self._pos[active_rows]
+            # Repulsión k²/d hasta el radio de corte; atracción d²/k por las aristas
+            delta = points[pair_i] - self._pos[pair_j]
+            dist2 = np.einsum("ij,ij->i", delta, delta)
+            np.maximum(dist2, 1e-2, out=dist2)
+            repulsion = np.where(dist2 < cutoff2, spring * spring / dist2, 0.0)
+            force = np.stack([np.bincount(pair_i, delta[:, 0] * repulsion, n_active),
+                              np.bincount(pair_i, delta[:, 1] * repulsion, n_active)], axis=1)
+            if len(edge_i):
+                pull = self._pos[edge_j] - points[edge_i]
+                lengths = np.sqrt(np.einsum("ij,ij->i", pull, pull))
+                np.add.at(force, edge_i, pull * (lengths / spring)[:, None])
+            norms = np.sqrt(np.einsum("ij,ij->i", force, force))
+            scale = np.minimum(norms, temperature) / np.maximum(norms, 1e-9)
+            self._pos[active_rows] = points + force * scale[:, None]
+            temperature *= cooling
+
+        positions = {}
+        for node, row in zip(active, active_rows.tolist()):
+            x, y = self._pos[row]
+            cell = self._cell((x, y))
+            if cell != self._cell_of[row]:
+                self._cells[self._cell_of[row]].discard(row)
+                self._cells.setdefault(cell, set()).add(row)
+                self._cell_of[row] = cell
+            positions[node] = (round(float(x), 1), round(float(y), 1))
+        set_node_positions(graph, positions)
+        return len(positions)
+
+    @classmethod
+    def from_graph(cls, graph, **kwargs):
+        """Disposición de un grafo existente: usa las posiciones guardadas y coloca el resto."""
+        layout = cls(graph, **kwargs)
+        layout._pending.update(dict.fromkeys(graph.nodes()))
+        return layout
+
+
+# Una disposición por grafo; desaparece con el grafo
+_layouts = weakref.WeakKeyDictionary()
+
+
+def get_layout(graph) -> GraphLayout:
+    """Disposición del grafo, creada la primera vez y mantenida después con sus mutaciones."""
+    layout = _layouts.get(graph)
+    if layout is None:
+        layout = _layouts[graph] = GraphLayout.from_graph(graph)
+        attach_journal(graph, layout, name="layout")
+    return layout
@@ -0,0 +1,459 @@
+# src/mapping/map_store.py
+"""
+Mapa persistente en SQLite (modo WAL).
+
+El grafo de la sesión se escribe en la base de datos a medida que cambia: el
+almacén se adjunta como diario de mapping/graph_manager.py ('map_store'), así que
+cada add_node_to_graph, add_edge_to_graph y update_node_data se confirma en disco
+al momento. Si una escritura falla (base de datos bloqueada, disco lleno) el
+mutador no se entera: el error se registra, el mapa queda desincronizado y se
+reescribe entero desde el grafo en el siguiente cambio (resync()). Abrir un mapa grande es abrir el fichero; las consultas por nodo,
+vecinos, intervalo de tiempo u objeto usan índices y no necesitan el grafo en
+memoria. load_graph() lo reconstruye entero cuando la interfaz lo necesita.
+
+Tablas:
+    nodes(id, name, description, timestamp, input_mode, attrs)  attrs: JSON del resto
+    observations(node_id, data)                                 data: Observation.to_json()
+    object_terms(term, node_id)                                 términos de mapping/object_index.py
+    edges(source, target, action)
+    actions(seq, action, node, timestamp)                       historial de acciones
+
+Cada mapa es un fichero <MAP_DIR>/<map_id>.sqlite3: cada sesión de la interfaz
+escribe en su propio mapa y solo abre otro si se elige explícitamente, así que dos
+pestañas no comparten (ni borran) el mapa de la otra.
+
+    store = open_map_store(new_map_id())
+    store.attach(graph)                    # write-through desde graph_manager
+    store.successors("Kitchen_Door")       # [('Hall', 'move_forward'), ...]
+    list_maps()                            # [('mapa_20250101_120000_ab12cd', 120, 1735732800.0), ...]
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import secrets
+import weakref
+import threading
+
+import networkx as nx
+
+from mapping.observation import Observation
+from mapping.object_index import observation_terms, normalize_words
+from mapping.graph_manager import attach_journal, detach_journal
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_MAP_DIR = os.path.join(_PROJECT_ROOT, "data", "maps")
+_MAP_SUFFIX = ".sqlite3"
+_MAP_ID = re.compile(r"^[\w\-]+$")
+RESYNC_INTERVAL = 5.0  # segundos entre intentos de reescribir un mapa desincronizado
+
+logger = logging.getLogger(__name__)
+
+# Atributos de nodo con columna propia; el resto va a 'attrs' como JSON
+_NODE_COLUMNS = ("description", "timestamp", "input_mode")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    description TEXT,
+    timestamp REAL,
+    input_mode TEXT,
+    attrs TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS nodes_timestamp ON nodes(timestamp);
+CREATE TABLE IF NOT EXISTS observations (
+    node_id INTEGER PRIMARY KEY REFERENCES nodes(id) ON DELETE CASCADE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS object_terms (
+    term TEXT NOT NULL,
+    node_id INTEGER NOT NULL REFERENCES nodes(id) ON DELETE CASCADE,
+    PRIMARY KEY (term, node_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS object_terms_node ON object_terms(node_id);
+CREATE TABLE IF NOT EXISTS edges (
+    source INTEGER NOT NULL REFERENCES nodes(id) ON DELETE CASCADE,
+    target INTEGER NOT NULL REFERENCES nodes(id) ON DELETE CASCADE,
+    action TEXT,
+    PRIMARY KEY (source, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_target ON edges(target);
+CREATE TABLE IF NOT EXISTS actions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    node TEXT,
+    timestamp REAL NOT NULL
+);
+"""
+
+
+def _json_default(value):
+    if isinstance(value, Observation):
+        return value.to_json()
+    raise TypeError(f"Atributo de nodo no serializable: {type(value).__name__}")
+
+
+class MapStore:
+    """
+    Conexión a la base de datos del mapa. Es segura entre hilos (un lock serializa
+    las operaciones), como necesita Streamlit al reutilizarla entre reruns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Con WAL, NORMAL no pierde consistencia ante un corte; solo las últimas transacciones
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+        self.writes = 0
+        # Estado tras un error de escritura: el grafo adjunto es la referencia
+        self.dirty = False
+        self.last_error = None
+        self._graph_ref = None
+        self._pending_actions = []  # filas de 'actions' aún sin guardar
+        self._replace_actions = False  # el historial guardado se sustituye al resincronizar
+        self._next_resync = 0.0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Escritura ---
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def _node_id(self, cur, name):
+        """id del nodo ``name``, creándolo vacío si no existe (como graph.add_edge)."""
+        row = cur.execute("SELECT id FROM nodes WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        return cur.execute("INSERT INTO nodes (name) VALUES (?)", (name,)).lastrowid
+
+    def _write_node(self, cur, name, data):
+        """Inserta un nodo o fusiona ``data`` con sus atributos, como graph.add_node."""
+        node_id = self._node_id(cur, name)
+        data = dict(data)
+        observation = data.pop("observation", None)
+        if observation is None and "llm_json" in data:
+            observation = Observation.from_json(data.pop("llm_json"))
+        columns = {key: data.pop(key) for key in _NODE_COLUMNS if key in data}
+        row = cur.execute("SELECT attrs FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        data = {**json.loads(row[0]), **data}
+        assignments = ", ".join(f"{key} = ?" for key in columns)
+        cur.execute(f"UPDATE nodes SET {assignments + ', ' if assignments else ''}attrs = ? WHERE id = ?",
+                    (*columns.values(), json.dumps(data, default=_json_default), node_id))
+        if observation is not None:
+            cur.execute("INSERT OR REPLACE INTO observations (node_id, data) VALUES (?, ?)",
+                        (node_id, json.dumps(observation.to_json())))
+            cur.execute("DELETE FROM object_terms WHERE node_id = ?", (node_id,))
+            cur.executemany("INSERT INTO object_terms (term, node_id) VALUES (?, ?)",
+                            [(term, node_id) for term in observation_terms(observation)])
+
+    def _write_edge(self, cur, source, target, action):
+        cur.execute("INSERT OR REPLACE INTO edges (source, target, action) VALUES (?, ?, ?)",
+                    (self._node_id(cur, source), self._node_id(cur, target), action))
+
+    def append(self, entry):
+        """
+        Entrada del diario de graph_manager: (operación, args...). Se confirma al momento.
+        Los errores de SQLite no se propagan (el grafo ya ha cambiado): ver resync().
+        """
+        op = entry[0]
+        if op not in ("add_node", "update_node", "add_edge", "set_positions"):
+            raise ValueError(f"Mutación desconocida: {op!r}")
+        if self.dirty:
+            self.resync()  # El grafo ya incluye esta mutación
+            return
+        try:
+            with self._transaction() as cur:
+                if op == "add_edge":
+                    self._write_edge(cur, *entry[1:])
+                elif op == "set_positions":
+                    # Posiciones de mapping/layout.py: van a attrs con el resto de atributos
+                    for name, (x, y) in entry[1].items():
+                        self._write_node(cur, name, {"x": x, "y": y})
+                else:
+                    self._write_node(cur, entry[1], entry[2])
+        except sqlite3.Error as e:
+            self._mark_dirty(e)
+            return
+        self.writes += 1
+
+    def record_action(self, action: str, node=None):
+        row = (action, node, time.time())
+        if not self.dirty:
+            try:
+                with self._transaction() as cur:
+                    cur.execute("INSERT INTO actions (action, node, timestamp) VALUES (?, ?, ?)", row)
+                return
+            except sqlite3.Error as e:
+                self._mark_dirty(e)
+        self._pending_actions.append(row)
+
+    def _mark_dirty(self, error):
+        if not self.dirty:
+            logger.warning("No se pudo escribir en el mapa %s (%s); se reescribirá desde el grafo", self.path, error)
+        self.dirty, self.last_error = True, error
+        self._next_resync = time.monotonic() + RESYNC_INTERVAL
+
+    def resync(self, force: bool = False) -> bool:
+        """
+        Reescribe nodos y aristas desde el grafo adjunto y guarda las acciones pendientes
+        si alguna escritura falló. Tras un intento fallido no se reintenta hasta pasados
+        RESYNC_INTERVAL segundos, salvo con ``force``.
+
+        Returns:
+            True si el mapa guardado está al día.
+        """
+        if not self.dirty:
+            return True
+        graph = self._graph_ref() if self._graph_ref is not None else None
+        if graph is None or (not force and time.monotonic() < self._next_resync):
+            return False
+        try:
+            with self._transaction() as cur:
+                self._write_graph(cur, graph, clear_actions=self._replace_actions)
+                cur.executemany("INSERT INTO actions (action, node, timestamp) VALUES (?, ?, ?)",
+                                self._pending_actions)
+        except sqlite3.Error as e:
+            self._mark_dirty(e)
+            return False
+        logger.info("Mapa %s resincronizado desde el grafo", self.path)
+        self._synced()
+        return True
+
+    def _synced(self):
+        self.dirty, self.last_error = False, None
+        self._pending_actions, self._replace_actions = [], False
+
+    def attach(self, graph):
+        """Escribe en la base de datos cada mutación posterior de ``graph`` (write-through)."""
+        self._graph_ref = weakref.ref(graph)
+        attach_journal(graph, self, name="map_store")
+
+    def detach(self, graph):
+        detach_journal(graph, name="map_store")
+        if self._graph_ref is not None and self._graph_ref() is graph:
+            self._graph_ref = None
+
+    def clear(self):
+        with self._transaction() as cur:
+            for table in ("object_terms", "observations", "edges", "actions", "nodes"):
+                cur.execute(f"DELETE FROM {table}")
+
+    def _write_graph(self, cur, graph, clear_actions=True):
+        for table in ("object_terms", "observations", "edges", "nodes"):
+            cur.execute(f"DELETE FROM {table}")
+        if clear_actions:
+            cur.execute("DELETE FROM actions")
+        for name, data in graph.nodes(data=True):
+            self._write_node(cur, name, data)
+        for source, target, data in graph.edges(data=True):
+            self._write_edge(cur, source, target, data.get("action"))
+
+    def replace_graph(self, graph, action_history=()):
+        """
+        Sustituye el mapa guardado por ``graph`` (p.ej. al cargar un estado) en una
+        transacción. Si SQLite falla, queda pendiente de resync() como en append().
+        """
+        now = time.time()
+        actions = [(action, None, now) for action in action_history]
+        try:
+            with self._transaction() as cur:
+                self._write_graph(cur, graph)
+                cur.executemany("INSERT INTO actions (action, node, timestamp) VALUES (?, ?, ?)", actions)
+        except sqlite3.Error as e:
+            self._graph_ref = weakref.ref(graph)
+            self._pending_actions, self._replace_actions = actions, True
+            self._mark_dirty(e)
+            return
+        self._synced()
+
+    # --- Lectura ---
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _node_from_row(self, row):
+        _, name, description, timestamp, input_mode, attrs, observation = row
+        data = json.loads(attrs)
+        data.update((key, value) for key, value in zip(_NODE_COLUMNS, (description, timestamp, input_mode))
+                    if value is not None)
+        if observation is not None:
+            data["observation"] = Observation.from_json(json.loads(observation))
+        return name, data
+
+    _NODE_SELECT = ("SELECT n.id, n.name, n.description, n.timestamp, n.input_mode, n.attrs, o.data "
+                    "FROM nodes n LEFT JOIN observations o ON o.node_id = n.id")
+
+    def number_of_nodes(self) -> int:
+        return self._query("SELECT COUNT(*) FROM nodes")[0][0]
+
+    def number_of_edges(self) -> int:
+        return self._query("SELECT COUNT(*) FROM edges")[0][0]
+
+    def get_node(self, name):
+        """Atributos del nodo (con su Observation) o None si no existe."""
+        rows = self._query(self._NODE_SELECT + " WHERE n.name = ?", (name,))
+        return self._node_from_row(rows[0])[1] if rows else None
+
+    def successors(self, name):
+        """[(vecino, acción)] de las aristas que salen de ``name``."""
+        return [tuple(row) for row in self._query(
+            "SELECT t.name, e.action FROM nodes s JOIN edges e ON e.source = s.id "
+            "JOIN nodes t ON t.id = e.target WHERE s.name = ?", (name,))]
+
+    def predecessors(self, name):
+        """[(vecino, acción)] de las aristas que llegan a ``name``."""
+        return [tuple(row) for row in self._query(
+            "SELECT s.name, e.action FROM nodes t JOIN edges e ON e.target = t.id "
+            "JOIN nodes s ON s.id = e.source WHERE t.name = ?", (name,))]
+
+    def nodes_between(self, start: float, end: float):
+        """Nombres de los nodos analizados en [start, end], por orden de tiempo."""
+        return [row[0] for row in self._query(
+            "SELECT name FROM nodes WHERE timestamp BETWEEN ? AND ? ORDER BY timestamp", (start, end))]
+
+    def nodes_with_object(self, name: str):
+        """Nodos cuya observación incluye el objeto/obstáculo ``name`` (normalizado como en object_index)."""
+        term = " ".join(normalize_words(name))
+        return [row[0] for row in self._query(
+            "SELECT n.name FROM object_terms t JOIN nodes n ON n.id = t.node_id WHERE t.term = ?", (term,))]
+
+    def actions(self, limit: int = None):
+        """Historial de acciones, de la más antigua a la más reciente (las ``limit`` últimas)."""
+        if limit is None:
+            rows = self._query("SELECT action FROM actions ORDER BY seq")
+        else:
+            rows = self._query("SELECT action FROM actions ORDER BY seq DESC LIMIT ?", (limit,))[::-1]
+        return [row[0] for row in rows]
+
+    def load_graph(self, backend=None):
+        """Reconstruye el grafo completo (y no le adjunta el almacén: usar attach())."""
+        graph = nx.DiGraph()
+        for row in self._query(self._NODE_SELECT + " ORDER BY n.id"):
+            name, data = self._node_from_row(row)
+            graph.add_node(name, **data)
+        for source, target, action in self._query(
+                "SELECT s.name, t.name, e.action FROM edges e JOIN nodes s ON s.id = e.source "
+                "JOIN nodes t ON t.id = e.target"):
+            graph.add_edge(source, target, action=action)
+        if (backend or os.getenv("GRAPH_BACKEND", "networkx")) == "csr":
+            from mapping.csr_graph import CSRGraph
+            return CSRGraph.from_networkx(graph)
+        return graph
+
+    def stats(self) -> dict:
+        size = sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal")
+                   if os.path.exists(self.path + suffix))
+        return {"nodes": self.number_of_nodes(), "edges": self.number_of_edges(),
+                "actions": self._query("SELECT COUNT(*) FROM actions")[0][0],
+                "bytes": size, "writes": self.writes, "dirty": self.dirty}
+
+
+class _Transaction:
+    """BEGIN/COMMIT (ROLLBACK si hay excepción) bajo el lock del almacén."""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            cur = self._conn.cursor()
+            cur.execute("BEGIN")
+        except BaseException:
+            # __exit__ no se llama si falla __enter__ (p.ej. base de datos bloqueada)
+            self._lock.release()
+            raise
+        self._cur = cur
+        return cur
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._cur.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
+        return False
+
+
+def map_dir():
+    """Directorio de los mapas (MAP_DIR, data/maps por defecto), o None si MAP_DIR está vacía."""
+    return os.getenv("MAP_DIR", DEFAULT_MAP_DIR) or None
+
+
+def new_map_id() -> str:
+    """Identificador para un mapa nuevo: fecha de creación y un sufijo aleatorio."""
+    return time.strftime("mapa_%Y%m%d_%H%M%S_") + secrets.token_hex(3)
+
+
+def _map_path(directory, map_id):
+    if not _MAP_ID.match(map_id):
+        raise ValueError(f"Identificador de mapa no válido: {map_id!r}")
+    return os.path.join(directory, map_id + _MAP_SUFFIX)
+
+
+# Una conexión por fichero en el proceso: las sesiones que abren el mismo mapa la comparten
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_map_store(map_id: str, directory: str = None):
+    """Almacén del mapa ``map_id`` (se crea si no existe), o None si no hay directorio de mapas."""
+    directory = directory or map_dir()
+    if directory is None:
+        return None
+    path = _map_path(directory, map_id)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = MapStore(path)
+        return store
+
+
+def _count_nodes(path):
+    with _stores_lock:
+        store = _stores.get(path)
+    if store is not None:
+        return store.number_of_nodes()
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+    finally:
+        conn.close()
+
+
+def list_maps(directory: str = None) -> list:
+    """
+    Mapas guardados con al menos un nodo, del modificado más recientemente al más antiguo.
+
+    Returns:
+        Lista de tuplas (map_id, nodos, fecha de modificación).
+    """
+    directory = directory or map_dir()
+    if directory is None or not os.path.isdir(directory):
+        return []
+    maps = []
+    for name in os.listdir(directory):
+        if not name.endswith(_MAP_SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        nodes = _count_nodes(path)
+        if nodes:
+            modified = max(os.path.getmtime(path + suffix) for suffix in ("", "-wal")
+                           if os.path.exists(path + suffix))
+            maps.append((name[:-len(_MAP_SUFFIX)], nodes, modified))
+    maps.sort(key=lambda item: item[2], reverse=True)
+    return maps
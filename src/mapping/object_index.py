@@ -0,0 +1,183 @@
+# src/mapping/object_index.py
+"""
+Índice invertido de objetos, obstáculos y landmarks -> nodos del grafo.
+
+Cada nodo aporta los términos normalizados de su observación (mapping/observation.py):
+nombres de identified_objects, tipos de obstacles y las palabras de los landmarks
+(el nombre de nodo sugerido y su versión detallada). Dos nodos que comparten términos poco frecuentes ('nevera plateada') son
+buenos candidatos a estar conectados; los muy frecuentes ('pared') no cuentan.
+La puntuación es la similitud coseno de los vectores TF-IDF, calculada recorriendo
+solo las listas de los términos del nodo consultado, no todos los nodos.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from mapping.observation import Observation
+
+# Palabras sin valor para identificar un lugar (artículos, preposiciones, tamaños); los
+# colores y materiales se conservan porque sí distinguen objetos
+STOPWORDS = frozenset((
+    "a", "an", "the", "of", "with", "and", "on", "in", "at", "to", "some", "small", "large", "big",
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "con", "y", "en",
+))
+# Un término presente en más de esta fracción de nodos (y en más de _MIN_MAX_DF) se ignora
+# al buscar candidatos: pesa poco y su lista crecería con el mapa
+DEFAULT_MAX_DF_RATIO = 0.05
+_MIN_MAX_DF = 10
+DEFAULT_MIN_SCORE = 0.35
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _strip_accents(text):
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _singular(word):
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_words(name: str) -> list:
+    """'Sillas de Madera' -> ['silla', 'madera']: minúsculas, sin tildes ni plural simple."""
+    text = _NON_WORD.sub(" ", _strip_accents(str(name).lower()))
+    return [_singular(word) for word in text.split() if word not in STOPWORDS]
+
+
+def observation_terms(observation) -> Counter:
+    """
+    Términos de una observación con su frecuencia. Cada nombre aporta la frase completa
+    ('red door') y sus palabras ('red', 'door'), así que 'puerta' coincide con
+    'puerta de madera' pero la frase exacta pesa más. Las palabras de los landmarks
+    (node_name y node_name_detailed, el texto que el planificador muestra como
+    landmarks) cuentan una vez aunque aparezcan en los dos.
+    """
+    terms = Counter()
+    names = [item.name for item in observation.objects] + [item.type for item in observation.obstacles]
+    for name in names:
+        words = normalize_words(name)
+        if not words:
+            continue
+        terms.update(words)
+        if len(words) > 1:
+            terms[" ".join(words)] += 1
+    landmarks = normalize_words(observation.node_name) + normalize_words(observation.node_name_detailed or "")
+    terms.update(list(dict.fromkeys(landmarks)))
+    return terms
+
+
+class ObjectIndex:
+    """
+    Índice invertido término -> {node_id: frecuencia}, actualizado nodo a nodo.
+
+    add() sustituye los términos anteriores del nodo, así que se puede llamar tras
+    cada alta o actualización. candidates() devuelve los nodos más parecidos a uno
+    dado con su puntuación y los términos compartidos.
+    """
+
+    def __init__(self, max_df_ratio: float = DEFAULT_MAX_DF_RATIO):
+        self.max_df_ratio = max_df_ratio
+        self._postings = {}  # término -> {node_id: tf}
+        self._node_terms = {}  # node_id -> Counter
+
+    def __len__(self):
+        return len(self._node_terms)
+
+    def __contains__(self, node_id):
+        return node_id in self._node_terms
+
+    def add(self, node_id, observation):
+        """Indexa (o reindexa) un nodo a partir de su Observation o del dict parseado."""
+        self.remove(node_id)
+        if observation is None:
+            return
+        terms = observation_terms(Observation.from_json(observation))
+        if not terms:
+            return
+        self._node_terms[node_id] = terms
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[node_id] = tf
+
+    def remove(self, node_id):
+        terms = self._node_terms.pop(node_id, None)
+        for term in terms or ():
+            posting = self._postings[term]
+            del posting[node_id]
+            if not posting:
+                del self._postings[term]
+
+    def idf(self, term) -> float:
+        """IDF suavizado: log((1 + N) / (1 + df)) + 1."""
+        df = len(self._postings.get(term, ()))
+        return math.log((1 + len(self._node_terms)) / (1 + df)) + 1
+
+    def _max_df(self):
+        return max(_MIN_MAX_DF, int(self.max_df_ratio * len(self._node_terms)))
+
+    def _norm(self, terms, idf_cache, max_df):
+        """Norma del vector TF-IDF restringido a los términos que no superan ``max_df``."""
+        total = 0.0
+        for term, tf in terms.items():
+            weight = idf_cache.get(term)
+            if weight is None:
+                posting = self._postings[term]
+                weight = idf_cache[term] = self.idf(term) if len(posting) <= max_df else 0.0
+            total += (tf * weight) ** 2
+        return math.sqrt(total)
+
+    def candidates(self, node_id, top_k: int = 5, min_score: float = DEFAULT_MIN_SCORE, exclude=()):
+        """
+        Nodos que comparten términos con ``node_id``, por similitud coseno TF-IDF.
+
+        Solo se recorren las listas de los términos del nodo, ignorando los presentes en
+        más de ``max_df_ratio`` de los nodos (que tampoco cuentan en las normas), así que
+        el coste depende de los términos compartidos y no del tamaño del mapa.
+
+        Returns:
+            Lista de tuplas (node_id, puntuación 0-1, [términos compartidos]) ordenada
+            por puntuación, con puntuación >= min_score y sin los nodos de ``exclude``.
+        """
+        terms = self._node_terms.get(node_id)
+        if not terms:
+            return []
+        max_df = self._max_df()
+        idf_cache = {}
+        dots = {}
+        shared = {}
+        for term, tf in terms.items():
+            posting = self._postings[term]
+            if len(posting) > max_df:
+                idf_cache[term] = 0.0
+                continue
+            weight = idf_cache[term] = self.idf(term)
+            for other, other_tf in posting.items():
+                if other == node_id or other in exclude:
+                    continue
+                dots[other] = dots.get(other, 0.0) + tf * other_tf * weight * weight
+                shared.setdefault(other, []).append(term)
+        if not dots:
+            return []
+        query_norm = self._norm(terms, idf_cache, max_df)
+        scored = []
+        for other, dot in dots.items():
+            score = dot / (query_norm * self._norm(self._node_terms[other], idf_cache, max_df))
+            if score >= min_score:
+                scored.append((other, score, sorted(shared[other], key=len, reverse=True)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:top_k]
+
+    def stats(self) -> dict:
+        return {"nodes": len(self._node_terms), "terms": len(self._postings),
+                "postings": sum(len(posting) for posting in self._postings.values())}
+
+    @classmethod
+    def from_graph(cls, graph, **kwargs):
+        """Construye el índice a partir de la observación de cada nodo."""
+        from mapping.graph_manager import get_node_observation
+        index = cls(**kwargs)
+        for node_id in graph.nodes():
+            index.add(node_id, get_node_observation(graph, node_id))
+        return index
@@ -0,0 +1,190 @@
+# src/mapping/observation.py
+"""
+Modelo tipado de una observación (respuesta de visión ya parseada).
+
+Los nodos del grafo guardan una Observation en su atributo 'observation' en lugar
+del dict completo de la respuesta: clases con __slots__, tuplas en vez de listas y
+nombres internados (objetos, obstáculos, direcciones, nodos destino), que se repiten
+mucho entre nodos y así comparten una sola copia en memoria.
+
+    observation = Observation.from_json(parsed)   # valida y normaliza
+    observation.node_name, observation.actions     # acceso directo
+    observation.to_json()                          # dict con la estructura de navigation_prompt
+"""
+import sys
+
+_intern = sys.intern
+
+
+def _text(value) -> str:
+    """Normaliza un valor escalar a str (None -> '')."""
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def _name(value) -> str:
+    return _intern(_text(value).strip())
+
+
+def _items(value):
+    """Lista de la respuesta; un valor suelto cuenta como lista de un elemento."""
+    if value is None or value == "":
+        return ()
+    return value if isinstance(value, (list, tuple)) else (value,)
+
+
+class _Record:
+    """Base de los registros: igualdad, repr y conversión a dict a partir de __slots__."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_json(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class SceneObject(_Record):
+    __slots__ = ("name", "characteristics")
+
+    @classmethod
+    def from_json(cls, item):
+        if isinstance(item, dict):
+            return cls(_name(item.get("name")), _text(item.get("characteristics")))
+        return cls(_name(item), "")
+
+
+class NavigationPath(_Record):
+    __slots__ = ("description", "direction", "features")
+
+    @classmethod
+    def from_json(cls, item):
+        if isinstance(item, dict):
+            return cls(_text(item.get("description")), _name(item.get("direction")),
+                       _name(item.get("features")))
+        return cls(_text(item), "", "")
+
+
+class Obstacle(_Record):
+    __slots__ = ("type", "size", "location")
+
+    @classmethod
+    def from_json(cls, item):
+        if isinstance(item, dict):
+            return cls(_name(item.get("type")), _name(item.get("size")), _name(item.get("location")))
+        return cls(_name(item), "", "")
+
+
+class GraphElement(_Record):
+    __slots__ = ("target_node", "action")
+
+    @classmethod
+    def from_json(cls, item):
+        if isinstance(item, dict):
+            return cls(_name(item.get("target_node")), _name(item.get("action")))
+        return cls(_name(item), "")
+
+
+class Observation(_Record):
+    """
+    Observación de un punto de vista. Los campos equivalen a las claves de
+    navigation_prompt; las claves desconocidas se conservan en ``extra`` para que
+    to_json() devuelva lo mismo que se recibió.
+    """
+    __slots__ = ("description", "node_name", "node_name_detailed", "objects", "paths", "obstacles",
+                 "actions", "graph_elements", "reasoning", "avoidance_strategy", "process_step", "extra")
+
+    # Clave JSON -> (atributo, tipo de elemento) de los campos de lista
+    _LISTS = {
+        "identified_objects": ("objects", SceneObject),
+        "potential_navigation_paths": ("paths", NavigationPath),
+        "obstacles": ("obstacles", Obstacle),
+        "navigation_graph_elements": ("graph_elements", GraphElement),
+    }
+    _TEXTS = {
+        "overall_scene_description": "description",
+        "reasoning": "reasoning",
+        "obstacle_avoidance_strategy": "avoidance_strategy",
+        "process_step": "process_step",
+    }
+
+    def __init__(self, description="", node_name="", node_name_detailed="", objects=(), paths=(),
+                 obstacles=(), actions=(), graph_elements=(), reasoning="", avoidance_strategy="",
+                 process_step="", extra=None):
+        super().__init__(description, _name(node_name), node_name_detailed, tuple(objects), tuple(paths),
+                         tuple(obstacles), tuple(actions), tuple(graph_elements), reasoning,
+                         avoidance_strategy, process_step, extra or None)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Construye la observación a partir del dict parseado de la respuesta.
+
+        Acepta las variantes que producen los distintos parseos (JSON, reparación
+        local, texto crudo): campos ausentes, valores None, elementos de lista como
+        string en lugar de objeto, etc.
+
+        Raises:
+            TypeError: si ``data`` no es un dict.
+        """
+        if isinstance(data, Observation):
+            return data
+        if not isinstance(data, dict):
+            raise TypeError(f"Se esperaba un dict con la respuesta parseada, no {type(data).__name__}")
+        landmarks = data.get("landmarks_and_suggested_node_name")
+        if isinstance(landmarks, dict):
+            node_name = landmarks.get("suggested_node_name")
+            node_name_detailed = _text(landmarks.get("suggested_node_name_detailed"))
+        else:
+            node_name, node_name_detailed = landmarks, ""
+
+        observation = cls.__new__(cls)
+        observation.node_name = _name(node_name)
+        observation.node_name_detailed = node_name_detailed
+        for key, attribute in cls._TEXTS.items():
+            setattr(observation, attribute, _text(data.get(key)))
+        for key, (attribute, item_type) in cls._LISTS.items():
+            setattr(observation, attribute, tuple(item_type.from_json(item) for item in _items(data.get(key))))
+        observation.actions = tuple(_text(action) for action in _items(data.get("robot_perspective_and_potential_actions")))
+        extra = {key: value for key, value in data.items() if key not in _KNOWN_KEYS}
+        observation.extra = extra or None
+        return observation
+
+    def to_json(self) -> dict:
+        """Dict con la estructura (y el orden de claves) de navigation_prompt."""
+        result = {
+            "overall_scene_description": self.description,
+            "landmarks_and_suggested_node_name": {
+                "suggested_node_name": self.node_name,
+                "suggested_node_name_detailed": self.node_name_detailed,
+            },
+            "identified_objects": [item.to_json() for item in self.objects],
+            "potential_navigation_paths": [item.to_json() for item in self.paths],
+            "obstacles": [item.to_json() for item in self.obstacles],
+            "robot_perspective_and_potential_actions": list(self.actions),
+            "navigation_graph_elements": [item.to_json() for item in self.graph_elements],
+            "reasoning": self.reasoning,
+            "obstacle_avoidance_strategy": self.avoidance_strategy,
+            "process_step": self.process_step,
+        }
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    @property
+    def object_names(self) -> tuple:
+        return tuple(item.name for item in self.objects if item.name)
+
+
+_KNOWN_KEYS = frozenset(("landmarks_and_suggested_node_name", "robot_perspective_and_potential_actions",
+                         *Observation._LISTS, *Observation._TEXTS))
@@ -0,0 +1,205 @@
+# src/mapping/place_index.py
+"""
+Reconocimiento de lugares: detecta que una vista nueva corresponde a un nodo ya
+explorado aunque el LLM le haya dado otro nombre ('Kitchen_Entrance' frente a
+'Kitchen_Door').
+
+Cada observación se convierte en un vector de tamaño fijo con el truco del hashing:
+las palabras y bigramas de la descripción, los landmarks, el nombre sugerido y los
+objetos/obstáculos (normalizados como en mapping/object_index.py) se asignan a una
+columna con crc32 y un signo, con más peso para landmarks y objetos. No hay modelo
+ni red: el vector solo depende del texto. Los vectores se guardan en una matriz
+NumPy y la similitud coseno (con pesos IDF por columna, para que 'pared' o 'puerta'
+apenas cuenten) con todos los nodos es un producto matriz-vector, o matriz-matriz
+para varias consultas a la vez.
+"""
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from mapping.observation import Observation
+from mapping.object_index import normalize_words
+
+DEFAULT_DIM = 512
+# Similitud coseno a partir de la cual dos observaciones se consideran el mismo lugar
+DEFAULT_MIN_SCORE = 0.65
+# Los pesos IDF se recalculan cuando el índice ha crecido (o menguado) esta fracción
+IDF_REFRESH_RATIO = 0.1
+
+# Peso de cada fuente de términos en el vector
+DESCRIPTION_WEIGHT = 1.0
+LANDMARK_WEIGHT = 2.0
+OBJECT_WEIGHT = 2.0
+OBJECT_WORD_WEIGHT = 1.0
+OBSTACLE_WEIGHT = 1.0
+
+
+@lru_cache(maxsize=65536)
+def _feature_slot(term: str, dim: int):
+    """(columna, signo) del término; el signo reduce el sesgo de las colisiones."""
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+
+def _add_words(features, words, weight, bigrams=False):
+    for word in words:
+        features[word] = features.get(word, 0.0) + weight
+    if bigrams:
+        for pair in zip(words, words[1:]):
+            term = " ".join(pair)
+            features[term] = features.get(term, 0.0) + weight
+
+
+def observation_features(observation) -> dict:
+    """Términos ponderados de una observación (Observation o dict parseado)."""
+    observation = Observation.from_json(observation)
+    features = {}
+    _add_words(features, normalize_words(observation.description), DESCRIPTION_WEIGHT, bigrams=True)
+    _add_words(features, normalize_words(observation.node_name_detailed), LANDMARK_WEIGHT, bigrams=True)
+    _add_words(features, normalize_words(observation.node_name), LANDMARK_WEIGHT)
+    for item in observation.objects:
+        words = normalize_words(item.name)
+        if words:
+            term = "obj:" + " ".join(words)
+            features[term] = features.get(term, 0.0) + OBJECT_WEIGHT
+            _add_words(features, words, OBJECT_WORD_WEIGHT)
+    for item in observation.obstacles:
+        _add_words(features, normalize_words(item.type), OBSTACLE_WEIGHT)
+    return features
+
+
+def embed_observation(observation, dim: int = DEFAULT_DIM) -> np.ndarray:
+    """Vector float32 de términos hasheados (todo ceros si la observación no tiene texto)."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for term, weight in observation_features(observation).items():
+        column, sign = _feature_slot(term, dim)
+        vector[column] += sign * weight
+    return vector
+
+
+class PlaceIndex:
+    """
+    Matriz (nodos x dim) de vectores de lugar con búsqueda coseno top-k.
+
+    Las filas crecen por duplicación y una baja mueve la última fila al hueco, como
+    en mapping/view_index.py, así que añadir y quitar nodos es O(dim). La frecuencia
+    de cada columna se mantiene al día; los pesos IDF y las normas de las filas se
+    congelan y se recalculan (O(nodos x dim)) solo cuando el índice ha cambiado de
+    tamaño en IDF_REFRESH_RATIO, así que una consulta es un único producto.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+        self._vectors = np.zeros((16, dim), dtype=np.float32)
+        self._norms = np.zeros(16, dtype=np.float32)  # norma de cada fila con self._weights
+        self._df = np.zeros(dim, dtype=np.int64)  # filas con la columna distinta de cero
+        self._weights = np.ones(dim, dtype=np.float32)
+        self._weights_size = 0  # nodos indexados al calcular self._weights
+        self._node_ids = []
+        self._slots = {}  # node_id -> fila
+
+    def __len__(self):
+        return len(self._node_ids)
+
+    def __contains__(self, node_id):
+        return node_id in self._slots
+
+    def embed(self, observation) -> np.ndarray:
+        return embed_observation(observation, self.dim)
+
+    def add(self, node_id, observation):
+        """Añade (o sustituye) el vector de un nodo; las observaciones sin texto no se indexan."""
+        self.remove(node_id)
+        if observation is None:
+            return
+        vector = self.embed(observation)
+        if not vector.any():
+            return
+        if len(self._node_ids) == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+            self._norms = np.concatenate([self._norms, np.zeros_like(self._norms)])
+        slot = len(self._node_ids)
+        self._vectors[slot] = vector
+        self._norms[slot] = np.linalg.norm(vector * self._weights)
+        self._df += vector != 0
+        self._node_ids.append(node_id)
+        self._slots[node_id] = slot
+
+    def remove(self, node_id):
+        slot = self._slots.pop(node_id, None)
+        if slot is None:
+            return
+        self._df -= self._vectors[slot] != 0
+        last = len(self._node_ids) - 1
+        if slot != last:
+            moved = self._node_ids[slot] = self._node_ids[last]
+            self._vectors[slot] = self._vectors[last]
+            self._norms[slot] = self._norms[last]
+            self._slots[moved] = slot
+        self._node_ids.pop()
+
+    def _refresh_weights(self):
+        """IDF suavizado por columna, log((1 + N) / (1 + df)) + 1, y normas de las filas."""
+        count = len(self._node_ids)
+        if abs(count - self._weights_size) <= IDF_REFRESH_RATIO * self._weights_size:
+            return
+        self._weights = (np.log((1 + count) / (1 + self._df)) + 1).astype(np.float32)
+        self._weights_size = count
+        self._norms[:count] = np.linalg.norm(self._vectors[:count] * self._weights, axis=1)
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 5, min_score: float = 0.0, exclude=()):
+        """
+        Vecinos más parecidos de cada fila de ``queries`` (vectores de embed()).
+
+        Returns:
+            Una lista por consulta de tuplas (node_id, similitud coseno) ordenada de
+            mayor a menor, con similitud >= min_score y sin los nodos de ``exclude``.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        count = len(self._node_ids)
+        if not count:
+            return [[] for _ in queries]
+        self._refresh_weights()
+        weighted = queries * self._weights
+        query_norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        query_norms[query_norms == 0] = 1
+        scores = (weighted * self._weights) @ self._vectors[:count].T
+        scores /= query_norms * np.maximum(self._norms[:count], 1e-12)
+        for node_id in exclude:
+            slot = self._slots.get(node_id)
+            if slot is not None:
+                scores[:, slot] = -np.inf
+        k = min(top_k, count)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, columns in zip(scores, top):
+            columns = columns[np.argsort(-row[columns])]
+            results.append([(self._node_ids[c], float(row[c])) for c in columns if row[c] >= min_score])
+        return results
+
+    def search(self, observation, top_k: int = 5, min_score: float = 0.0, exclude=()):
+        """Como search_batch para una sola observación (Observation o dict parseado)."""
+        return self.search_batch(self.embed(observation), top_k, min_score, exclude)[0]
+
+    def match(self, observation, min_score: float = DEFAULT_MIN_SCORE, exclude=()):
+        """
+        Nodo que corresponde al mismo lugar que ``observation``.
+
+        Returns:
+            Tupla (node_id, similitud) del nodo más parecido si supera min_score, o None.
+        """
+        best = self.search(observation, top_k=1, min_score=min_score, exclude=exclude)
+        return best[0] if best else None
+
+    def memory_bytes(self) -> int:
+        return self._vectors.nbytes + self._norms.nbytes + self._df.nbytes + self._weights.nbytes
+
+    @classmethod
+    def from_graph(cls, graph, dim: int = DEFAULT_DIM):
+        """Construye el índice a partir de la observación de cada nodo."""
+        from mapping.graph_manager import get_node_observation
+        index = cls(dim)
+        for node_id in graph.nodes():
+            index.add(node_id, get_node_observation(graph, node_id))
+        return index
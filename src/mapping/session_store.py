@@ -0,0 +1,384 @@
+# src/mapping/session_store.py
+"""
+Guardado de sesiones en formato binario: una instantánea comprimida más un diario
+de cambios que solo crece.
+
+La instantánea es el mismo dict que produce save_state() (grafo en node_link_data,
+imágenes como referencias ``blob:`` de mapping/blob_store.py), serializado con
+msgpack si está instalado (JSON compacto si no) y comprimido con zstd si está
+instalado (gzip si no). La cabecera indica el formato, así que un fichero se lee
+con cualquier combinación disponible.
+
+Entre instantáneas, cada guardado añade al diario solo las mutaciones del grafo
+hechas con mapping/graph_manager.py desde el guardado anterior, las acciones nuevas
+y los campos de la sesión que han cambiado. Cargar es leer la instantánea y
+reproducir el diario. Cuando el diario crece demasiado se escribe una instantánea
+nueva y se vacía.
+
+    store = SessionStore("data/sessions/default")
+    store.save(session_fields(), st.session_state.graph)   # {'mode': 'append', 'bytes': 412, ...}
+    state = store.load()                                    # state['graph'] ya es un grafo
+"""
+import os
+import json
+import gzip
+import struct
+import weakref
+import tempfile
+
+from mapping.observation import Observation
+from mapping.graph_manager import (
+    attach_journal, add_node_to_graph, add_edge_to_graph, update_node_data, set_node_positions, graph_to_node_link,
+    graph_from_node_link
+)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_SESSION_DIR = os.path.join(_PROJECT_ROOT, "data", "sessions", "default")
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOG_FILE = "journal.log"
+MAGIC = b"NAVSNAP1"
+# El diario se compacta en una instantánea nueva al superar este tamaño o la mitad de la instantánea
+MIN_COMPACT_BYTES = 256 * 1024
+
+_FRAME = struct.Struct(">I")  # longitud de cada registro del diario
+# Campos de la sesión que normalmente solo crecen: si la lista es la misma que en el último
+# guardado y sus primeros elementos no han cambiado, el diario guarda solo los nuevos. Si se
+# ha sustituido alguno (p.ej. una vista reanalizada en analyzed_images) se guarda entera
+APPEND_ONLY_FIELDS = ("action_history", "analyzed_images")
+
+
+# --- Serialización ---
+def _serializers():
+    """{código: (dumps, loads)} de los formatos disponibles; 'j' (JSON) siempre."""
+    formats = {b"j": (
+        lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        lambda data: json.loads(data),
+    )}
+    try:
+        import msgpack
+    except ImportError:
+        return formats
+    formats[b"m"] = (
+        lambda obj: msgpack.packb(obj, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+    )
+    return formats
+
+
+def _compressors():
+    """{código: (compress, decompress)}; 'g' (gzip) siempre."""
+    codecs = {b"g": (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress)}
+    try:
+        import zstandard
+    except ImportError:
+        return codecs
+    codecs[b"z"] = (
+        lambda data: zstandard.ZstdCompressor(level=6).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+    return codecs
+
+
+def _preferred(codes, order):
+    return next(code for code in order if code in codes)
+
+
+def _codec(table, code, kind):
+    try:
+        return table[code]
+    except KeyError:
+        raise ValueError(f"Formato de {kind} no disponible en este entorno: {code!r} "
+                         f"(instala msgpack/zstandard)") from None
+
+
+def dumps_snapshot(state: dict) -> bytes:
+    """Instantánea de un dict de save_state(): cabecera + contenido serializado y comprimido."""
+    serializers, compressors = _serializers(), _compressors()
+    serializer = _preferred(serializers, (b"m", b"j"))
+    compressor = _preferred(compressors, (b"z", b"g"))
+    payload = compressors[compressor][0](serializers[serializer][0](state))
+    return MAGIC + serializer + compressor + payload
+
+
+def is_snapshot(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def loads_snapshot(data: bytes) -> dict:
+    """
+    Inverso de dumps_snapshot.
+
+    Raises:
+        ValueError: si no es una instantánea o su formato no está disponible.
+    """
+    if not is_snapshot(data):
+        raise ValueError("El fichero no es una instantánea de sesión")
+    offset = len(MAGIC)
+    serializer = _codec(_serializers(), data[offset:offset + 1], "serialización")
+    compressor = _codec(_compressors(), data[offset + 1:offset + 2], "compresión")
+    return serializer[1](compressor[1](data[offset + 2:]))
+
+
+def loads_state(data: bytes) -> dict:
+    """Estado guardado en cualquier formato: instantánea binaria o el JSON de versiones anteriores."""
+    if is_snapshot(data):
+        return loads_snapshot(data)
+    return json.loads(data)
+
+
+# --- Registros del diario ---
+def _encode_node_data(data: dict) -> dict:
+    """Atributos de nodo serializables: la Observation se guarda como 'llm_json'."""
+    encoded = dict(data)
+    observation = encoded.pop("observation", None)
+    if observation is not None:
+        encoded["llm_json"] = observation.to_json()
+    return encoded
+
+
+def _decode_node_data(data: dict) -> dict:
+    if "llm_json" in data:
+        data["observation"] = Observation.from_json(data.pop("llm_json"))
+    return data
+
+
+def _encode_entry(entry) -> dict:
+    op = entry[0]
+    if op in ("add_node", "update_node"):
+        return {"op": op, "node": entry[1], "data": _encode_node_data(entry[2])}
+    if op == "add_edge":
+        return {"op": op, "u": entry[1], "v": entry[2], "action": entry[3]}
+    if op == "set_positions":
+        return {"op": op, "positions": [[node, x, y] for node, (x, y) in entry[1].items()]}
+    raise ValueError(f"Mutación desconocida en el diario: {op!r}")
+
+
+def _apply_record(state: dict, record: dict):
+    """Reproduce un registro del diario sobre un estado cuyo 'graph' ya es un grafo."""
+    op = record["op"]
+    graph = state["graph"]
+    if op == "add_node":
+        add_node_to_graph(graph, record["node"], _decode_node_data(record["data"]))
+    elif op == "update_node":
+        update_node_data(graph, record["node"], _decode_node_data(record["data"]))
+    elif op == "add_edge":
+        add_edge_to_graph(graph, record["u"], record["v"], record["action"])
+    elif op == "set_positions":
+        set_node_positions(graph, {node: (x, y) for node, x, y in record["positions"]})
+    elif op == "extend":
+        state.setdefault(record["field"], []).extend(record["items"])
+    elif op == "state":
+        state.update(record["fields"])
+    else:
+        raise ValueError(f"Registro desconocido en el diario: {op!r}")
+
+
+class SessionStore:
+    """
+    Sesión guardada en un directorio: ``snapshot.bin`` + ``journal.log``.
+
+    El diario es una secuencia de registros (longitud de 4 bytes + registro
+    serializado). Un registro incompleto al final (p.ej. un corte durante la
+    escritura) se ignora al cargar.
+    """
+
+    def __init__(self, session_dir: str = DEFAULT_SESSION_DIR, min_compact_bytes: int = MIN_COMPACT_BYTES):
+        self.session_dir = session_dir
+        self.min_compact_bytes = min_compact_bytes
+        self._graph_ref = None  # weakref al grafo cuyo diario está adjunto
+        self._journal = []
+        self._saved_fields = {}  # campos de la sesión tal y como se guardaron por última vez
+        self._saved_lists = {}  # campo de APPEND_ONLY_FIELDS -> (lista, copia de lo guardado)
+        self._serializer = _preferred(_serializers(), (b"m", b"j"))
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.session_dir, SNAPSHOT_FILE)
+
+    @property
+    def log_path(self):
+        return os.path.join(self.session_dir, LOG_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.snapshot_path)
+
+    def _size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _track(self, graph, fields):
+        """Adjunta un diario vacío a ``graph``: los cambios siguientes irán al diario."""
+        self._graph_ref = weakref.ref(graph)
+        self._journal = []
+        attach_journal(graph, self._journal)
+        self._saved_fields = {}
+        self._saved_lists = {}
+        self._remember(fields)
+
+    def _remember(self, fields):
+        for key, value in fields.items():
+            if key in APPEND_ONLY_FIELDS and isinstance(value, list):
+                self._saved_lists[key] = (value, _copy(value))
+            else:
+                self._saved_fields[key] = _copy(value)
+
+    def _appended(self, key, value):
+        """Elementos añadidos a ``value`` desde el último guardado, o None si no se puede saber."""
+        saved = self._saved_lists.get(key)
+        if saved is None or saved[0] is not value:
+            return None
+        saved_items = saved[1]
+        if len(value) < len(saved_items) or _copy(value[:len(saved_items)]) != saved_items:
+            return None
+        return value[len(saved_items):]
+
+    def _needs_snapshot(self, graph) -> bool:
+        if self._graph_ref is None or self._graph_ref() is not graph or not self.exists():
+            return True
+        return self._size(self.log_path) > max(self.min_compact_bytes, self._size(self.snapshot_path) // 2)
+
+    def save(self, fields: dict, graph) -> dict:
+        """
+        Guarda la sesión de forma incremental.
+
+        Args:
+            fields: Campos de la sesión (el dict de save_state() sin 'graph'; si
+                    lo lleva, se ignora).
+            graph: Grafo de la sesión. Solo se convierte a node_link_data al escribir
+                   una instantánea; si no, basta con su diario de mutaciones.
+
+        Returns:
+            {'mode': 'snapshot'|'append', 'bytes': escritos, 'records': registros}.
+        """
+        if self._needs_snapshot(graph):
+            return self.snapshot(fields, graph)
+
+        fields = {key: value for key, value in fields.items() if key != "graph"}
+        # La disposición mueve nodos en cada rerun: solo se guarda la última posición de
+        # cada uno, al final (los nodos no se borran, así que ya existen al reproducirlo)
+        positions = {}
+        records = []
+        for entry in self._journal:
+            if entry[0] == "set_positions":
+                positions.update(entry[1])
+            else:
+                records.append(_encode_entry(entry))
+        if positions:
+            records.append(_encode_entry(("set_positions", positions)))
+        changed = {}
+        for key, value in fields.items():
+            appended = self._appended(key, value) if key in APPEND_ONLY_FIELDS else None
+            if appended is not None:
+                if appended:
+                    records.append({"op": "extend", "field": key, "items": _copy(appended)})
+                continue
+            value = _copy(value)
+            if key in self._saved_lists or self._saved_fields.get(key) != value:
+                changed[key] = value
+        if changed:
+            records.append({"op": "state", "fields": changed})
+
+        # Un diario ya empezado sigue con el formato indicado en su primer byte
+        new_log = not self._size(self.log_path)
+        if new_log:
+            code = self._serializer
+        else:
+            with open(self.log_path, "rb") as f:
+                code = f.read(1)
+        dumps = _codec(_serializers(), code, "serialización")[0]
+        frames = bytearray()
+        for record in records:
+            payload = dumps(record)
+            frames += _FRAME.pack(len(payload)) + payload
+        if frames:
+            with open(self.log_path, "ab") as f:
+                f.write(code + frames if new_log else frames)
+                f.flush()
+                os.fsync(f.fileno())
+        self._journal.clear()
+        self._remember(fields)
+        return {"mode": "append", "bytes": len(frames), "records": len(records)}
+
+    def snapshot(self, fields: dict, graph) -> dict:
+        """Escribe una instantánea completa (fichero temporal + rename) y vacía el diario."""
+        os.makedirs(self.session_dir, exist_ok=True)
+        fields = {key: value for key, value in fields.items() if key != "graph"}
+        data = dumps_snapshot({"graph": graph_to_node_link(graph), **fields})
+        fd, tmp_path = tempfile.mkstemp(dir=self.session_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+        self._track(graph, fields)
+        return {"mode": "snapshot", "bytes": len(data), "records": 0}
+
+    def _read_log(self):
+        try:
+            with open(self.log_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        if not data:
+            return []
+        loads = _codec(_serializers(), data[:1], "serialización")[1]
+        records = []
+        offset = 1
+        while offset + _FRAME.size <= len(data):
+            (length,) = _FRAME.unpack_from(data, offset)
+            start = offset + _FRAME.size
+            if start + length > len(data):
+                break  # registro a medio escribir
+            records.append(loads(data[start:start + length]))
+            offset = start + length
+        return records
+
+    def load(self, backend=None) -> dict:
+        """
+        Lee la instantánea y reproduce el diario.
+
+        Returns:
+            Estado como el de save_state(), con 'graph' ya convertido en grafo (y con
+            el diario adjunto, de modo que el siguiente save() solo añade cambios).
+
+        Raises:
+            FileNotFoundError: si la sesión no tiene instantánea.
+        """
+        with open(self.snapshot_path, "rb") as f:
+            state = loads_snapshot(f.read())
+        state["graph"] = graph_from_node_link(state["graph"], backend)
+        for record in self._read_log():
+            _apply_record(state, record)
+        self._track(state["graph"], {key: value for key, value in state.items() if key != "graph"})
+        return state
+
+    def stats(self) -> dict:
+        return {"snapshot_bytes": self._size(self.snapshot_path), "log_bytes": self._size(self.log_path),
+                "pending_mutations": len(self._journal)}
+
+
+def _copy(value):
+    """
+    Copia de los campos mutables para detectar cambios en el siguiente guardado. Las
+    tuplas pasan a listas, como al serializarlas, para que un estado cargado no
+    parezca distinto del guardado.
+    """
+    if isinstance(value, (list, tuple)):
+        return [_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    return value
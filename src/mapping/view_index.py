@@ -0,0 +1,162 @@
+# src/mapping/view_index.py
+"""
+Índice de hashes perceptuales (dHash) de las vistas de cada nodo del grafo.
+
+Si el robot apenas se ha movido, la vista nueva es casi idéntica a la de un nodo
+ya analizado: su dHash difiere en pocos bits. El índice encuentra ese nodo sin
+llamar al LLM. Los hashes de cada nodo se guardan en su atributo 'view_hashes'
+(hex por posición) para que el índice se reconstruya al cargar un estado.
+"""
+import numpy as np
+
+HASH_SIZE = 8  # 8x8 = 64 bits por imagen
+# Distancia de Hamming máxima (bits de 64) para considerar dos vistas la misma
+DEFAULT_MAX_DISTANCE = 6
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Bits a 1 de cada uint64 (np.bitwise_count en numpy >= 2, tabla de bytes si no)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def dhash_image_bytes(image_bytes: bytes, hash_size: int = HASH_SIZE) -> int:
+    """
+    dHash de una imagen: miniatura en grises de (hash_size+1) x hash_size y un bit por
+    cada par de píxeles vecinos en horizontal (1 si el izquierdo es más claro).
+    """
+    import io
+    from PIL import Image
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft("L", (hash_size * 8, hash_size * 8))  # JPEG: decodifica ya reducida
+        thumb = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(thumb, dtype=np.int16)
+    bits = (pixels[:, :-1] > pixels[:, 1:]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def compute_view_hashes(images: dict) -> dict:
+    """
+    Calcula el dHash de cada imagen de una vista ({'left'|'center'|'right': data URI}).
+
+    Returns:
+        {posición: hash en hex}, o None si alguna imagen no se puede decodificar
+        (p.ej. URLs http, que no se descargan).
+    """
+    from utils.image_processing import decode_image_source
+    hashes = {}
+    for position, source in images.items():
+        if not source:
+            continue
+        raw = decode_image_source(source)
+        if raw is None:
+            return None
+        try:
+            hashes[position] = format(dhash_image_bytes(raw), "016x")
+        except Exception as e:
+            print(f"Warning: Could not hash image for position {position}: {e}")
+            return None
+    return hashes or None
+
+
+class _HashGroup:
+    """Matriz de hashes (n x posiciones) de las vistas con el mismo conjunto de posiciones."""
+
+    def __init__(self, width: int):
+        self.hashes = np.zeros((16, width), dtype=np.uint64)
+        self.node_ids = []
+
+    def append(self, node_id, row):
+        if len(self.node_ids) == len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.zeros_like(self.hashes)])
+        self.hashes[len(self.node_ids)] = row
+        self.node_ids.append(node_id)
+        return len(self.node_ids) - 1
+
+    def remove(self, slot):
+        """Quita la fila ``slot`` moviendo la última a su hueco. Devuelve el nodo movido o None."""
+        last = len(self.node_ids) - 1
+        moved = None
+        if slot != last:
+            self.hashes[slot] = self.hashes[last]
+            self.node_ids[slot] = moved = self.node_ids[last]
+        self.node_ids.pop()
+        return moved
+
+
+class ViewIndex:
+    """
+    Índice de vecinos cercanos por distancia de Hamming entre dHashes.
+
+    Las vistas se agrupan por conjunto de posiciones (una vista central solo se
+    compara con vistas centrales; una panorámica con panorámicas de las mismas
+    posiciones). La distancia entre dos vistas es la mayor de sus posiciones, de
+    modo que todas las imágenes deben parecerse. La búsqueda es un XOR + popcount
+    vectorizado sobre la matriz del grupo: sub-milisegundo con miles de nodos.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._groups = {}
+        self._slots = {}  # node_id -> (positions, fila)
+
+    def __len__(self):
+        return len(self._slots)
+
+    @staticmethod
+    def _row(view_hashes: dict):
+        positions = tuple(sorted(view_hashes))
+        row = np.array([int(view_hashes[p], 16) for p in positions], dtype=np.uint64)
+        return positions, row
+
+    def add(self, node_id, view_hashes: dict):
+        """Añade (o sustituye) la vista de un nodo."""
+        if not view_hashes:
+            return
+        self.remove(node_id)
+        positions, row = self._row(view_hashes)
+        group = self._groups.get(positions)
+        if group is None:
+            group = self._groups[positions] = _HashGroup(len(positions))
+        self._slots[node_id] = (positions, group.append(node_id, row))
+
+    def remove(self, node_id):
+        entry = self._slots.pop(node_id, None)
+        if entry is None:
+            return
+        positions, slot = entry
+        moved = self._groups[positions].remove(slot)
+        if moved is not None:
+            self._slots[moved] = (positions, slot)
+
+    def lookup(self, view_hashes: dict, max_distance: int = None):
+        """
+        Busca la vista indexada más cercana.
+
+        Returns:
+            Tupla (node_id, distancia) si hay una vista a distancia <= max_distance,
+            o None.
+        """
+        if not view_hashes:
+            return None
+        max_distance = self.max_distance if max_distance is None else max_distance
+        positions, row = self._row(view_hashes)
+        group = self._groups.get(positions)
+        if group is None or not group.node_ids:
+            return None
+        distances = _popcount(group.hashes[:len(group.node_ids)] ^ row).max(axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+        return group.node_ids[best], int(distances[best])
+
+    @classmethod
+    def from_graph(cls, graph, max_distance: int = DEFAULT_MAX_DISTANCE):
+        """Construye el índice a partir del atributo 'view_hashes' de los nodos."""
+        index = cls(max_distance)
+        for node_id, data in graph.nodes(data=True):
+            index.add(node_id, data.get("view_hashes"))
+        return index
@@ -0,0 +1,196 @@
+# src/navigation/path_service.py
+"""
+Caché de alcanzabilidad y caminos más cortos del grafo de navegación.
+
+Guarda el árbol de caminos mínimos (en saltos, como nx.shortest_path) de los últimos
+orígenes consultados: una vez calculado el árbol de current_node, cada
+comprobación has_path(current_node, objetivo) del panel de navegación es una
+consulta a un dict.
+
+La validez se comprueba con el contador de mutaciones de mapping/graph_manager.py
+(graph_version): si no ha cambiado, la consulta no hace nada más. Si ha cambiado,
+las aristas añadidas desde entonces (recibidas como diario 'paths') se aplican a
+cada árbol: una arista solo puede acortar distancias, así que se relaja y se
+propaga la mejora a los nodos afectados en lugar de descartar los árboles. El
+grafo solo crece durante una exploración; los cambios hechos sin los mutadores
+requieren clear_path_cache.
+
+    paths = get_path_service(graph)
+    paths.has_path("Pasillo", "Cocina")
+    paths.shortest_path("Pasillo", "Cocina")
+"""
+import weakref
+from collections import OrderedDict, deque
+
+import networkx as nx
+
+from mapping.graph_manager import attach_journal, detach_journal, graph_version
+
+MAX_CACHED_TREES = 16  # orígenes distintos con árbol en caché (LRU)
+
+
+class _Tree:
+    """Distancias y padres del BFS desde un origen (solo los nodos alcanzables)."""
+    __slots__ = ("dist", "parent")
+
+    def __init__(self, dist, parent):
+        self.dist = dist
+        self.parent = parent
+
+
+def _bfs_tree(graph, source) -> _Tree:
+    if hasattr(graph, "bfs_parents"):
+        # CSRGraph: BFS vectorizado por niveles
+        parents = graph.bfs_parents(source)
+        distances = graph.bfs_distances(source)
+        labels = graph._labels
+        reached = (parents >= 0).nonzero()[0].tolist()
+        parent = {labels[i]: labels[p] for i, p in zip(reached, parents[reached].tolist())}
+        dist = {labels[i]: d for i, d in zip(reached, distances[reached].tolist())}
+        parent[source] = None
+        return _Tree(dist, parent)
+    dist, parent = {source: 0}, {source: None}
+    queue = deque((source,))
+    while queue:
+        node = queue.popleft()
+        next_dist = dist[node] + 1
+        for neighbor in graph.successors(node):
+            if neighbor not in dist:
+                dist[neighbor] = next_dist
+                parent[neighbor] = node
+                queue.append(neighbor)
+    return _Tree(dist, parent)
+
+
+class PathService:
+    """Árboles de caminos mínimos por origen, mantenidos al añadir aristas."""
+
+    def __init__(self, graph, max_trees: int = MAX_CACHED_TREES):
+        self._graph_ref = weakref.ref(graph)
+        self.max_trees = max_trees
+        self._trees = OrderedDict()  # origen -> _Tree, el más reciente al final
+        self._new_edges = []  # aristas añadidas desde la última sincronización
+        self._version = graph_version(graph)
+        self.hits = 0
+        self.misses = 0
+        self.repaired = 0  # nodos cuya distancia ha mejorado al aplicar aristas nuevas
+
+    @property
+    def graph(self):
+        return self._graph_ref()
+
+    # --- Diario de graph_manager ---
+    def append(self, entry):
+        if entry[0] == "add_edge":
+            self._new_edges.append((entry[1], entry[2]))
+
+    def _sync(self):
+        version = graph_version(self.graph)
+        if version == self._version:
+            return
+        if self._new_edges:
+            graph = self.graph
+            for tree in self._trees.values():
+                for u, v in self._new_edges:
+                    self._insert_edge(graph, tree, u, v)
+            self._new_edges.clear()
+        self._version = version
+
+    def _insert_edge(self, graph, tree, u, v):
+        """Relaja la arista u -> v en el árbol y propaga las distancias que mejoran."""
+        dist, parent = tree.dist, tree.parent
+        du = dist.get(u)
+        if du is None:
+            return
+        dv = dist.get(v)
+        if dv is not None and dv <= du + 1:
+            return
+        dist[v], parent[v] = du + 1, u
+        queue = deque((v,))
+        while queue:
+            node = queue.popleft()
+            self.repaired += 1
+            next_dist = dist[node] + 1
+            for neighbor in graph.successors(node):
+                known = dist.get(neighbor)
+                if known is None or known > next_dist:
+                    dist[neighbor], parent[neighbor] = next_dist, node
+                    queue.append(neighbor)
+
+    def _tree(self, source, build=True):
+        self._sync()
+        tree = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+            self.hits += 1
+            return tree
+        if not build:
+            return None
+        self.misses += 1
+        tree = self._trees[source] = _bfs_tree(self.graph, source)
+        if len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        return tree
+
+    # --- Consultas ---
+    def has_tree(self, source) -> bool:
+        """True si las consultas desde ``source`` ya son búsquedas en el caché."""
+        return self._tree(source, build=False) is not None
+
+    def has_path(self, source, target) -> bool:
+        """Como nx.has_path, pero False (sin excepción) si alguno de los nodos no está en el grafo."""
+        graph = self.graph
+        if source not in graph or target not in graph:
+            return False
+        return target in self._tree(source).dist
+
+    def distance(self, source, target):
+        """Saltos de source a target, o None si no hay camino."""
+        if source not in self.graph:
+            return None
+        return self._tree(source).dist.get(target)
+
+    def shortest_path(self, source, target) -> list:
+        """
+        Camino más corto en saltos, reconstruido desde el árbol del origen.
+
+        Raises:
+            nx.NodeNotFound: si source o target no están en el grafo.
+            nx.NetworkXNoPath: si no hay camino.
+        """
+        graph = self.graph
+        for node in (source, target):
+            if node not in graph:
+                raise nx.NodeNotFound(f"El nodo {node!r} no está en el grafo")
+        parent = self._tree(source).parent
+        if target not in parent:
+            raise nx.NetworkXNoPath(f"No hay camino de {source!r} a {target!r}")
+        path = [target]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        return path[::-1]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"trees": len(self._trees), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None, "repaired": self.repaired,
+                "version": self._version}
+
+
+# Un servicio por grafo; desaparece con el grafo
+_services = weakref.WeakKeyDictionary()
+
+
+def get_path_service(graph) -> PathService:
+    """Servicio de caminos del grafo, creado la primera vez y mantenido con sus mutaciones."""
+    service = _services.get(graph)
+    if service is None:
+        service = _services[graph] = PathService(graph)
+        attach_journal(graph, service, name="paths")
+    return service
+
+
+def clear_path_cache(graph):
+    """Descarta los árboles del grafo (p.ej. tras modificarlo sin los mutadores)."""
+    if _services.pop(graph, None) is not None:
+        detach_journal(graph, name="paths")
@@ -1,14 +1,17 @@
 # src/navigation/planner.py
 
 import networkx as nx
-import streamlit as st # Solo si necesitas mostrar errores/info directamente aquí
 # Importar la NUEVA función de generación de texto
 from api.gpt_client import generate_text_with_gpt # Asegúrate que esta función exista
+from mapping.graph_manager import get_node_observation
+from mapping.hierarchy import get_hierarchy
 
-def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: str, action_history: list, door_states: dict):
+def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: str, action_history: list, door_states: dict,
+                             notify=None):
     """
-    Genera un plan de navegación utilizando NetworkX para pathfinding
-    y un LLM para generar instrucciones detalladas.
+    Genera un plan de navegación buscando la ruta en la jerarquía del mapa
+    (zonas -> habitaciones -> nodos, ver mapping/hierarchy.py) y un LLM para
+    generar instrucciones detalladas.
 
     Args:
         graph: El grafo de navegación (NetworkX DiGraph).
@@ -16,6 +19,8 @@ def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: s
         goal_node_id: El ID del nodo objetivo.
         action_history: Lista de acciones recientes.
         door_states: Diccionario con el estado de las puertas {('node1', 'node2'): 'abierta'/'cerrada'}.
+        notify: Función opcional que recibe mensajes informativos (p.ej. st.info en la interfaz).
+                El planificador no depende de Streamlit para poder usarse sin interfaz.
 
     Returns:
         Un string formateado con el plan de navegación o un mensaje de error/sin ruta.
@@ -32,12 +37,15 @@ def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: s
     # --- Paso 1: Pathfinding Algorítmico ---
     path_nodes = None
     try:
-        # Encuentra el camino más corto (ignora pesos por ahora, o añade lógica de peso si es necesario)
-        # Considera si quieres manejar el estado de las puertas aquí creando un grafo temporal
-        # o dejar que el LLM maneje la lógica de puertas cerradas en el paso 2.
-        # Opción más simple: encontrar el camino geométrico y que el LLM avise de puertas.
-        path_nodes = nx.shortest_path(graph, source=start_node, target=goal_node_id)
-        st.info(f"Ruta encontrada por NetworkX: {' -> '.join(path_nodes)}") # Log/Info
+        # Busca en el grafo de zonas y habitaciones y refina solo dentro de las habitaciones
+        # de la ruta, así el coste no crece con el tamaño del mapa. Las comprobaciones de
+        # alcanzabilidad del panel usan el caché de navigation/path_service.py; la ruta
+        # del plan sale siempre de la jerarquía, que además etiqueta las habitaciones.
+        # El estado de las puertas lo maneja el LLM en el paso 2.
+        hierarchy = get_hierarchy(graph)
+        path_nodes = hierarchy.shortest_path(start_node, goal_node_id)
+        if notify:
+            notify(f"Ruta encontrada: {' -> '.join(path_nodes)}") # Log/Info
     except nx.NetworkXNoPath:
         return f"No se encontró una ruta directa desde '{start_node}' hasta '{goal_node_id}' en el grafo actual."
     except Exception as e:
@@ -47,6 +55,11 @@ def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: s
     if path_nodes and len(path_nodes) > 1:
         # Extraer información relevante para el prompt
         path_details = []
+        rooms_on_path = []  # Habitaciones atravesadas, sin repetir consecutivas
+        for node in path_nodes:
+            room_label = hierarchy.room_label(hierarchy.room_of_node(node))
+            if not rooms_on_path or rooms_on_path[-1] != room_label:
+                rooms_on_path.append(room_label)
         for i in range(len(path_nodes) - 1):
             u, v = path_nodes[i], path_nodes[i+1]
             edge_data = graph.get_edge_data(u, v)
@@ -55,12 +68,14 @@ def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: s
             # Obtener descripción/landmarks del nodo de destino del paso
             node_v_data = graph.nodes.get(v, {})
             node_v_desc = node_v_data.get('description', '')
-            node_v_landmarks = node_v_data.get('llm_json', {}).get('landmarks_and_suggested_node_name', {}).get('suggested_node_name_detailed', 'Sin landmarks específicos.')
+            node_v_observation = get_node_observation(graph, v)
+            node_v_landmarks = (node_v_observation.node_name_detailed if node_v_observation else '') or 'Sin landmarks específicos.'
 
             path_details.append({
                 "from": u,
                 "to": v,
                 "action": action,
+                "target_room": hierarchy.room_label(hierarchy.room_of_node(v)),
                 "target_node_description": node_v_desc,
                 "target_node_landmarks": node_v_landmarks
             })
@@ -69,6 +84,9 @@ def generate_navigation_plan(graph: nx.DiGraph, start_node: str, goal_node_id: s
         prompt = f"""Eres un asistente de navegación robótica. Has calculado la siguiente secuencia de nodos como la ruta más corta desde {start_node} hasta {goal_node_id}:
 { ' -> '.join(path_nodes) }
 
+Habitaciones que atraviesa la ruta (agrupación automática del mapa):
+{ ' -> '.join(rooms_on_path) }
+
 Ahora, genera un plan paso a paso en lenguaje natural para el usuario (o robot).
 
 Detalles de cada paso en la ruta:
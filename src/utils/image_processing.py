@@ -0,0 +1,176 @@
+# src/utils/image_processing.py
+import io
+import math
+import base64
+from PIL import Image, ImageFilter, ImageOps, ImageStat
+
+# Valores por defecto del preprocesado antes de enviar imágenes al modelo
+DEFAULT_MAX_LONG_EDGE = 1024
+DEFAULT_FORMAT = "JPEG"
+DEFAULT_QUALITY = 80
+# Por debajo de este lado largo el detalle alto no aporta teselas extra
+LOW_DETAIL_MAX_EDGE = 512
+# Densidad media de bordes (0-1) por debajo de la cual la escena se considera simple
+LOW_DETAIL_EDGE_DENSITY = 0.04
+
+_MIME_BY_FORMAT = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def decode_image_source(image_source: str):
+    """
+    Decodifica un data URI, una cadena base64 o una referencia ``blob:`` a bytes.
+
+    Returns:
+        Los bytes de la imagen, o None si la fuente es una URL http(s), no es base64
+        válido o el blob no existe.
+    """
+    if not image_source or image_source.startswith("http"):
+        return None
+    if image_source.startswith("blob:"):
+        from mapping.blob_store import get_blob_store
+        try:
+            return get_blob_store().read(image_source)
+        except KeyError:
+            return None
+    payload = image_source.split(",", 1)[1] if image_source.startswith("data:") else image_source
+    try:
+        return base64.b64decode(payload)
+    except Exception:
+        return None
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """
+    Estima los tokens de visión de una imagen según las reglas publicadas por OpenAI:
+    'low' cuesta 85 tokens fijos; 'high' (y 'auto' en el peor caso) encaja la imagen
+    en 2048x2048, reduce el lado corto a 768 y cobra 170 tokens por tesela de 512px.
+    """
+    if detail == "low" or width <= 0 or height <= 0:
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def edge_density(image: Image.Image) -> float:
+    """Densidad media de bordes (0-1) sobre una miniatura en escala de grises."""
+    thumb = image.convert("L")
+    thumb.thumbnail((128, 128))
+    edges = thumb.filter(ImageFilter.FIND_EDGES)
+    return ImageStat.Stat(edges).mean[0] / 255.0
+
+
+def choose_detail(image: Image.Image, low_max_edge: int = LOW_DETAIL_MAX_EDGE,
+                  low_edge_density: float = LOW_DETAIL_EDGE_DENSITY) -> str:
+    """
+    Elige 'low' o 'high' para una imagen: las imágenes pequeñas o visualmente simples
+    (pared lisa, pasillo vacío) no ganan nada con el detalle alto.
+    """
+    if max(image.size) <= low_max_edge:
+        return "low"
+    return "low" if edge_density(image) < low_edge_density else "high"
+
+
+def preprocess_image_bytes(image_bytes: bytes, max_long_edge: int = DEFAULT_MAX_LONG_EDGE,
+                           image_format: str = DEFAULT_FORMAT, quality: int = DEFAULT_QUALITY,
+                           detail: str = None):
+    """
+    Reduce, limpia de metadatos y recodifica una imagen para enviarla al modelo.
+
+    Si la imagen ya está en el formato destino, cabe en ``max_long_edge`` y no tiene
+    metadatos, se devuelven los bytes originales (la operación es idempotente y nunca
+    aumenta el tamaño).
+
+    Args:
+        image_bytes: Bytes de la imagen original.
+        max_long_edge: Lado largo máximo en píxeles.
+        image_format: 'JPEG' o 'WEBP'.
+        quality: Calidad de compresión (1-95).
+        detail: Fuerza 'low'/'high'; si es None se elige con choose_detail.
+
+    Returns:
+        Tupla (data_uri, detail, report) donde report contiene bytes y tokens
+        estimados antes/después y el ahorro.
+    """
+    image_format = image_format.upper()
+    image = Image.open(io.BytesIO(image_bytes))
+    original_format = image.format
+    original_size = image.size
+    has_metadata = bool(image.info.get("exif") or image.info.get("icc_profile") or image.info.get("xmp"))
+
+    if original_format == "JPEG":
+        # Decodificación reducida por DCT: mucho más rápida con fotos grandes
+        image.draft("RGB", (max_long_edge, max_long_edge))
+    image = ImageOps.exif_transpose(image)  # Respeta la orientación antes de tirar el EXIF
+    if max(image.size) > max_long_edge:
+        image.thumbnail((max_long_edge, max_long_edge), Image.LANCZOS)
+
+    if original_format == image_format and image.size == original_size and not has_metadata:
+        output_bytes = image_bytes
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        # Sin exif/icc_profile en save(): los metadatos se descartan
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+        output_bytes = buffer.getvalue()
+        if len(output_bytes) >= len(image_bytes) and image.size == original_size:
+            output_bytes, image_format = image_bytes, original_format
+
+    if detail is None:
+        detail = choose_detail(image)
+    mime_type = _MIME_BY_FORMAT.get(image_format, f"image/{(image_format or 'jpeg').lower()}")
+    data_uri = f"data:{mime_type};base64,{base64.b64encode(output_bytes).decode('utf-8')}"
+
+    original_tokens = estimate_image_tokens(*original_size, detail="high")
+    processed_tokens = estimate_image_tokens(*image.size, detail=detail)
+    report = {
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(output_bytes),
+        "bytes_saved": len(image_bytes) - len(output_bytes),
+        "original_size": original_size,
+        "processed_size": image.size,
+        "detail": detail,
+        "original_tokens": original_tokens,
+        "processed_tokens": processed_tokens,
+        "tokens_saved": original_tokens - processed_tokens,
+    }
+    return data_uri, detail, report
+
+
+def preprocess_image_inputs(image_inputs: list, **options):
+    """
+    Aplica preprocess_image_bytes a una lista ``image_inputs`` de gpt_client.
+
+    Las URLs http(s) y las fuentes que no se pueden decodificar se dejan como están
+    (con detalle 'auto'). Cada entrada devuelta incluye la clave 'detail'.
+
+    Returns:
+        Tupla (new_inputs, report) con el informe agregado de la llamada y el
+        desglose por posición en report['images'].
+    """
+    new_inputs = []
+    report = {"bytes_saved": 0, "tokens_saved": 0, "original_bytes": 0, "processed_bytes": 0, "images": {}}
+    for img_input in image_inputs:
+        source = img_input.get('source')
+        raw = decode_image_source(source) if source else None
+        if raw is None:
+            new_inputs.append(dict(img_input, detail=img_input.get('detail', 'auto')))
+            continue
+        try:
+            data_uri, detail, image_report = preprocess_image_bytes(
+                raw, detail=img_input.get('detail') if img_input.get('detail') in ("low", "high") else None,
+                **options
+            )
+        except Exception as e:
+            print(f"Warning: Could not preprocess image for position {img_input.get('position')}: {e}")
+            new_inputs.append(dict(img_input, detail=img_input.get('detail', 'auto')))
+            continue
+        new_inputs.append(dict(img_input, source=data_uri, detail=detail))
+        report["images"][img_input.get('position', 'image')] = image_report
+        for field in ("bytes_saved", "tokens_saved", "original_bytes", "processed_bytes"):
+            report[field] += image_report[field]
+    return new_inputs, report
@@ -0,0 +1,257 @@
+# src/utils/json_repair.py
+"""
+Reparación local de JSON mal formado devuelto por el LLM.
+
+Sustituye en la mayoría de casos la segunda llamada al LLM con formatting_prompt:
+un tokenizador tolerante y un parser descendente reconstruyen el objeto aunque la
+respuesta traiga texto alrededor, comentarios //, comillas simples, comas de más o
+de menos, claves sin comillas o se haya cortado al llegar a max_tokens.
+
+    parsed, fixes = repair_json(texto)
+    # fixes: ['stripped_prefix', 'trailing_commas', 'closed_brackets', ...]
+"""
+import re
+
+# Códigos de las reparaciones que puede aplicar repair_json
+FIXES = (
+    "stripped_prefix",       # texto o ```json antes del objeto
+    "stripped_suffix",       # texto después del objeto
+    "removed_comments",      # comentarios // o /* */
+    "single_quotes",         # 'texto' → "texto"
+    "escaped_inner_quotes",  # comillas sin escapar dentro de un string ("la "gran" puerta", 'robot's')
+    "escaped_control_chars", # saltos de línea/tabuladores sin escapar dentro de strings
+    "python_literals",       # True/False/None
+    "unquoted_keys",         # {clave: ...}
+    "unquoted_strings",      # valores sin comillas
+    "trailing_commas",       # [1, 2,] / {"a": 1,}
+    "missing_commas",        # "a": 1 "b": 2
+    "missing_colons",        # {"a" 1}
+    "closed_string",         # string sin cerrar (respuesta truncada)
+    "closed_brackets",       # {/[ sin cerrar (respuesta truncada)
+    "dropped_incomplete",    # clave sin valor ("a": , ...) o literal a medias al final (tru)
+)
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_WORD = re.compile(r"[A-Za-z_$][\w$\-]*")
+_PY_LITERALS = {"True": True, "False": False, "None": None}
+_JSON_LITERALS = {"true": True, "false": False, "null": None}
+# Comienzos de literal: una palabra así al final del texto es un literal cortado, no un string
+_LITERAL_PREFIXES = frozenset(word[:i] for word in (*_JSON_LITERALS, *_PY_LITERALS) for i in range(1, len(word)))
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_EOF = ("eof", None)
+
+
+class _Truncated(Exception):
+    """El texto se acabó a mitad de un valor."""
+
+
+class _Tokenizer:
+    def __init__(self, text: str, start: int, fixes: set):
+        self.text = text
+        self.pos = start
+        self.fixes = fixes
+        self.peeked = None
+
+    def peek(self):
+        if self.peeked is None:
+            self.peeked = self._next()
+        return self.peeked
+
+    def take(self):
+        token = self.peek()
+        self.peeked = None
+        return token
+
+    def _skip_space_and_comments(self):
+        text, n = self.text, len(self.text)
+        while self.pos < n:
+            c = text[self.pos]
+            if c in " \t\r\n":
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = n if end == -1 else end + 1
+                self.fixes.add("removed_comments")
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                self.pos = n if end == -1 else end + 2
+                self.fixes.add("removed_comments")
+            else:
+                break
+
+    def _next(self):
+        self._skip_space_and_comments()
+        text = self.text
+        if self.pos >= len(text):
+            return _EOF
+        c = text[self.pos]
+        if c in "{}[]:,":
+            self.pos += 1
+            return (c, c)
+        if c in "\"'":
+            return ("str", self._string(c))
+        match = _NUMBER.match(text, self.pos)
+        if match:
+            self.pos = match.end()
+            raw = match.group(0)
+            try:
+                return ("value", int(raw) if raw.lstrip("-").isdigit() else float(raw))
+            except ValueError:
+                return ("value", raw)
+        match = _WORD.match(text, self.pos)
+        if match:
+            self.pos = match.end()
+            word = match.group(0)
+            if word in _JSON_LITERALS:
+                return ("value", _JSON_LITERALS[word])
+            if word in _PY_LITERALS:
+                self.fixes.add("python_literals")
+                return ("value", _PY_LITERALS[word])
+            if self.pos == len(text) and word in _LITERAL_PREFIXES:
+                return ("partial", word)
+            return ("word", word)
+        # Carácter suelto (p.ej. markdown): se descarta
+        self.pos += 1
+        return self._next()
+
+    def _string(self, quote):
+        if quote == "'":
+            self.fixes.add("single_quotes")
+        text, n = self.text, len(self.text)
+        i = self.pos + 1
+        chars = []
+        while i < n:
+            c = text[i]
+            if c == "\\":
+                if i + 1 >= n:
+                    break
+                escaped = text[i + 1]
+                if escaped == "u" and i + 6 <= n:
+                    try:
+                        chars.append(chr(int(text[i + 2:i + 6], 16)))
+                        i += 6
+                        continue
+                    except ValueError:
+                        pass
+                chars.append(_ESCAPES.get(escaped, escaped))
+                i += 2
+                continue
+            if c == quote:
+                # Solo cierra si lo siguiente puede seguir a un valor; si no, es una comilla interior
+                j = i + 1
+                while j < n and text[j] in " \t":
+                    j += 1
+                if j >= n or text[j] in ",:}]\r\n" or (j > i + 1 and text[j] in "\"'{[-0123456789"):
+                    self.pos = i + 1
+                    return "".join(chars)
+                self.fixes.add("escaped_inner_quotes")
+            if c in "\n\r\t":
+                self.fixes.add("escaped_control_chars")
+            chars.append(c)
+            i += 1
+        self.pos = n
+        self.fixes.add("closed_string")
+        return "".join(chars)
+
+
+class _Parser:
+    def __init__(self, tokens: _Tokenizer, fixes: set):
+        self.tokens = tokens
+        self.fixes = fixes
+
+    def value(self):
+        kind, token = self.tokens.take()
+        if kind == "{":
+            return self.container("}", {})
+        if kind == "[":
+            return self.container("]", [])
+        if kind in ("str", "value"):
+            return token
+        if kind == "word":
+            # Palabras sueltas seguidas (valor sin comillas con espacios) hasta el siguiente delimitador
+            words = [token]
+            while self.tokens.peek()[0] == "word":
+                words.append(self.tokens.take()[1])
+            self.fixes.add("unquoted_strings")
+            return " ".join(words)
+        if kind in ("eof", "partial"):
+            raise _Truncated()
+        raise ValueError(f"Token inesperado: {token!r}")
+
+    def container(self, closer, result):
+        is_object = closer == "}"
+        expecting_item = True
+        while True:
+            kind, token = self.tokens.peek()
+            if kind == "eof":
+                self.fixes.add("closed_brackets")
+                return result
+            if kind in "}]":
+                self.tokens.take()
+                if kind != closer:
+                    self.fixes.add("closed_brackets")  # Cierre equivocado: se cierra el contenedor actual
+                if expecting_item and result:
+                    self.fixes.add("trailing_commas")
+                return result
+            if kind == ",":
+                self.tokens.take()
+                expecting_item = True
+                continue
+            if not expecting_item:
+                self.fixes.add("missing_commas")
+            try:
+                if is_object:
+                    self.member(result)
+                else:
+                    result.append(self.value())
+            except _Truncated:
+                self.fixes.update(("dropped_incomplete", "closed_brackets"))
+                return result
+            expecting_item = False
+
+    def member(self, result):
+        kind, key = self.tokens.take()
+        if kind == "word":
+            self.fixes.add("unquoted_keys")
+        elif kind == "value":
+            key = str(key).lower() if isinstance(key, bool) or key is None else str(key)
+        elif kind != "str":
+            raise ValueError(f"Clave inesperada: {key!r}")
+        if self.tokens.peek()[0] == ":":
+            self.tokens.take()
+        elif self.tokens.peek()[0] == "eof":
+            raise _Truncated()
+        else:
+            self.fixes.add("missing_colons")
+        if self.tokens.peek()[0] in ",}]":
+            # Clave sin valor ("a": , "b": 1): se descarta solo esa clave
+            self.fixes.add("dropped_incomplete")
+            return
+        result[key] = self.value()
+
+
+def repair_json(text: str):
+    """
+    Intenta reconstruir el objeto (o lista) JSON de ``text``.
+
+    Returns:
+        Tupla (parsed, fixes): el valor recuperado (None si no hay nada que recuperar)
+        y la lista ordenada de códigos de FIXES aplicados ([] si ya era JSON válido).
+    """
+    if not text:
+        return None, []
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None, []
+    start = min(starts)
+    fixes = set()
+    if text[:start].strip():
+        fixes.add("stripped_prefix")
+    tokens = _Tokenizer(text, start, fixes)
+    try:
+        parsed = _Parser(tokens, fixes).value()
+    except (_Truncated, ValueError, RecursionError):
+        return None, sorted(fixes)
+    if text[tokens.pos:].strip():
+        fixes.add("stripped_suffix")
+    return parsed, [fix for fix in FIXES if fix in fixes]
@@ -1,10 +1,99 @@
 import re
-import json
+
+# Patrones precompilados (una sola vez al importar). Un único finditer multilínea localiza
+# los títulos de sección; cada sección de lista se trocea con un split por viñetas.
+# El título empieza por el literal '**' para que el motor salte directamente a los candidatos
+_HEADER = re.compile(r"\*\*[ \t]*\d+\.[ \t]+([^\n*:]+)(?::[ \t]*\*\*|\*\*[ \t]*:?)[ \t]*([^\n]*)")
+_BULLET = re.compile(r"^[ \t]*(?:[-*•]|\d+[.)])[ \t]+", re.MULTILINE)
+# Un elemento de lista: viñeta, etiqueta opcional '**Etiqueta**:' / '**Etiqueta:**' y el detalle,
+# incluidas las líneas siguientes que no empiezan otra viñeta
+_ITEM = re.compile(
+    r"^[ \t]*(?:[-*•]|\d+[.)])[ \t]+(?:\*\*([^\n*]+?)(?::\*\*|\*\*[ \t]*:)[ \t]*)?"
+    r"([^\n]*(?:\n(?![ \t]*(?:[-*•]|\d+[.)])[ \t])[^\n]*)*)",
+    re.MULTILINE,
+)
+_NODE_NAME = re.compile(r"(?:\*\*[ \t]*)?Suggested Node Name:\**\s*\"?([^\n\"*]+)\"?", re.IGNORECASE)
+_NON_ALPHA = re.compile(r"[^a-z ]+")
+
+# Título de sección (normalizado: minúsculas, solo letras y espacios) -> (campo, tipo)
+_SECTIONS = {
+    "overall scene description": ("overall_scene_description", "text"),
+    "identified objects": ("identified_objects", "objects"),
+    "potential navigation paths": ("potential_navigation_paths", "paths"),
+    "obstacles": ("obstacles", "obstacles"),
+    "landmarks and suggested node name": ("landmarks_and_suggested_node_name", "landmarks"),
+    "robots perspective and potential actions": ("robot_perspective_and_potential_actions", "actions"),
+    "navigation graph elements": ("navigation_graph_elements", "graph"),
+    "reasoning": ("reasoning", "text"),
+    "obstacle avoidance strategy": ("obstacle_avoidance_strategy", "text"),
+}
+
+
+_section_cache = {}
+
+
+def _section_for(title):
+    """(campo, tipo) de un título de sección, o None si no es una sección del esquema."""
+    if title in _section_cache:
+        return _section_cache[title]
+    key = " ".join(_NON_ALPHA.sub("", title.lower().replace("'", "").replace("&", " and ")).split())
+    section = _SECTIONS.get(key)
+    if section is None:
+        # Títulos con texto extra ("Obstacles (if any)"): el nombre más largo contenido en el título
+        matches = [name for name in _SECTIONS if name in key]
+        if matches:
+            section = _SECTIONS[max(matches, key=len)]
+    if len(_section_cache) < 1024:
+        _section_cache[title] = section
+    return section
+
+
+def _build_item(kind, label, details):
+    if kind == "objects":
+        return {"name": label, "characteristics": details} if label else {"name": details, "characteristics": ""}
+    if kind == "paths":
+        # Si no se especifica dirección, la dejamos vacía
+        return {"description": label or details, "direction": "", "features": details if label else ""}
+    if kind == "obstacles":
+        return {"type": label or details, "size": "", "location": details if label else ""}
+    if kind == "graph":
+        return {"target_node": label or details, "action": details if label else ""}
+    return details if not label else f"**{label}**: {details}"  # actions
+
+
+def _fill_section(result, field, kind, content):
+    if kind == "text":
+        result[field] = content.strip()
+        return
+    if kind == "landmarks":
+        m = _NODE_NAME.search(content)
+        if m:
+            result[field]["suggested_node_name"] = m.group(1).strip()
+            content = content[:m.start()] + content[m.end():]
+        detailed = " ".join(part.strip() for part in _BULLET.split(content) if part.strip())
+        if detailed:
+            result[field]["suggested_node_name_detailed"] = detailed
+        return
+    # Listas: cada viñeta abre un elemento; las líneas sin viñeta continúan el anterior
+    target = result[field]
+    items = _ITEM.findall(content)
+    if not items and content.strip():
+        items = [(None, content)]  # Sección sin viñetas: un único elemento
+    for label, details in items:
+        details = details.strip()
+        if label or details:
+            target.append(_build_item(kind, label.strip() if label else None, details))
+
 
 def parse_raw_text_to_json(raw_text):
     """
     Parsea el raw text estructurado en secciones y bullets a un objeto JSON
     con la estructura esperada.
+
+    Recorre el texto una sola vez con patrones precompilados y rellena los nueve
+    campos del esquema, incluidos navigation_graph_elements, reasoning y
+    obstacle_avoidance_strategy. Las secciones se reconocen por su título
+    ('**N. Título:**', con o sin contenido en la misma línea).
     """
     result = {
         "overall_scene_description": "",
@@ -20,85 +109,15 @@ def parse_raw_text_to_json(raw_text):
         "obstacle_avoidance_strategy": ""
     }
 
-    # Patrón para extraer secciones del raw text
-    pattern = re.compile(r"\*\*(\d+\.\s+[^:]+):\*\*\s*\n(.+?)(?=\n\*\*\d+\.|$)", re.DOTALL)
-    matches = pattern.findall(raw_text)
-    for header, content in matches:
-        header = header.strip()
-        content = content.strip()
-        if "Overall Scene Description" in header:
-            result["overall_scene_description"] = content
-        elif "Identified Objects" in header:
-            # Divide por líneas que comienzan con guiones
-            lines = re.split(r"\n- ", content)
-            for line in lines:
-                line = line.strip("- ").strip()
-                if not line:
-                    continue
-                # Espera el formato: **Nombre:** descripción
-                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
-                if m:
-                    name = m.group(1).strip()
-                    characteristics = m.group(2).strip()
-                    result["identified_objects"].append({"name": name, "characteristics": characteristics})
-                else:
-                    # Si no hay coincidencia, se guarda la línea completa
-                    result["identified_objects"].append({"name": line, "characteristics": ""})
-        elif "Potential Navigation Paths" in header:
-            lines = re.split(r"\n- ", content)
-            for line in lines:
-                line = line.strip("- ").strip()
-                if not line:
-                    continue
-                # Intenta separar usando el formato: **Descripción:** detalles
-                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
-                if m:
-                    description = m.group(1).strip()
-                    details = m.group(2).strip()
-                    # Si no se especifica dirección, la dejamos vacía
-                    result["potential_navigation_paths"].append({
-                        "description": description, 
-                        "direction": "", 
-                        "features": details
-                    })
-                else:
-                    result["potential_navigation_paths"].append({
-                        "description": line, 
-                        "direction": "", 
-                        "features": ""
-                    })
-        elif "Obstacles" in header:
-            lines = re.split(r"\n- ", content)
-            for line in lines:
-                line = line.strip("- ").strip()
-                if not line:
-                    continue
-                m = re.match(r"\*\*(.+?)\*\*:\s*(.*)", line)
-                if m:
-                    typ = m.group(1).strip()
-                    details = m.group(2).strip()
-                    result["obstacles"].append({
-                        "type": typ, 
-                        "size": "",  # Si se requiere, se podría intentar extraer el tamaño
-                        "location": details
-                    })
-                else:
-                    result["obstacles"].append({
-                        "type": line, 
-                        "size": "", 
-                        "location": ""
-                    })
-        elif "Landmarks and Suggested Node Name" in header:
-            # Busca la línea que contenga "Suggested Node Name:"
-            m = re.search(r"Suggested Node Name:\s*\"?([^\n\"]+)\"?", content)
-            if m:
-                result["landmarks_and_suggested_node_name"]["suggested_node_name"] = m.group(1).strip()
-        elif "Robot's Perspective and Potential Actions" in header:
-            lines = re.split(r"\n- ", content)
-            for line in lines:
-                line = line.strip("- ").strip()
-                if line:
-                    result["robot_perspective_and_potential_actions"].append(line)
-        # Otras secciones (como navigation_graph_elements, reasoning, obstacle_avoidance_strategy)
-        # se pueden agregar aquí según se requiera.
+    # Cualquier título numerado cierra la sección anterior; los desconocidos se ignoran
+    headers = list(_HEADER.finditer(raw_text))
+    for i, header in enumerate(headers):
+        section = _section_for(header.group(1))
+        if section is None:
+            continue
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(raw_text)
+        content = raw_text[header.end():end]
+        if header.group(2):
+            content = header.group(2) + "\n" + content
+        _fill_section(result, section[0], section[1], content)
     return result
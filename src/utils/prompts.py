@@ -9,10 +9,14 @@ This may be a single image from the center view OR three images providing a pano
 - Pay attention to elements that might span across views or are only visible from the sides. Use the descriptions to reflect this combined understanding.
 
 **Regardless of the input (single or panoramic):**
-Generate STRICTLY a JSON response with this EXACT structure:
+Generate STRICTLY a JSON response with this EXACT structure (keep the keys in this order):
 
 {
   "overall_scene_description": "[1-2 sentences reflecting the full view available, single or panoramic, mention something relevant in each view]",
+  "landmarks_and_suggested_node_name": {
+    "suggested_node_name": "[2-4 word unique name reflecting the location based on available view(s)]",
+    "suggested_node_name_detailed": "[Detailed description of landmarks from available view(s) to uniquely identify this location]"
+  },
   "identified_objects": [
     {"name": "object1", "characteristics": "[key features based on available view(s)]"},
     {"name": "object2", "characteristics": "[key features]"}
@@ -26,10 +30,6 @@ Generate STRICTLY a JSON response with this EXACT structure:
     {"type": "[e.g., wall, furniture, step]", "size": "[small/medium/large]", "location": "[relative position based on available view(s), e.g., 'center-low', 'spanning left-center']"}
      // Add more obstacles as identified
   ],
-  "landmarks_and_suggested_node_name": {
-    "suggested_node_name": "[2-4 word unique name reflecting the location based on available view(s)]",
-    "suggested_node_name_detailed": "[Detailed description of landmarks from available view(s) to uniquely identify this location]"
-  },
   "robot_perspective_and_potential_actions": [
     "[Action 1 based on full view and goal]",
     "[Action 2 based on full view and goal]"
@@ -0,0 +1,116 @@
+# src/utils/response_validation.py
+import re
+import json
+from utils.json_repair import repair_json
+from utils.parsing_llm_response import parse_raw_text_to_json
+
+# Claves de primer nivel de navigation_prompt y su tipo JSON
+NAVIGATION_SCHEMA = {
+    "overall_scene_description": str,
+    "landmarks_and_suggested_node_name": dict,
+    "identified_objects": list,
+    "potential_navigation_paths": list,
+    "obstacles": list,
+    "robot_perspective_and_potential_actions": list,
+    "navigation_graph_elements": list,
+    "reasoning": str,
+    "obstacle_avoidance_strategy": str,
+    "process_step": str,
+}
+
+# Umbrales de la heurística de confianza (ajustables con las estadísticas de la cascada)
+DEFAULT_THRESHOLDS = {
+    "min_description_chars": 20,
+    "min_paths": 1,
+    "min_actions": 1,
+    "require_node_name": True,
+    "accept_parse_fallback": False,
+}
+
+
+def fill_navigation_defaults(parsed: dict) -> list:
+    """Añade (in situ) las claves de NAVIGATION_SCHEMA que falten con su valor vacío. Devuelve las añadidas."""
+    added = []
+    for key, expected_type in NAVIGATION_SCHEMA.items():
+        if key not in parsed:
+            parsed[key] = {"suggested_node_name": ""} if key == "landmarks_and_suggested_node_name" else expected_type()
+            added.append(key)
+    return added
+
+
+def _parse_response(response_text: str):
+    """
+    Devuelve (parsed, fallback) siguiendo el mismo orden que la interfaz: JSON,
+    bloque ```json, reparación local (utils/json_repair.py) y texto crudo.
+    """
+    try:
+        parsed = json.loads(response_text)
+        if isinstance(parsed, dict):
+            return parsed, None
+    except (TypeError, ValueError):
+        pass
+    match = re.search(r'```json\s*(\{.*?\})\s*```', response_text or "", re.DOTALL)
+    if match:
+        try:
+            parsed = json.loads(match.group(1))
+            if isinstance(parsed, dict):
+                return parsed, "markdown_block"
+        except ValueError:
+            pass
+    repaired, _ = repair_json(response_text)
+    if isinstance(repaired, dict) and any(key in repaired for key in NAVIGATION_SCHEMA):
+        return repaired, "repaired"
+    try:
+        return parse_raw_text_to_json(response_text or ""), "raw_text"
+    except Exception:
+        return None, "raw_text"
+
+
+def validate_navigation_response(response_text: str, thresholds: dict = None) -> dict:
+    """
+    Comprueba una respuesta de visión contra el esquema de navigation_prompt y una
+    heurística de confianza.
+
+    Args:
+        response_text: Texto devuelto por el modelo.
+        thresholds: Umbrales que sustituyen a los de DEFAULT_THRESHOLDS.
+
+    Returns:
+        {'valid': bool, 'confident': bool, 'issues': [str], 'parsed': dict|None,
+         'parse_fallback': None|'markdown_block'|'repaired'|'raw_text'}. 'valid' exige todas las
+        claves con su tipo; 'confident' además que pase la heurística. Los códigos de
+        'issues' ('missing:<clave>', 'type:<clave>', 'empty_paths', ...) sirven para
+        agregar por qué se escala.
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    parsed, fallback = _parse_response(response_text)
+    issues = []
+    if parsed is None:
+        return {"valid": False, "confident": False, "issues": ["unparseable"], "parsed": None,
+                "parse_fallback": fallback}
+
+    for key, expected_type in NAVIGATION_SCHEMA.items():
+        if key not in parsed:
+            issues.append(f"missing:{key}")
+        elif not isinstance(parsed[key], expected_type):
+            issues.append(f"type:{key}")
+    valid = not issues
+
+    if fallback and not limits["accept_parse_fallback"]:
+        issues.append(f"parse_fallback:{fallback}")
+    landmarks = parsed.get("landmarks_and_suggested_node_name")
+    node_name = landmarks.get("suggested_node_name", "") if isinstance(landmarks, dict) else ""
+    if limits["require_node_name"] and not (isinstance(node_name, str) and node_name.strip()):
+        issues.append("missing_node_name")
+    description = parsed.get("overall_scene_description")
+    if not isinstance(description, str) or len(description.strip()) < limits["min_description_chars"]:
+        issues.append("short_description")
+    paths = parsed.get("potential_navigation_paths")
+    if not isinstance(paths, list) or len(paths) < limits["min_paths"]:
+        issues.append("empty_paths")
+    actions = parsed.get("robot_perspective_and_potential_actions")
+    if not isinstance(actions, list) or len(actions) < limits["min_actions"]:
+        issues.append("empty_actions")
+
+    return {"valid": valid, "confident": valid and not issues, "issues": issues, "parsed": parsed,
+            "parse_fallback": fallback}
@@ -0,0 +1,124 @@
+# src/utils/streaming_json.py
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Parser incremental de un objeto JSON que llega por fragmentos (streaming).
+
+    Solo sigue la estructura del nivel superior: en cuanto un campo de primer nivel
+    queda completo (string, número, lista u objeto anidado) se devuelve como par
+    (clave, valor) sin esperar al resto de la respuesta. Además expone el texto
+    parcial del string de primer nivel que se está recibiendo, para poder pintar
+    descripciones largas mientras llegan.
+
+    Uso:
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expecting = "start"  # start, key, colon, value, after_value
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._value_kind = None  # string, container, scalar
+
+    def feed(self, chunk: str) -> list:
+        """Añade un fragmento y devuelve la lista de campos de primer nivel completados."""
+        if not chunk or self.done:
+            return []
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expecting == "key":
+                        self._key = json.loads(buffer[self._key_start:i + 1])
+                        self._expecting = "colon"
+                    elif self._depth == 1 and self._value_kind == "string":
+                        completed.append(self._emit(buffer[self._value_start:i + 1]))
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expecting == "key":
+                    self._key_start = i
+                elif self._depth == 1 and self._expecting == "value":
+                    self._value_start, self._value_kind = i, "string"
+                    self._expecting = "after_value"
+            elif c in "{[":
+                if self._depth == 0:
+                    self._expecting = "key"
+                elif self._depth == 1 and self._expecting == "value":
+                    self._value_start, self._value_kind = i, "container"
+                    self._expecting = "after_value"
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 1 and self._value_kind == "scalar":
+                    completed.append(self._emit(buffer[self._value_start:i].strip()))
+                self._depth -= 1
+                if self._depth == 1 and self._value_kind == "container":
+                    completed.append(self._emit(buffer[self._value_start:i + 1]))
+                elif self._depth == 0:
+                    self.done = True
+                    i += 1
+                    break
+            elif self._depth == 1:
+                if c == ":" and self._expecting == "colon":
+                    self._expecting = "value"
+                elif c == ",":
+                    if self._value_kind == "scalar":
+                        completed.append(self._emit(buffer[self._value_start:i].strip()))
+                    self._expecting = "key"
+                elif c not in _WHITESPACE and self._expecting == "value":
+                    self._value_start, self._value_kind = i, "scalar"
+                    self._expecting = "after_value"
+            i += 1
+        self._pos = i
+        return [field for field in completed if field is not None]
+
+    def _emit(self, raw_value):
+        key = self._key
+        self._key = self._value_start = self._value_kind = None
+        try:
+            value = json.loads(raw_value)
+        except ValueError:
+            return None
+        self.fields[key] = value
+        return key, value
+
+    def partial_string(self):
+        """
+        Devuelve (clave, texto_parcial) si se está recibiendo un string de primer
+        nivel, o None. El texto parcial no incluye escapes a medio llegar.
+        """
+        if not (self._in_string and self._depth == 1 and self._value_kind == "string"):
+            return None
+        raw = self.buffer[self._value_start + 1:self._pos]
+        if raw.endswith("\\"):
+            raw = raw[:-1]
+        try:
+            return self._key, json.loads(f'"{raw}"')
+        except ValueError:
+            return self._key, raw
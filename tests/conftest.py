@@ -0,0 +1,19 @@
+# tests/conftest.py
+# Los módulos se importan como en la app (api.*, mapping.*, ...), con src/ en el path
+import os
+import sys
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+import pytest
+
+
+@pytest.fixture
+def llm_cache(tmp_path, monkeypatch):
+    """Caché de respuestas del LLM del proceso en un directorio temporal (no en data/cache)."""
+    from api import response_cache
+    cache = response_cache.ResponseCache(str(tmp_path / "llm_cache"))
+    monkeypatch.setattr(response_cache, "_default_cache", cache)
+    return cache
@@ -0,0 +1,76 @@
+# tests/test_batch.py
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from api.gpt_client import analyze_images_batch_sync
+from api.rate_limiter import RateBudget, estimate_request_tokens, TOKENS_PER_IMAGE
+
+
+class _FakeCompletions:
+    """chat.completions asíncrono que cuenta las llamadas simultáneas."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def create(self, timeout=None, **request):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        url = request["messages"][0]["content"][2]["image_url"]["url"]
+        message = SimpleNamespace(content=json.dumps({"url": url}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def _client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def _job(i):
+    return [{"position": "center", "source": f"https://example.com/vista{i}.jpg"}]
+
+
+def test_estimate_counts_text_images_and_output():
+    assert estimate_request_tokens("a" * 400, n_images=2, max_tokens=100) == 100 + 2 * TOKENS_PER_IMAGE + 100
+
+
+def test_budget_waits_for_tokens_to_refill():
+    async def run():
+        budget = RateBudget(tokens_per_minute=6000)  # 100 tokens/s
+        await budget.acquire(6000)
+        started = time.monotonic()
+        await budget.acquire(10)
+        return time.monotonic() - started
+    assert 0.05 < asyncio.run(run()) < 1.0
+
+
+def test_batch_bounds_concurrency_and_keeps_job_order(llm_cache):
+    completions = _FakeCompletions()
+    results = analyze_images_batch_sync([_job(i) for i in range(8)], max_concurrency=3, preprocess=False,
+                                        async_client=_client(completions))
+    assert [result["index"] for result in results] == list(range(8))
+    assert all(result["error"] is None for result in results)
+    assert [json.loads(result["response"])["url"] for result in results] == \
+        [f"https://example.com/vista{i}.jpg" for i in range(8)]
+    assert completions.calls == 8
+    assert completions.max_active == 3
+
+
+def test_batch_reuses_cache_and_coalesces_identical_jobs(llm_cache):
+    completions = _FakeCompletions()
+    client = _client(completions)
+    first = analyze_images_batch_sync([_job(0), _job(0), _job(1)], preprocess=False, async_client=client)
+    assert completions.calls == 2
+    assert sum(result["coalesced"] for result in first) == 1
+
+    again = analyze_images_batch_sync([_job(0), _job(1)], preprocess=False, async_client=client)
+    assert completions.calls == 2
+    assert all(result["cached"] for result in again)
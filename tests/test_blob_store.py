@@ -0,0 +1,54 @@
+# tests/test_blob_store.py
+import base64
+import hashlib
+
+import pytest
+
+from api.response_cache import image_digest
+from mapping import blob_store
+from mapping.blob_store import BlobStore, externalize_images, image_for_display, resolve_image_source
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+JPEG_URI = "data:image/jpeg;base64," + base64.b64encode(b"\xff\xd8\xff" + b"\x01" * 32).decode()
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "_default_store", store)
+    return store
+
+
+def test_same_content_is_stored_once(store):
+    ref = store.put(PNG)
+    assert ref == "blob:" + hashlib.sha256(PNG).hexdigest()
+    assert store.put(PNG) == ref
+    assert store.stats() == {"entries": 1, "bytes": len(PNG), "writes": 1, "dedup_hits": 1}
+    assert store.read(ref) == PNG
+
+
+def test_data_uri_round_trip_keeps_mime_and_cache_key(store):
+    ref = store.put_source(JPEG_URI)
+    assert store.contains(ref)
+    assert store.data_uri(ref) == JPEG_URI
+    # La referencia da la misma clave de caché que la imagen original
+    assert image_digest(ref) == image_digest(JPEG_URI)
+    assert store.data_uri(store.put(PNG)).startswith("data:image/png;base64,")
+
+
+def test_urls_refs_and_invalid_sources_are_left_as_is(store):
+    ref = store.put(PNG)
+    for source in ("https://example.com/a.jpg", ref, "no es base64!", None):
+        assert store.put_source(source) == source
+
+
+def test_session_helpers_use_references(store):
+    images = externalize_images({"center": JPEG_URI, "left": None})
+    assert images["left"] is None
+    assert images["center"].startswith("blob:")
+    assert resolve_image_source(images["center"]) == JPEG_URI
+    assert image_for_display(images["center"]) == base64.b64decode(JPEG_URI.split(",", 1)[1])
+    missing = "blob:" + "0" * 64
+    assert resolve_image_source(missing) is None
+    with pytest.raises(KeyError):
+        store.read(missing)
@@ -0,0 +1,88 @@
+# tests/test_cascade.py
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from api import gpt_client, transport
+from api.cascade import get_cascade_stats
+from api.resilience import LLMBadRequestError
+from utils.response_validation import validate_navigation_response
+
+IMAGE = [{"position": "center", "source": "https://example.com/pasillo.jpg"}]
+
+GOOD = json.dumps({
+    "overall_scene_description": "Pasillo largo con una puerta de madera al fondo",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Pasillo"},
+    "identified_objects": [{"name": "puerta"}],
+    "potential_navigation_paths": [{"description": "Seguir recto"}],
+    "obstacles": [],
+    "robot_perspective_and_potential_actions": ["move_forward"],
+    "navigation_graph_elements": [],
+    "reasoning": "La puerta está libre",
+    "obstacle_avoidance_strategy": "Ninguna",
+    "process_step": "explorar",
+})
+VAGUE = json.dumps({"overall_scene_description": "Pasillo", "landmarks_and_suggested_node_name": {}})
+
+
+class _ModelTransport:
+    """Transporte falso: cada modelo responde con un texto fijo (o una excepción)."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.models = []
+
+    def chat_completion(self, timeout=None, **request):
+        self.models.append(request["model"])
+        answer = self.answers[request["model"]]
+        if isinstance(answer, Exception):
+            raise answer
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))], usage=None)
+
+
+@pytest.fixture
+def models(llm_cache, monkeypatch):
+    def install(answers):
+        fake = _ModelTransport(answers)
+        monkeypatch.setattr(transport, "_transport", fake)
+        return fake
+    get_cascade_stats().clear()
+    yield install
+    get_cascade_stats().clear()
+
+
+def test_validation_flags_vague_responses():
+    assert validate_navigation_response(GOOD)["confident"]
+    result = validate_navigation_response(VAGUE)
+    assert not result["valid"] and not result["confident"]
+    assert {"missing_node_name", "short_description", "empty_paths", "empty_actions"} <= set(result["issues"])
+
+
+def test_cheap_model_answer_is_kept_when_confident(models):
+    fake = models({"gpt-4o-mini": GOOD, "gpt-4o": GOOD})
+    assert gpt_client.analyze_image_with_gpt(IMAGE, preprocess=False, cascade=True) == GOOD
+    assert fake.models == ["gpt-4o-mini"]
+    assert gpt_client.get_last_cascade_report()["model"] == "gpt-4o-mini"
+
+
+def test_vague_or_failed_cheap_answer_escalates(models):
+    fake = models({"gpt-4o-mini": VAGUE, "gpt-4o": GOOD})
+    assert gpt_client.analyze_image_with_gpt(IMAGE, preprocess=False, cascade=True) == GOOD
+    assert fake.models == ["gpt-4o-mini", "gpt-4o"]
+    tiers = gpt_client.get_last_cascade_report()["tiers"]
+    assert [tier["accepted"] for tier in tiers] == [False, True]
+    assert "empty_paths" in tiers[0]["issues"]
+
+    fake = models({"gpt-4o-mini": LLMBadRequestError("petición rechazada"), "gpt-4o": GOOD})
+    assert gpt_client.analyze_image_with_gpt(IMAGE, "Otro prompt", preprocess=False, cascade=True) == GOOD
+    assert fake.models[-1] == "gpt-4o"
+    summary = get_cascade_stats().summary()
+    assert summary["gpt-4o-mini"]["escalated"] == 2
+    assert summary["gpt-4o"]["accepted"] == 2
+
+
+def test_last_tier_is_accepted_even_if_vague(models):
+    models({"gpt-4o-mini": VAGUE, "gpt-4o": VAGUE})
+    assert gpt_client.analyze_image_with_gpt(IMAGE, preprocess=False, cascade=True) == VAGUE
+    assert gpt_client.get_last_cascade_report()["model"] == "gpt-4o"
@@ -0,0 +1,113 @@
+# tests/test_csr_graph.py
+import random
+
+import networkx as nx
+import pytest
+
+from mapping.csr_graph import CSRGraph
+from mapping.graph_manager import add_edge_to_graph, add_node_to_graph, initialize_graph
+
+
+def _random_pair(n_nodes=120, n_edges=400, compact_every=16, seed=3):
+    """El mismo grafo aleatorio en networkx y en CSR, con compactaciones a mitad de construcción."""
+    rng = random.Random(seed)
+    reference, csr = nx.DiGraph(), CSRGraph(compact_every=compact_every)
+    for i in range(n_nodes):
+        reference.add_node(f"n{i}", index=i)
+        csr.add_node(f"n{i}", index=i)
+    for _ in range(n_edges):
+        u, v = f"n{rng.randrange(n_nodes)}", f"n{rng.randrange(n_nodes)}"
+        action = rng.choice(["move_forward", "turn_left", "open_door"])
+        reference.add_edge(u, v, action=action)
+        csr.add_edge(u, v, action=action)
+    return reference, csr
+
+
+def _assert_same_adjacency(reference, csr):
+    assert csr.number_of_edges() == reference.number_of_edges()
+    assert set(csr.edges()) == set(reference.edges())
+    for node in reference:
+        assert sorted(csr.succ[node]) == sorted(reference.succ[node])
+        assert sorted(csr.pred[node]) == sorted(reference.pred[node])
+        assert csr.out_degree(node) == reference.out_degree(node)
+    for u, v, data in reference.edges(data=True):
+        assert csr.get_edge_data(u, v) == data
+
+
+def test_adjacency_matches_networkx_before_and_after_compaction():
+    reference, csr = _random_pair()
+    assert csr.compactions > 0 and csr._pending  # parte compactada y parte en el búfer
+    _assert_same_adjacency(reference, csr)
+    csr.compact()
+    assert not csr._pending
+    _assert_same_adjacency(reference, csr)
+
+
+def test_repeated_edge_updates_its_action_in_either_state():
+    csr = CSRGraph(compact_every=1000)
+    csr.add_edge("a", "b", action="move_forward")
+    csr.add_edge("a", "b", action="open_door")
+    assert csr.get_edge_data("a", "b") == {"action": "open_door"}
+    csr.compact()
+    csr.add_edge("a", "b", action="turn_left")
+    assert csr.number_of_edges() == 1
+    assert csr.get_edge_data("a", "b") == {"action": "turn_left"}
+
+
+def test_bfs_parents_and_distances_match_networkx():
+    reference, csr = _random_pair()
+    for source in ("n0", "n7", "n42"):
+        expected = nx.single_source_shortest_path_length(reference, source)
+        distances = csr.bfs_distances(source)
+        assert {csr._labels[i]: int(d) for i, d in enumerate(distances) if d >= 0} == expected
+        parents = csr.bfs_parents(source)
+        for i, parent in enumerate(parents.tolist()):
+            node = csr._labels[i]
+            if node == source:
+                assert parent == i
+            elif node in expected:
+                # El padre está un nivel antes y tiene arista hacia el nodo
+                assert reference.has_edge(csr._labels[parent], node)
+                assert expected[csr._labels[parent]] == expected[node] - 1
+            else:
+                assert parent == -1
+
+
+def test_shortest_path_matches_networkx_lengths():
+    reference, csr = _random_pair(seed=11)
+    rng = random.Random(5)
+    for _ in range(50):
+        source, target = f"n{rng.randrange(120)}", f"n{rng.randrange(120)}"
+        if nx.has_path(reference, source, target):
+            path = csr.shortest_path(source, target)
+            assert len(path) == nx.shortest_path_length(reference, source, target) + 1
+            assert all(reference.has_edge(u, v) for u, v in zip(path, path[1:]))
+        else:
+            assert not csr.has_path(source, target)
+            with pytest.raises(nx.NetworkXNoPath):
+                csr.shortest_path(source, target)
+    with pytest.raises(nx.NodeNotFound):
+        csr.shortest_path("n0", "desconocido")
+
+
+def test_node_attributes_and_round_trip():
+    reference, csr = _random_pair(n_nodes=20, n_edges=40)
+    csr.nodes["n3"]["description"] = "Cocina"
+    del csr.nodes["n4"]["index"]
+    assert dict(csr.nodes["n3"]) == {"index": 3, "description": "Cocina"}
+    assert "index" not in csr.nodes["n4"]
+    back = csr.to_networkx()
+    assert back.nodes["n3"] == {"index": 3, "description": "Cocina"}
+    assert set(back.edges(data="action")) == set(reference.edges(data="action"))
+    again = CSRGraph.from_networkx(back)
+    assert set(again.edges(data="action")) == set(reference.edges(data="action"))
+
+
+def test_graph_manager_works_on_the_csr_backend():
+    graph = initialize_graph(backend="csr")
+    add_node_to_graph(graph, "entrada", {"description": "Entrada"})
+    add_edge_to_graph(graph, "entrada", "pasillo", "move_forward")
+    add_edge_to_graph(graph, "pasillo", "cocina", "move_forward")
+    assert isinstance(graph, CSRGraph)
+    assert nx.shortest_path(graph, "entrada", "cocina") == ["entrada", "pasillo", "cocina"]
+    assert graph.shortest_path("entrada", "cocina") == ["entrada", "pasillo", "cocina"]
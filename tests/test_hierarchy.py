@@ -0,0 +1,113 @@
+# tests/test_hierarchy.py
+import networkx as nx
+import pytest
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph, update_node_data
+from mapping.graph_manager import attach_journal
+from mapping.hierarchy import MapHierarchy, get_hierarchy
+from mapping.observation import Observation
+
+
+def _view(graph, node, *objects):
+    add_node_to_graph(graph, node, {
+        "description": node,
+        "observation": Observation.from_json({"identified_objects": [{"name": name} for name in objects]}),
+    })
+
+
+def _link(graph, u, v):
+    add_edge_to_graph(graph, u, v, "move_forward")
+    add_edge_to_graph(graph, v, u, "move_backward")
+
+
+@pytest.fixture
+def house():
+    """Cocina (3 vistas) -> pasillo (2) -> dormitorio (3), y un trastero aislado."""
+    graph = initialize_graph()
+    for i in range(3):
+        _view(graph, f"cocina{i}", "nevera", "horno", "fregadero")
+    for i in range(2):
+        _view(graph, f"pasillo{i}", "cuadro", "alfombra")
+    for i in range(3):
+        _view(graph, f"dormitorio{i}", "cama", "armario", "lampara")
+    _view(graph, "trastero", "caja")
+    chain = [f"cocina{i}" for i in range(3)] + [f"pasillo{i}" for i in range(2)] + [f"dormitorio{i}" for i in range(3)]
+    for u, v in zip(chain, chain[1:]):
+        _link(graph, u, v)
+    return graph
+
+
+def test_similar_connected_views_share_a_room(house):
+    hierarchy = get_hierarchy(house)
+    hierarchy.refresh()
+    room_of = hierarchy.room_of
+    assert room_of["cocina0"] == room_of["cocina1"] == room_of["cocina2"]
+    assert room_of["dormitorio0"] == room_of["dormitorio2"]
+    assert len({room_of["cocina0"], room_of["pasillo0"], room_of["dormitorio0"]}) == 3
+    assert hierarchy.portals(room_of["cocina2"], room_of["pasillo0"]) == {("cocina2", "pasillo0")}
+
+
+def test_shortest_path_matches_networkx(house):
+    hierarchy = get_hierarchy(house)
+    for source, target in [("cocina0", "dormitorio2"), ("dormitorio1", "cocina1"), ("pasillo0", "pasillo0")]:
+        assert hierarchy.shortest_path(source, target) == nx.shortest_path(house, source, target)
+
+
+def test_no_path_and_missing_node(house):
+    hierarchy = get_hierarchy(house)
+    with pytest.raises(nx.NetworkXNoPath):
+        hierarchy.shortest_path("cocina0", "trastero")
+    with pytest.raises(nx.NodeNotFound):
+        hierarchy.shortest_path("cocina0", "garaje")
+
+
+def test_follows_mutations_incrementally(house):
+    hierarchy = get_hierarchy(house)
+    with pytest.raises(nx.NetworkXNoPath):
+        hierarchy.shortest_path("cocina0", "trastero")
+    nodes_before = hierarchy.stats()["nodes"]
+    _link(house, "dormitorio2", "trastero")
+    assert hierarchy.shortest_path("cocina0", "trastero")[-2:] == ["dormitorio2", "trastero"]
+    _view(house, "terraza", "planta")
+    _link(house, "trastero", "terraza")
+    assert hierarchy.stats()["nodes"] == nodes_before + 1
+    assert "terraza" in hierarchy.room_of
+
+
+def test_room_label_follows_node_updates(house):
+    hierarchy = get_hierarchy(house)
+    hierarchy.refresh()
+    room = hierarchy.room_of["trastero"]
+    assert hierarchy.room_label(room) == "caja"
+    observation = Observation.from_json({"identified_objects": [{"name": "bicicleta"}] * 3})
+    update_node_data(house, "trastero", {"observation": observation})
+    assert hierarchy.room_label(room) == "bicicleta"
+
+
+def test_reanalysis_replaces_node_terms(house):
+    hierarchy = get_hierarchy(house)
+    hierarchy.refresh()
+    room = hierarchy.rooms[hierarchy.room_of["trastero"]]
+    for objects in (["bicicleta"], ["bicicleta", "rueda"], ["maleta"]):
+        observation = Observation.from_json({"identified_objects": [{"name": name} for name in objects]})
+        update_node_data(house, "trastero", {"observation": observation})
+    assert dict(room.terms) == {"maleta": 1}
+    assert hierarchy._df["maleta"] == 1
+    assert "caja" not in hierarchy._df and "bicicleta" not in hierarchy._df and "rueda" not in hierarchy._df
+    assert hierarchy._df["nevera"] == 3
+
+
+def test_room_path_stays_in_the_zones_of_the_zone_path():
+    # Una habitación por nodo y zonas de dos: s, r1 | r2, t | u | x. La ruta de zonas de
+    # s a t es directa, así que el atajo s -> x -> t (otra zona) no entra en la ruta de habitaciones
+    graph = initialize_graph()
+    hierarchy = MapHierarchy(graph, max_room_size=1, max_zone_size=2)
+    attach_journal(graph, hierarchy, name="hierarchy")
+    for node in ("s", "r1", "r2", "t", "u", "x"):
+        add_node_to_graph(graph, node, {})
+    for u, v in [("s", "r1"), ("r1", "r2"), ("r2", "t"), ("t", "u"), ("s", "x"), ("x", "t")]:
+        add_edge_to_graph(graph, u, v, "move_forward")
+    rooms = hierarchy.room_path("s", "t")
+    assert [next(iter(hierarchy.rooms[room].members)) for room in rooms] == ["s", "r1", "r2", "t"]
+    assert len({hierarchy.rooms[room].zone for room in rooms}) == 2
+    assert hierarchy.fallbacks == 0
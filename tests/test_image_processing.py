@@ -0,0 +1,63 @@
+# tests/test_image_processing.py
+import base64
+import io
+
+from PIL import Image
+
+from utils.image_processing import (
+    choose_detail, decode_image_source, estimate_image_tokens, preprocess_image_bytes, preprocess_image_inputs,
+)
+
+
+def _png(size, color=(120, 80, 40)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _noisy_jpeg(size):
+    image = Image.effect_noise(size, 80).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def test_token_estimate_follows_tile_rules():
+    assert estimate_image_tokens(4000, 3000, detail="low") == 85
+    assert estimate_image_tokens(512, 512) == 85 + 170
+    assert estimate_image_tokens(2048, 2048) == 85 + 170 * 4  # encajada a 768x768
+
+
+def test_large_image_is_downscaled_and_reencoded():
+    data_uri, detail, report = preprocess_image_bytes(_png((3000, 2000)))
+    assert data_uri.startswith("data:image/jpeg;base64,")
+    image = Image.open(io.BytesIO(base64.b64decode(data_uri.split(",", 1)[1])))
+    assert max(image.size) == 1024
+    assert report["processed_size"] == image.size
+    assert report["bytes_saved"] > 0 and report["tokens_saved"] > 0
+
+
+def test_small_jpeg_is_returned_unchanged():
+    raw = _noisy_jpeg((300, 200))
+    data_uri, detail, report = preprocess_image_bytes(raw)
+    assert base64.b64decode(data_uri.split(",", 1)[1]) == raw
+    assert detail == "low"
+    assert report["bytes_saved"] == 0
+
+
+def test_flat_scene_gets_low_detail():
+    assert choose_detail(Image.new("RGB", (1600, 1200), (200, 200, 200))) == "low"
+    assert choose_detail(Image.effect_noise((1600, 1200), 80)) == "high"
+
+
+def test_inputs_keep_urls_and_report_per_position():
+    raw = _png((2000, 1000))
+    inputs = [
+        {"position": "left", "source": "https://example.com/a.jpg"},
+        {"position": "center", "source": "data:image/png;base64," + base64.b64encode(raw).decode()},
+    ]
+    new_inputs, report = preprocess_image_inputs(inputs)
+    assert new_inputs[0] == dict(inputs[0], detail="auto")
+    assert new_inputs[1]["source"].startswith("data:image/jpeg")
+    assert list(report["images"]) == ["center"]
+    assert decode_image_source(inputs[0]["source"]) is None
@@ -0,0 +1,74 @@
+# tests/test_json_repair.py
+import pytest
+
+from utils.json_repair import repair_json, FIXES
+
+
+def test_valid_json_needs_no_fixes():
+    assert repair_json('{"a": [1, 2.5, "x"], "b": null}') == ({"a": [1, 2.5, "x"], "b": None}, [])
+
+
+@pytest.mark.parametrize("text, expected, fix", [
+    ('Aquí tienes:\n```json\n{"a": 1}\n```', {"a": 1}, "stripped_prefix"),
+    ('{"a": 1} espero que sirva', {"a": 1}, "stripped_suffix"),
+    ('{"a": 1, // comentario\n "b": 2}', {"a": 1, "b": 2}, "removed_comments"),
+    ("{'a': 'b'}", {"a": "b"}, "single_quotes"),
+    ('{"a": "la "gran" puerta"}', {"a": 'la "gran" puerta'}, "escaped_inner_quotes"),
+    ('{"a": "dos\nlíneas"}', {"a": "dos\nlíneas"}, "escaped_control_chars"),
+    ('{"a": True, "b": None}', {"a": True, "b": None}, "python_literals"),
+    ('{a: 1}', {"a": 1}, "unquoted_keys"),
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}, "trailing_commas"),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}, "missing_commas"),
+    ('{"a" 1}', {"a": 1}, "missing_colons"),
+])
+def test_single_defect_is_repaired_and_reported(text, expected, fix):
+    parsed, fixes = repair_json(text)
+    assert parsed == expected
+    assert fix in fixes
+
+
+def test_truncated_response_keeps_complete_fields():
+    parsed, fixes = repair_json('{"name": "Pasillo", "objects": [{"name": "puerta"}, {"name": "cu')
+    assert parsed["name"] == "Pasillo"
+    assert parsed["objects"][0] == {"name": "puerta"}
+    assert "closed_brackets" in fixes
+
+
+def test_truncated_after_key_drops_it():
+    parsed, fixes = repair_json('{"a": 1, "b":')
+    assert parsed == {"a": 1}
+    assert "dropped_incomplete" in fixes
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": tru', {"a": 1}),
+    ('{"a": 1, "b": Fals', {"a": 1}),
+    ('{"a": 1, "b": [nu', {"a": 1, "b": []}),
+])
+def test_truncated_literal_is_dropped_not_quoted(text, expected):
+    parsed, fixes = repair_json(text)
+    assert parsed == expected
+    assert "dropped_incomplete" in fixes
+    assert "unquoted_strings" not in fixes
+
+
+def test_empty_value_drops_only_that_key():
+    parsed, fixes = repair_json('{"a": , "b": 1}')
+    assert parsed == {"b": 1}
+    assert "dropped_incomplete" in fixes
+
+
+def test_hash_is_not_a_comment():
+    parsed, fixes = repair_json('{"a": 1, "b": #2, "c": 3}')
+    assert parsed == {"a": 1, "b": 2, "c": 3}
+    assert "removed_comments" not in fixes
+
+
+def test_fixes_follow_declared_order():
+    _, fixes = repair_json("texto {'a': True, b: [1,],")
+    assert fixes == [fix for fix in FIXES if fix in fixes]
+
+
+@pytest.mark.parametrize("text", ["", "sin llaves", None])
+def test_nothing_to_recover(text):
+    assert repair_json(text) == (None, [])
@@ -0,0 +1,67 @@
+# tests/test_layout.py
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph
+from mapping.layout import get_layout
+from mapping.map_store import open_map_store
+from mapping.session_store import SessionStore
+
+
+def _explore(graph, count):
+    for i in range(count):
+        add_node_to_graph(graph, f"Vista_{i}", {"description": f"Vista {i}"})
+        if i:
+            add_edge_to_graph(graph, f"Vista_{i // 2}", f"Vista_{i}", "move_forward")
+
+
+def _positions(graph):
+    return {node: (data["x"], data["y"]) for node, data in graph.nodes(data=True)}
+
+
+def test_update_places_new_nodes_and_moves_only_their_surroundings():
+    graph = initialize_graph()
+    _explore(graph, 200)
+    layout = get_layout(graph)
+    assert layout.update()["placed"] == 200
+    before = _positions(graph)
+    add_node_to_graph(graph, "Nueva", {})
+    add_edge_to_graph(graph, "Vista_150", "Nueva", "move_forward")
+    result = layout.update()
+    assert result["placed"] == 1
+    assert result["moved"] < 10
+    after = _positions(graph)
+    assert sum(before[node] != after[node] for node in before) < 10
+    assert layout.update() == {"placed": 0, "moved": 0, "ms": layout.last_update["ms"]}
+
+
+def test_reopened_sqlite_map_keeps_positions(tmp_path):
+    store = open_map_store("mapa", str(tmp_path))
+    graph = initialize_graph()
+    store.attach(graph)
+    _explore(graph, 50)
+    get_layout(graph).update()
+    add_node_to_graph(graph, "Nueva", {})
+    add_edge_to_graph(graph, "Vista_10", "Nueva", "move_forward")
+    get_layout(graph).update()
+
+    reopened = store.load_graph()
+    assert _positions(reopened) == _positions(graph)
+    result = get_layout(reopened).update()
+    assert (result["placed"], result["moved"]) == (51, 0)
+
+
+def test_session_journal_keeps_last_positions(tmp_path):
+    session = SessionStore(str(tmp_path))
+    graph = initialize_graph()
+    _explore(graph, 30)
+    session.save({}, graph)  # instantánea sin posiciones
+    layout = get_layout(graph)
+    layout.update()
+    add_node_to_graph(graph, "Nueva", {})
+    add_edge_to_graph(graph, "Vista_3", "Nueva", "move_forward")
+    layout.update()
+    result = session.save({}, graph)
+    assert result["mode"] == "append"
+    assert result["records"] == 3  # nodo, arista y una sola entrada con las posiciones
+
+    loaded = SessionStore(str(tmp_path)).load()["graph"]
+    assert _positions(loaded) == _positions(graph)
+    assert get_layout(loaded).update()["moved"] == 0
@@ -0,0 +1,110 @@
+# tests/test_map_store.py
+import sqlite3
+
+import pytest
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph, update_node_data
+from mapping.map_store import open_map_store, list_maps, new_map_id
+from mapping.observation import Observation
+
+
+def _observation(*objects):
+    return Observation.from_json({"identified_objects": [{"name": name} for name in objects]})
+
+
+def test_write_through_round_trip(tmp_path):
+    store = open_map_store("mapa_a", str(tmp_path))
+    graph = initialize_graph()
+    store.attach(graph)
+    add_node_to_graph(graph, "Cocina", {"description": "cocina", "timestamp": 1.0,
+                                        "observation": _observation("nevera plateada")})
+    add_node_to_graph(graph, "Pasillo", {"description": "pasillo", "timestamp": 2.0})
+    add_edge_to_graph(graph, "Cocina", "Pasillo", "move_forward")
+    update_node_data(graph, "Pasillo", {"notes": "puerta al fondo"})
+    store.record_action("move_forward", "Cocina")
+
+    loaded = store.load_graph()
+    assert list(loaded.edges(data="action")) == [("Cocina", "Pasillo", "move_forward")]
+    assert loaded.nodes["Pasillo"]["notes"] == "puerta al fondo"
+    assert loaded.nodes["Cocina"]["observation"].objects[0].name == "nevera plateada"
+    assert store.successors("Cocina") == [("Pasillo", "move_forward")]
+    assert store.nodes_with_object("Nevera Plateada") == ["Cocina"]
+    assert store.nodes_between(1.5, 3.0) == ["Pasillo"]
+    assert store.actions() == ["move_forward"]
+
+
+def test_maps_are_isolated_per_id(tmp_path):
+    first = open_map_store("mapa_a", str(tmp_path))
+    second = open_map_store("mapa_b", str(tmp_path))
+    assert first is not second
+    assert open_map_store("mapa_a", str(tmp_path)) is first
+    graph_a, graph_b = initialize_graph(), initialize_graph()
+    first.attach(graph_a)
+    second.attach(graph_b)
+    add_node_to_graph(graph_a, "Cocina", {})
+    add_node_to_graph(graph_b, "Garaje", {})
+    # Reiniciar un mapa no toca el otro
+    second.replace_graph(initialize_graph())
+    assert list(first.load_graph().nodes()) == ["Cocina"]
+    assert second.number_of_nodes() == 0
+
+
+def test_list_maps_skips_empty_maps(tmp_path):
+    graph = initialize_graph()
+    open_map_store("mapa_con_nodos", str(tmp_path)).attach(graph)
+    add_node_to_graph(graph, "Cocina", {})
+    open_map_store("mapa_vacio", str(tmp_path))
+    assert [(map_id, nodes) for map_id, nodes, _ in list_maps(str(tmp_path))] == [("mapa_con_nodos", 1)]
+
+
+def test_map_ids_are_validated(tmp_path):
+    assert new_map_id() != new_map_id()
+    with pytest.raises(ValueError):
+        open_map_store("../fuera", str(tmp_path))
+
+
+def test_no_directory_means_in_memory(monkeypatch):
+    monkeypatch.setenv("MAP_DIR", "")
+    assert open_map_store("mapa_a") is None
+    assert list_maps() == []
+
+
+class _FailingConnection:
+    """Conexión que falla al escribir mientras ``failing`` sea True (disco lleno, bloqueo...)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.failing = True
+
+    def cursor(self):
+        if self.failing:
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.cursor()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_write_errors_do_not_escape_mutators(tmp_path):
+    store = open_map_store("mapa_a", str(tmp_path))
+    graph = initialize_graph()
+    store.attach(graph)
+    add_node_to_graph(graph, "Cocina", {})
+    store.record_action("turn_left", "Cocina")
+
+    real_conn = store._conn
+    store._conn = failing = _FailingConnection(real_conn)
+    add_node_to_graph(graph, "Pasillo", {})
+    add_edge_to_graph(graph, "Cocina", "Pasillo", "move_forward")
+    store.record_action("move_forward", "Cocina")
+    assert "Pasillo" in graph and store.dirty
+    assert isinstance(store.last_error, sqlite3.OperationalError)
+    assert not store.resync(force=True)
+
+    failing.failing = False
+    store._next_resync = 0.0
+    add_node_to_graph(graph, "Salon", {})  # el siguiente cambio reescribe el mapa entero
+    assert not store.dirty
+    assert sorted(store.load_graph().nodes()) == ["Cocina", "Pasillo", "Salon"]
+    assert store.successors("Cocina") == [("Pasillo", "move_forward")]
+    assert store.actions() == ["turn_left", "move_forward"]
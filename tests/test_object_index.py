@@ -0,0 +1,35 @@
+# tests/test_object_index.py
+from mapping.object_index import ObjectIndex, normalize_words, observation_terms
+from mapping.observation import Observation
+
+
+def _observation(name, detailed="", objects=()):
+    return {
+        "landmarks_and_suggested_node_name": {"suggested_node_name": name, "suggested_node_name_detailed": detailed},
+        "identified_objects": [{"name": item} for item in objects],
+    }
+
+
+def test_normalize_words():
+    assert normalize_words("Sillas de Madera") == ["silla", "madera"]
+    assert normalize_words("Pasillo_Principal") == ["pasillo", "principal"]
+
+
+def test_terms_include_detailed_landmarks_once():
+    terms = observation_terms(Observation.from_json(
+        _observation("Cocina", "Cocina con nevera plateada", ["red door"])))
+    assert terms["nevera"] == terms["plateada"] == 1
+    assert terms["cocina"] == 1
+    assert terms["red door"] == terms["red"] == terms["door"] == 1
+
+
+def test_nodes_sharing_a_detailed_landmark_are_candidates():
+    index = ObjectIndex()
+    index.add("vista_a", _observation("Vista_A", "Estatua de bronce junto a la ventana"))
+    index.add("vista_b", _observation("Vista_B", "Estatua de bronce en la esquina"))
+    index.add("otra", _observation("Otra", "Sofá azul"))
+    for i in range(20):
+        index.add(f"relleno{i}", _observation(f"Relleno{i}", f"mesa {i}"))
+    candidates = index.candidates("vista_a")
+    assert [node for node, _, _ in candidates] == ["vista_b"]
+    assert {"estatua", "bronce"} <= set(candidates[0][2])
@@ -0,0 +1,53 @@
+# tests/test_observation.py
+from mapping import graph_manager
+from mapping.graph_manager import (
+    add_node_to_graph, get_node_observation, graph_from_node_link, graph_to_node_link,
+    graph_version, initialize_graph, update_node_data,
+)
+from mapping.observation import Observation
+
+LLM_JSON = {
+    "overall_scene_description": "Cocina luminosa",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Cocina"},
+    "identified_objects": [{"name": "nevera"}],
+}
+
+
+def test_round_trip_through_json():
+    observation = Observation.from_json(LLM_JSON)
+    assert Observation.from_json(observation.to_json()) == observation
+    assert observation.node_name == "Cocina"
+    assert observation.object_names == ("nevera",)
+
+
+def test_reading_an_old_node_does_not_modify_it():
+    graph = initialize_graph()
+    graph.add_node("cocina", llm_json=LLM_JSON)  # añadido sin los mutadores
+    version = graph_version(graph)
+    assert get_node_observation(graph, "cocina").node_name == "Cocina"
+    assert graph_manager.convert_nx_to_agraph(graph)
+    assert graph.nodes["cocina"] == {"llm_json": LLM_JSON}
+    assert graph_version(graph) == version
+
+
+def test_mutators_convert_and_journal_the_observation():
+    graph = initialize_graph()
+    journal = []
+    graph_manager.attach_journal(graph, journal)
+    add_node_to_graph(graph, "cocina", {"llm_json": LLM_JSON})
+    update_node_data(graph, "cocina", {"llm_json": dict(LLM_JSON, overall_scene_description="Otra")})
+    data = graph.nodes["cocina"]
+    assert "llm_json" not in data
+    assert data["observation"].description == "Otra"
+    assert [entry[0] for entry in journal] == ["add_node", "update_node"]
+    assert all(isinstance(entry[2].get("observation"), Observation) for entry in journal)
+
+
+def test_loading_an_old_state_converts_once():
+    graph = initialize_graph()
+    add_node_to_graph(graph, "cocina", {"observation": Observation.from_json(LLM_JSON)})
+    saved = graph_to_node_link(graph)
+    assert saved["nodes"][0]["llm_json"]
+    loaded = graph_from_node_link(saved)
+    assert loaded.nodes["cocina"]["observation"] == graph.nodes["cocina"]["observation"]
+    assert "llm_json" in saved["nodes"][0]  # el estado de entrada no se toca
@@ -0,0 +1,70 @@
+# tests/test_parsing_llm_response.py
+from benchmarks.parse_raw_text import SCHEMA_FIELDS, legacy_parse_raw_text_to_json, synthetic_corpus
+from utils.parsing_llm_response import parse_raw_text_to_json
+
+TEXT = """Aquí está el análisis:
+
+**1. Overall Scene Description:** Cocina amplia con luz natural.
+
+**2. Identified Objects:**
+- **Nevera**: plateada, a la izquierda
+- **Mesa:** de madera,
+  con cuatro sillas
+- Ventana grande
+
+**3. Potential Navigation Paths (if any):**
+1. **Puerta del fondo**: abierta
+
+**5. Landmarks & Suggested Node Name:**
+- Nevera junto a la ventana
+- **Suggested Node Name:** "Cocina_Nevera"
+
+**6. Robot's Perspective and Potential Actions:**
+- **Avanzar**: dos metros
+- Girar a la izquierda
+
+**7. Navigation Graph Elements:**
+- **Pasillo**: move_backward
+
+**8. Reasoning:**
+La puerta está abierta.
+
+**10. Notas extra:**
+Se ignora.
+"""
+
+
+def test_parses_every_schema_field():
+    parsed = parse_raw_text_to_json(TEXT)
+    assert tuple(parsed) == SCHEMA_FIELDS
+    assert parsed["overall_scene_description"] == "Cocina amplia con luz natural."
+    assert parsed["identified_objects"] == [
+        {"name": "Nevera", "characteristics": "plateada, a la izquierda"},
+        {"name": "Mesa", "characteristics": "de madera,\n  con cuatro sillas"},
+        {"name": "Ventana grande", "characteristics": ""},
+    ]
+    assert parsed["potential_navigation_paths"] == [
+        {"description": "Puerta del fondo", "direction": "", "features": "abierta"}]
+    assert parsed["obstacles"] == []
+    assert parsed["landmarks_and_suggested_node_name"] == {
+        "suggested_node_name": "Cocina_Nevera", "suggested_node_name_detailed": "Nevera junto a la ventana"}
+    assert parsed["robot_perspective_and_potential_actions"] == ["**Avanzar**: dos metros", "Girar a la izquierda"]
+    assert parsed["navigation_graph_elements"] == [{"target_node": "Pasillo", "action": "move_backward"}]
+    assert parsed["reasoning"] == "La puerta está abierta."
+    assert parsed["obstacle_avoidance_strategy"] == ""
+
+
+def test_matches_the_previous_parser_on_the_fields_it_filled():
+    shared = ("overall_scene_description", "identified_objects", "potential_navigation_paths", "obstacles",
+              "robot_perspective_and_potential_actions")
+    for text in synthetic_corpus(50):
+        new, old = parse_raw_text_to_json(text), legacy_parse_raw_text_to_json(text)
+        assert {field: new[field] for field in shared} == {field: old[field] for field in shared}
+        assert new["landmarks_and_suggested_node_name"]["suggested_node_name"] == \
+            old["landmarks_and_suggested_node_name"]["suggested_node_name"]
+
+
+def test_text_without_sections_gives_empty_fields():
+    parsed = parse_raw_text_to_json("Lo siento, no puedo analizar la imagen.")
+    assert parsed["overall_scene_description"] == ""
+    assert parsed["identified_objects"] == []
@@ -0,0 +1,87 @@
+# tests/test_path_service.py
+import random
+
+import networkx as nx
+import pytest
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph, graph_version
+from navigation.path_service import get_path_service, clear_path_cache
+
+
+def _graph(edges):
+    graph = initialize_graph()
+    for u, v in edges:
+        for node in (u, v):
+            if node not in graph:
+                add_node_to_graph(graph, node, {"description": node})
+        add_edge_to_graph(graph, u, v, "move_forward")
+    return graph
+
+
+def test_mutators_bump_version():
+    graph = initialize_graph()
+    version = graph_version(graph)
+    add_node_to_graph(graph, "a", {})
+    add_edge_to_graph(graph, "a", "b", "move_forward")
+    assert graph_version(graph) == version + 2
+
+
+def test_queries_and_errors():
+    graph = _graph([("a", "b"), ("b", "c"), ("c", "d"), ("x", "a")])
+    paths = get_path_service(graph)
+    assert paths.shortest_path("a", "d") == ["a", "b", "c", "d"]
+    assert paths.distance("a", "d") == 3
+    assert paths.has_path("a", "d") and not paths.has_path("d", "a")
+    assert not paths.has_path("a", "falta")
+    with pytest.raises(nx.NetworkXNoPath):
+        paths.shortest_path("a", "x")
+    with pytest.raises(nx.NodeNotFound):
+        paths.shortest_path("a", "falta")
+
+
+def test_repeated_queries_are_cache_hits():
+    graph = _graph([("a", "b"), ("b", "c")])
+    paths = get_path_service(graph)
+    assert not paths.has_tree("a")
+    for _ in range(4):
+        paths.has_path("a", "c")
+    paths.shortest_path("a", "c")
+    assert paths.has_tree("a")
+    assert (paths.stats()["misses"], paths.stats()["hits"]) == (1, 5)
+
+
+def test_added_edges_repair_trees_instead_of_rebuilding():
+    graph = _graph([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")])
+    paths = get_path_service(graph)
+    assert paths.distance("a", "e") == 4
+    add_edge_to_graph(graph, "a", "d", "go_through_door")
+    add_edge_to_graph(graph, "e", "f", "move_forward")
+    assert paths.shortest_path("a", "e") == ["a", "d", "e"]
+    assert paths.shortest_path("a", "f") == ["a", "d", "e", "f"]
+    assert paths.stats()["misses"] == 1
+    assert paths.stats()["version"] == graph_version(graph)
+
+
+def test_matches_networkx_under_random_growth():
+    rng = random.Random(0)
+    graph = _graph([("n0", "n1")])
+    paths = get_path_service(graph)
+    for i in range(2, 120):
+        add_node_to_graph(graph, f"n{i}", {})
+        add_edge_to_graph(graph, f"n{rng.randrange(i)}", f"n{i}", "move_forward")
+        if i % 3 == 0:
+            add_edge_to_graph(graph, f"n{rng.randrange(i)}", f"n{rng.randrange(i)}", "turn_left")
+        for _ in range(3):
+            source, target = f"n{rng.randrange(i + 1)}", f"n{rng.randrange(i + 1)}"
+            expected = nx.has_path(graph, source, target)
+            assert paths.has_path(source, target) == expected
+            if expected:
+                assert paths.distance(source, target) == nx.shortest_path_length(graph, source, target)
+    assert paths.stats()["trees"] <= paths.max_trees
+
+
+def test_clear_path_cache_detaches_service():
+    graph = _graph([("a", "b")])
+    paths = get_path_service(graph)
+    clear_path_cache(graph)
+    assert get_path_service(graph) is not paths
@@ -0,0 +1,96 @@
+# tests/test_place_index.py
+import numpy as np
+import pytest
+
+from mapping.graph_manager import add_node_to_graph, initialize_graph
+from mapping.place_index import PlaceIndex, embed_observation
+
+KITCHEN = {
+    "overall_scene_description": "Cocina con encimera de mármol y ventana grande",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Kitchen_Entrance"},
+    "identified_objects": [{"name": "nevera"}, {"name": "horno"}],
+}
+KITCHEN_AGAIN = {
+    "overall_scene_description": "Cocina con encimera de mármol junto a la ventana",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Kitchen_Door"},
+    "identified_objects": [{"name": "horno"}, {"name": "nevera"}],
+}
+BEDROOM = {
+    "overall_scene_description": "Dormitorio con cama doble y armario",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Bedroom"},
+    "identified_objects": [{"name": "cama"}, {"name": "lámpara"}],
+}
+GARAGE = {
+    "overall_scene_description": "Garaje con coche y estanterías de herramientas",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Garage"},
+    "identified_objects": [{"name": "coche"}],
+}
+
+
+def _index():
+    index = PlaceIndex()
+    index.add("cocina", KITCHEN)
+    index.add("dormitorio", BEDROOM)
+    index.add("garaje", GARAGE)
+    return index
+
+
+def test_same_place_with_another_name_is_matched():
+    index = _index()
+    node_id, score = index.match(KITCHEN_AGAIN)
+    assert node_id == "cocina"
+    assert score >= 0.65
+    assert index.match(KITCHEN_AGAIN, exclude=["cocina"]) is None
+
+
+def test_search_is_sorted_and_batch_matches_single_queries():
+    index = _index()
+    results = index.search(BEDROOM, top_k=3)
+    assert results[0][0] == "dormitorio"
+    assert results[0][1] == max(score for _, score in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    queries = np.stack([index.embed(KITCHEN_AGAIN), index.embed(BEDROOM)])
+    batch = index.search_batch(queries, top_k=3)
+    for got, expected in zip(batch, [index.search(KITCHEN_AGAIN, top_k=3), results]):
+        assert [node_id for node_id, _ in got] == [node_id for node_id, _ in expected]
+        assert [score for _, score in got] == pytest.approx([score for _, score in expected], abs=1e-5)
+
+
+def test_remove_and_replace_keep_the_rows_consistent():
+    index = _index()
+    index.remove("cocina")  # la última fila ocupa el hueco
+    assert "cocina" not in index and len(index) == 2
+    assert index.search(GARAGE, top_k=1)[0][0] == "garaje"
+    assert index.match(KITCHEN_AGAIN) is None
+    index.add("dormitorio", KITCHEN)  # sustitución del vector de un nodo
+    assert len(index) == 2
+    assert index.match(KITCHEN_AGAIN)[0] == "dormitorio"
+    index.remove("desconocido")
+    assert len(index) == 2
+
+
+def test_observations_without_text_are_not_indexed():
+    index = PlaceIndex()
+    index.add("vacío", {})
+    index.add("ninguno", None)
+    assert len(index) == 0
+    assert not embed_observation({}).any()
+    assert index.search(KITCHEN) == []
+
+
+def test_index_grows_past_its_initial_capacity():
+    index = PlaceIndex(dim=64)
+    for i in range(40):
+        index.add(f"n{i}", {"overall_scene_description": f"habitación número{i} sala{i}"})
+    assert len(index) == 40
+    assert index.search({"overall_scene_description": "habitación número17 sala17"}, top_k=1)[0][0] == "n17"
+
+
+def test_from_graph_indexes_every_observation():
+    graph = initialize_graph()
+    add_node_to_graph(graph, "cocina", {"llm_json": KITCHEN})
+    add_node_to_graph(graph, "dormitorio", {"llm_json": BEDROOM})
+    add_node_to_graph(graph, "pasillo", {})
+    index = PlaceIndex.from_graph(graph)
+    assert len(index) == 2
+    assert index.search(KITCHEN_AGAIN, top_k=1)[0][0] == "cocina"
@@ -0,0 +1,65 @@
+# tests/test_planer.py
+import pytest
+
+from mapping.graph_manager import initialize_graph, add_node_to_graph, add_edge_to_graph
+from mapping.hierarchy import get_hierarchy
+from navigation import planer
+from navigation.path_service import get_path_service
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Sustituye la llamada al LLM de texto y guarda los prompts recibidos."""
+    received = []
+
+    def generate_text(prompt):
+        received.append(prompt)
+        return "## Plan de Navegación"
+    monkeypatch.setattr(planer, "generate_text_with_gpt", generate_text)
+    return received
+
+
+def _chain(*nodes):
+    graph = initialize_graph()
+    for node in nodes:
+        add_node_to_graph(graph, node, {"description": node})
+    for u, v in zip(nodes, nodes[1:]):
+        add_edge_to_graph(graph, u, v, "move_forward")
+    return graph
+
+
+def test_plan_after_cached_reachability_check(prompts):
+    # Orden del panel de navegación: comprobaciones has_path antes de generar el plan,
+    # sin que nada haya refrescado la jerarquía
+    graph = _chain("a", "b", "c")
+    assert get_path_service(graph).has_path("a", "c")
+    assert planer.generate_navigation_plan(graph, "a", "c", [], {}) == "## Plan de Navegación"
+    assert "a -> b -> c" in prompts[0]
+
+
+def test_plan_route_comes_from_the_hierarchy(prompts, monkeypatch):
+    graph = _chain("a", "b", "c")
+    get_path_service(graph).has_path("a", "c")
+    hierarchy = get_hierarchy(graph)
+    calls = []
+    shortest_path = hierarchy.shortest_path
+    monkeypatch.setattr(hierarchy, "shortest_path", lambda *args: calls.append(args) or shortest_path(*args))
+    planer.generate_navigation_plan(graph, "a", "c", [], {})
+    assert calls == [("a", "c")]
+
+
+def test_plan_with_nodes_added_after_the_tree(prompts):
+    graph = _chain("a", "b")
+    get_path_service(graph).has_path("a", "b")
+    add_node_to_graph(graph, "c", {"description": "c"})
+    add_edge_to_graph(graph, "b", "c", "move_forward")
+    assert planer.generate_navigation_plan(graph, "a", "c", [], {}) == "## Plan de Navegación"
+    assert "a -> b -> c" in prompts[0]
+
+
+def test_plan_without_path(prompts):
+    graph = _chain("a", "b")
+    add_node_to_graph(graph, "aislado", {})
+    result = planer.generate_navigation_plan(graph, "a", "aislado", [], {})
+    assert result.startswith("No se encontró una ruta")
+    assert not prompts
@@ -0,0 +1,93 @@
+# tests/test_render_graph.py
+from mapping.graph_manager import (
+    add_edge_to_graph, add_node_to_graph, cluster_node_id, convert_nx_to_agraph, convert_nx_to_agraph_lod,
+    get_render_stats, initialize_graph, parse_cluster_id, update_node_data,
+)
+from mapping.hierarchy import get_hierarchy
+
+
+def _chain(n):
+    graph = initialize_graph()
+    for i in range(n):
+        add_node_to_graph(graph, f"n{i}", {"description": f"Vista {i}"})
+    for i in range(n - 1):
+        add_edge_to_graph(graph, f"n{i}", f"n{i + 1}", "move_forward")
+    return graph
+
+
+def _ids(items):
+    return {item.id for item in items}
+
+
+def test_lod_draws_edges_added_without_the_mutators():
+    graph = _chain(6)
+    convert_nx_to_agraph(graph)
+    graph.add_edge("n1", "n0", action="move_backward")  # sin add_edge_to_graph
+    _, edges = convert_nx_to_agraph_lod(graph, focus=["n0"], hops=1)
+    assert ("n1", "n0") in {(edge.source, edge.to) for edge in edges}
+    _, edges = convert_nx_to_agraph(graph)
+    assert len(edges) == graph.number_of_edges()
+
+
+def test_only_dirty_items_are_rebuilt():
+    graph = _chain(50)
+    nodes, edges = convert_nx_to_agraph(graph)
+    assert get_render_stats(graph) == {"cached_nodes": 50, "cached_edges": 49, "rebuilt": 99}
+    again, _ = convert_nx_to_agraph(graph)
+    assert all(new is old for new, old in zip(again[1:], nodes[1:]))  # el primero es una copia superpuesta
+    assert get_render_stats(graph)["rebuilt"] == 0
+
+    update_node_data(graph, "n7", {"description": "Cocina"})
+    add_edge_to_graph(graph, "n49", "n50", "turn_left")
+    new_nodes, new_edges = convert_nx_to_agraph(graph)
+    assert get_render_stats(graph)["rebuilt"] == 3  # n7, n50 y la arista nueva
+    assert new_nodes[7].title == "Cocina"
+    assert all(new is old for new, old in zip(new_nodes[1:], nodes[1:]) if new.id != "n7")
+    assert new_edges[-1].label == "turn_left"
+
+
+def test_nodes_added_without_the_mutators_are_reconciled():
+    graph = _chain(5)
+    convert_nx_to_agraph(graph)
+    graph.add_node("suelto", description="Nodo suelto")
+    nodes, _ = convert_nx_to_agraph(graph)
+    assert "suelto" in _ids(nodes)
+    assert get_render_stats(graph)["cached_nodes"] == 6
+
+
+def test_overlays_do_not_touch_the_cached_items():
+    graph = _chain(5)
+    convert_nx_to_agraph(graph)
+    nodes, _ = convert_nx_to_agraph(graph, highlights={"n2": "#ff0000"})
+    assert nodes[2].color == "#ff0000"
+    plain, _ = convert_nx_to_agraph(graph)
+    assert plain[2].color != "#ff0000"
+
+
+def test_lod_draws_the_focus_and_collapses_the_rest():
+    graph = _chain(200)
+    nodes, edges = convert_nx_to_agraph_lod(graph, focus=["n100"], hops=1)
+    detail = {node_id for node_id in _ids(nodes) if parse_cluster_id(node_id) is None}
+    assert detail == {"n99", "n100", "n101"}
+    assert len(nodes) < 20
+
+    # Cada nodo está dibujado o dentro de exactamente un super-nodo
+    hierarchy = get_hierarchy(graph)
+    covered = list(detail)
+    for node_id in _ids(nodes) - detail:
+        kind, cluster_id = parse_cluster_id(node_id)
+        rooms = [cluster_id] if kind == "room" else hierarchy.zones[cluster_id]
+        covered += [node for room in rooms for node in hierarchy.rooms[room].members if node not in detail]
+    assert sorted(covered) == sorted(graph.nodes())
+    assert {(edge.source, edge.to) for edge in edges} >= {("n99", "n100"), ("n100", "n101")}
+    assert all(edge.source in _ids(nodes) and edge.to in _ids(nodes) for edge in edges)
+
+
+def test_lod_expanding_a_room_shows_its_members():
+    graph = _chain(200)
+    convert_nx_to_agraph_lod(graph, focus=["n100"], hops=1)
+    hierarchy = get_hierarchy(graph)
+    room = cluster_node_id("room", hierarchy.room_of["n0"])
+    nodes, _ = convert_nx_to_agraph_lod(graph, focus=["n100"], hops=1, expanded=[room])
+    assert hierarchy.rooms[hierarchy.room_of["n0"]].members <= _ids(nodes)
+    assert room not in _ids(nodes)
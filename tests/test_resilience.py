@@ -0,0 +1,70 @@
+# tests/test_resilience.py
+import pytest
+
+from api.resilience import (
+    CircuitBreaker, ResiliencePolicy, LLMAuthError, LLMCircuitOpenError, LLMServerError,
+    LLMTimeoutError, call_with_resilience, classify_exception,
+)
+
+
+def _policy(**kwargs):
+    return ResiliencePolicy(backoff_base=0.0, backoff_max=0.0, **kwargs)
+
+
+def _failing(errors, result="ok"):
+    """fn(timeout) que lanza los errores dados en orden y después devuelve ``result``."""
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return fn, calls
+
+
+def test_retryable_errors_are_retried():
+    fn, calls = _failing([TimeoutError("lento"), ConnectionError("caída")])
+    assert call_with_resilience(fn, _policy(max_retries=3)) == "ok"
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_retries_with_attempts():
+    fn, calls = _failing([LLMServerError("500")] * 5)
+    with pytest.raises(LLMServerError) as info:
+        call_with_resilience(fn, _policy(max_retries=2))
+    assert info.value.attempts == 3
+    assert len(calls) == 3
+
+
+def test_non_retryable_error_fails_at_once():
+    fn, calls = _failing([LLMAuthError("clave inválida")])
+    with pytest.raises(LLMAuthError):
+        call_with_resilience(fn, _policy(max_retries=3))
+    assert len(calls) == 1
+
+
+def test_classify_maps_builtin_errors():
+    assert isinstance(classify_exception(TimeoutError()), LLMTimeoutError)
+    assert classify_exception(ConnectionError()).retryable
+
+
+def test_breaker_opens_then_probes_once(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("api.resilience.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    fn, calls = _failing([LLMServerError("500")] * 2)
+    with pytest.raises(LLMServerError):
+        call_with_resilience(fn, _policy(max_retries=1), breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(LLMCircuitOpenError):
+        call_with_resilience(fn, _policy(), breaker)
+    assert len(calls) == 2  # abierto: no se llama al backend
+
+    clock[0] = 11.0
+    breaker.before_call()  # semiabierto: pasa una sola prueba
+    with pytest.raises(LLMCircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,58 @@
+# tests/test_response_cache.py
+import json
+import time
+
+from api.response_cache import ResponseCache
+
+
+def _age(cache, key, seconds):
+    """Reescribe la entrada como si se hubiera creado hace ``seconds`` segundos."""
+    path = cache._path(key)
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created"] -= seconds
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_get_hit_and_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ab01", "respuesta")
+    assert cache.get("ab01") == "respuesta"
+    assert cache.get("ab02") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_age_counts_from_creation_in_get(tmp_path):
+    ResponseCache(str(tmp_path)).put("ab01", "vieja")
+    _age(ResponseCache(str(tmp_path)), "ab01", 200)
+    cache = ResponseCache(str(tmp_path), max_age_seconds=100)
+    assert cache.get("ab01") is None
+    assert cache.evictions == 1
+
+
+def test_reads_do_not_extend_age_on_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_seconds=100)
+    cache.put("ab01", "leída a menudo")
+    assert cache.get("ab01") == "leída a menudo"  # refresca la marca de último acceso
+    _age(cache, "ab01", 200)
+    # Otro proceso reabre la caché: la edad sale de "created", no de la fecha del fichero
+    reopened = ResponseCache(str(tmp_path), max_age_seconds=100)
+    reopened.put("cd01", "nueva")
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get("ab01") is None
+
+
+def test_size_eviction_is_lru(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("k0", "x" * 50)
+    cache.max_bytes = int(cache.stats()["bytes"] * 3.5)  # caben tres entradas
+    for i in range(1, 3):
+        time.sleep(0.01)
+        cache.put(f"k{i}", "x" * 50)
+    time.sleep(0.01)
+    cache.get("k0")
+    cache.put("k3", "x" * 50)
+    assert cache.get("k0") == "x" * 50
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "x" * 50
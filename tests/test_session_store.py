@@ -0,0 +1,49 @@
+# tests/test_session_store.py
+from mapping.graph_manager import add_edge_to_graph, add_node_to_graph, initialize_graph
+from mapping.session_store import SessionStore
+
+
+def _session(tmp_path):
+    graph = initialize_graph()
+    add_node_to_graph(graph, "entrada", {"description": "Entrada"})
+    fields = {"action_history": ["avanzar"], "analyzed_images": [("entrada", {"front": "blob:aaa"})]}
+    store = SessionStore(str(tmp_path))
+    assert store.save(fields, graph)["mode"] == "snapshot"
+    return store, graph, fields
+
+
+def test_appended_items_and_mutations_are_journaled(tmp_path):
+    store, graph, fields = _session(tmp_path)
+    add_edge_to_graph(graph, "entrada", "pasillo", "avanzar")
+    fields["action_history"].append("girar")
+    fields["analyzed_images"].append(("pasillo", {"front": "blob:bbb"}))
+    result = store.save(fields, graph)
+    assert result["mode"] == "append"
+    assert result["records"] == 3  # arista + dos 'extend'
+
+    state = SessionStore(str(tmp_path)).load()
+    assert list(state["graph"].edges) == [("entrada", "pasillo")]
+    assert state["action_history"] == ["avanzar", "girar"]
+    assert [item[0] for item in state["analyzed_images"]] == ["entrada", "pasillo"]
+
+
+def test_replaced_entry_is_saved_and_reloaded(tmp_path):
+    store, graph, fields = _session(tmp_path)
+    add_node_to_graph(graph, "pasillo", {"description": "Pasillo"})
+    fields["analyzed_images"].append(("pasillo", {"front": "blob:bbb"}))
+    assert store.save(fields, graph)["mode"] == "append"
+
+    # Reanálisis de una vista: la entrada se sustituye en su sitio
+    fields["analyzed_images"][0] = ("entrada", {"front": "blob:ccc"})
+    result = store.save(fields, graph)
+    assert result["mode"] == "append"
+    assert result["records"] == 1
+
+    state = SessionStore(str(tmp_path)).load()
+    assert state["analyzed_images"][0][1] == {"front": "blob:ccc"}
+    assert state["analyzed_images"][1][1] == {"front": "blob:bbb"}
+
+
+def test_unchanged_session_writes_nothing(tmp_path):
+    store, graph, fields = _session(tmp_path)
+    assert store.save(fields, graph) == {"mode": "append", "bytes": 0, "records": 0}
@@ -0,0 +1,100 @@
+# tests/test_single_flight.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.single_flight import SingleFlight
+
+
+def test_do_shares_one_call_between_threads():
+    flights = SingleFlight()
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "resultado"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", fn)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(flights.do("k", fn)))
+    follower.start()
+    while flights.stats()["coalesced"] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert sorted(results) == [("resultado", False), ("resultado", True)]
+    assert len(calls) == 1
+
+
+def test_ado_shares_result_and_error():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("fallo")
+
+    async def main():
+        shared = await asyncio.gather(flights.ado("k", call), flights.ado("k", call))
+        errors = await asyncio.gather(flights.ado("e", fail), flights.ado("e", fail), return_exceptions=True)
+        return shared, errors
+
+    shared, errors = asyncio.run(main())
+    assert shared == [("ok", False), ("ok", True)]
+    assert len(calls) == 1
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_ado_follower_takes_over_when_leader_is_cancelled():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("k", call))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.ado("k", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == (2, False)
+    assert flights.stats() == {"leaders": 2, "coalesced": 0, "in_flight": 0, "coalesced_rate": 0.0}
+
+
+def test_ado_cancelled_follower_does_not_cancel_leader():
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        leader = asyncio.create_task(flights.ado("k", call))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.ado("k", call))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == ("ok", False)
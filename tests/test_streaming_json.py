@@ -0,0 +1,53 @@
+# tests/test_streaming_json.py
+import json
+
+import pytest
+
+from utils.streaming_json import IncrementalJSONParser
+
+DOCUMENT = {
+    "overall_scene_description": "Un pasillo con una \"puerta\" roja\nal fondo",
+    "landmarks_and_suggested_node_name": {"suggested_node_name": "Pasillo", "x": [1, {"y": "}"}]},
+    "identified_objects": [{"name": "puerta"}, {"name": "cuadro"}],
+    "count": 3,
+    "ok": True,
+    "reasoning": None,
+}
+
+
+def _feed_all(text, size):
+    parser = IncrementalJSONParser()
+    fields = []
+    for i in range(0, len(text), size):
+        fields.extend(parser.feed(text[i:i + size]))
+    return parser, fields
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_fields_match_json_loads_for_any_chunking(size):
+    text = json.dumps(DOCUMENT, ensure_ascii=False)
+    parser, fields = _feed_all(text, size)
+    assert dict(fields) == DOCUMENT
+    assert [key for key, _ in fields] == list(DOCUMENT)
+    assert parser.done
+
+
+def test_field_is_emitted_as_soon_as_it_completes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": "uno", "b": [1, 2') == [("a", "uno")]
+    assert parser.feed('], "c"') == [("b", [1, 2])]
+    assert parser.feed(': 5}') == [("c", 5)]
+
+
+def test_partial_string_skips_half_received_escape():
+    parser = IncrementalJSONParser()
+    parser.feed('{"overall_scene_description": "Una puerta \\')
+    assert parser.partial_string() == ("overall_scene_description", "Una puerta ")
+    parser.feed('"roja\\" al')
+    assert parser.partial_string() == ("overall_scene_description", 'Una puerta "roja" al')
+
+
+def test_text_after_object_is_ignored():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1} y más texto') == [("a", 1)]
+    assert parser.feed('{"b": 2}') == []
@@ -0,0 +1,54 @@
+# tests/test_transport.py
+import json
+
+import pytest
+
+from api.fake_server import run_fake_server
+from api.transport import LiveTransport, RecordingTransport, ReplayTransport, TransportError, request_fingerprint
+
+IMAGE = "data:image/jpeg;base64,/9j/AAAA"
+
+
+def _vision_request(image=IMAGE, **extra):
+    return {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "Describe la vista"},
+            {"type": "image_url", "image_url": {"url": image, "detail": "low"}},
+        ]}],
+        **extra,
+    }
+
+
+def test_fingerprint_ignores_timeout_and_image_encoding():
+    assert request_fingerprint(_vision_request()) == request_fingerprint(_vision_request(timeout=5))
+    # Mismos bytes con otro prefijo MIME
+    assert request_fingerprint(_vision_request()) == \
+        request_fingerprint(_vision_request("data:image/png;base64,/9j/AAAA"))
+    assert request_fingerprint(_vision_request()) != request_fingerprint(_vision_request(max_tokens=10))
+
+
+def test_record_then_replay_offline(tmp_path):
+    archive = str(tmp_path / "archive.jsonl")
+    with run_fake_server() as base_url:
+        recorder = RecordingTransport(LiveTransport(api_key="fake", base_url=base_url), archive)
+        live = recorder.chat_completion(**_vision_request())
+        streamed = "".join(chunk.choices[0].delta.content or ""
+                           for chunk in recorder.chat_completion(**_vision_request(stream=True)) if chunk.choices)
+
+    # El servidor es determinista: la misma imagen da el mismo nodo
+    content = live.choices[0].message.content
+    assert json.loads(content)["landmarks_and_suggested_node_name"]["suggested_node_name"]
+    assert streamed == content
+
+    replay = ReplayTransport(archive)
+    assert replay.chat_completion(**_vision_request(timeout=1)).choices[0].message.content == content
+    replayed = "".join(chunk.choices[0].delta.content or ""
+                       for chunk in replay.chat_completion(**_vision_request(stream=True)) if chunk.choices)
+    assert replayed == content
+
+
+def test_replay_without_recording_raises(tmp_path):
+    replay = ReplayTransport(str(tmp_path / "vacío.jsonl"))
+    with pytest.raises(TransportError):
+        replay.chat_completion(**_vision_request())
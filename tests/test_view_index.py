@@ -0,0 +1,67 @@
+# tests/test_view_index.py
+import base64
+import io
+
+from PIL import Image, ImageDraw
+
+from mapping.graph_manager import add_node_to_graph, initialize_graph
+from mapping.view_index import ViewIndex, compute_view_hashes, dhash_image_bytes
+
+
+def _scene(shift=0, stripes=8):
+    """Franjas verticales desplazadas ``shift`` píxeles: cada desplazamiento pequeño es un paso corto."""
+    image = Image.new("L", (320, 240), 30)
+    draw = ImageDraw.Draw(image)
+    for i in range(stripes):
+        x = shift + i * 320 // stripes
+        draw.rectangle([x, 0, x + 320 // (2 * stripes), 240], fill=220 - 20 * i)
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _data_uri(raw):
+    return "data:image/png;base64," + base64.b64encode(raw).decode()
+
+
+def _hex(raw):
+    return format(dhash_image_bytes(raw), "016x")
+
+
+def test_near_duplicate_view_is_found():
+    index = ViewIndex(max_distance=6)
+    index.add("pasillo", {"center": _hex(_scene())})
+    index.add("cocina", {"center": _hex(_scene(stripes=3))})
+    node, distance = index.lookup({"center": _hex(_scene(shift=2))})
+    assert node == "pasillo" and distance <= 6
+    assert index.lookup({"center": _hex(_scene(shift=2))}, max_distance=-1) is None
+
+
+def test_views_are_only_compared_with_the_same_positions():
+    index = ViewIndex()
+    index.add("pasillo", {"center": _hex(_scene())})
+    assert index.lookup({"left": _hex(_scene()), "center": _hex(_scene())}) is None
+
+
+def test_remove_keeps_the_other_slots():
+    index = ViewIndex(max_distance=0)
+    hashes = {name: {"center": _hex(_scene(stripes=stripes))} for name, stripes in (("a", 2), ("b", 5), ("c", 11))}
+    for name, view in hashes.items():
+        index.add(name, view)
+    index.remove("a")  # "c" pasa a la fila de "a"
+    assert len(index) == 2
+    assert index.lookup(hashes["c"]) == ("c", 0)
+    assert index.lookup(hashes["b"]) == ("b", 0)
+    assert index.lookup(hashes["a"]) is None
+
+
+def test_index_is_rebuilt_from_node_hashes():
+    hashes = compute_view_hashes({"center": _data_uri(_scene()), "left": None})
+    assert list(hashes) == ["center"]
+    assert compute_view_hashes({"center": "https://example.com/a.jpg"}) is None
+    graph = initialize_graph()
+    add_node_to_graph(graph, "pasillo", {"view_hashes": hashes})
+    add_node_to_graph(graph, "sin_imagen", {})
+    index = ViewIndex.from_graph(graph)
+    assert len(index) == 1
+    assert index.lookup(hashes) == ("pasillo", 0)